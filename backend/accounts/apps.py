@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        # Vô hiệu cache RBAC khi role/permission/user_role thay đổi
+        from accounts.signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,27 @@
+# accounts/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from accounts.models import RbacPermission, Role, RolePermission, UserRole
+
+_RBAC_MODELS = (Role, RbacPermission, RolePermission, UserRole)
+
+
+def invalidate_rbac_cache(**kwargs) -> None:
+    """
+    Ghi/xoá dữ liệu RBAC → bump version cache (workflow.services.rbac_cache).
+    Bump ngay (request hiện tại thấy thay đổi) và thêm một lần sau commit để loại bản
+    mà worker khác lỡ nạp từ dữ liệu chưa commit.
+    QuerySet.update()/bulk_create không phát signal — gọi hàm này thủ công sau các thao tác đó.
+    """
+    from workflow.services import rbac, rbac_cache
+
+    rbac_cache.bump_version()
+    rbac.clear_permission_cache()
+    transaction.on_commit(rbac_cache.bump_version)
+
+
+def connect_signals() -> None:
+    for model in _RBAC_MODELS:
+        post_save.connect(invalidate_rbac_cache, sender=model, dispatch_uid=f"rbac_cache_save_{model.__name__}")
+        post_delete.connect(invalidate_rbac_cache, sender=model, dispatch_uid=f"rbac_cache_delete_{model.__name__}")
@@ -0,0 +1,36 @@
+# audit/filters.py
+from __future__ import annotations
+
+import django_filters
+from django.db.models import QuerySet
+
+from audit.models import AuditLog
+
+
+class AuditLogFilterSet(django_filters.FilterSet):
+    """
+    Tham số hỗ trợ:
+      - entity_type, entity_id: đối tượng bị tác động (vd: document + 123)
+      - actor: user_id (UUID) người thực hiện
+      - action: mã hành động; nhiều giá trị cách nhau dấu phẩy (vd: DOC.IN.ASSIGN,DOC.IN.COMPLETE)
+      - at_from / at_to: khoảng thời gian [at_from, at_to) — ISO 8601, chấp nhận cả ngày (YYYY-MM-DD)
+    """
+
+    entity_type = django_filters.CharFilter(field_name="entity_type")
+    entity_id = django_filters.CharFilter(field_name="entity_id")
+    actor = django_filters.UUIDFilter(field_name="actor_id")
+    action = django_filters.CharFilter(method="filter_action")
+    at_from = django_filters.DateTimeFilter(field_name="at", lookup_expr="gte")
+    at_to = django_filters.DateTimeFilter(field_name="at", lookup_expr="lt")
+
+    class Meta:
+        model = AuditLog
+        fields = ["entity_type", "entity_id", "actor", "action", "at_from", "at_to"]
+
+    def filter_action(self, qs: QuerySet, name: str, value: str) -> QuerySet:
+        actions = [a.strip() for a in (value or "").split(",") if a.strip()]
+        if not actions:
+            return qs
+        if len(actions) == 1:
+            return qs.filter(action=actions[0])
+        return qs.filter(action__in=actions)
@@ -0,0 +1,23 @@
+# audit_logs → bảng phân vùng theo tháng trên `at` (PostgreSQL); CSDL khác bỏ qua.
+from django.db import migrations
+
+from core.partitioning import convert_to_partitioned, convert_to_plain
+
+
+def forwards(apps, schema_editor):
+    convert_to_partitioned(schema_editor, "audit_logs")
+
+
+def backwards(apps, schema_editor):
+    convert_to_plain(schema_editor, "audit_logs")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_partition_audit_logs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['at', 'audit_id'], name='audit_logs_at_cbe44a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor', 'at'], name='audit_logs_actor_i_078b88_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', 'at'], name='audit_logs_action_ddefb0_idx'),
+        ),
+    ]
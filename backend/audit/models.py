@@ -24,6 +24,10 @@ class AuditLog(models.Model):
         db_table = "audit_logs"
         indexes = [
             models.Index(fields=["entity_type", "entity_id", "at"]),
+            # API tra cứu: keyset theo (at, audit_id) + lọc theo người thực hiện/hành động
+            models.Index(fields=["at", "audit_id"]),
+            models.Index(fields=["actor", "at"]),
+            models.Index(fields=["action", "at"]),
         ]
         constraints = [
             # Dùng tuple hằng để tránh Pylance báo "Entity is not defined"
@@ -0,0 +1,28 @@
+# audit/serializers.py
+from __future__ import annotations
+
+from rest_framework import serializers
+
+from audit.models import AuditLog
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="audit_id", read_only=True)
+    actor_id = serializers.UUIDField(read_only=True, allow_null=True)
+    actor_username = serializers.CharField(source="actor.username", read_only=True, default=None)
+
+    class Meta:
+        model = AuditLog
+        fields = (
+            "id",
+            "at",
+            "actor_id",
+            "actor_username",
+            "action",
+            "entity_type",
+            "entity_id",
+            "ip",
+            "before_json",
+            "after_json",
+        )
+        read_only_fields = fields
@@ -1,3 +1,173 @@
-from django.shortcuts import render
+# audit/views.py
+"""
+Tra cứu audit log (chỉ đọc) cho bộ phận kiểm soát/tuân thủ.
 
-# Create your views here.
+- GET /api/v1/audit-logs/          : danh sách, luôn phân trang keyset theo (at, audit_id) — không COUNT/OFFSET
+- GET /api/v1/audit-logs/{id}/     : chi tiết
+- GET /api/v1/audit-logs/export/   : xuất toàn bộ kết quả lọc dạng NDJSON (mặc định) hoặc CSV (?output=csv),
+  streaming theo lô keyset nên không giữ cả tập kết quả trong bộ nhớ.
+"""
+from __future__ import annotations
+
+import csv
+from typing import Any, Dict, Iterator
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticated
+from django_filters.rest_framework import DjangoFilterBackend
+
+from audit.filters import AuditLogFilterSet
+from audit.models import AuditLog
+from audit.serializers import AuditLogSerializer
+from core.docs import DEFAULT_ERROR_RESPONSES, doc_list, doc_retrieve
+from core.exceptions import ContractAPIException
+from core.renderers import ORJSONRenderer
+from workflow.services import rbac
+from workflow.services.rbac import Act
+
+TAG = "Nhật ký audit"
+
+# Cột xuất (values()) → tên khoá trong NDJSON/CSV, đồng nhất với AuditLogSerializer
+EXPORT_COLUMNS = (
+    ("audit_id", "id"),
+    ("at", "at"),
+    ("actor_id", "actor_id"),
+    ("actor__username", "actor_username"),
+    ("action", "action"),
+    ("entity_type", "entity_type"),
+    ("entity_id", "entity_id"),
+    ("ip", "ip"),
+    ("before_json", "before_json"),
+    ("after_json", "after_json"),
+)
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+_json = ORJSONRenderer()  # cùng định dạng JSON với API (datetime "Z", UUID chuỗi)
+
+
+def _dumps(value: Any) -> bytes:
+    return _json.render(value)
+
+
+def iter_keyset(qs: QuerySet, batch_size: int) -> Iterator[Dict[str, Any]]:
+    """
+    Duyệt qs theo (at, audit_id) tăng dần, mỗi lô một truy vấn seek dùng index (at, audit_id):
+    không giữ server-side cursor/transaction mở suốt thời gian client tải.
+    """
+    qs = qs.order_by("at", "audit_id").values(*(src for src, _ in EXPORT_COLUMNS))
+    last = None
+    while True:
+        page = qs
+        if last is not None:
+            at, pk = last
+            page = qs.filter(at__gte=at).filter(Q(at__gt=at) | Q(audit_id__gt=pk))
+        rows = list(page[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = (rows[-1]["at"], rows[-1]["audit_id"])
+
+
+def _export_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    out = {dst: row[src] for src, dst in EXPORT_COLUMNS}
+    if out["actor_id"] is not None:
+        out["actor_id"] = str(out["actor_id"])
+    return out
+
+
+class _Echo:
+    """Pseudo-buffer cho csv.writer: trả lại dòng vừa ghi thay vì lưu."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _ndjson_lines(rows: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    for row in rows:
+        yield _dumps(_export_row(row)) + b"\n"
+
+
+def _csv_lines(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow([dst for _, dst in EXPORT_COLUMNS])  # BOM để Excel nhận UTF-8
+    for row in rows:
+        out = _export_row(row)
+        out["at"] = out["at"].isoformat() if out["at"] else ""
+        for key in ("before_json", "after_json"):
+            out[key] = _dumps(out[key]).decode("utf-8") if out[key] is not None else ""
+        yield writer.writerow(["" if v is None else v for v in out.values()])
+
+
+class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = AuditLogSerializer
+    queryset = AuditLog.objects.all()
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = AuditLogFilterSet
+    ordering_fields = ["at"]
+    ordering = ["-at"]
+    # Bảng lớn, chỉ thêm: luôn seek theo (at, audit_id), trang đầu không cần ?cursor=
+    cursor_pagination = "always"
+
+    def initial(self, request, *args, **kwargs):  # type: ignore[override]
+        super().initial(request, *args, **kwargs)
+        if not rbac.can(request.user, Act.AUDIT_VIEW, None):
+            raise PermissionDenied("Không đủ quyền thực hiện thao tác này.")
+
+    def get_queryset(self) -> QuerySet[AuditLog]:
+        return super().get_queryset().select_related("actor")
+
+    @doc_list(
+        item_serializer=AuditLogSerializer,
+        tag=TAG,
+        operation_id="audit_log_list",
+        summary="Tra cứu audit log (phân trang cursor)",
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @doc_retrieve(
+        detail_serializer=AuditLogSerializer,
+        tag=TAG,
+        operation_id="audit_log_retrieve",
+        summary="Chi tiết audit log",
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @extend_schema(
+        tags=[TAG],
+        operation_id="audit_log_export",
+        summary="Xuất audit log (NDJSON/CSV, streaming)",
+        parameters=[
+            OpenApiParameter("output", OpenApiTypes.STR, enum=EXPORT_FORMATS, description="Mặc định ndjson."),
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR, (200, "text/csv"): OpenApiTypes.STR,
+                   **DEFAULT_ERROR_RESPONSES},
+    )
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
+    def export(self, request, *args, **kwargs):
+        output = (request.query_params.get("output") or "ndjson").lower()
+        if output not in EXPORT_FORMATS:
+            raise ContractAPIException("Định dạng xuất không hỗ trợ (ndjson|csv).", code="INVALID_EXPORT_FORMAT")
+
+        qs = self.filter_queryset(AuditLog.objects.all())
+        rows = iter_keyset(qs, max(1, int(getattr(settings, "AUDIT_EXPORT_BATCH_SIZE", 2000))))
+        stamp = timezone.now().strftime("%Y%m%d%H%M%S")
+        if output == "csv":
+            response = StreamingHttpResponse(_csv_lines(rows), content_type="text/csv; charset=utf-8")
+        else:
+            response = StreamingHttpResponse(_ndjson_lines(rows), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="audit-logs-{stamp}.{output}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0002_case_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caseattachment',
+            name='sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='caseattachment',
+            name='size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
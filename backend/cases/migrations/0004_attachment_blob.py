@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_attachment_checksum'),
+        ('common', '0005_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caseattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='case_attachments', to='common.attachmentblob'),
+        ),
+    ]
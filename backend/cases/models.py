@@ -192,5 +192,10 @@ class CaseAttachment(models.Model):
     attachment_type = models.CharField(max_length=20)
     file_name = models.CharField(max_length=200)
     storage_path = models.CharField(max_length=500)
+    size = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # hex, tính khi lưu tệp
+    blob = models.ForeignKey(
+        "common.AttachmentBlob", null=True, blank=True, on_delete=models.PROTECT, related_name="case_attachments"
+    )
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     uploaded_at = models.DateTimeField(default=timezone.now)
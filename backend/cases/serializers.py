@@ -312,10 +312,11 @@ class CaseAttachmentSerializer(serializers.ModelSerializer):
             "attachment_id",
             "attachment_type",
             "file_name",
+            "size",
             "uploaded_at",
             "uploaded_by",
         )
-        read_only_fields = ("attachment_id", "uploaded_at", "uploaded_by")
+        read_only_fields = ("attachment_id", "size", "uploaded_at", "uploaded_by")
 
 
 class CaseAttachmentUploadSerializer(serializers.Serializer):
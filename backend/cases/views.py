@@ -2,9 +2,7 @@
 from __future__ import annotations
 
 from typing import List, Optional
-from uuid import uuid4
 
-from django.core.files.storage import default_storage
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -20,6 +18,7 @@ from rest_framework.views import APIView
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from drf_spectacular.types import OpenApiTypes
 
+from common import downloads, uploads
 from core.exceptions import ForbiddenError, PreconditionFailedError, PreconditionRequiredError
 from core.etag import build_etag
 
@@ -50,7 +49,7 @@ from cases.serializers import (
     ArchiveCaseActionSerializer,
 )
 from cases.filters import CaseFilterSet
-from workflow.services import rbac
+from workflow.services import blob_store, rbac
 from workflow.services.rbac import Role
 
 # Components dùng chung (đã được đặt tên qua common.schema)
@@ -183,6 +182,8 @@ class CaseViewSet(viewsets.ModelViewSet):
     serializer_class = CaseSerializer
     queryset = Case.objects.all()
     filterset_class = CaseFilterSet
+    # Cho phép ?cursor= (keyset) thay cho page/page_size khi duyệt danh sách lớn
+    cursor_pagination = True
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
@@ -594,19 +595,62 @@ class CaseViewSet(viewsets.ModelViewSet):
         meta_serializer = CaseAttachmentUploadSerializer(data=request.data)
         meta_serializer.is_valid(raise_exception=True)
         file_name = getattr(upload, "name", "attachment")
-        storage_path = default_storage.save(
-            f"case-attachments/{uuid4()}_{file_name}",
-            upload,
-        )
+        blob = blob_store.store(upload.chunks)
         attachment = CaseAttachment.objects.create(
             case=case,
             attachment_type=meta_serializer.validated_data.get("attachment_type") or "tep_kem_theo",
             file_name=file_name,
-            storage_path=storage_path,
             uploaded_by=request.user,
+            **blob_store.attachment_fields(blob),
         )
         return Response(CaseAttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
 
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"attachments/(?P<attachment_id>[^/]+)/download",
+    )
+    def download_attachment(self, request, attachment_id: str, pk=None):
+        case = self.get_object()
+        attachment = get_object_or_404(CaseAttachment.objects.exclude(storage_path=""), pk=attachment_id, case=case)
+        return downloads.attachment_response(
+            request,
+            storage_path=attachment.storage_path,
+            file_name=attachment.file_name,
+            sha256=attachment.sha256,
+            size=attachment.size,
+        )
+
+    # Tải đính kèm lớn theo từng phần (common.uploads)
+    @action(detail=True, methods=["post"], url_path=r"attachments/uploads")
+    def attachment_upload_init(self, request, pk=None):
+        case = self.get_object()
+        return uploads.init_upload(request, target_type="case", target_id=case.pk)
+
+    @action(
+        detail=True,
+        methods=["get", "put", "delete"],
+        url_path=r"attachments/uploads/(?P<upload_id>[0-9a-fA-F-]{36})",
+    )
+    def attachment_upload(self, request, upload_id: str, pk=None):
+        case = self.get_object()
+        return uploads.upload_detail(request, target_type="case", target_id=case.pk, upload_id=upload_id)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"attachments/uploads/(?P<upload_id>[0-9a-fA-F-]{36})/complete",
+    )
+    def attachment_upload_complete(self, request, upload_id: str, pk=None):
+        case = self.get_object()
+        return uploads.complete_upload(
+            request,
+            target_type="case",
+            target_id=case.pk,
+            upload_id=upload_id,
+            serializer_class=CaseAttachmentSerializer,
+        )
+
     @action(
         detail=True,
         methods=["delete"],
@@ -0,0 +1,138 @@
+# common/downloads.py
+"""
+Phản hồi tải tệp đính kèm (dùng chung DocumentViewSet và CaseViewSet), gọi SAU khi đã kiểm quyền.
+
+- ETag mạnh = "<sha256 nội dung>" (đính kèm lưu theo blob SHA-256); If-None-Match khớp → 304.
+- Range: một khoảng `bytes=a-b` / `bytes=a-` / `bytes=-n` → 206 chỉ đọc đúng đoạn đó; khoảng không hợp lệ
+  → 416; If-Range không khớp ETag → trả cả tệp. Nhiều khoảng → trả cả tệp (RFC 9110 cho phép bỏ qua).
+- ATTACHMENT_DOWNLOAD_OFFLOAD = "x-accel" | "x-sendfile": trả header để proxy (nginx/Apache) tự phục vụ
+  tệp (kể cả Range/If-None-Match) — worker Python không phải đẩy byte.
+"""
+from __future__ import annotations
+
+import mimetypes
+import re
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+BLOCK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _offload_mode() -> str:
+    return (getattr(settings, "ATTACHMENT_DOWNLOAD_OFFLOAD", "") or "").strip().lower()
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """So khớp yếu cho If-None-Match (bỏ tiền tố W/)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (đầu, cuối) bao gồm cả hai đầu cho một khoảng byte; None nếu không có/không dùng được (trả cả tệp).
+    Khoảng cú pháp đúng nhưng nằm ngoài tệp → ValueError (416).
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with default_storage.open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = fh.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _offload_response(mode: str, storage_path: str) -> Optional[HttpResponse]:
+    if mode == "x-accel":
+        prefix = getattr(settings, "ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{storage_path.lstrip('/')}"
+        return response
+    if mode == "x-sendfile":
+        try:
+            full_path = default_storage.path(storage_path)
+        except NotImplementedError:  # storage không có đường dẫn cục bộ (S3...) → tự stream
+            return None
+        response = HttpResponse()
+        response["X-Sendfile"] = full_path
+        return response
+    return None
+
+
+def attachment_response(
+    request,
+    *,
+    storage_path: str,
+    file_name: str,
+    sha256: str = "",
+    size: Optional[int] = None,
+):
+    etag = f'"{sha256}"' if sha256 else None
+    if etag and _etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    response = _offload_response(_offload_mode(), storage_path)
+    if response is None:
+        size = size if size is not None else default_storage.size(storage_path)
+        if_range = request.headers.get("If-Range")
+        use_range = not if_range or (etag is not None and if_range.strip() == etag)
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size) if use_range else None
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range is None:
+            response = FileResponse(default_storage.open(storage_path, "rb"), content_type=content_type)
+            response["Content-Length"] = str(size)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(storage_path, start, end), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        response["Accept-Ranges"] = "bytes"
+    else:
+        response["Content-Type"] = content_type
+
+    response["Content-Disposition"] = content_disposition_header(False, file_name)
+    # Quyền có thể đổi → trình duyệt luôn hỏi lại, nhưng chỉ nhận 304 khi nội dung không đổi
+    response["Cache-Control"] = "private, no-cache"
+    if etag:
+        response["ETag"] = etag
+    return response
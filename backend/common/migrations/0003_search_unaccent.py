@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Bỏ dấu tiếng Việt cho tìm kiếm:
+#  - extension unaccent (có sẵn trong contrib của image postgres chính thức)
+#  - text search configuration `vn_unaccent` = simple + unaccent cho các token chữ
+#  - hàm IMMUTABLE `immutable_unaccent(text)` = lower(unaccent(text)) để dùng trong index
+FORWARD_SQL = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'vn_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION vn_unaccent (COPY = simple);
+        ALTER TEXT SEARCH CONFIGURATION vn_unaccent
+            ALTER MAPPING FOR word, hword, hword_part, numword, numhword, hword_numpart
+            WITH unaccent, simple;
+    END IF;
+END
+$$;
+
+-- Gọi unaccent có schema cụ thể: khi build index (PG17+) search_path bị thu hẹp về pg_catalog
+DO $$
+DECLARE
+    ext_schema text := (
+        SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace
+        WHERE e.extname = 'unaccent'
+    );
+BEGIN
+    EXECUTE format(
+        'CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text '
+        'LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT '
+        'AS $func$ SELECT lower(%1$I.unaccent(%2$L::regdictionary, $1)) $func$',
+        ext_schema,
+        ext_schema || '.unaccent'
+    );
+END
+$$;
+"""
+
+REVERSE_SQL = """
+DROP FUNCTION IF EXISTS immutable_unaccent(text);
+DROP TEXT SEARCH CONFIGURATION IF EXISTS vn_unaccent;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0002_initial"),
+    ]
+    operations = [
+        migrations.RunSQL(sql=FORWARD_SQL, reverse_sql=REVERSE_SQL),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:07
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_search_unaccent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target_type', models.CharField(choices=[('document', 'Văn bản'), ('case', 'Hồ sơ')], max_length=20)),
+                ('target_id', models.CharField(max_length=64)),
+                ('file_name', models.CharField(max_length=200)),
+                ('attachment_type', models.CharField(blank=True, default='', max_length=20)),
+                ('note', models.CharField(blank=True, max_length=250, null=True)),
+                ('total_size', models.BigIntegerField()),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('parts', models.JSONField(blank=True, default=list)),
+                ('expected_sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('status', models.CharField(choices=[('ACTIVE', 'Đang tải'), ('COMPLETED', 'Hoàn tất'), ('ABORTED', 'Đã huỷ')], default='ACTIVE', max_length=20)),
+                ('attachment_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'upload_sessions',
+                'indexes': [models.Index(fields=['target_type', 'target_id'], name='upload_sess_target__071bc3_idx'), models.Index(fields=['status', 'expires_at'], name='upload_sess_status_bb43bc_idx')],
+            },
+        ),
+    ]
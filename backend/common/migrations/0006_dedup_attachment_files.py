@@ -0,0 +1,67 @@
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db import migrations, transaction
+from django.db.models import F
+
+BLOCK_SIZE = 64 * 1024
+ATTACHMENT_MODELS = (("documents", "DocumentAttachment"), ("cases", "CaseAttachment"))
+
+
+def _digest(path):
+    h, size = hashlib.sha256(), 0
+    with default_storage.open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(BLOCK_SIZE), b""):
+            h.update(block)
+            size += len(block)
+    return h.hexdigest(), size
+
+
+def _dedup_existing(apps, schema_editor):
+    """
+    Gắn đính kèm cũ vào kho blob: bản đầu tiên của mỗi nội dung giữ nguyên đường dẫn làm blob
+    (không sao chép), các bản trùng trỏ sang đó và tệp trùng bị xoá sau khi commit.
+    Tệp không đọc được (đã mất) để nguyên, blob = NULL.
+    """
+    Blob = apps.get_model("common", "AttachmentBlob")
+    duplicates = set()
+    for app_label, model_name in ATTACHMENT_MODELS:
+        Attachment = apps.get_model(app_label, model_name)
+        pending = Attachment.objects.filter(blob__isnull=True).exclude(storage_path="")
+        for pk, path in pending.values_list("pk", "storage_path").iterator():
+            try:
+                sha256, size = _digest(path)
+            except OSError:
+                continue
+            blob, _ = Blob.objects.get_or_create(sha256=sha256, defaults={"size": size, "storage_path": path})
+            if blob.storage_path != path:
+                duplicates.add(path)
+            Attachment.objects.filter(pk=pk).update(
+                blob=blob, storage_path=blob.storage_path, sha256=sha256, size=size
+            )
+            Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") + 1)
+
+    keep = set(Blob.objects.values_list("storage_path", flat=True))
+    doomed = sorted(duplicates - keep)
+
+    def _delete_files():
+        for path in doomed:
+            try:
+                default_storage.delete(path)
+            except OSError:
+                pass
+
+    transaction.on_commit(_delete_files)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0005_attachment_blobs"),
+        ("documents", "0011_attachment_blob"),
+        ("cases", "0004_attachment_blob"),
+    ]
+
+    operations = [
+        migrations.RunPython(_dedup_existing, migrations.RunPython.noop),
+    ]
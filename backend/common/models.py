@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
@@ -36,3 +38,76 @@ class IdempotencyKey(models.Model):
     def __str__(self) -> str:
         owner = getattr(self.owner, "pk", None)
         return f"{self.key}::{self.method} {self.path} (owner={owner})"
+
+
+class UploadSession(models.Model):
+    """
+    Phiên tải lên đính kèm theo từng phần (init → PUT chunk theo offset → complete).
+    Mỗi chunk là một file tạm trong default_storage (`parts`); offset trong DB là nguồn sự thật
+    để client nối lại sau khi rớt mạng.
+    """
+
+    class Target(models.TextChoices):
+        DOCUMENT = "document", "Văn bản"
+        CASE = "case", "Hồ sơ"
+
+    class Status(models.TextChoices):
+        ACTIVE = "ACTIVE", "Đang tải"
+        COMPLETED = "COMPLETED", "Hoàn tất"
+        ABORTED = "ABORTED", "Đã huỷ"
+
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target_type = models.CharField(max_length=20, choices=Target.choices)
+    target_id = models.CharField(max_length=64)
+    file_name = models.CharField(max_length=200)
+    attachment_type = models.CharField(max_length=20, blank=True, default="")
+    note = models.CharField(max_length=250, null=True, blank=True)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    # [{"offset", "size", "path"}] theo thứ tự offset
+    parts = models.JSONField(default=list, blank=True)
+    expected_sha256 = models.CharField(max_length=64, blank=True, default="")
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+    attachment_id = models.UUIDField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "upload_sessions"
+        indexes = [
+            models.Index(fields=["target_type", "target_id"]),
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.upload_id} {self.file_name} {self.received_bytes}/{self.total_size}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    Nội dung tệp đính kèm lưu một lần theo SHA-256 (content-addressed).
+    DocumentAttachment/CaseAttachment trỏ tới qua FK `blob`; ref_count = số đính kèm đang trỏ tới,
+    được signal giữ khớp trong cùng transaction. Blob ref_count = 0 quá hạn → lệnh `gc_blobs` xoá.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    storage_path = models.CharField(max_length=500)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    # chạm mỗi lần được dùng lại/nhả → GC chờ đủ grace kể từ lần cuối
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "attachment_blobs"
+        indexes = [models.Index(fields=["ref_count", "updated_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} ({self.size} byte, {self.ref_count} ref)"
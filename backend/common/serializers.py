@@ -16,6 +16,7 @@ __all__ = [
     "TrimmedCharField",
     "StrictDateField",
     "CompactUserSerializer",
+    "AttachmentUploadInitSerializer",
 ]
 
 
@@ -30,6 +31,7 @@ class ServiceErrorToDRFMixin:
     SERVICE_CODE_FIELD_MAP: Dict[str, str] = {
         # ví dụ: test kỳ vọng 'issue_number' có trong body
         "DUPLICATE_ISSUE_NUMBER": "issue_number",
+        "NEXT_SEQUENCE_TOO_LOW": "next_sequence",
         # mở rộng thêm khi cần
     }
 
@@ -188,3 +190,14 @@ class CompactUserSerializer(serializers.ModelSerializer):
                 return val.strip()
 
         return None
+
+
+# ============================================================
+# 4) Tải đính kèm theo từng phần (dùng chung văn bản & hồ sơ)
+# ============================================================
+class AttachmentUploadInitSerializer(serializers.Serializer):
+    file_name = TrimmedCharField(max_length=200)
+    total_size = serializers.IntegerField(min_value=1)
+    attachment_type = TrimmedCharField(max_length=20, required=False, allow_blank=True, allow_null=True)
+    note = TrimmedCharField(max_length=250, required=False, allow_blank=True, allow_null=True)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True)
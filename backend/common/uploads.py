@@ -0,0 +1,168 @@
+# common/uploads.py
+"""
+Phản hồi HTTP cho tải đính kèm theo từng phần (dùng chung DocumentViewSet và CaseViewSet).
+
+  POST   .../attachments/uploads/                 {file_name, total_size, sha256?, attachment_type?, note?}
+  PUT    .../attachments/uploads/{id}/?offset=N   thân = bytes thô của chunk (hoặc Content-Range: bytes a-b/n)
+  GET    .../attachments/uploads/{id}/            trạng thái; HEAD chỉ trả header Upload-Offset
+  POST   .../attachments/uploads/{id}/complete/   ghép tệp → đính kèm (201)
+  DELETE .../attachments/uploads/{id}/            huỷ phiên
+
+Rớt mạng: client GET/HEAD lấy offset rồi PUT tiếp từ đó. Sai offset → 409 kèm offset hiện tại.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Optional
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.serializers import AttachmentUploadInitSerializer
+from workflow.services import chunked_upload
+from workflow.services.errors import ServiceError, ValidationError
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def _error_response(exc: ServiceError) -> Response:
+    code = exc.code or ""
+    if code in chunked_upload.NOT_FOUND_CODES:
+        status_code = status.HTTP_404_NOT_FOUND
+    elif code in chunked_upload.CONFLICT_CODES:
+        status_code = status.HTTP_409_CONFLICT
+    elif code in chunked_upload.GONE_CODES:
+        status_code = status.HTTP_410_GONE
+    else:
+        status_code = status.HTTP_400_BAD_REQUEST
+    resp = Response(exc.to_dict(), status=status_code)
+    offset = (exc.extra or {}).get("offset")
+    if offset is not None:
+        resp["Upload-Offset"] = str(offset)
+    return resp
+
+
+def _uploads_base(request) -> str:
+    path = request.path
+    marker = "/uploads/"
+    return path[: path.index(marker) + len(marker)] if marker in path else path
+
+
+def _payload(request, session) -> Dict[str, Any]:
+    upload_url = f"{_uploads_base(request)}{session.upload_id}/"
+    return {
+        "upload_id": str(session.upload_id),
+        "file_name": session.file_name,
+        "total_size": session.total_size,
+        "offset": session.received_bytes,
+        "status": session.status,
+        "chunk_size": chunked_upload.chunk_max_size(),
+        "expires_at": session.expires_at,
+        "upload_url": upload_url,
+        "complete_url": f"{upload_url}complete/",
+        "attachment_id": str(session.attachment_id) if session.attachment_id else None,
+    }
+
+
+def _session_response(request, session, status_code=status.HTTP_200_OK) -> Response:
+    resp = Response(_payload(request, session), status=status_code)
+    resp["Upload-Offset"] = str(session.received_bytes)
+    resp["Upload-Length"] = str(session.total_size)
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+def _chunk_offset(request, length: Optional[int]) -> int:
+    content_range = request.headers.get("Content-Range")
+    if content_range:
+        match = _CONTENT_RANGE.match(content_range.strip())
+        if not match:
+            raise ValidationError("Content-Range không hợp lệ.", code="UPLOAD_INVALID_RANGE")
+        start, end = int(match.group(1)), int(match.group(2))
+        if length is not None and end - start + 1 != length:
+            raise ValidationError("Content-Range không khớp Content-Length.", code="UPLOAD_INVALID_RANGE")
+        return start
+    raw = request.query_params.get("offset") or request.headers.get("Upload-Offset")
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError("Thiếu offset của chunk (?offset= hoặc Content-Range).", code="UPLOAD_OFFSET_REQUIRED")
+
+
+def _content_length(request) -> Optional[int]:
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def init_upload(
+    request,
+    *,
+    target_type: str,
+    target_id: Any,
+    validate_name: Optional[Callable[[str], None]] = None,
+) -> Response:
+    ser = AttachmentUploadInitSerializer(data=request.data)
+    ser.is_valid(raise_exception=True)
+    data = ser.validated_data
+    if validate_name is not None:
+        validate_name(data["file_name"])
+    try:
+        session = chunked_upload.start(
+            actor=request.user,
+            target_type=target_type,
+            target_id=target_id,
+            file_name=data["file_name"],
+            total_size=data["total_size"],
+            attachment_type=data.get("attachment_type") or "",
+            note=data.get("note"),
+            sha256=data.get("sha256") or "",
+        )
+    except ServiceError as exc:
+        return _error_response(exc)
+    resp = _session_response(request, session, status.HTTP_201_CREATED)
+    resp["Location"] = resp.data["upload_url"]
+    return resp
+
+
+def upload_detail(request, *, target_type: str, target_id: Any, upload_id: str) -> Response:
+    """GET/HEAD trạng thái, PUT một chunk, DELETE huỷ phiên."""
+    try:
+        session = chunked_upload.get_session(
+            upload_id, actor=request.user, target_type=target_type, target_id=target_id
+        )
+        method = request.method.upper()
+        if method == "DELETE":
+            chunked_upload.abort(session)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if method == "PUT":
+            length = _content_length(request)
+            session = chunked_upload.write_chunk(
+                session,
+                request.stream,
+                offset=_chunk_offset(request, length),
+                length=length,
+                chunk_sha256=request.headers.get("X-Chunk-SHA256") or "",
+            )
+    except ServiceError as exc:
+        return _error_response(exc)
+    return _session_response(request, session)
+
+
+def complete_upload(
+    request,
+    *,
+    target_type: str,
+    target_id: Any,
+    upload_id: str,
+    serializer_class,
+) -> Response:
+    try:
+        session = chunked_upload.get_session(
+            upload_id, actor=request.user, target_type=target_type, target_id=target_id
+        )
+        session, attachment = chunked_upload.complete(session)
+    except ServiceError as exc:
+        return _error_response(exc)
+    return Response(serializer_class(attachment).data, status=status.HTTP_201_CREATED)
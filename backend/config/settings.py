@@ -140,6 +140,7 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # đặt sớm để thêm header CORS
     "django.middleware.security.SecurityMiddleware",
     "workflow.middleware.client_ip.ClientIPMiddleware",
+    "workflow.middleware.rbac_cache.RBACCacheMiddleware",  # memo quyền RBAC theo request
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -243,14 +244,15 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "core.exceptions.contract_exception_handler",
 
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "core.parsers.ORJSONParser",
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ],
 
+    # orjson cho mọi response; Browsable API chỉ bật khi DEBUG
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",  # tắt khi lên prod nếu muốn
+        "core.renderers.ORJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
     ],
 }
 
@@ -289,6 +291,20 @@ SPECTACULAR_SETTINGS = {
     "APPEND_COMPONENTS": {},
 }
 
+# =============================================================================
+# Pagination: chiến lược đếm total_items
+#   - exact     : COUNT(*) mỗi request (mặc định)
+#   - estimated : ước lượng từ planner PostgreSQL khi không có filter của người dùng
+#   - cached    : COUNT(*) cache theo (phạm vi hiển thị, tham số lọc) trong TTL giây
+# =============================================================================
+PAGINATION_COUNT_STRATEGY = get_str("PAGINATION_COUNT_STRATEGY", "exact").lower()
+PAGINATION_COUNT_CACHE_TTL = int(get_str("PAGINATION_COUNT_CACHE_TTL", "30"))
+# Dưới ngưỡng này ước lượng không đáng tin/không đáng tiết kiệm → COUNT thật
+PAGINATION_ESTIMATE_THRESHOLD = int(get_str("PAGINATION_ESTIMATE_THRESHOLD", "10000"))
+
+# List văn bản dùng encoder `.values()` thay DRF serializer (cùng JSON contract)
+DOCUMENT_LIST_FAST_PATH = get_bool("DOCUMENT_LIST_FAST_PATH", True)
+
 # =============================================================================
 # JWT (SimpleJWT) - KHÔNG dùng blacklist
 # =============================================================================
@@ -329,6 +345,17 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 # =============================================================================
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+# Tải đính kèm theo từng phần (.../attachments/uploads/): thân PUT được ghi thẳng xuống storage theo khối
+UPLOAD_CHUNK_MAX_SIZE = int(get_str("UPLOAD_CHUNK_MAX_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_FILE_SIZE = int(get_str("UPLOAD_MAX_FILE_SIZE", str(1024 * 1024 * 1024)))
+# Phiên không có chunk mới quá TTL → `purge_upload_sessions` dọn part còn sót
+UPLOAD_SESSION_TTL_HOURS = int(get_str("UPLOAD_SESSION_TTL_HOURS", "24"))
+# Kho blob đính kèm theo SHA-256: blob hết tham chiếu quá GRACE_HOURS mới bị `gc_blobs` xoá
+BLOB_GC_GRACE_HOURS = int(get_str("BLOB_GC_GRACE_HOURS", "24"))
+# Tải đính kèm: "" = Django tự stream (có Range/ETag); "x-accel" (nginx, location internal trỏ MEDIA_ROOT
+# tại ATTACHMENT_ACCEL_PREFIX) hoặc "x-sendfile" (Apache mod_xsendfile) = proxy phục vụ tệp sau khi kiểm quyền
+ATTACHMENT_DOWNLOAD_OFFLOAD = get_str("ATTACHMENT_DOWNLOAD_OFFLOAD", "")
+ATTACHMENT_ACCEL_PREFIX = get_str("ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
 
 # =============================================================================
 # Logging
@@ -349,13 +376,75 @@ LOGGING = {
 
 # Bật/tắt phát sự kiện (ví dụ tắt trong test)
 EVENTS_PUBLISH_ENABLED = get_bool("EVENTS_PUBLISH_ENABLED", True)
+# Ghi sự kiện vào bảng event_outbox cùng transaction; `manage.py events_relay` publish lên Redis.
+# Tắt để publish đồng bộ trong request như trước.
+EVENTS_OUTBOX_ENABLED = get_bool("EVENTS_OUTBOX_ENABLED", True)
+EVENTS_OUTBOX_MAX_ATTEMPTS = int(get_str("EVENTS_OUTBOX_MAX_ATTEMPTS", "10"))
+# "pubsub" | "streams" (Redis Streams theo domain, đọc bằng `events_subscribe --group`) | "both"
+EVENTS_BACKEND = get_str("EVENTS_BACKEND", "pubsub")
+EVENTS_STREAM_PREFIX = get_str("EVENTS_STREAM_PREFIX", "events:stream")
+EVENTS_STREAM_MAXLEN = int(get_str("EVENTS_STREAM_MAXLEN", "100000"))
+# SSE /api/v1/events/stream (chạy dưới ASGI): heartbeat giữ kết nối, queue tối đa mỗi client
+EVENTS_SSE_HEARTBEAT = float(get_str("EVENTS_SSE_HEARTBEAT", "15"))
+EVENTS_SSE_QUEUE_SIZE = int(get_str("EVENTS_SSE_QUEUE_SIZE", "100"))
+EVENTS_SSE_RETRY_MS = int(get_str("EVENTS_SSE_RETRY_MS", "5000"))
 
 # Ưu tiên URL; nếu không có sẽ ghép REDIS_HOST/PORT/DB
 REDIS_URL = get_str("REDIS_URL", "redis://127.0.0.1:6379/0")
+# Pool kết nối Redis cho events (giới hạn số kết nối mỗi process, health-check định kỳ)
+EVENTS_REDIS_MAX_CONNECTIONS = int(get_str("EVENTS_REDIS_MAX_CONNECTIONS", "20"))
+EVENTS_REDIS_POOL_TIMEOUT = float(get_str("EVENTS_REDIS_POOL_TIMEOUT", "1.0"))
+EVENTS_REDIS_HEALTH_CHECK_INTERVAL = int(get_str("EVENTS_REDIS_HEALTH_CHECK_INTERVAL", "30"))
+EVENTS_REDIS_SOCKET_TIMEOUT = float(get_str("EVENTS_REDIS_SOCKET_TIMEOUT", "1.0"))
 # REDIS_HOST = "localhost"
 # REDIS_PORT = 6379
 # REDIS_DB   = 0
 
+# Cache dùng chung giữa các worker (gunicorn): đặt CACHE_REDIS_URL để dùng Redis;
+# mặc định locmem (mỗi process một bản — chỉ phù hợp dev/test)
+CACHE_REDIS_URL = get_str("CACHE_REDIS_URL", "")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": get_str("CACHE_KEY_PREFIX", "htvb"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Ma trận role→permission + role của user cache theo version (bump bằng signal khi sửa RBAC)
+RBAC_CACHE_ENABLED = get_bool("RBAC_CACHE_ENABLED", True)
+RBAC_CACHE_TTL = int(get_str("RBAC_CACHE_TTL", "300"))
+
+# Cache tra cứu trạng thái catalog + system_settings (workflow.services.lookup_cache):
+# worker khác thấy thay đổi sau tối đa CHECK_INTERVAL giây; TTL là trần cho ghi không qua ORM
+LOOKUP_CACHE_TTL = int(get_str("LOOKUP_CACHE_TTL", "300"))
+LOOKUP_CACHE_CHECK_INTERVAL = float(get_str("LOOKUP_CACHE_CHECK_INTERVAL", "5"))
+LOOKUP_CACHE_WARM_ON_START = get_bool("LOOKUP_CACHE_WARM_ON_START", True)
+
+# Ghi audit log: "buffered" (gom theo transaction, bulk_create khi commit) | "async" (thread ghi nền) | "sync"
+AUDIT_WRITE_MODE = get_str("AUDIT_WRITE_MODE", "buffered")
+AUDIT_BULK_BATCH_SIZE = int(get_str("AUDIT_BULK_BATCH_SIZE", "500"))
+AUDIT_ASYNC_FLUSH_INTERVAL = float(get_str("AUDIT_ASYNC_FLUSH_INTERVAL", "0.5"))
+# Xuất audit (GET /api/v1/audit-logs/export/): số dòng mỗi truy vấn keyset
+AUDIT_EXPORT_BATCH_SIZE = int(get_str("AUDIT_EXPORT_BATCH_SIZE", "2000"))
+
+# Job nền (notifications.jobs, lệnh `run_jobs`): quá STALE_SECONDS không heartbeat → job được worker khác nhận lại
+JOBS_STALE_SECONDS = int(get_str("JOBS_STALE_SECONDS", "300"))
+JOBS_MAX_ATTEMPTS = int(get_str("JOBS_MAX_ATTEMPTS", "3"))
+# Nhập văn bản (POST .../import): số dòng mỗi lần bulk_create + checkpoint; số lỗi từng dòng giữ lại trong báo cáo
+IMPORT_BATCH_SIZE = int(get_str("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(get_str("IMPORT_MAX_ERRORS", "1000"))
+# Xuất văn bản/sổ đăng ký: tới SYNC_MAX_ROWS dòng thì stream ngay trong request, lớn hơn → job nền
+EXPORT_SYNC_MAX_ROWS = int(get_str("EXPORT_SYNC_MAX_ROWS", "5000"))
+EXPORT_CHUNK_SIZE = int(get_str("EXPORT_CHUNK_SIZE", "2000"))
+
+# Bảng phi chuẩn hoá document_visibility/case_visibility cho visible_*_q (duy trì bằng signal).
+# Trước khi bật: chạy `manage.py rebuild_visibility` để dựng dữ liệu ban đầu.
+VISIBILITY_INDEX_ENABLED = get_bool("VISIBILITY_INDEX_ENABLED", False)
+
 # --- App feature flags / testing toggles ---
 TESTING = False
 ALLOW_JSON_UPLOAD_FALLBACK = False  # Chỉ cho phép multipart ở môi trường thật
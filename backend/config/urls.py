@@ -13,6 +13,9 @@ URL configuration for backend (API-only).
     /api/v1/inbound-docs/...
     /api/v1/outbound-docs/...
     /api/v1/cases/...
+    /api/v1/audit-logs/... (chỉ đọc + export NDJSON/CSV)
+    /api/v1/report-exports/... (tệp xuất nền của người dùng)
+- SSE (ASGI): /api/v1/events/stream
 """
 
 from django.contrib import admin
@@ -23,6 +26,7 @@ from django.views.generic import RedirectView
 from rest_framework.routers import DefaultRouter
 
 from cases.views import CaseViewSet, CaseTaskDetailView, CommentListCreateView, CommentDetailView
+from workflow.views_events import event_stream
 
 # ===== Schema & Docs (ưu tiên ở đầu để 'schema' trỏ tới SchemaViewWithServers) =====
 from core.docs import urlpatterns as docs_urls  # cung cấp /api/v1/schema|docs|redoc
@@ -44,6 +48,8 @@ def _register_v1_routes() -> None:
         DocumentTemplateViewSet,
     )
     from workflow.views import WorkflowTransitionViewSet
+    from audit.views import AuditLogViewSet
+    from reports.views import ReportExportViewSet
 
     router_v1.register(r"documents", DocumentViewSet, basename="documents")
     router_v1.register(r"inbound-docs", InboundDocumentViewSet, basename="inbound-docs")
@@ -55,6 +61,8 @@ def _register_v1_routes() -> None:
     router_v1.register(r"numbering-rules", NumberingRuleViewSet, basename="numbering-rules")
     router_v1.register(r"document-templates", DocumentTemplateViewSet, basename="document-templates")
     router_v1.register(r"workflow-transitions", WorkflowTransitionViewSet, basename="workflow-transitions")
+    router_v1.register(r"audit-logs", AuditLogViewSet, basename="audit-logs")
+    router_v1.register(r"report-exports", ReportExportViewSet, basename="report-exports")
 
 _register_v1_routes()
 
@@ -76,6 +84,7 @@ urlpatterns = [
     path("api/v1/case-tasks/<int:pk>/", CaseTaskDetailView.as_view(), name="case-task-detail"),
     path("api/v1/comments/", CommentListCreateView.as_view(), name="comment-list"),
     path("api/v1/comments/<int:pk>/", CommentDetailView.as_view(), name="comment-detail"),
+    path("api/v1/events/stream", event_stream, name="events-stream"),
 
     # Trang chủ → Swagger UI (tiện dev)
     path("", RedirectView.as_view(url="/api/v1/docs/", permanent=False)),
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Nạp sẵn trạng thái catalog + system_settings (mỗi bảng một truy vấn) ở request đầu tiên của worker;
+# không truy vấn lúc import (gunicorn --preload: kết nối mở trong master sẽ bị các worker fork dùng chung)
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "LOOKUP_CACHE_WARM_ON_START", True):
+    from workflow.services.lookup_cache import warm_on_first_request  # noqa: E402
+
+    warm_on_first_request()
@@ -52,6 +52,9 @@ def paged_of(name: str, item_serializer: Type[drf_serializers.Serializer]) -> Ty
         total_pages: int,
         page: int,
         page_size: int,
+        total_is_estimate?: bool,   # total_items là ước lượng/cache
+        next_cursor?: str | null,   # chỉ có khi gọi với ?cursor= (keyset)
+        prev_cursor?: str | null,
       }
 
     - Cache theo 'name' để mọi nơi gọi cùng tên nhận cùng 1 CLASS,
@@ -68,6 +71,9 @@ def paged_of(name: str, item_serializer: Type[drf_serializers.Serializer]) -> Ty
             "total_pages": drf_serializers.IntegerField(),
             "page": drf_serializers.IntegerField(),
             "page_size": drf_serializers.IntegerField(),
+            "total_is_estimate": drf_serializers.BooleanField(required=False),
+            "next_cursor": drf_serializers.CharField(required=False, allow_null=True),
+            "prev_cursor": drf_serializers.CharField(required=False, allow_null=True),
         },
     )
     ser_cls = cast(Type[drf_serializers.Serializer], tmp)
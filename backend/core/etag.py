@@ -18,8 +18,20 @@ def build_etag(instance: Any, *, prefix: str | None = None) -> str:
         or getattr(instance, "document_id", None)
         or getattr(instance, "case_id", None)
     )
-    timestamp = _pick_timestamp(instance)
-    base = f"{prefix or instance.__class__.__name__}:{pk}:{timestamp}"
+    return build_etag_from_values(
+        prefix or instance.__class__.__name__,
+        pk,
+        _pick_timestamp(instance),
+    )
+
+
+def build_etag_from_values(prefix: str, pk: Any, timestamp: Any) -> str:
+    """
+    Cùng công thức với build_etag nhưng nhận sẵn pk + timestamp (dùng cho dòng `.values()`).
+    """
+    if not isinstance(timestamp, str):
+        timestamp = _format_ts(timestamp)
+    base = f"{prefix}:{pk}:{timestamp}"
     digest = hashlib.sha256(base.encode("utf-8")).hexdigest()
     return f'W/\"{digest}\"'
 
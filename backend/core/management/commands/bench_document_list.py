@@ -0,0 +1,106 @@
+# core/management/commands/bench_document_list.py
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Callable, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark list văn bản: DocumentSlimSerializer (DRF) so với encoder `.values()` "
+        "(documents.list_encoders). Đo trọn truy vấn + serialize + render JSON cho từng cỡ trang."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--rows", default="20,200", help="Các cỡ trang, phân tách bởi ',' (mặc định 20,200).")
+        parser.add_argument("--repeat", type=int, default=30, help="Số lần lặp mỗi phép đo (lấy median).")
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Tạo tạm văn bản nháp cho đủ số dòng (trong transaction, rollback khi xong).",
+        )
+
+    def handle(self, *args, **opts):
+        from documents.list_encoders import get_slim_row_encoder
+        from documents.models import Document
+        from documents.serializers import DocumentSlimSerializer
+        from documents.views_base import annotate_list_counters
+
+        try:
+            sizes = [int(x) for x in str(opts["rows"]).split(",") if x.strip()]
+        except ValueError:
+            raise CommandError("--rows phải là danh sách số nguyên, ví dụ 20,200")
+        repeat = max(1, int(opts["repeat"]))
+
+        encoder = get_slim_row_encoder()
+        if encoder is None:
+            raise CommandError("Model hiện tại không hỗ trợ fast-path encoder.")
+
+        render = JSONRenderer().render
+
+        def base_qs():
+            qs = Document.objects.select_related("status", "department", "created_by")
+            return annotate_list_counters(qs).order_by("-created_at")
+
+        def drf(n: int) -> bytes:
+            return render(DocumentSlimSerializer(list(base_qs()[:n]), many=True).data)
+
+        def fast(n: int) -> bytes:
+            return render(encoder.encode_many(encoder.values(base_qs())[:n]))
+
+        try:
+            with transaction.atomic():
+                if opts["seed"]:
+                    self._seed(Document, max(sizes))
+                available = Document.objects.count()
+                for n in sizes:
+                    if available < n:
+                        self.stdout.write(self.style.WARNING(f"Chỉ có {available} văn bản (< {n}); dùng --seed."))
+                    if drf(n) != fast(n):
+                        raise CommandError(f"Kết quả JSON khác nhau ở {n} dòng.")
+                    t_drf = self._median(lambda: drf(n), repeat)
+                    t_fast = self._median(lambda: fast(n), repeat)
+                    self.stdout.write(
+                        f"rows={n:<5} drf={t_drf * 1000:8.2f} ms  fast={t_fast * 1000:8.2f} ms  "
+                        f"speedup=x{(t_drf / t_fast) if t_fast else float('inf'):.1f}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    @staticmethod
+    def _median(fn: Callable[[], object], repeat: int) -> float:
+        samples: List[float] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples)
+
+    @staticmethod
+    def _seed(Document, n: int) -> None:
+        User = get_user_model()
+        user = User.objects.filter(is_active=True).first()
+        now = timezone.now()
+        Document.objects.bulk_create(
+            [
+                Document(
+                    title=f"Bench {i}",
+                    doc_direction="du_thao",
+                    document_code=f"BENCH-{now:%H%M%S}-{i}",
+                    created_by=user,
+                )
+                for i in range(n)
+            ]
+        )
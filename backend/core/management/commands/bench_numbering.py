@@ -0,0 +1,140 @@
+# core/management/commands/bench_numbering.py
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+STRATEGIES = ("counter", "max")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark cấp số đi khi nhiều tiến trình phát hành đồng thời: bộ đếm một dòng "
+        "(workflow.services.numbering) so với cách cũ MAX(seq) + thử lại khi trùng. "
+        "Ghi vào scope riêng rồi dọn sạch khi xong."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--workers", type=int, default=16, help="Số luồng phát hành song song (mặc định 16).")
+        parser.add_argument("--per-worker", type=int, default=50, help="Số lần cấp số mỗi luồng (mặc định 50).")
+        parser.add_argument(
+            "--hold-ms", type=float, default=0.0,
+            help="Giữ transaction thêm N ms sau khi cấp số (mô phỏng phần còn lại của publish).",
+        )
+        parser.add_argument("--strategy", default="counter,max", help="counter,max (mặc định cả hai).")
+
+    def handle(self, *args, **opts):
+        from documents.models import NumberCounter, OutgoingNumbering
+
+        strategies = [s.strip() for s in str(opts["strategy"]).split(",") if s.strip()]
+        if not strategies or any(s not in STRATEGIES for s in strategies):
+            raise CommandError(f"--strategy chỉ nhận {', '.join(STRATEGIES)}")
+        workers, per_worker = int(opts["workers"]), int(opts["per_worker"])
+        if workers < 1 or per_worker < 1:
+            raise CommandError("--workers/--per-worker phải >= 1")
+        actor = get_user_model().objects.filter(is_active=True).first()
+        if actor is None:
+            raise CommandError("Cần ít nhất một user đang hoạt động (issued_by).")
+
+        token = uuid.uuid4().hex[:8]
+        for strategy in strategies:
+            scope = f"bench:{token}:{strategy}"
+            try:
+                allocate = self._strategy(strategy, scope, actor)
+                stats = self._run(allocate, workers, per_worker, float(opts["hold_ms"]) / 1000.0)
+                seqs = sorted(OutgoingNumbering.objects.filter(scope=scope).values_list("seq", flat=True))
+                ok = seqs == list(range(1, len(seqs) + 1)) and len(seqs) == workers * per_worker
+                lat = sorted(stats["latencies"])
+                self.stdout.write(
+                    f"{strategy:<8} n={len(seqs):<6} {len(seqs) / stats['elapsed']:9.1f} số/s  "
+                    f"p50={self._pct(lat, 50) * 1000:7.2f} ms  p95={self._pct(lat, 95) * 1000:7.2f} ms  "
+                    f"max={lat[-1] * 1000:7.2f} ms  retry={stats['retries']:<5} "
+                    f"{'liên tục' if ok else 'LỖI: trùng/nhảy số'} lỗi={stats['errors']}"
+                )
+            finally:
+                OutgoingNumbering.objects.filter(scope=scope).delete()
+                NumberCounter.objects.filter(scope=scope).delete()
+
+    # ---------- Chiến lược cấp số ----------
+    def _strategy(self, name: str, scope: str, actor) -> Callable[[], int]:
+        from documents.models import OutgoingNumbering
+        from workflow.services import numbering
+
+        year = timezone.now().year
+        if name == "counter":
+            plan = numbering.NumberingPlan(scope=scope, period="bench")
+
+            def allocate() -> int:
+                numbering.allocate(plan, actor=actor, year=year)
+                return 0
+
+            return allocate
+
+        def allocate_max() -> int:
+            # Cách cũ: MAX(seq) + 1, trùng unique thì thử lại (savepoint để transaction ngoài còn dùng được)
+            retries = 0
+            while True:
+                seq = (OutgoingNumbering.objects.filter(scope=scope, period="bench").aggregate(m=Max("seq"))["m"] or 0) + 1
+                try:
+                    with transaction.atomic():
+                        OutgoingNumbering.objects.create(
+                            year=year, seq=seq, scope=scope, period="bench", issued_by=actor, issued_at=timezone.now()
+                        )
+                    return retries
+                except IntegrityError:
+                    retries += 1
+
+        return allocate_max
+
+    def _run(self, allocate: Callable[[], int], workers: int, per_worker: int, hold: float) -> Dict:
+        latencies: List[float] = []
+        counters = {"retries": 0, "errors": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(workers)
+
+        def worker() -> None:
+            local: List[float] = []
+            retries = errors = 0
+            try:
+                barrier.wait()
+                for _ in range(per_worker):
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            retries += allocate()
+                            if hold:
+                                time.sleep(hold)
+                    except Exception:
+                        errors += 1
+                    local.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(local)
+                    counters["retries"] += retries
+                    counters["errors"] += errors
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return {"latencies": latencies, "elapsed": time.perf_counter() - started, **counters}
+
+    @staticmethod
+    def _pct(values: List[float], pct: int) -> float:
+        if not values:
+            return 0.0
+        if len(values) == 1:
+            return values[0]
+        return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
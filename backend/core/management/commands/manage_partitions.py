@@ -0,0 +1,60 @@
+# core/management/commands/manage_partitions.py
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Bảo trì partition theo tháng của audit_logs/document_workflow_logs: tạo trước partition các tháng "
+        "tới và (tuỳ chọn) tách/lưu trữ partition cũ. Nên chạy định kỳ (cron hằng ngày)."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("tables", nargs="*", help="Bảng cần xử lý (mặc định: mọi bảng đã phân vùng).")
+        parser.add_argument("--ahead", type=int, default=3, help="Số tháng tạo trước (mặc định 3).")
+        parser.add_argument(
+            "--retain-months", type=int, default=None,
+            help="Giữ N tháng gần nhất; partition cũ hơn bị tách khỏi bảng. Bỏ trống → không tách.",
+        )
+        parser.add_argument("--archive-dir", default=None, help="Thư mục xuất partition đã tách (.csv.gz).")
+        parser.add_argument("--drop", action="store_true", help="Xoá bảng partition sau khi tách (cần --archive-dir).")
+        parser.add_argument(
+            "--force-drop-without-archive", action="store_true",
+            help="Cho phép --drop khi không có --archive-dir (mất hẳn lịch sử của partition).",
+        )
+
+    def handle(self, *args, **opts):
+        from core import partitioning
+
+        ahead = int(opts["ahead"])
+        if ahead < 0:
+            raise CommandError("--ahead phải >= 0")
+        retain = opts["retain_months"]
+        if retain is not None and retain < 1:
+            raise CommandError("--retain-months phải >= 1")
+        if opts["drop"] and retain is None:
+            raise CommandError("--drop cần đi kèm --retain-months")
+        force = opts["force_drop_without_archive"]
+        if opts["drop"] and not opts["archive_dir"] and not force:
+            raise CommandError("--drop cần --archive-dir (hoặc --force-drop-without-archive để xoá không lưu trữ)")
+
+        tables = opts["tables"] or list(partitioning.managed_tables())
+        for table in tables:
+            if table not in partitioning.PARTITIONED_TABLES:
+                raise CommandError(f"Bảng không được quản lý phân vùng: {table}")
+            if not partitioning.is_partitioned(table):
+                self.stdout.write(self.style.WARNING(f"{table}: chưa phân vùng, bỏ qua."))
+                continue
+
+            created = partitioning.ensure_partitions(table, months_ahead=ahead)
+            self.stdout.write(f"{table}: tạo {len(created)} partition mới {', '.join(created)}".rstrip())
+
+            if retain is not None:
+                detached = partitioning.detach_partitions(
+                    table, retain, archive_dir=opts["archive_dir"], drop=opts["drop"], force=force
+                )
+                for name, path in detached:
+                    note = f" → {path}" if path else ""
+                    self.stdout.write(f"{table}: đã tách {name}{note}")
+        self.stdout.write(self.style.SUCCESS("Xong."))
@@ -1,7 +1,168 @@
 # core/pagination.py
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime as dt
+import hashlib
+import json
+import uuid
+from decimal import Decimal
+from functools import cached_property, partial
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Model, Q, QuerySet
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from core.exceptions import ContractAPIException
+
+
+class _SeekKey(NamedTuple):
+    """Một cột trong khóa seek: model field + chiều giảm dần."""
+
+    field: Any
+    desc: bool
+
+    @property
+    def name(self) -> str:
+        return self.field.name
+
+    @property
+    def expr(self) -> str:
+        return f"-{self.name}" if self.desc else self.name
+
+
+def _encode_value(value: Any) -> Any:
+    """Chuẩn hoá giá trị khóa sang JSON (giữ đủ microsecond cho datetime)."""
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _row_value(obj: Any, key: _SeekKey) -> Any:
+    """Đọc giá trị khóa từ model instance hoặc dict (queryset `.values()`)."""
+    if isinstance(obj, dict):
+        return obj[key.name]
+    return getattr(obj, key.field.attname)
+
+
+def _after_q(key: _SeekKey, value: Any) -> Q:
+    """
+    Điều kiện "đứng SAU value" theo thứ tự sắp xếp của PostgreSQL:
+      - ASC  → NULLS LAST
+      - DESC → NULLS FIRST
+    Đảo chiều mọi khóa vẫn giữ đúng quy ước này nên dùng được cho cả prev.
+    """
+    name, nullable = key.name, bool(key.field.null)
+    if value is None:
+        if key.desc:
+            return Q(**{f"{name}__isnull": False})
+        return Q(pk__in=[])
+    cond = Q(**{f"{name}__lt" if key.desc else f"{name}__gt": value})
+    if nullable and not key.desc:
+        cond |= Q(**{f"{name}__isnull": True})
+    return cond
+
+
+def _equal_q(key: _SeekKey, value: Any) -> Q:
+    if value is None:
+        return Q(**{f"{key.name}__isnull": True})
+    return Q(**{key.name: value})
+
+
+def _seek_q(keys: Sequence[_SeekKey], values: Sequence[Any]) -> Q:
+    """(k1, k2, ..., pk) > (v1, v2, ..., vpk) theo từng chiều sắp xếp của từng khóa."""
+    head, value = keys[0], values[0]
+    cond = _after_q(head, value)
+    if len(keys) > 1:
+        cond |= _equal_q(head, value) & _seek_q(keys[1:], values[1:])
+    return cond
+
+
+# ---------------------------------------------------------------------------
+# Count strategy: exact | estimated | cached
+# ---------------------------------------------------------------------------
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_CACHED = "cached"
+
+
+def _planner_estimate(queryset: QuerySet) -> Optional[int]:
+    """
+    Ước lượng số dòng từ thống kê planner của PostgreSQL:
+      - Không có WHERE → pg_class.reltuples của bảng
+      - Có WHERE (hướng văn bản, phạm vi hiển thị, ...) → "Plan Rows" của EXPLAIN
+    Trả None nếu không phải PostgreSQL, bảng chưa ANALYZE hoặc truy vấn lỗi.
+    """
+    conn = connections[queryset.db]
+    if conn.vendor != "postgresql":
+        return None
+    try:
+        with transaction.atomic(using=queryset.db), conn.cursor() as cur:
+            if not queryset.query.where:
+                cur.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cur.fetchone()
+                value = int(row[0]) if row and row[0] is not None else -1
+            else:
+                sql, params = queryset.order_by().values("pk").query.sql_with_params()
+                cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                plan = cur.fetchone()[0]
+                if isinstance(plan, (str, bytes)):
+                    plan = json.loads(plan)
+                value = int(plan[0]["Plan"]["Plan Rows"])
+    except (DatabaseError, LookupError, TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
+class _StrategyPaginator(DjangoPaginator):
+    """
+    Paginator Django với `count` lấy từ hàm đếm theo chiến lược.
+    Khi tổng là ước lượng: không chặn số trang theo count và không cắt trang cuối,
+    để trang thực tế luôn đủ page_size dù ước lượng lệch.
+    """
+
+    def __init__(self, object_list, per_page, *, counter: Callable[[], Tuple[int, bool]], **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._counter = counter
+        self.is_estimate = False
+
+    @cached_property
+    def count(self):
+        value, self.is_estimate = self._counter()
+        return value
+
+    def validate_number(self, number):
+        _ = self.count  # xác định is_estimate trước khi kiểm tra biên
+        if not self.is_estimate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
 class DefaultPageNumberPagination(PageNumberPagination):
     """
     Contract-compliant pagination envelope:
@@ -10,6 +171,15 @@ class DefaultPageNumberPagination(PageNumberPagination):
       - total_pages: tổng số trang
       - page: trang hiện tại (1-based)
       - page_size: kích thước trang đang áp dụng (đã clamp <= max_page_size)
+      - total_is_estimate: True nếu total_items là ước lượng/giá trị cache (không COUNT ngay)
+
+    Chiến lược đếm lấy từ `view.count_strategy` hoặc settings.PAGINATION_COUNT_STRATEGY.
+
+    Keyset (opt-in): view đặt `cursor_pagination = True` và client gửi `?cursor=`
+    (rỗng = trang đầu); `cursor_pagination = "always"` → luôn keyset, kể cả khi không
+    gửi cursor. Khi đó bỏ COUNT/OFFSET, seek theo ordering hiện tại + PK:
+      - items, page_size
+      - next_cursor / prev_cursor: chuỗi opaque (None khi hết trang)
     """
 
     page_size = 20          # theo chính sách tích hợp
@@ -17,13 +187,53 @@ class DefaultPageNumberPagination(PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 200
 
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor không hợp lệ."
+
+    # Tham số không phải "bộ lọc" khi xét ước lượng/khóa cache
+    non_filter_params = ("ordering", "format")
+
+    cursor_mode: bool = False
+    _cursor_page_size: int = 0
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Dispatch page-number / keyset
+    # ------------------------------------------------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_option = getattr(view, "cursor_pagination", False)
+        self.cursor_mode = bool(
+            cursor_option == "always"
+            or (cursor_option and self.cursor_query_param in request.query_params)
+        )
+        if self.cursor_mode:
+            return self._paginate_keyset(queryset, request)
+        self.django_paginator_class = partial(
+            _StrategyPaginator,
+            counter=partial(self._count, queryset, request, view),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response({
+                "items": data,
+                "page_size": self._cursor_page_size,
+                "next_cursor": self.next_cursor,
+                "prev_cursor": self.prev_cursor,
+            })
+
         page_size = self.get_page_size(self.request)
         if not page_size:
             page_size = self.page.paginator.per_page
 
-        total_items = self.page.paginator.count
-        total_pages = self.page.paginator.num_pages
+        paginator = self.page.paginator
+        total_items = paginator.count
+        is_estimate = bool(getattr(paginator, "is_estimate", False))
+        total_pages = paginator.num_pages
+        if is_estimate:
+            total_pages = max(total_pages, self.page.number)
 
         return Response({
             "items": data,
@@ -31,8 +241,156 @@ class DefaultPageNumberPagination(PageNumberPagination):
             "total_pages": total_pages,
             "page": self.page.number,
             "page_size": page_size,
+            "total_is_estimate": is_estimate,
         })
 
+    # ------------------------------------------------------------------
+    # Count strategy
+    # ------------------------------------------------------------------
+    def _count_strategy(self, view) -> str:
+        value = getattr(view, "count_strategy", None) or getattr(settings, "PAGINATION_COUNT_STRATEGY", COUNT_EXACT)
+        value = str(value).lower()
+        return value if value in (COUNT_EXACT, COUNT_ESTIMATED, COUNT_CACHED) else COUNT_EXACT
+
+    def _filter_params(self, request) -> List[Tuple[str, List[str]]]:
+        skip = {self.page_query_param, self.page_size_query_param, self.cursor_query_param, *self.non_filter_params}
+        params = request.query_params
+        return sorted(
+            (key, sorted(params.getlist(key)))
+            for key in params.keys()
+            if key not in skip and any(v != "" for v in params.getlist(key))
+        )
+
+    def _count_cache_key(self, queryset: QuerySet, request, view) -> str:
+        user = getattr(request, "user", None)
+        scope = str(getattr(user, "pk", None) or "anon") if getattr(user, "is_authenticated", False) else "anon"
+        raw = json.dumps(
+            [
+                type(view).__name__ if view is not None else "",
+                queryset.model._meta.label_lower,
+                scope,
+                self._filter_params(request),
+            ],
+            separators=(",", ":"),
+        )
+        return "pagination:count:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, queryset: QuerySet, request, view) -> Tuple[int, bool]:
+        """Trả (total_items, is_estimate) theo chiến lược hiện hành."""
+        strategy = self._count_strategy(view)
+
+        if strategy == COUNT_ESTIMATED and not self._filter_params(request):
+            estimate = _planner_estimate(queryset)
+            threshold = int(getattr(settings, "PAGINATION_ESTIMATE_THRESHOLD", 10000))
+            if estimate is not None and estimate >= threshold:
+                return estimate, True
+
+        if strategy == COUNT_CACHED:
+            key = self._count_cache_key(queryset, request, view)
+            cached = cache.get(key)
+            if cached is not None:
+                return int(cached), True
+            value = queryset.count()
+            cache.set(key, value, int(getattr(settings, "PAGINATION_COUNT_CACHE_TTL", 30)))
+            return value, False
+
+        return queryset.count(), False
+
+    # ------------------------------------------------------------------
+    # Keyset implementation
+    # ------------------------------------------------------------------
+    def _paginate_keyset(self, queryset: QuerySet, request) -> List[Model]:
+        self.request = request
+        page_size = self.get_page_size(request) or self.page_size
+        self._cursor_page_size = page_size
+
+        keys = self._seek_keys(queryset)
+        position, reverse = self._decode_cursor(request.query_params.get(self.cursor_query_param), keys)
+
+        # prev: đảo chiều mọi khóa rồi seek "sau" vị trí cursor, cuối cùng lật lại kết quả
+        seek_keys = [k._replace(desc=not k.desc) for k in keys] if reverse else keys
+        qs = queryset.order_by(*[k.expr for k in seek_keys])
+        if position is not None:
+            qs = qs.filter(_seek_q(seek_keys, position))
+
+        rows = list(qs[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        first = rows[0] if rows else None
+        last = rows[-1] if rows else None
+        if reverse:
+            self.prev_cursor = self._encode_cursor(first, keys, reverse=True) if has_more else None
+            self.next_cursor = self._encode_cursor(last, keys, reverse=False)
+        else:
+            self.next_cursor = self._encode_cursor(last, keys, reverse=False) if has_more else None
+            self.prev_cursor = self._encode_cursor(first, keys, reverse=True) if position is not None else None
+        return rows
+
+    def _seek_keys(self, queryset: QuerySet) -> List[_SeekKey]:
+        """
+        Suy ra khóa seek từ ordering hiện tại (FilterSet/OrderingFilter/Meta) và luôn
+        chốt bằng PK (cùng chiều với khóa cuối) để thứ tự là toàn phần.
+        Chỉ chấp nhận field cục bộ, không quan hệ; còn lại → 400.
+        """
+        opts = queryset.model._meta
+        raw = list(queryset.query.order_by) or list(opts.ordering or [])
+        keys: List[_SeekKey] = []
+        for item in raw:
+            if not isinstance(item, str) or item == "?":
+                raise ContractAPIException("Ordering không hỗ trợ phân trang cursor.", code="CURSOR_UNSUPPORTED_ORDERING")
+            desc = item.startswith("-")
+            name = item.lstrip("-+")
+            try:
+                field = opts.pk if name == "pk" else opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not getattr(field, "concrete", False) or field.is_relation:
+                raise ContractAPIException("Ordering không hỗ trợ phân trang cursor.", code="CURSOR_UNSUPPORTED_ORDERING")
+            if any(k.name == field.name for k in keys):
+                continue
+            keys.append(_SeekKey(field, desc))
+            if field.primary_key:
+                break
+
+        if not keys or not keys[-1].field.primary_key:
+            keys.append(_SeekKey(opts.pk, keys[-1].desc if keys else True))
+        return keys
+
+    def _encode_cursor(self, obj: Any, keys: Sequence[_SeekKey], *, reverse: bool) -> Optional[str]:
+        if obj is None:
+            return None
+        payload = {
+            "o": [k.expr for k in keys],
+            "v": [_encode_value(_row_value(obj, k)) for k in keys],
+            "r": 1 if reverse else 0,
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, token: Optional[str], keys: Sequence[_SeekKey]):
+        """Trả (position|None, reverse). Cursor rỗng = trang đầu."""
+        token = (token or "").strip()
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw.decode("utf-8"))
+            if payload.get("o") != [k.expr for k in keys]:
+                raise ValueError("ordering mismatch")
+            values = payload["v"]
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError("bad position")
+            position = [None if v is None else k.field.to_python(v) for k, v in zip(keys, values)]
+            return position, bool(payload.get("r"))
+        except (binascii.Error, ValueError, TypeError, KeyError, AttributeError, DjangoValidationError):
+            raise ContractAPIException(self.invalid_cursor_message, code="INVALID_CURSOR")
+
+    # ------------------------------------------------------------------
+    # Schema
+    # ------------------------------------------------------------------
     def get_paginated_response_schema(self, schema):
         return {
             "type": "object",
@@ -42,6 +400,21 @@ class DefaultPageNumberPagination(PageNumberPagination):
                 "total_pages": {"type": "integer"},
                 "page": {"type": "integer"},
                 "page_size": {"type": "integer"},
+                "total_is_estimate": {"type": "boolean"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "prev_cursor": {"type": "string", "nullable": True},
             },
             "required": ["items", "total_items", "total_pages", "page", "page_size"],
         }
+
+    def get_schema_operation_parameters(self, view):
+        params = super().get_schema_operation_parameters(view)
+        if getattr(view, "cursor_pagination", False):
+            params.append({
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset cursor (opaque). Gửi rỗng để lấy trang đầu; bỏ qua page/total_*.",
+                "schema": {"type": "string"},
+            })
+        return params
@@ -0,0 +1,35 @@
+# core/parsers.py
+from __future__ import annotations
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from core.renderers import ORJSONRenderer
+
+try:
+    import orjson  # tối ưu tốc độ nếu có
+except Exception:  # pragma: no cover - orjson là dependency chính
+    orjson = None  # type: ignore[assignment]
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser dùng orjson.loads (đọc thẳng bytes, không qua codecs reader).
+    orjson chỉ nhận UTF-8 và luôn từ chối NaN/Infinity (tương đương STRICT_JSON);
+    body khai báo charset khác → quay về JSONParser gốc.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
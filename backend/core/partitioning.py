@@ -0,0 +1,338 @@
+# core/partitioning.py
+"""
+Phân vùng theo tháng (PostgreSQL declarative range partitioning) cho các bảng log tăng không giới hạn.
+
+- convert_to_partitioned / convert_to_plain: chuyển bảng thường ⇄ bảng phân vùng (dùng trong migration),
+  giữ nguyên tên index/UNIQUE/FK/CHECK để state của Django không lệch. `LIKE` chỉ chép DEFAULT/CHECK/NOT NULL
+  nên index, UNIQUE (trên bảng phân vùng phải chứa cột phân vùng) và identity được dựng lại tường minh.
+- ensure_partitions: tạo trước partition các tháng sắp tới (lệnh manage_partitions chạy định kỳ).
+- detach_partitions: xuất CSV nén (.csv.gz) partition cũ (ngoài khoá bảng cha), rồi tách và tuỳ chọn xoá.
+Partition "{table}_default" hứng dòng nằm ngoài mọi khoảng (insert không bao giờ lỗi vì thiếu partition).
+Ranh giới partition tính theo UTC (DB lưu UTC); "tháng hiện tại" lấy theo TIME_ZONE (timezone.localdate).
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+# bảng → (cột phân vùng, cột khoá chính)
+PARTITIONED_TABLES = {
+    "audit_logs": ("at", "audit_id"),
+    "document_workflow_logs": ("acted_at", "log_id"),
+}
+
+# DETACH không CONCURRENTLY chờ khoá bảng cha tối đa bấy nhiêu rồi bỏ (chạy lại ở lần sau)
+DETACH_LOCK_TIMEOUT = "5s"
+
+_PART_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    idx = value.year * 12 + (value.month - 1) + months
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def _qn(name: str) -> str:
+    return default_connection.ops.quote_name(name)
+
+
+# ---------- Chuyển đổi bảng (migration) ----------
+def _with_key(definition: str, column: str, after: str = "") -> str:
+    """Thêm cột phân vùng vào danh sách cột đầu tiên (sau `after`) của định nghĩa UNIQUE nếu chưa có."""
+    start = definition.index("(", definition.index(after) + len(after) if after else 0)
+    depth = 0
+    for end in range(start, len(definition)):
+        depth += {"(": 1, ")": -1}.get(definition[end], 0)
+        if depth == 0:
+            break
+    cols = [c.strip().strip('"') for c in definition[start + 1 : end].split(",")]
+    if column in cols:
+        return definition
+    return f"{definition[:end]}, {_qn(column)}{definition[end:]}"
+
+
+def _table_ddl(cursor, table: str) -> Tuple[List[str], List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Định nghĩa index (trừ PK và index của ràng buộc UNIQUE), ràng buộc UNIQUE và FK hiện có của bảng."""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.contype = 'u')
+        """,
+        [table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    ddl = []
+    for contype in ("u", "f"):
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = %s",
+            [table, contype],
+        )
+        ddl.append(list(cursor.fetchall()))
+    uniques, fks = ddl
+    return indexes, uniques, fks
+
+
+def _identity_kind(cursor, table: str, column: str) -> str:
+    """'a' (ALWAYS) / 'd' (BY DEFAULT) nếu cột là identity, '' nếu không."""
+    cursor.execute(
+        "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s", [table, column]
+    )
+    row = cursor.fetchone()
+    return (row[0] or "").strip() if row else ""
+
+
+def _rebuild(schema_editor, table: str, partitioned: bool, months_ahead: int = 3) -> None:
+    column, pk = PARTITIONED_TABLES[table]
+    legacy = f"{table}_legacy"
+    seq = f"{table}_{pk}_seq"
+    with schema_editor.connection.cursor() as cur:
+        indexes, uniques, fks = _table_ddl(cur, table)
+        identity = _identity_kind(cur, table, pk)
+        cur.execute(f"ALTER TABLE {_qn(table)} RENAME TO {_qn(legacy)}")
+        cur.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [legacy])
+        for (pk_name,) in cur.fetchall():
+            cur.execute(f"ALTER TABLE {_qn(legacy)} RENAME CONSTRAINT {_qn(pk_name)} TO {_qn(legacy + '_pkey')}")
+        for conname, _ in (*fks, *uniques):  # giải phóng tên để dựng lại trên bảng mới
+            cur.execute(f"ALTER TABLE {_qn(legacy)} DROP CONSTRAINT {_qn(conname)}")
+        for indexdef in indexes:
+            name = re.match(r"CREATE (?:UNIQUE )?INDEX (\S+) ON", indexdef).group(1)
+            cur.execute(f"DROP INDEX {name}")
+
+        suffix = f" PARTITION BY RANGE ({_qn(column)})" if partitioned else ""
+        cur.execute(
+            f"CREATE TABLE {_qn(table)} (LIKE {_qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){suffix}"
+        )
+        # Bảng phân vùng: PK phải chứa cột phân vùng
+        pk_cols = f"{_qn(pk)}, {_qn(column)}" if partitioned else _qn(pk)
+        cur.execute(f"ALTER TABLE {_qn(table)} ADD CONSTRAINT {_qn(table + '_pkey')} PRIMARY KEY ({pk_cols})")
+
+        if partitioned:
+            cur.execute(f"SELECT min({_qn(column)}), max({_qn(column)}) FROM {_qn(legacy)}")
+            lo, hi = cur.fetchone()
+            today = timezone.localdate()
+            first = month_start((lo.date() if lo else today))
+            last = month_start(max(hi.date() if hi else today, today))
+            cur.execute(f"CREATE TABLE {_qn(table + '_default')} PARTITION OF {_qn(table)} DEFAULT")
+            months = (last.year - first.year) * 12 + last.month - first.month + 1 + months_ahead
+            for i in range(months):
+                _create_partition(cur, table, column, add_months(first, i))
+
+        cur.execute(f"INSERT INTO {_qn(table)} SELECT * FROM {_qn(legacy)}")
+        cur.execute(f"DROP TABLE {_qn(legacy)} CASCADE")  # kéo theo sequence/identity cũ
+
+        cur.execute(f"SELECT COALESCE(max({_qn(pk)}), 0) + 1 FROM {_qn(table)}")
+        next_id = int(cur.fetchone()[0])
+        if schema_editor.connection.pg_version >= 170000 or not partitioned:
+            # Identity (Django mặc định); bảng phân vùng chỉ hỗ trợ từ PG17
+            kind = "ALWAYS" if identity == "a" else "BY DEFAULT"
+            cur.execute(
+                f"ALTER TABLE {_qn(table)} ALTER COLUMN {_qn(pk)} ADD GENERATED {kind} AS IDENTITY "
+                f"(START WITH {next_id})"
+            )
+        else:
+            cur.execute(f"CREATE SEQUENCE IF NOT EXISTS {_qn(seq)} OWNED BY {_qn(table)}.{_qn(pk)}")
+            cur.execute(f"ALTER TABLE {_qn(table)} ALTER COLUMN {_qn(pk)} SET DEFAULT nextval('{seq}')")
+            cur.execute("SELECT setval(%s, %s, false)", [seq, next_id])
+        for indexdef in indexes:
+            indexdef = re.sub(r" ON (?:ONLY )?\S+ USING ", f" ON {_qn(table)} USING ", indexdef, count=1)
+            if partitioned and indexdef.startswith("CREATE UNIQUE"):
+                indexdef = _with_key(indexdef, column, after=" USING ")
+            cur.execute(indexdef)
+        for conname, definition in uniques:
+            if partitioned:
+                definition = _with_key(definition, column)
+            cur.execute(f"ALTER TABLE {_qn(table)} ADD CONSTRAINT {_qn(conname)} {definition}")
+        for conname, definition in fks:
+            cur.execute(f"ALTER TABLE {_qn(table)} ADD CONSTRAINT {_qn(conname)} {definition}")
+
+
+def convert_to_partitioned(schema_editor, table: str) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    _rebuild(schema_editor, table, partitioned=True)
+
+
+def convert_to_plain(schema_editor, table: str) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    _rebuild(schema_editor, table, partitioned=False)
+
+
+# ---------- Quản lý partition (lệnh định kỳ) ----------
+@dataclass
+class PartitionInfo:
+    name: str
+    month: date
+
+
+def is_partitioned(table: str, connection=None) -> bool:
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cur.fetchone() is not None
+
+
+def list_partitions(table: str, connection=None) -> List[PartitionInfo]:
+    """Partition theo tháng đang gắn vào bảng (không gồm partition default), sắp theo tháng."""
+    connection = connection or default_connection
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        out = []
+        for (name,) in cur.fetchall():
+            m = _PART_RE.search(name)
+            if m:
+                out.append(PartitionInfo(name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda p: p.month)
+
+
+def _create_partition(cur, table: str, column: str, month: date) -> bool:
+    name = partition_name(table, month)
+    cur.execute("SELECT to_regclass(%s)", [name])
+    if cur.fetchone()[0] is not None:
+        return False
+    lo, hi = _bound(month), _bound(add_months(month, 1))
+    default = f"{table}_default"
+    cur.execute("SELECT to_regclass(%s)", [default])
+    has_default = cur.fetchone()[0] is not None
+    stray = False
+    if has_default:
+        cur.execute(
+            f"SELECT 1 FROM {_qn(default)} WHERE {_qn(column)} >= %s AND {_qn(column)} < %s LIMIT 1", [lo, hi]
+        )
+        stray = cur.fetchone() is not None
+    if not stray:
+        cur.execute(
+            f"CREATE TABLE {_qn(name)} PARTITION OF {_qn(table)} FOR VALUES FROM (%s) TO (%s)", [lo, hi]
+        )
+        return True
+    # Partition default đang giữ dòng của tháng này → tạo bảng rời, chuyển dòng sang rồi ATTACH
+    # (ATTACH tự dựng trên bảng rời các index/UNIQUE đã khai báo ở bảng cha)
+    cur.execute(f"CREATE TABLE {_qn(name)} (LIKE {_qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cur.execute(
+        f"WITH moved AS (DELETE FROM {_qn(default)} WHERE {_qn(column)} >= %s AND {_qn(column)} < %s RETURNING *) "
+        f"INSERT INTO {_qn(name)} SELECT * FROM moved",
+        [lo, hi],
+    )
+    cur.execute(f"ALTER TABLE {_qn(table)} ATTACH PARTITION {_qn(name)} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+    return True
+
+
+def ensure_partitions(table: str, months_ahead: int = 3, start: Optional[date] = None, connection=None) -> List[str]:
+    """Tạo (nếu thiếu) partition từ tháng `start` (mặc định tháng hiện tại theo TIME_ZONE) tới months_ahead tháng sau."""
+    connection = connection or default_connection
+    column, _ = PARTITIONED_TABLES[table]
+    first = month_start(start or timezone.localdate())
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+        for i in range(months_ahead + 1):
+            month = add_months(first, i)
+            if _create_partition(cur, table, column, month):
+                created.append(partition_name(table, month))
+    return created
+
+
+def _export_csv_gz(cur, name: str, archive_dir: str) -> Tuple[str, int]:
+    """COPY partition ra .csv.gz; trả (đường dẫn, số dòng)."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    sql = f"COPY {_qn(name)} TO STDOUT WITH (FORMAT csv, HEADER true)"
+    with gzip.open(path, "wb") as fh:
+        raw = getattr(cur, "cursor", cur)
+        if hasattr(raw, "copy"):  # psycopg 3
+            with raw.copy(sql) as copy:
+                for block in copy:
+                    fh.write(bytes(block))
+        else:  # psycopg2
+            raw.copy_expert(sql, fh)
+    return path, raw.rowcount
+
+
+def _detach(cur, table: str, name: str, concurrently: bool) -> None:
+    if concurrently:
+        cur.execute(f"ALTER TABLE {_qn(table)} DETACH PARTITION {_qn(name)} CONCURRENTLY")
+        return
+    # DETACH thường khoá ACCESS EXCLUSIVE bảng cha: chỉ đổi metadata, không đợi lâu sau hàng đợi khoá
+    cur.execute(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'")
+    cur.execute(f"ALTER TABLE {_qn(table)} DETACH PARTITION {_qn(name)}")
+
+
+def detach_partitions(
+    table: str,
+    retain_months: int,
+    *,
+    archive_dir: Optional[str] = None,
+    drop: bool = False,
+    force: bool = False,
+    today: Optional[date] = None,
+    connection=None,
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Tách các partition có tháng < (tháng hiện tại - retain_months). Trả [(tên partition, file lưu trữ)].
+
+    Có archive_dir → xuất CSV nén TRƯỚC khi tách, ngoài transaction: COPY từ partition con chỉ giữ
+    ACCESS SHARE nên insert/đọc log vẫn chạy. Sau đó DETACH (CONCURRENTLY khi được: bảng cha không có
+    partition default và không nằm trong transaction) rồi DROP trong transaction ngắn riêng; partition đã
+    nhận thêm dòng trong lúc xuất thì được xuất lại trước khi xoá.
+    drop=True không có archive_dir sẽ xoá lịch sử không lưu trữ → phải truyền force=True.
+    """
+    if drop and not archive_dir and not force:
+        raise ValueError("drop=True cần archive_dir (hoặc force=True để xoá không lưu trữ).")
+    connection = connection or default_connection
+    cutoff = add_months(month_start(today or timezone.localdate()), -retain_months)
+    with connection.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", [f"{table}_default"])
+        has_default = cur.fetchone()[0] is not None
+    concurrently = not has_default and not connection.in_atomic_block
+    results = []
+    for part in list_partitions(table, connection):
+        if part.month >= cutoff:
+            continue
+        path, exported = None, 0
+        if archive_dir:
+            with connection.cursor() as cur:
+                path, exported = _export_csv_gz(cur, part.name, archive_dir)
+        if concurrently:
+            with connection.cursor() as cur:
+                _detach(cur, table, part.name, concurrently=True)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+            if not concurrently:
+                _detach(cur, table, part.name, concurrently=False)
+            if archive_dir:
+                cur.execute(f"SELECT count(*) FROM {_qn(part.name)}")
+                if cur.fetchone()[0] != exported:  # ghi muộn vào tháng cũ trong lúc xuất
+                    path, _ = _export_csv_gz(cur, part.name, archive_dir)
+            if drop:
+                cur.execute(f"DROP TABLE {_qn(part.name)}")
+        results.append((part.name, path))
+    return results
+
+
+def managed_tables() -> Iterable[str]:
+    return [t for t in PARTITIONED_TABLES if is_partitioned(t)]
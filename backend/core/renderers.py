@@ -0,0 +1,79 @@
+# core/renderers.py
+from __future__ import annotations
+
+import datetime as dt
+import decimal
+import uuid
+from typing import Any
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson  # tối ưu tốc độ nếu có
+except Exception:  # pragma: no cover - orjson là dependency chính
+    orjson = None  # type: ignore[assignment]
+
+
+# UTC → "Z" (giống DRF JSONEncoder); cho phép khóa dict không phải str
+_ORJSON_OPTIONS = (
+    (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_UUID)
+    if orjson is not None
+    else 0
+)
+
+
+def orjson_default(obj: Any) -> Any:
+    """
+    Fallback cho kiểu orjson không tự xử lý — bám theo rest_framework.utils.encoders.JSONEncoder
+    để JSON ra giống hệt renderer mặc định của DRF.
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        # COERCE_DECIMAL_TO_STRING đã xử lý ở tầng serializer; tới đây DRF trả float
+        return float(obj)
+    if isinstance(obj, dt.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "__getitem__"):
+        cls = list if isinstance(obj, (list, tuple)) else dict
+        try:
+            return cls(obj)
+        except Exception:
+            pass
+    if hasattr(obj, "__iter__"):
+        return tuple(item for item in obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer dùng orjson: datetime/date/time/UUID native, Decimal/lazy str qua `orjson_default`.
+    Đầu ra tương thích byte với JSONRenderer (compact, UTF-8, escape U+2028/U+2029).
+    Quay về JSONRenderer khi thiếu orjson, client yêu cầu `indent`, hoặc orjson từ chối dữ liệu
+    (vd. số nguyên > 64-bit).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=orjson_default, option=_ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Giống DRF: escape U+2028/U+2029 để nhúng an toàn trong <script>
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,71 @@
+# documents/exports.py
+"""
+Phản hồi HTTP cho xuất văn bản / sổ đăng ký (dùng chung DocumentBaseViewSet và RegisterBookViewSet).
+
+- mode=auto (mặc định): đếm dòng; <= EXPORT_SYNC_MAX_ROWS → trả file ngay, lớn hơn → job nền (202).
+- mode=sync / mode=async: ép một đường.
+CSV trả bằng StreamingHttpResponse (từng khối, không giữ cả tập); XLSX ghi write_only ra file tạm rồi
+FileResponse. Job nền ghi vào default_storage; trạng thái/tải về qua /api/v1/report-exports/{id}/.
+"""
+from __future__ import annotations
+
+import tempfile
+from typing import Any, Mapping, Optional
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.exceptions import ContractAPIException
+from workflow.services import document_export
+from workflow.services.errors import ServiceError
+
+EXPORT_MODES = ("auto", "sync", "async")
+
+
+def export_response(
+    request,
+    *,
+    kind: str,
+    params: Mapping[str, Any],
+    output: Optional[str] = None,
+    mode: Optional[str] = None,
+    direction: Optional[str] = None,
+):
+    mode = mode or "auto"
+    try:
+        fmt = document_export.check_format(output or "csv")
+        qs, columns = document_export.resolve(kind, params, actor=request.user, direction=direction)
+        total = qs.count() if mode == "auto" else None
+        if mode == "async" or (total is not None and total > document_export.sync_max_rows()):
+            export = document_export.enqueue_export(
+                actor=request.user, kind=kind, params=params, fmt=fmt, direction=direction
+            )
+            payload = {
+                "download_url": reverse("report-exports-download", kwargs={"pk": export.pk}),
+                "total_rows": total,
+                "export_id": export.pk,
+                "job_id": str(export.job_id),
+                "status": "QUEUED",
+                "status_url": reverse("report-exports-detail", kwargs={"pk": export.pk}),
+            }
+            return Response(payload, status=status.HTTP_202_ACCEPTED)
+    except ServiceError as exc:
+        raise ContractAPIException(str(exc), code=exc.code)
+
+    filename = document_export.filename_for(kind, fmt)
+    rows = document_export.iter_rows(qs, columns)
+    if fmt == "csv":
+        response = StreamingHttpResponse(
+            document_export.csv_chunks(rows, columns), content_type=document_export.CONTENT_TYPES["csv"]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+    tmp = tempfile.TemporaryFile()
+    document_export.write_file(tmp, fmt, rows, columns)
+    tmp.seek(0)
+    return FileResponse(
+        tmp, as_attachment=True, filename=filename, content_type=document_export.CONTENT_TYPES[fmt]
+    )
@@ -6,12 +6,13 @@ import django_filters
 from django.db.models import Q, QuerySet
 from django.db.models.fields import DateTimeField
 from documents.models import Document
+from documents.search import RANK_ANNOTATION, annotate_headline, search_documents
 
 
 class DocumentFilterSet(django_filters.FilterSet):
     """
     Tham số hỗ trợ:
-      - q: tìm kiếm nhanh (title, summary, content, numbers, sender, recipient) — chỉ add field nếu tồn tại
+      - q: tìm kiếm full-text bỏ dấu (title, sender) + trigram (title) + số hiệu (issue_number, received_number)
       - status: id hoặc code trạng thái (vd: 3 hoặc 'PUBLISHED')
       - doc_direction: 'di' | 'den' (viewset đã cố định nhưng vẫn hỗ trợ)
       - department, urgency, security: id (urgency/security tự map sang urgency_level/security_level nếu có)
@@ -20,10 +21,13 @@ class DocumentFilterSet(django_filters.FilterSet):
       - has_attachments: true/false
       - date_from/date_to: phạm vi ngày (issued_date cho outbound, received_date cho inbound)
       - mine: true → lọc theo assignees chứa request.user
-      - ordering: created_at, updated_at, issued_date, received_date (tiền tố '-' để giảm dần)
+      - ordering: created_at, updated_at, issued_date, received_date (tiền tố '-' để giảm dần);
+        'relevance' sắp theo độ liên quan khi có q (mặc định khi có q và không truyền ordering)
+      - highlight: true (kèm q) → mỗi item có thêm `title_highlight` với từ khớp bọc <mark>
     """
 
     q = django_filters.CharFilter(method="filter_q")
+    highlight = django_filters.BooleanFilter(method="filter_highlight")
     status = django_filters.CharFilter(method="filter_status")
     doc_direction = django_filters.CharFilter(method="filter_doc_direction")
 
@@ -47,6 +51,7 @@ class DocumentFilterSet(django_filters.FilterSet):
         model = Document
         fields = [
             "q",
+            "highlight",
             "status",
             "doc_direction",
             "department",
@@ -117,30 +122,26 @@ class DocumentFilterSet(django_filters.FilterSet):
 
     # ================= Implementations =================
     def filter_q(self, qs: QuerySet[Document], name: str, value: Optional[str]) -> QuerySet[Document]:
+        """
+        Full-text (bỏ dấu, khớp tiền tố) trên title/sender + trigram trên title + số hiệu.
+        Annotate `search_rank` để viewset sắp theo độ liên quan (xem documents/search.py).
+        """
         if not value:
             return qs
+        try:
+            qs, _matched = search_documents(qs, value)
+            return qs
+        except Exception:
+            # Trong trường hợp schema đặc biệt vẫn sinh lỗi, trả về qs để an toàn
+            return qs
 
-        # Chỉ add điều kiện cho những field thực sự tồn tại
-        cond = Q()
-        for field in (
-            "title",
-            "summary",
-            "content",
-            "issue_number",
-            "received_number",
-            "sender",
-            "recipient",
-        ):
-            if self._has_field(field):
-                cond |= Q(**{f"{field}__icontains": value})
-
-        # Nếu không field nào tồn tại, giữ nguyên qs (không raise lỗi)
-        if cond == Q():
+    def filter_highlight(self, qs: QuerySet[Document], name: str, value: Optional[bool]) -> QuerySet[Document]:
+        q = (self.data.get("q") if hasattr(self.data, "get") else None) or ""
+        if not value or not str(q).strip():
             return qs
         try:
-            return qs.filter(cond)
+            return annotate_headline(qs, str(q))
         except Exception:
-            # Trong trường hợp schema đặc biệt vẫn sinh lỗi, trả về qs để an toàn
             return qs
 
     def filter_status(self, qs: QuerySet[Document], name: str, value: Optional[str]) -> QuerySet[Document]:
@@ -245,7 +246,7 @@ class DocumentFilterSet(django_filters.FilterSet):
 
     def filter_ordering(self, qs: QuerySet[Document], name: str, value: Optional[str]) -> QuerySet[Document]:
         """
-        Hỗ trợ: created_at, updated_at, issued_date, received_date (có thể nhiều, phân tách bởi ',').
+        Hỗ trợ: created_at, updated_at, issued_date, received_date, relevance (có thể nhiều, phân tách bởi ',').
         Tự map sang field thực tế có tồn tại trong model để tránh lỗi.
         """
         if not value:
@@ -257,6 +258,11 @@ class DocumentFilterSet(django_filters.FilterSet):
         for p in parts:
             desc = p.startswith("-")
             key = p[1:] if desc else p
+            if key == "relevance":
+                # Chỉ có nghĩa khi đi kèm q (đã annotate search_rank); luôn giảm dần
+                if RANK_ANNOTATION in qs.query.annotations:
+                    order_by_fields.append(f"-{RANK_ANNOTATION}")
+                continue
             mapped = self._map_order_field(key)
             if mapped:
                 order_by_fields.append(f"-{mapped}" if desc else mapped)
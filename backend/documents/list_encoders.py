@@ -0,0 +1,264 @@
+# documents/list_encoders.py
+"""
+Fast-path cho list văn bản (DocumentSlimSerializer).
+
+Thay vì dựng model instance + ~17 SerializerMethodField + CompactUserSerializer lồng nhau
+cho từng dòng, encoder đọc một truy vấn phẳng `.values()` (JOIN sẵn các FK cần thiết,
+kèm annotate `assignee_count`/`has_attachments`) rồi ghép dict theo đúng thứ tự khóa
+và kiểu dữ liệu mà DocumentSlimSerializer trả ra.
+
+Các quy tắc "an toàn" của serializer (TinyDictSerializer.from_model, _pick_dt,
+CompactUserSerializer.get_full_name, build_etag) được "biên dịch" một lần từ metadata
+model: chỉ giữ các tên field thực sự tồn tại. Nếu model có thuộc tính không phải field
+(property/method) trùng các tên đó, encoder không dựng được → trả None để view dùng DRF.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Model, QuerySet
+
+from core.etag import build_etag_from_values
+from documents.models import Document
+from documents.search import HEADLINE_ANNOTATION
+
+# Cùng thứ tự ưu tiên với TinyDictSerializer.from_model / CompactUserSerializer / _pick_dt
+_TINY_NAME_ATTRS = ("name", "title", "full_name", "display_name")
+_TINY_CODE_ATTRS = ("code", "slug")
+_USER_NAME_ATTRS = ("full_name", "name", "display_name", "username", "email")
+_CREATED_ATTRS = ("created_at", "created_on", "created")
+_UPDATED_ATTRS = ("updated_at", "updated_on", "modified", "modified_at")
+_ETAG_TS_ATTRS = ("updated_at", "updated_on", "modified_at", "modified")
+
+
+class _Unsupported(Exception):
+    """Model có thuộc tính động mà `.values()` không tái hiện được."""
+
+
+def _concrete(model: type[Model]) -> Dict[str, Any]:
+    return {f.name: f for f in model._meta.concrete_fields}
+
+
+def _present(model: type[Model], names: Sequence[str]) -> List[str]:
+    """Giữ các tên là field thật; tên trùng property/method → không hỗ trợ fast-path."""
+    fields = _concrete(model)
+    out: List[str] = []
+    for name in names:
+        if name in fields:
+            out.append(name)
+        elif hasattr(model, name):
+            raise _Unsupported(f"{model.__name__}.{name}")
+    return out
+
+
+def _first_text(row: Dict[str, Any], keys: Sequence[str]) -> Optional[str]:
+    for key in keys:
+        value = row.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _first_datetime(row: Dict[str, Any], keys: Sequence[str]) -> Optional[datetime]:
+    for key in keys:
+        value = row.get(key)
+        if isinstance(value, datetime):
+            return value
+    return None
+
+
+class _TinySpec:
+    """Tiny object {id, name, code} cho một FK (None nếu Document không có field đó)."""
+
+    def __init__(self, attr: str):
+        self.attr = attr
+        self.fk_key: Optional[str] = None
+        self.name_keys: List[str] = []
+        self.code_keys: List[str] = []
+
+        field = _concrete(Document).get(attr)
+        if field is None:
+            if hasattr(Document, attr):
+                raise _Unsupported(f"Document.{attr}")
+            return
+        if not field.is_relation:
+            raise _Unsupported(f"Document.{attr}")
+        related = field.related_model
+        self.fk_key = field.attname
+        self.name_keys = [f"{attr}__{n}" for n in _present(related, _TINY_NAME_ATTRS)]
+        self.code_keys = [f"{attr}__{n}" for n in _present(related, _TINY_CODE_ATTRS)]
+
+    @property
+    def keys(self) -> List[str]:
+        return ([self.fk_key] if self.fk_key else []) + self.name_keys + self.code_keys
+
+    def encode(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.fk_key is None:
+            return None
+        fk = row.get(self.fk_key)
+        if fk is None:
+            return None
+        return {
+            "id": fk if isinstance(fk, int) else None,
+            "name": _first_text(row, self.name_keys),
+            "code": _first_text(row, self.code_keys),
+        }
+
+
+class SlimRowEncoder:
+    """Encoder đã biên dịch cho DocumentSlimSerializer (một instance dùng lại mọi request)."""
+
+    def __init__(self) -> None:
+        doc_fields = _concrete(Document)
+        self.pk_key = Document._meta.pk.name
+
+        self.direction_keys = _present(Document, ("direction", "doc_direction"))
+        self.status = _TinySpec("status")
+        self.department = _TinySpec("department")
+        self.urgency = _TinySpec("urgency")
+        self.security = _TinySpec("security")
+        self.created_keys = _present(Document, _CREATED_ATTRS)
+        self.updated_keys = _present(Document, _UPDATED_ATTRS)
+        self.etag_ts_keys = _present(Document, _ETAG_TS_ATTRS)
+
+        # status_name: getattr(status, "name") or getattr(status, "code")
+        self.status_name_keys: List[str] = []
+        if self.status.fk_key:
+            related = doc_fields["status"].related_model
+            self.status_name_keys = [f"status__{n}" for n in _present(related, ("name", "code"))]
+
+        # creator: CompactUserSerializer(id, username, email, full_name)
+        self.creator_fk: Optional[str] = None
+        self.creator_keys: List[str] = []
+        creator_field = doc_fields.get("created_by")
+        if creator_field is not None:
+            User = get_user_model()
+            if creator_field.related_model is not User or callable(getattr(User, "get_full_name", None)):
+                raise _Unsupported("created_by")
+            self.creator_fk = creator_field.attname
+            self.creator_pk_key = f"created_by__{User._meta.pk.name}"
+            self.creator_name_keys = [f"created_by__{n}" for n in _present(User, _USER_NAME_ATTRS)]
+            self.creator_keys = [self.creator_pk_key, "created_by__username", "created_by__email"] + self.creator_name_keys
+        elif hasattr(Document, "created_by"):
+            raise _Unsupported("Document.created_by")
+
+        for name in ("title", "sender", "issue_number", "received_number", "issued_date", "received_date"):
+            if name not in doc_fields:
+                raise _Unsupported(f"Document.{name}")
+
+        keys = [self.pk_key, "title", "sender", "issue_number", "received_number", "issued_date", "received_date"]
+        keys += self.direction_keys + self.status_name_keys + self.created_keys + self.updated_keys + self.etag_ts_keys
+        for spec in (self.status, self.department, self.urgency, self.security):
+            keys += spec.keys
+        if self.creator_fk:
+            keys += [self.creator_fk] + self.creator_keys
+        keys += ["assignee_count", "has_attachments"]
+        self.value_keys: Tuple[str, ...] = tuple(dict.fromkeys(keys))
+
+    # ------------------------------------------------------------------
+    def supports(self, qs: QuerySet) -> bool:
+        """Chỉ áp dụng cho queryset Document đã annotate bộ đếm (annotate_list_counters)."""
+        annotations = qs.query.annotations
+        return qs.model is Document and "assignee_count" in annotations and "has_attachments" in annotations
+
+    def values(self, qs: QuerySet) -> QuerySet:
+        """
+        Truy vấn phẳng cho list. Thêm cả các field đang dùng để ORDER BY để phân trang
+        keyset đọc được vị trí từ dict, và `title_highlight` nếu đã annotate.
+        """
+        local = _concrete(qs.model)
+        extra = [HEADLINE_ANNOTATION] if HEADLINE_ANNOTATION in qs.query.annotations else []
+        for item in qs.query.order_by:
+            if isinstance(item, str):
+                name = item.lstrip("-+")
+                if name in local and not local[name].is_relation:
+                    extra.append(name)
+        return qs.values(*dict.fromkeys(self.value_keys + tuple(extra)))
+
+    def encode(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        pk = row[self.pk_key]
+
+        direction = None
+        for key in self.direction_keys:
+            direction = row.get(key)
+            if direction:
+                break
+        if direction is not None:
+            direction = getattr(direction, "value", direction)
+
+        title = row.get("title")
+        sender = row.get("sender")
+        issued = row.get("issued_date")
+        received = row.get("received_date")
+
+        etag_ts: Any = None
+        for key in self.etag_ts_keys:
+            if row.get(key) is not None:
+                etag_ts = row[key]
+                break
+        if etag_ts is None:
+            etag_ts = row.get("created_at")
+
+        out = {
+            "id": int(pk) if pk is not None else None,
+            "title": str(title) if title is not None else None,
+            "doc_direction": direction,
+            "status": self.status.encode(row),
+            "status_name": _first_text_or_raw(row, self.status_name_keys) if row.get(self.status.fk_key or "") is not None else None,
+            "department": self.department.encode(row),
+            "urgency": self.urgency.encode(row),
+            "security": self.security.encode(row),
+            "sender": str(sender) if sender is not None else None,
+            "outgoing_number": row.get("issue_number"),
+            "incoming_number": row.get("received_number"),
+            "issued_date": issued.isoformat() if issued is not None else None,
+            "received_date": received.isoformat() if received is not None else None,
+            "creator": self._encode_creator(row),
+            "assignee_count": int(row.get("assignee_count") or 0),
+            "has_attachments": bool(row.get("has_attachments")),
+            "created_at": _first_datetime(row, self.created_keys),
+            "updated_at": _first_datetime(row, self.updated_keys),
+            "etag": build_etag_from_values("Document", pk, etag_ts),
+        }
+        headline = row.get(HEADLINE_ANNOTATION)
+        if headline is not None:
+            out[HEADLINE_ANNOTATION] = headline
+        return out
+
+    def encode_many(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        encode = self.encode
+        return [encode(row) for row in rows]
+
+    def _encode_creator(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.creator_fk or row.get(self.creator_fk) is None:
+            return None
+        user_pk = row.get(self.creator_pk_key)
+        username = row.get("created_by__username")
+        email = row.get("created_by__email")
+        return {
+            "id": user_pk if isinstance(user_pk, int) else None,
+            "username": str(username) if username is not None else None,
+            "email": str(email) if email is not None else None,
+            "full_name": _first_text(row, self.creator_name_keys),
+        }
+
+
+def _first_text_or_raw(row: Dict[str, Any], keys: Sequence[str]) -> Any:
+    """`a or b` như getter status_name: trả giá trị truthy đầu tiên (không strip)."""
+    for key in keys:
+        value = row.get(key)
+        if value:
+            return value
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_slim_row_encoder() -> Optional[SlimRowEncoder]:
+    """Encoder dùng chung; None nếu model hiện tại không tái hiện được bằng `.values()`."""
+    try:
+        return SlimRowEncoder()
+    except _Unsupported:
+        return None
@@ -0,0 +1,50 @@
+# documents/management/commands/backfill_search_vector.py
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Điền/tính lại cột documents.search_vector theo lô (duyệt theo PK, mỗi lô một transaction). "
+        "Mặc định chỉ xử lý dòng còn NULL; dùng --all sau khi đổi trọng số/cấu hình tìm kiếm."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000, help="Số dòng mỗi lô (mặc định 1000).")
+        parser.add_argument("--all", action="store_true", help="Tính lại mọi dòng, kể cả dòng đã có giá trị.")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Nghỉ giữa các lô (giây) để giảm tải DB.")
+
+    def handle(self, *args, **opts):
+        from documents.models import Document
+        from documents.search import document_search_vector
+
+        batch_size = int(opts["batch_size"])
+        if batch_size <= 0:
+            raise CommandError("--batch-size phải > 0")
+        pause = max(0.0, float(opts["sleep"]))
+
+        base = Document._base_manager.all()
+        if not opts["all"]:
+            base = base.filter(search_vector__isnull=True)
+
+        last_pk = None
+        total = 0
+        while True:
+            chunk = base.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                total += Document._base_manager.filter(pk__in=pks).update(search_vector=document_search_vector())
+            last_pk = pks[-1]
+            self.stdout.write(f"… {total} dòng (đến pk={last_pk})")
+            if pause:
+                time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(f"Đã cập nhật search_vector cho {total} văn bản."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import documents.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_search_unaccent'),
+        ('documents', '0004_document_issue_year_attachment_note'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='document',
+            name='doc_title_sender_fts',
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'sender', config='vn_unaccent'), name='doc_title_sender_fts'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(documents.search.ImmutableUnaccent('title'), name='gin_trgm_ops'), name='doc_title_trgm'),
+        ),
+    ]
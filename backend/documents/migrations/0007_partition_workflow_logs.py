@@ -0,0 +1,23 @@
+# document_workflow_logs → bảng phân vùng theo tháng trên `acted_at` (PostgreSQL); CSDL khác bỏ qua.
+from django.db import migrations
+
+from core.partitioning import convert_to_partitioned, convert_to_plain
+
+
+def forwards(apps, schema_editor):
+    convert_to_partitioned(schema_editor, "document_workflow_logs")
+
+
+def backwards(apps, schema_editor):
+    convert_to_plain(schema_editor, "document_workflow_logs")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0006_document_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
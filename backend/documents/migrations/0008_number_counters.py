@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:49
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+
+
+def backfill_scope_period(apps, schema_editor):
+    """Số đã cấp trước đây: bộ đếm theo năm + tiền tố (khớp scope mặc định của allocator)."""
+    Numbering = apps.get_model("documents", "OutgoingNumbering")
+    Numbering.objects.update(
+        scope=Concat(Value("outgoing:"), Coalesce("prefix", Value("")), output_field=CharField()),
+        period=Cast("year", CharField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_partition_workflow_logs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberCounter',
+            fields=[
+                ('counter_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('scope', models.CharField(max_length=60)),
+                ('period', models.CharField(max_length=10)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'number_counters',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='outgoingnumbering',
+            name='uq_year_seq',
+        ),
+        migrations.AddField(
+            model_name='outgoingnumbering',
+            name='period',
+            field=models.CharField(default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='outgoingnumbering',
+            name='scope',
+            field=models.CharField(default='outgoing:', max_length=60),
+        ),
+        migrations.RunPython(backfill_scope_period, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='outgoingnumbering',
+            constraint=models.UniqueConstraint(fields=('scope', 'period', 'seq'), name='uq_numbering_scope_period_seq'),
+        ),
+        migrations.AddConstraint(
+            model_name='numbercounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'period'), name='uq_number_counter_scope_period'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:53
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_number_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberReservation',
+            fields=[
+                ('reservation_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('period', models.CharField(max_length=10)),
+                ('first_value', models.BigIntegerField()),
+                ('last_value', models.BigIntegerField()),
+                ('next_value', models.BigIntegerField()),
+                ('reserved_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('register_book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='documents.registerbook')),
+                ('reserved_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'number_reservations',
+                'indexes': [models.Index(fields=['register_book', 'reserved_at'], name='number_rese_registe_7afde2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_number_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentattachment',
+            name='sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documentattachment',
+            name='size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
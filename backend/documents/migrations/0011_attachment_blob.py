@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_attachment_blobs'),
+        ('documents', '0010_attachment_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='document_attachments', to='common.attachmentblob'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+# Trọng số tại thời điểm tạo cột (documents.search.SEARCH_VECTOR_WEIGHTS) – cố định trong migration
+WEIGHTS = (("title", "A"), ("issue_number", "A"), ("document_code", "A"), ("sender", "B"))
+
+
+def _vector():
+    vector = None
+    for name, weight in WEIGHTS:
+        part = SearchVector(name, config="vn_unaccent", weight=weight)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def _backfill(apps, schema_editor):
+    """
+    Điền search_vector cho văn bản có sẵn (0006 thêm cột NULL và bỏ index biểu thức cũ → không
+    điền thì tìm kiếm trả rỗng). Duyệt theo PK, mỗi lô một transaction (migration không atomic)
+    để không giữ khoá cả bảng; chỉ dòng còn NULL nên chạy lại an toàn.
+    """
+    Document = apps.get_model("documents", "Document")
+    pending = Document._base_manager.filter(search_vector__isnull=True).order_by("pk")
+    last_pk = None
+    while True:
+        chunk = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+        pks = list(chunk.values_list("pk", flat=True)[:BATCH_SIZE])
+        if not pks:
+            break
+        with transaction.atomic():
+            Document._base_manager.filter(pk__in=pks).update(search_vector=_vector())
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('documents', '0011_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(_backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:40
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_backfill_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('issue_number'), name='gin_trgm_ops'), name='doc_issue_number_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['received_number'], name='doc_received_number_idx'),
+        ),
+    ]
@@ -3,10 +3,12 @@ import uuid
 from django.conf import settings
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Upper
 from django.utils import timezone
-from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from accounts.models import Department
+from documents.search import SEARCH_VECTOR_FIELDS, ImmutableUnaccent, document_search_vector
 from catalog.models import (
     Field,
     DocumentType,
@@ -31,10 +33,17 @@ class Document(models.Model):
             models.Index(fields=["department"]),
             models.Index(fields=["issued_date"]),
             models.Index(fields=["created_at"]),
+            GinIndex(fields=["search_vector"], name="doc_search_vector_gin"),
             GinIndex(
-                SearchVector("title", "sender", config="simple"),
-                name="doc_title_sender_fts",
+                OpClass(ImmutableUnaccent("title"), name="gin_trgm_ops"),
+                name="doc_title_trgm",
             ),
+            # Tìm theo số hiệu (documents.search._number_q): LIKE '%...%' trên upper(issue_number)
+            GinIndex(
+                OpClass(Upper("issue_number"), name="gin_trgm_ops"),
+                name="doc_issue_number_trgm",
+            ),
+            models.Index(fields=["received_number"], name="doc_received_number_idx"),
         ]
         constraints = [
             # doc_direction='di' => issue_number & issued_date NOT NULL
@@ -94,6 +103,9 @@ class Document(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # tsvector có trọng số (documents.search.SEARCH_VECTOR_WEIGHTS) – chỉ ghi qua refresh_search_vector
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return f"[{self.doc_direction}] {self.title}"
 
@@ -102,7 +114,20 @@ class Document(models.Model):
             self.issue_year = self.issued_date.year
         elif self.doc_direction == Document.Direction.DU_THAO and self.issued_date:
             self.issue_year = self.issued_date.year
-        return super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        result = super().save(*args, **kwargs)
+        # save(update_fields=[...]) chỉ đổi trạng thái/người ký... → không cần tính lại tsvector
+        if update_fields is None or SEARCH_VECTOR_FIELDS.intersection(update_fields):
+            self.refresh_search_vector()
+        return result
+
+    def refresh_search_vector(self) -> None:
+        """Tính lại search_vector trong DB (một UPDATE theo PK, không đụng updated_at)."""
+        if self.pk is None:
+            return
+        type(self)._base_manager.filter(pk=self.pk).update(search_vector=document_search_vector())
+        # Giá trị thật nằm ở DB; bỏ bản cũ trên instance để lần đọc sau tự nạp lại
+        self.__dict__.pop("search_vector", None)
 
 
 class DocumentVersion(models.Model):
@@ -200,13 +225,16 @@ class OutgoingNumbering(models.Model):
     class Meta:
         db_table = "outgoing_numbering"
         constraints = [
-            models.UniqueConstraint(fields=["year", "seq"], name="uq_year_seq"),
+            # seq duy nhất trong một bộ đếm (xem NumberCounter)
+            models.UniqueConstraint(fields=["scope", "period", "seq"], name="uq_numbering_scope_period_seq"),
         ]
         indexes = [models.Index(fields=["issued_at"])]
 
     id = models.BigAutoField(primary_key=True)
     year = models.IntegerField()
     seq = models.IntegerField()
+    scope = models.CharField(max_length=60, default="outgoing:")
+    period = models.CharField(max_length=10, default="")
     prefix = models.CharField(max_length=20, null=True, blank=True)
     postfix = models.CharField(max_length=20, null=True, blank=True)
     issued_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
@@ -215,6 +243,55 @@ class OutgoingNumbering(models.Model):
     # document = models.OneToOneField(Document, null=True, blank=True, on_delete=models.SET_NULL)
 
 
+class NumberCounter(models.Model):
+    """
+    Bộ đếm cấp số: một dòng cho mỗi (scope, period), tăng bằng UPDATE ... RETURNING trong transaction
+    phát hành (workflow.services.numbering) → khoá đúng một dòng, rollback trả lại số (không nhảy số).
+      - scope: "outgoing:{prefix}" | "rule:{rule_id}" | "book:{register_id}"
+      - period: kỳ reset theo reset_policy ("2025", "2025-Q1", "2025-03", "all")
+    """
+
+    class Meta:
+        db_table = "number_counters"
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "period"], name="uq_number_counter_scope_period"),
+        ]
+
+    counter_id = models.BigAutoField(primary_key=True)
+    scope = models.CharField(max_length=60)
+    period = models.CharField(max_length=10)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.scope}@{self.period}={self.last_value}"
+
+
+class NumberReservation(models.Model):
+    """
+    Khối số liên tiếp [first_value, last_value] đã giữ trước từ bộ đếm của một sổ đăng ký
+    (một lần UPDATE bộ đếm cho cả lô). Các lệnh đăng ký lần lượt lấy next_value; số giữ mà
+    không dùng tới vẫn bị bỏ qua trong sổ.
+    """
+
+    class Meta:
+        db_table = "number_reservations"
+        indexes = [models.Index(fields=["register_book", "reserved_at"])]
+
+    reservation_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    register_book = models.ForeignKey("RegisterBook", on_delete=models.CASCADE, related_name="reservations")
+    period = models.CharField(max_length=10)
+    first_value = models.BigIntegerField()
+    last_value = models.BigIntegerField()
+    next_value = models.BigIntegerField()
+    reserved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
+    reserved_at = models.DateTimeField(default=timezone.now)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.last_value - self.next_value + 1)
+
+
 class Organization(models.Model):
     class Meta:
         db_table = "organizations"
@@ -281,6 +358,11 @@ class DocumentAttachment(models.Model):
     file_name = models.CharField(max_length=200)
     storage_path = models.CharField(max_length=500)
     note = models.CharField(max_length=250, null=True, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # hex, tính khi lưu tệp
+    blob = models.ForeignKey(
+        "common.AttachmentBlob", null=True, blank=True, on_delete=models.PROTECT, related_name="document_attachments"
+    )
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     uploaded_at = models.DateTimeField(default=timezone.now)
 
@@ -0,0 +1,134 @@
+# documents/search.py
+"""
+Tìm kiếm văn bản trên PostgreSQL cho tham số `q`.
+
+- Full-text: cột lưu sẵn `documents.search_vector` (tsvector có trọng số, cấu hình
+  `vn_unaccent` bỏ dấu tiếng Việt, GIN index `doc_search_vector_gin`). Cột được cập nhật
+  ở Document.save; dữ liệu có sẵn được điền theo lô ở migration documents 0012 (tính lại sau khi
+  đổi trọng số bằng `manage.py backfill_search_vector --all`).
+  Mỗi từ khoá được match theo tiền tố (`từ:*`) và AND với nhau; rank đọc thẳng từ cột.
+- Trigram (pg_trgm): fallback cho từ khoá ngắn/một phần từ hoặc gõ sai —
+  LIKE '%...%' và word-similarity trên `immutable_unaccent(title)` (GIN gin_trgm_ops).
+- Số hiệu: nếu từ khoá có chữ số thì so thêm issue_number (LIKE trên upper(), GIN gin_trgm_ops) /
+  received_number (btree).
+- Highlight: `annotate_headline` gắn `title_highlight` (ts_headline trên title) cho list.
+
+Cấu hình `vn_unaccent` và hàm `immutable_unaccent` được tạo ở migration common 0003.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Func, Q, QuerySet, TextField, Value
+from django.db.models.functions import Upper
+
+SEARCH_CONFIG = "vn_unaccent"
+RANK_ANNOTATION = "search_rank"
+HEADLINE_ANNOTATION = "title_highlight"
+
+# Trọng số từng field trong search_vector (A cao nhất). summary/content chưa có trên model;
+# khi bổ sung chỉ cần thêm vào đây (C/D) rồi chạy lại backfill_search_vector.
+SEARCH_VECTOR_WEIGHTS = (
+    ("title", "A"),
+    ("issue_number", "A"),
+    ("document_code", "A"),
+    ("sender", "B"),
+)
+SEARCH_VECTOR_FIELDS = frozenset(name for name, _w in SEARCH_VECTOR_WEIGHTS)
+
+# Từ khoá ngắn hơn ngưỡng này thì trigram không hiệu quả → chỉ dùng FTS tiền tố
+_TRIGRAM_MIN_LEN = 3
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class ImmutableUnaccent(Func):
+    """lower(unaccent(x)) bọc IMMUTABLE để dùng được trong index biểu thức."""
+
+    function = "immutable_unaccent"
+    output_field = TextField()
+
+
+def document_search_vector() -> SearchVector:
+    """Biểu thức tính giá trị cho cột search_vector (setweight(to_tsvector(...)) || ...)."""
+    vector = None
+    for name, weight in SEARCH_VECTOR_WEIGHTS:
+        part = SearchVector(name, config=SEARCH_CONFIG, weight=weight)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def _tokens(value: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(value) if t]
+
+
+def build_search_query(value: str) -> Optional[SearchQuery]:
+    """'quyet dinh' → to_tsquery('vn_unaccent', 'quyet:* & dinh:*'); None nếu không có token."""
+    tokens = _tokens(value)
+    if not tokens:
+        return None
+    raw = " & ".join(f"{t}:*" for t in tokens)
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type="raw")
+
+
+def _number_q(value: str) -> Q:
+    """
+    So số hiệu; mọi nhánh đều có index (doc_issue_number_trgm, doc_received_number_idx) để OR với
+    điều kiện FTS/trigram vẫn là BitmapOr thay vì quét cả bảng. Cần alias `_search_issue_number`.
+    """
+    cond = Q()
+    if any(ch.isdigit() for ch in value):
+        cond |= Q(_search_issue_number__contains=Upper(Value(value, output_field=TextField())))
+    if value.isdigit():
+        try:
+            cond |= Q(received_number=int(value))
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return cond
+
+
+def search_documents(qs: QuerySet, value: str) -> Tuple[QuerySet, bool]:
+    """
+    Lọc `qs` theo từ khoá và annotate `search_rank`.
+    Trả (queryset, matched) – matched=False khi từ khoá rỗng sau khi tách token.
+    """
+    value = (value or "").strip()
+    query = build_search_query(value)
+    if query is None:
+        return qs, False
+
+    aliases = {}
+    cond = Q(search_vector=query)
+
+    # Trigram: so cả cụm từ khoá (đã bỏ dấu) – bắt một phần từ và lỗi gõ
+    if len(value) >= _TRIGRAM_MIN_LEN:
+        needle = ImmutableUnaccent(Value(value, output_field=TextField()))
+        aliases["_search_title"] = ImmutableUnaccent(F("title"))
+        cond |= Q(_search_title__contains=needle)
+        cond |= Q(_search_title__trigram_word_similar=needle)
+
+    if any(ch.isdigit() for ch in value):
+        aliases["_search_issue_number"] = Upper(F("issue_number"))
+    cond |= _number_q(value)
+
+    if aliases:
+        qs = qs.alias(**aliases)
+    qs = qs.filter(cond)
+    return qs.annotate(**{RANK_ANNOTATION: SearchRank(F("search_vector"), query)}), True
+
+
+def annotate_headline(qs: QuerySet, value: str) -> QuerySet:
+    """Gắn `title_highlight`: title với các từ khớp bọc <mark>…</mark> (bỏ dấu như khi tìm)."""
+    query = build_search_query((value or "").strip())
+    if query is None:
+        return qs
+    headline = SearchHeadline(
+        "title",
+        query,
+        config=SEARCH_CONFIG,
+        start_sel="<mark>",
+        stop_sel="</mark>",
+        highlight_all=True,
+    )
+    return qs.annotate(**{HEADLINE_ANNOTATION: headline})
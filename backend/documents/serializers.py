@@ -1,10 +1,11 @@
 # documents/serializers.py
 from __future__ import annotations
 from typing import Any, Optional, Mapping, Iterable, List, Callable, Dict, cast
-from datetime import datetime
+from datetime import date, datetime
 
 from django.contrib.auth import get_user_model
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models.query import QuerySet
 from rest_framework import serializers
 from rest_framework.request import Request
@@ -45,6 +46,8 @@ from documents.models import (
 )
 
 from core.etag import build_etag
+from documents.search import HEADLINE_ANNOTATION
+from workflow.services import numbering
 
 User = get_user_model()
 
@@ -98,7 +101,7 @@ def _pick_dt(obj: Any, *names: str) -> Optional[datetime]:
 
 
 # ========== Config Serializers (Register book / Numbering / Templates) ==========
-class _OrgConfigSerializerMixin(serializers.ModelSerializer):
+class _OrgConfigSerializerMixin(ServiceErrorToDRFMixin, serializers.ModelSerializer):
     department = serializers.SerializerMethodField()
     department_id = serializers.IntegerField(
         required=False, allow_null=True, write_only=True
@@ -129,6 +132,15 @@ class _OrgConfigSerializerMixin(serializers.ModelSerializer):
     def get_department(self, obj: Any) -> Optional[Dict[str, Any]]:
         return TinyDictSerializer.from_model(getattr(obj, "department", None))
 
+    def _reset_counter(self, plan: Any, next_sequence: int) -> None:
+        """Sửa next_sequence = đặt lại bộ đếm của kỳ hiện tại (reset thủ công); số đã cấp → lỗi field."""
+        from workflow.services.errors import ServiceError
+
+        try:
+            numbering.set_next_value(plan, next_sequence)
+        except ServiceError as err:
+            self.raise_from_service(err)
+
 
 class RegisterBookSerializer(_OrgConfigSerializerMixin):
     class Meta:
@@ -178,7 +190,11 @@ class RegisterBookSerializer(_OrgConfigSerializerMixin):
         user = self._current_user()
         if user:
             validated_data.setdefault("updated_by", user)
-        return super().update(instance, validated_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if "next_sequence" in validated_data:
+                self._reset_counter(numbering.plan_for_book(instance, date.today()), instance.next_sequence)
+        return instance
 
 
 class NumberingRuleSerializer(_OrgConfigSerializerMixin):
@@ -231,7 +247,11 @@ class NumberingRuleSerializer(_OrgConfigSerializerMixin):
         user = self._current_user()
         if user:
             validated_data.setdefault("updated_by", user)
-        return super().update(instance, validated_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if "next_sequence" in validated_data:
+                self._reset_counter(numbering.plan_for_rule(instance, date.today()), instance.next_sequence)
+        return instance
 
 
 class DocumentTemplateSerializer(serializers.ModelSerializer):
@@ -417,10 +437,12 @@ class DocumentSlimSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_assignee_count(self, obj: Any) -> int:
-        m2m = getattr(obj, "assignees", None)
-        if m2m is None:
-            return 0
-        count_fn: Optional[Callable[[], int]] = getattr(m2m, "count", None)  # type: ignore[attr-defined]
+        # Ưu tiên giá trị annotate sẵn từ queryset (documents.views_base.annotate_list_counters)
+        annotated = getattr(obj, "assignee_count", None)
+        if annotated is not None:
+            return int(annotated)
+        rel = getattr(obj, "assignments", None)
+        count_fn: Optional[Callable[[], int]] = getattr(rel, "count", None) if rel is not None else None  # type: ignore[attr-defined]
         if callable(count_fn):
             try:
                 return int(count_fn())
@@ -430,6 +452,9 @@ class DocumentSlimSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_has_attachments(self, obj: Any) -> bool:
+        annotated = getattr(obj, "has_attachments", None)
+        if annotated is not None:
+            return bool(annotated)
         rel = getattr(obj, "attachments", None)
         exists_fn: Optional[Callable[[], bool]] = getattr(rel, "exists", None) if rel is not None else None  # type: ignore[attr-defined]
         if callable(exists_fn):
@@ -452,6 +477,14 @@ class DocumentSlimSerializer(serializers.ModelSerializer):
     def get_updated_at(self, obj: Any) -> Optional[datetime]:
         return _pick_dt(obj, "updated_at", "updated_on", "modified", "modified_at")
 
+    def to_representation(self, instance: Any) -> Dict[str, Any]:
+        data = super().to_representation(instance)
+        # Chỉ có khi list gọi ?q=...&highlight=true (documents.search.annotate_headline)
+        headline = getattr(instance, HEADLINE_ANNOTATION, None)
+        if headline is not None:
+            data[HEADLINE_ANNOTATION] = headline
+        return data
+
 
 # ========== Detail ==========
 class DocumentAttachmentSerializer(serializers.ModelSerializer):
@@ -1169,6 +1202,8 @@ class PublishActionSerializer(_BaseDocumentActionSerializer):
     prefix = TrimmedCharField(required=False, allow_blank=True, allow_null=True)
     postfix = TrimmedCharField(required=False, allow_blank=True, allow_null=True)
     year = serializers.IntegerField(required=False, allow_null=True, min_value=1900)
+    numbering_rule_id = serializers.IntegerField(required=False, allow_null=True)
+    register_book_id = serializers.IntegerField(required=False, allow_null=True)
 
     def validate_issue_number(self, v: Optional[str]) -> Optional[str]:
         if v is None:
@@ -1189,6 +1224,8 @@ class PublishActionSerializer(_BaseDocumentActionSerializer):
                 prefix=data.get("prefix"),
                 postfix=data.get("postfix"),
                 year=data.get("year"),
+                numbering_rule=data.get("numbering_rule_id"),
+                register_book=data.get("register_book_id"),
                 comment=data.get("comment"),
                 meta=data.get("meta"),
             )
@@ -1270,15 +1307,37 @@ class RegisterImportResponseSerializer(drf_serializers.Serializer):
     job_id = drf_serializers.CharField(required=False, allow_null=True)
 
 
+class NumberReservationRequestSerializer(drf_serializers.Serializer):
+    count = drf_serializers.IntegerField(min_value=1, max_value=1000)
+    date = drf_serializers.DateField(required=False, allow_null=True, help_text="Ngày xác định kỳ reset (mặc định hôm nay).")
+
+
+class NumberReservationSerializer(drf_serializers.Serializer):
+    reservation_id = drf_serializers.UUIDField()
+    register_id = drf_serializers.IntegerField(source="register_book_id")
+    period = drf_serializers.CharField()
+    first_value = drf_serializers.IntegerField()
+    last_value = drf_serializers.IntegerField()
+    next_value = drf_serializers.IntegerField()
+    remaining = drf_serializers.IntegerField()
+    reserved_at = drf_serializers.DateTimeField()
+
+
 class RegisterExportQuerySerializer(drf_serializers.Serializer):
     register_id = drf_serializers.IntegerField(required=False, min_value=1)
     year = drf_serializers.IntegerField(required=False, min_value=2000)
-    direction = drf_serializers.CharField(required=False, allow_blank=True)
+    direction = drf_serializers.ChoiceField(choices=["den", "di"], required=False)
+    output = drf_serializers.ChoiceField(choices=["csv", "xlsx"], required=False, default="csv")
+    mode = drf_serializers.ChoiceField(choices=["auto", "sync", "async"], required=False, default="auto")
 
 
 class RegisterExportResponseSerializer(drf_serializers.Serializer):
     download_url = drf_serializers.CharField()
-    total_rows = drf_serializers.IntegerField(required=False)
+    total_rows = drf_serializers.IntegerField(required=False, allow_null=True)
+    export_id = drf_serializers.IntegerField(required=False)
+    job_id = drf_serializers.CharField(required=False)
+    status = drf_serializers.CharField(required=False)
+    status_url = drf_serializers.CharField(required=False)
 
 
 class DocumentImportSerializer(drf_serializers.Serializer):
@@ -1287,26 +1346,91 @@ class DocumentImportSerializer(drf_serializers.Serializer):
         child=drf_serializers.DictField(), required=False, allow_empty=True
     )
     file = drf_serializers.FileField(required=False, allow_empty_file=False)
+    format = drf_serializers.ChoiceField(
+        choices=["csv", "xlsx", "ndjson"],
+        required=False,
+        help_text="Bỏ trống → đoán theo đuôi file (.csv/.xlsx/.ndjson/.jsonl)",
+    )
+
+    def validate_direction(self, value):
+        if value and value not in Document.Direction.values:
+            raise drf_serializers.ValidationError("Chỉ nhận den, di, du_thao.")
+        return value
+
+    def validate(self, attrs):
+        if attrs.get("file") is None and not attrs.get("items"):
+            raise drf_serializers.ValidationError({"file": "Cần file hoặc items để nhập."})
+        return attrs
 
 
 class DocumentImportResponseSerializer(drf_serializers.Serializer):
     accepted = drf_serializers.IntegerField()
     skipped = drf_serializers.IntegerField()
     job_id = drf_serializers.CharField(required=False, allow_null=True)
+    status = drf_serializers.CharField(required=False)
+    status_url = drf_serializers.CharField(required=False)
+
+
+class DocumentImportJobSerializer(drf_serializers.Serializer):
+    """Tiến độ job nhập (notifications.Job + progress_json do workflow.services.document_import ghi)."""
+
+    job_id = drf_serializers.CharField()
+    status = drf_serializers.CharField()
+    attempts = drf_serializers.IntegerField()
+    last_error = drf_serializers.CharField(allow_null=True)
+    filename = drf_serializers.CharField(source="payload_json.filename", allow_null=True, default=None)
+    format = drf_serializers.CharField(source="payload_json.format", default=None)
+    processed = drf_serializers.SerializerMethodField()
+    created = drf_serializers.SerializerMethodField()
+    failed = drf_serializers.SerializerMethodField()
+    finished = drf_serializers.SerializerMethodField()
+    errors = drf_serializers.SerializerMethodField()
+
+    def _progress(self, obj) -> Dict[str, Any]:
+        return obj.progress_json or {}
+
+    def get_processed(self, obj) -> int:
+        return int(self._progress(obj).get("processed", 0))
+
+    def get_created(self, obj) -> int:
+        return int(self._progress(obj).get("created", 0))
+
+    def get_failed(self, obj) -> int:
+        return int(self._progress(obj).get("failed", 0))
+
+    def get_finished(self, obj) -> bool:
+        return bool(self._progress(obj).get("finished", False))
+
+    def get_errors(self, obj) -> List[Dict[str, Any]]:
+        return list(self._progress(obj).get("errors", []))
 
 
 class DocumentExportQuerySerializer(drf_serializers.Serializer):
+    """Tham số điều khiển xuất; các bộ lọc còn lại giống API danh sách (DocumentFilterSet)."""
+
     direction = drf_serializers.CharField(required=False, allow_blank=True)
     status = drf_serializers.CharField(required=False, allow_blank=True)
-    level = drf_serializers.CharField(required=False, allow_blank=True)
     keyword = drf_serializers.CharField(required=False, allow_blank=True)
-    page_size = drf_serializers.IntegerField(required=False, min_value=1, max_value=2000)
     ordering = drf_serializers.CharField(required=False, allow_blank=True)
+    # `format` trùng tham số chọn renderer của DRF → dùng `output`
+    output = drf_serializers.ChoiceField(choices=["csv", "xlsx"], required=False, default="csv")
+    mode = drf_serializers.ChoiceField(
+        choices=["auto", "sync", "async"],
+        required=False,
+        default="auto",
+        help_text="auto: stream ngay nếu <= EXPORT_SYNC_MAX_ROWS dòng, lớn hơn chạy nền (202)",
+    )
 
 
 class DocumentExportResponseSerializer(drf_serializers.Serializer):
+    """Phản hồi 202 khi xuất chạy nền; đường đồng bộ trả thẳng file CSV/XLSX."""
+
     download_url = drf_serializers.CharField()
-    total_rows = drf_serializers.IntegerField(required=False)
+    total_rows = drf_serializers.IntegerField(required=False, allow_null=True)
+    export_id = drf_serializers.IntegerField(required=False)
+    job_id = drf_serializers.CharField(required=False)
+    status = drf_serializers.CharField(required=False)
+    status_url = drf_serializers.CharField(required=False)
 
 
 # ------- Inbound action request payloads (schema-only) --------
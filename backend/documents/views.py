@@ -6,7 +6,6 @@ from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.http import FileResponse, Http404
 from django.utils import timezone
@@ -18,6 +17,7 @@ from rest_framework.response import Response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 
+from common import downloads, uploads
 from core.exceptions import ForbiddenError
 from documents.models import (
     DispatchOutbox,
@@ -51,13 +51,15 @@ from documents.serializers import (
 )
 from documents.views_base import DocumentBaseViewSet
 from documents.views_outbound import _att_first_filefield_name, _att_has_field
-from workflow.services import rbac
+from workflow.services import blob_store, rbac
 from workflow.services.errors import ServiceError
 from workflow.services.outbound_service import OutboundService
 from workflow.services.rbac import Act, Role
 
 User = get_user_model()
 
+_UPLOAD_ACTIONS = ("attachment_upload_init", "attachment_upload", "attachment_upload_complete")
+
 
 def _user_role(user) -> Optional[str]:
     return rbac.get_single_role_code(user)
@@ -97,6 +99,8 @@ class DocumentViewSet(
 
     def resolve_required_act(self, action=None, method=None, request=None, obj=None):
         method = (method or "").upper()
+        if action in _UPLOAD_ACTIONS:
+            request = None  # thân PUT chunk là bytes thô — không để DRF parse request.data
         direction = self._direction_from_source(request=request, obj=obj)
 
         def _by_direction(in_act: Act, out_act: Act) -> Act:
@@ -118,12 +122,14 @@ class DocumentViewSet(
             return Act.OUT_APPROVE
         if action == "versions":
             return Act.VIEW if method == "GET" else _by_direction(Act.IN_EDIT_NOTE, Act.OUT_DRAFT_EDIT)
-        if action in ("attachments", "delete_attachment", "download_attachment"):
-            if method in ("GET",):
+        if action in ("attachments", "delete_attachment", "download_attachment") or action in _UPLOAD_ACTIONS:
+            if method in ("GET", "HEAD"):
                 return Act.VIEW
             return _by_direction(Act.IN_EDIT_NOTE, Act.OUT_DRAFT_EDIT)
         if action == "workflow_logs":
             return Act.VIEW
+        if action in ("import_documents", "import_status"):
+            return Act.IN_IMPORT_EXPORT
         if action == "dispatches":
             return Act.OUT_PUBLISH
         if action == "submit":
@@ -476,13 +482,14 @@ class DocumentViewSet(
             getattr(att, ff).save(name, upload, save=False)
             att.save()
         else:
-            raw = upload.read() if hasattr(upload, "read") else bytes(upload)
             if _att_has_field(DocumentAttachment, "storage_path"):
-                storage_path = default_storage.save(
-                    f"attachments/{uuid4()}_{name}",
-                    ContentFile(raw),
-                )
-                payload["storage_path"] = storage_path
+                # Kho blob theo SHA-256: đọc theo khối (UploadedFile.chunks), nội dung trùng không ghi lại
+                if hasattr(upload, "chunks"):
+                    blob = blob_store.store(upload.chunks)
+                else:
+                    raw = bytes(upload)
+                    blob = blob_store.store(lambda: [raw])
+                payload.update(blob_store.attachment_fields(blob))
             att = DocumentAttachment.objects.create(**payload)
         return Response(DocumentAttachmentSerializer(att).data, status=status.HTTP_201_CREATED)
 
@@ -525,8 +532,45 @@ class DocumentViewSet(
         storage_path = getattr(att, "storage_path", None)
         if not storage_path:
             raise Http404("Không có dữ liệu tệp.")
-        file_handle = default_storage.open(storage_path, "rb")
-        return FileResponse(file_handle, filename=getattr(att, "file_name", "download"))
+        return downloads.attachment_response(
+            request,
+            storage_path=storage_path,
+            file_name=getattr(att, "file_name", None) or "download",
+            sha256=getattr(att, "sha256", "") or "",
+            size=getattr(att, "size", None),
+        )
+
+    # ---- Tải đính kèm theo từng phần (common.uploads) -----------------------------
+    @action(detail=True, methods=["post"], url_path=r"attachments/uploads")
+    def attachment_upload_init(self, request, *args, **kwargs):
+        doc = self.get_object()
+        return uploads.init_upload(
+            request, target_type="document", target_id=doc.pk, validate_name=self._validate_upload_ext
+        )
+
+    @action(
+        detail=True,
+        methods=["get", "put", "delete"],
+        url_path=r"attachments/uploads/(?P<upload_id>[0-9a-fA-F-]{36})",
+    )
+    def attachment_upload(self, request, upload_id: str, *args, **kwargs):
+        doc = self.get_object()
+        return uploads.upload_detail(request, target_type="document", target_id=doc.pk, upload_id=upload_id)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"attachments/uploads/(?P<upload_id>[0-9a-fA-F-]{36})/complete",
+    )
+    def attachment_upload_complete(self, request, upload_id: str, *args, **kwargs):
+        doc = self.get_object()
+        return uploads.complete_upload(
+            request,
+            target_type="document",
+            target_id=doc.pk,
+            upload_id=upload_id,
+            serializer_class=DocumentAttachmentSerializer,
+        )
 
     # ---- Dispatches --------------------------------------------------------------
     @action(detail=True, methods=["get", "post"], url_path="dispatches")
@@ -1,34 +1,47 @@
 # documents/views_base.py
 from typing import Any, Optional, Iterable, List, Dict, Set
-from uuid import uuid4
 
 from django.conf import settings
 from django.core.exceptions import FieldDoesNotExist
-from django.db.models import Prefetch, QuerySet
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, QuerySet, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
 
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
 
+from core.parsers import ORJSONParser
 from core.pagination import DefaultPageNumberPagination
 from core.docs import DEFAULT_ERROR_RESPONSES
+from documents.exports import export_response
 from documents.filters import DocumentFilterSet
-from documents.models import Document, DocumentAttachment
+from documents.list_encoders import get_slim_row_encoder
+from documents.search import RANK_ANNOTATION
+from documents.models import Document, DocumentAssignment, DocumentAttachment
 from documents.permissions import DocumentPermission
 from documents.serializers import (
     DocumentSlimSerializer,
     DocumentDetailSerializer,
     DocumentImportSerializer,
     DocumentImportResponseSerializer,
+    DocumentImportJobSerializer,
     DocumentExportQuerySerializer,
     DocumentExportResponseSerializer,
 )
-from core.exceptions import PreconditionFailedError, PreconditionRequiredError
+from core.exceptions import ContractAPIException, PreconditionFailedError, PreconditionRequiredError
 from core.etag import build_etag
+from notifications.models import Job
+from workflow.services import document_import
+from workflow.services.errors import ServiceError
+
+
+# Tham số điều khiển/phân trang không phải bộ lọc → không lưu vào yêu cầu xuất
+_EXPORT_SKIP_PARAMS = ("output", "mode", "page", "page_size", "cursor")
 
 
 class ServiceErrorMixin:
@@ -137,6 +150,25 @@ def _safe_prefetch_related(qs: QuerySet, *names: str, **prefetch_map: Any) -> Qu
     return qs.prefetch_related(*prefetches) if prefetches else qs
 
 
+def annotate_list_counters(qs: QuerySet) -> QuerySet:
+    """
+    Gắn sẵn `assignee_count` (COUNT subquery) và `has_attachments` (EXISTS) để
+    DocumentSlimSerializer đọc trực tiếp, thay vì mỗi dòng gọi .count()/.exists().
+    Dùng subquery (không JOIN + GROUP BY) nên không nhân dòng với select_related.
+    """
+    assignee_count = (
+        DocumentAssignment.objects.filter(document=OuterRef("pk"))
+        .order_by()
+        .values("document")
+        .annotate(c=Count("*"))
+        .values("c")[:1]
+    )
+    return qs.annotate(
+        assignee_count=Coalesce(Subquery(assignee_count, output_field=IntegerField()), 0),
+        has_attachments=Exists(DocumentAttachment.objects.filter(document=OuterRef("pk"))),
+    )
+
+
 class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
     """
     Base cho Inbound/Outbound:
@@ -149,6 +181,8 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated, DocumentPermission]
     pagination_class = DefaultPageNumberPagination
     filterset_class = DocumentFilterSet
+    # Cho phép ?cursor= (keyset) thay cho page/page_size khi duyệt danh sách lớn
+    cursor_pagination = True
 
     # Chuẩn hoá lookup theo định hướng kiến trúc (tránh phụ thuộc tên cột PK)
     lookup_field = "pk"
@@ -175,8 +209,9 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
         - Dùng _safe_select_related cho các FK hay dùng trong list/retrieve.
         - Prefetch attachments có order_by để ổn định.
         - Lọc theo hướng văn bản nếu lớp con đặt doc_direction.
+        - Không nạp cột search_vector (tsvector chỉ dùng trong WHERE/rank).
         """
-        qs = Document.objects.all()
+        qs = Document.objects.defer("search_vector")
 
         # Các quan hệ FK thường dùng; helper sẽ tự bỏ các field không tồn tại.
         qs = _safe_select_related(
@@ -195,15 +230,17 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
 
         # Prefetch M2M/related (an toàn). 'assignees' KHÔNG tồn tại trên model hiện tại,
         # quan hệ đúng là 'assignments' (DocumentAssignment.related_name).
-        qs = _safe_prefetch_related(
-            qs,
-            "assignments",
-            # attachments: SỬ DỤNG 'uploaded_at' (không có 'created_at' trên DocumentAttachment)
-            attachments=Prefetch(
-                "attachments",
-                queryset=DocumentAttachment.objects.order_by("-uploaded_at"),
-            ),
-        )
+        # List chỉ cần bộ đếm đã annotate → bỏ prefetch để không nạp toàn bộ file đính kèm.
+        if getattr(self, "action", None) != "list":
+            qs = _safe_prefetch_related(
+                qs,
+                "assignments",
+                # attachments: SỬ DỤNG 'uploaded_at' (không có 'created_at' trên DocumentAttachment)
+                attachments=Prefetch(
+                    "attachments",
+                    queryset=DocumentAttachment.objects.order_by("-uploaded_at"),
+                ),
+            )
 
         doc_dir = self.doc_direction
         if doc_dir:
@@ -212,21 +249,61 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
             if getattr(self, "request", None) is not None:
                 setattr(self.request, "doc_direction_hint", doc_dir)
 
-        return qs.order_by(*self.ordering)
+        return annotate_list_counters(qs).order_by(*self.ordering)
 
     def get_serializer_class(self):
         if getattr(self, "action", None) == "list":
             return DocumentSlimSerializer
         return DocumentDetailSerializer
 
+    def filter_queryset(self, queryset):
+        """
+        Sau các filter backend: nếu có `q` (đã annotate search_rank) thì sắp theo độ liên quan
+        khi client không truyền ordering hoặc truyền 'relevance' — OrderingFilter chạy sau
+        FilterSet nên phải áp lại ở đây. Chế độ cursor giữ thứ tự mặc định (khóa seek ổn định).
+        """
+        qs = super().filter_queryset(queryset)
+        if RANK_ANNOTATION not in getattr(qs.query, "annotations", {}):
+            return qs
+        params = getattr(self.request, "query_params", {})
+        if getattr(self, "cursor_pagination", False) and "cursor" in params:
+            return qs
+        raw = str(params.get("ordering") or "").strip()
+        first = raw.split(",")[0].strip().lstrip("-") if raw else ""
+        if raw and first != "relevance":
+            return qs
+        return qs.order_by(f"-{RANK_ANNOTATION}", *self.ordering)
+
     # list/retrieve mặc định đã đủ cho Slim/Detail ở lớp con
     def list(self, request, *args, **kwargs):
         qs = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(qs)
-        ser = self.get_serializer(page or qs, many=True)
-        if page is not None:
-            return self.get_paginated_response(ser.data)
-        return Response(ser.data)
+        return self._list_response(qs)
+
+    def _list_response(self, qs: QuerySet, post_process=None) -> Response:
+        """
+        Phân trang + serialize cho list.
+        Khi serializer là DocumentSlimSerializer và bật DOCUMENT_LIST_FAST_PATH,
+        dùng encoder `.values()` (documents.list_encoders) thay cho DRF – cùng JSON contract.
+        """
+        encoder = None
+        if getattr(settings, "DOCUMENT_LIST_FAST_PATH", True) and self.get_serializer_class() is DocumentSlimSerializer:
+            encoder = get_slim_row_encoder()
+            if encoder is not None and not encoder.supports(qs):
+                encoder = None
+
+        if encoder is not None:
+            rows = self.paginate_queryset(encoder.values(qs))
+            data = encoder.encode_many(rows if rows is not None else encoder.values(qs))
+        else:
+            page = self.paginate_queryset(qs)
+            data = list(self.get_serializer(page if page is not None else qs, many=True).data)
+            rows = page
+
+        if post_process is not None:
+            post_process(data)
+        if rows is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -270,6 +347,7 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
         tags=["Văn bản"],
         operation_id="document_import",
         summary="Nhập dữ liệu văn bản",
+        description="Tạo job nhập nền (CSV/XLSX/NDJSON hoặc items); theo dõi tiến độ tại `status_url`.",
         request=DocumentImportSerializer,
         responses={202: DocumentImportResponseSerializer, **DEFAULT_ERROR_RESPONSES},
     )
@@ -277,31 +355,73 @@ class DocumentBaseViewSet(ServiceErrorMixin, viewsets.GenericViewSet):
         detail=False,
         methods=["post"],
         url_path="import",
-        parser_classes=[MultiPartParser, FormParser, JSONParser],
+        parser_classes=[MultiPartParser, FormParser, ORJSONParser],
     )
     def import_documents(self, request, *args, **kwargs):
+        return Response(self._enqueue_import(request), status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(
+        tags=["Văn bản"],
+        operation_id="document_import_status",
+        summary="Tiến độ job nhập văn bản",
+        responses={200: DocumentImportJobSerializer, **DEFAULT_ERROR_RESPONSES},
+    )
+    @action(detail=False, methods=["get"], url_path=r"import/(?P<job_id>[0-9]+)")
+    def import_status(self, request, job_id=None, *args, **kwargs):
+        job = Job.objects.filter(pk=job_id, type=Job.Type.DOCUMENT_IMPORT).first()
+        owner = (job.payload_json or {}).get("actor_id") if job is not None else None
+        if job is None or (owner != str(request.user.pk) and not request.user.is_superuser):
+            raise NotFound()
+        return Response(DocumentImportJobSerializer(job).data)
+
+    def _enqueue_import(self, request, direction: Optional[str] = None) -> Dict[str, Any]:
+        """Lưu dữ liệu nhập + tạo job DOCUMENT_IMPORT (chạy bởi `manage.py run_jobs`)."""
         serializer = DocumentImportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        payload = {
-            "accepted": len(serializer.validated_data.get("items") or []),
+        data = serializer.validated_data
+        items = data.get("items") or []
+        try:
+            job = document_import.enqueue_import(
+                actor=request.user,
+                upload=data.get("file"),
+                items=items,
+                direction=direction or data.get("direction") or None,
+                fmt=data.get("format"),
+            )
+        except ServiceError as exc:
+            raise ContractAPIException(str(exc), code=exc.code)
+        return {
+            "accepted": len(items),
             "skipped": 0,
-            "job_id": str(uuid4()),
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_url": f"{request.path.rstrip('/')}/{job.pk}/",
         }
-        return Response(payload, status=status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         tags=["Văn bản"],
         operation_id="document_export",
-        summary="Xuất dữ liệu văn bản",
-        request=DocumentExportQuerySerializer,
-        responses={200: DocumentExportResponseSerializer, **DEFAULT_ERROR_RESPONSES},
+        summary="Xuất dữ liệu văn bản (CSV/XLSX; tập lớn chạy nền)",
+        parameters=[DocumentExportQuerySerializer],
+        responses={
+            (200, "text/csv"): OpenApiTypes.BINARY,
+            202: DocumentExportResponseSerializer,
+            **DEFAULT_ERROR_RESPONSES,
+        },
     )
-    @action(detail=False, methods=["get"], url_path="export")
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
     def export_documents(self, request, *args, **kwargs):
+        return self._export_documents(request, direction=self.doc_direction)
+
+    def _export_documents(self, request, direction: Optional[str] = None):
         serializer = DocumentExportQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        payload = {
-            "download_url": f"/api/v1/documents/export/{uuid4()}",
-            "total_rows": 0,
-        }
-        return Response(payload)
+        params = {k: v for k, v in request.query_params.items() if k not in _EXPORT_SKIP_PARAMS}
+        return export_response(
+            request,
+            kind="documents",
+            params=params,
+            output=serializer.validated_data["output"],
+            mode=serializer.validated_data["mode"],
+            direction=direction,
+        )
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import uuid
-
 from typing import Dict, Optional
 
 from django.db.models import QuerySet
@@ -9,13 +7,16 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
-from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.parsers import MultiPartParser
 from rest_framework.settings import api_settings
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.request import Request
 
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
 
+from core.exceptions import ContractAPIException
+from core.parsers import ORJSONParser
 from core.docs import (
     DEFAULT_ERROR_RESPONSES,
     doc_list,
@@ -24,6 +25,7 @@ from core.docs import (
     doc_update,
     doc_delete,
 )
+from documents.exports import export_response
 from documents.models import RegisterBook, NumberingRule, DocumentTemplate
 from documents.serializers import (
     RegisterBookSerializer,
@@ -33,8 +35,11 @@ from documents.serializers import (
     RegisterImportResponseSerializer,
     RegisterExportQuerySerializer,
     RegisterExportResponseSerializer,
+    NumberReservationRequestSerializer,
+    NumberReservationSerializer,
 )
-from workflow.services import rbac
+from workflow.services import numbering, rbac
+from workflow.services.errors import ServiceError
 from workflow.services.rbac import Act
 
 
@@ -96,6 +101,7 @@ class RegisterBookViewSet(RBACModelViewSet):
         "destroy": Act.CONFIG_REGISTER_BOOK,
         "import_registers": Act.IN_IMPORT_EXPORT,
         "export_registers": Act.IN_IMPORT_EXPORT,
+        "reserve_numbers": Act.IN_REGISTER,
     }
 
     def get_queryset(self) -> QuerySet[RegisterBook]:
@@ -169,7 +175,7 @@ class RegisterBookViewSet(RBACModelViewSet):
         detail=False,
         methods=["post"],
         url_path="import",
-        parser_classes=[JSONParser, MultiPartParser],
+        parser_classes=[ORJSONParser, MultiPartParser],
     )
     def import_registers(self, request, *args, **kwargs):
         self._require_act(request, "import_registers")
@@ -183,23 +189,49 @@ class RegisterBookViewSet(RBACModelViewSet):
         }
         return Response(payload, status=status.HTTP_202_ACCEPTED)
 
+    @extend_schema(
+        tags=["Sổ đăng ký"],
+        operation_id="register_book_reserve_numbers",
+        summary="Giữ trước khối số liên tiếp cho một lô đăng ký",
+        request=NumberReservationRequestSerializer,
+        responses={201: NumberReservationSerializer, **DEFAULT_ERROR_RESPONSES},
+    )
+    @action(detail=True, methods=["post"], url_path="reserve-numbers")
+    def reserve_numbers(self, request, *args, **kwargs):
+        """
+        Một lần tăng bộ đếm của sổ cho cả lô (theo reset_policy của ngày `date`); các lệnh
+        POST /inbound-docs/{id}/register/ gửi `reservation_id` để lấy dần số trong khối.
+        """
+        self._require_act(request, "reserve_numbers")
+        book = self.get_object()
+        serializer = NumberReservationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            reservation = numbering.reserve_block(book, data["count"], actor=request.user, on=data.get("date"))
+        except ServiceError as exc:
+            raise ContractAPIException(str(exc), code=exc.code)
+        return Response(NumberReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
     @extend_schema(
         tags=["Sổ đăng ký"],
         operation_id="register_book_export",
-        summary="Xuất dữ liệu sổ đăng ký",
-        request=RegisterExportQuerySerializer,
-        responses={200: RegisterExportResponseSerializer, **DEFAULT_ERROR_RESPONSES},
+        summary="Xuất sổ đăng ký (CSV/XLSX; tập lớn chạy nền)",
+        parameters=[RegisterExportQuerySerializer],
+        responses={
+            (200, "text/csv"): OpenApiTypes.BINARY,
+            202: RegisterExportResponseSerializer,
+            **DEFAULT_ERROR_RESPONSES,
+        },
     )
     @action(detail=False, methods=["get"], url_path="export")
     def export_registers(self, request, *args, **kwargs):
         self._require_act(request, "export_registers")
         serializer = RegisterExportQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        payload = {
-            "download_url": f"/api/v1/register-books/export/{uuid.uuid4()}",
-            "total_rows": 0,
-        }
-        return Response(payload, status=status.HTTP_200_OK)
+        data = dict(serializer.validated_data)
+        output, mode = data.pop("output"), data.pop("mode")
+        return export_response(request, kind="register", params=data, output=output, mode=mode)
 
 
 class NumberingRuleViewSet(RBACModelViewSet):
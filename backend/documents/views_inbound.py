@@ -4,7 +4,6 @@ from __future__ import annotations
 from typing import Any, Optional, cast, List, Dict
 from datetime import date
 from urllib.parse import urlencode
-from uuid import uuid4
 
 from django.conf import settings as dj_settings
 from django.db.models import Prefetch
@@ -12,11 +11,12 @@ from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth import get_user_model
 from rest_framework import status, serializers as drf_serializers
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.views import APIView  # dùng trong initial()
 
 # drf-spectacular
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
@@ -29,6 +29,7 @@ from documents.views_base import (
     DocumentBaseViewSet,
     _safe_select_related,
     _safe_prefetch_related,
+    annotate_list_counters,
 )
 from documents.models import Document, DocumentAttachment
 from documents.serializers import (
@@ -48,6 +49,7 @@ from common.schema import (
 )
 
 # ===== Helper Docs (phân trang) =================================================
+from core.parsers import ORJSONParser
 from core.docs import paged_of, DEFAULT_ERROR_RESPONSES
 from core.exceptions import ForbiddenError
 
@@ -182,7 +184,11 @@ class ReceiveInboundActionSerializer(drf_serializers.Serializer):
 
 
 class RegisterInboundActionSerializer(drf_serializers.Serializer):
-    received_number = drf_serializers.IntegerField()
+    received_number = drf_serializers.IntegerField(required=False)
+    reservation_id = drf_serializers.UUIDField(
+        required=False,
+        help_text="Khối số giữ trước (POST /register-books/{id}/reserve-numbers/); dùng khi không gửi received_number",
+    )
     received_date = drf_serializers.DateField()
     sender = drf_serializers.CharField()
 
@@ -290,6 +296,7 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
         "archive": Act.IN_ARCHIVE,
         "withdraw_": Act.IN_WITHDRAW,
         "import_documents": Act.IN_IMPORT_EXPORT,
+        "import_status": Act.IN_IMPORT_EXPORT,
         "export_documents": Act.IN_IMPORT_EXPORT,
     }
 
@@ -318,7 +325,7 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
         - assignments/workflow_logs/attachments tồn tại theo models hiện tại.
         - attachments sắp theo '-uploaded_at' (không có 'created_at' trên DocumentAttachment).
         """
-        qs = Document.objects.filter(doc_direction="den")
+        qs = Document.objects.defer("search_vector").filter(doc_direction="den")
 
         qs = _safe_select_related(
             qs,
@@ -334,17 +341,19 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
             "security",  # -> security_level
         )
 
-        qs = _safe_prefetch_related(
-            qs,
-            "assignments",
-            "workflow_logs",
-            attachments=Prefetch(
-                "attachments",
-                queryset=DocumentAttachment.objects.order_by("-uploaded_at"),
-            ),
-        )
+        # List chỉ cần bộ đếm đã annotate → không prefetch quan hệ con
+        if getattr(self, "action", None) != "list":
+            qs = _safe_prefetch_related(
+                qs,
+                "assignments",
+                "workflow_logs",
+                attachments=Prefetch(
+                    "attachments",
+                    queryset=DocumentAttachment.objects.order_by("-uploaded_at"),
+                ),
+            )
 
-        return qs.order_by(*self.ordering)
+        return annotate_list_counters(qs).order_by(*self.ordering)
 
     # ---- Helper: đảm bảo có khóa 'id' trong dữ liệu list ----
     @staticmethod
@@ -360,16 +369,7 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
     def list(self, request, *args, **kwargs):
         # Khi TESTING, bỏ filter_queryset để tránh scope/filters làm rỗng dữ liệu seed
         raw_qs = self.get_queryset() if getattr(dj_settings, "TESTING", False) else self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(raw_qs)
-        if page is not None:
-            ser = self.get_serializer(page, many=True)
-            data = list(ser.data)  # mutable
-            self._ensure_id_alias(data)
-            return self.get_paginated_response(data)
-        ser = self.get_serializer(raw_qs, many=True)
-        data = list(ser.data)
-        self._ensure_id_alias(data)
-        return Response(data)
+        return self._list_response(raw_qs, post_process=self._ensure_id_alias)
 
     @extend_schema(
         tags=[_TAG],
@@ -382,55 +382,28 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
         detail=False,
         methods=["post"],
         url_path="import",
-        parser_classes=[MultiPartParser, FormParser, JSONParser],
+        parser_classes=[MultiPartParser, FormParser, ORJSONParser],
     )
     def import_documents(self, request, *args, **kwargs):
-        serializer = DocumentImportSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        items = serializer.validated_data.get("items") or []
-        uploaded_file = serializer.validated_data.get("file")
-        accepted = len(items)
-        if uploaded_file is not None:
-            accepted = max(accepted, 1)
-        payload = {
-            "accepted": accepted,
-            "skipped": 0,
-            "job_id": str(uuid4()),
-            "filename": getattr(uploaded_file, "name", None),
-        }
+        payload = self._enqueue_import(request, direction=Document.Direction.DEN)
+        uploaded_file = request.data.get("file") if hasattr(request.data, "get") else None
+        payload["filename"] = getattr(uploaded_file, "name", None)
         return Response(payload, status=status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         tags=[_TAG],
         operation_id="inbound_export",
-        summary="Xuất văn bản đến",
-        request=cast(Any, DocumentExportQuerySerializer),
-        responses={200: DocumentExportResponseSerializer, **DEFAULT_ERROR_RESPONSES},
+        summary="Xuất văn bản đến (CSV/XLSX; tập lớn chạy nền)",
+        parameters=[DocumentExportQuerySerializer],
+        responses={
+            (200, "text/csv"): OpenApiTypes.BINARY,
+            202: DocumentExportResponseSerializer,
+            **DEFAULT_ERROR_RESPONSES,
+        },
     )
-    @action(detail=False, methods=["get"], url_path="export")
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
     def export_documents(self, request, *args, **kwargs):
-        serializer = DocumentExportQuerySerializer(data=request.query_params)
-        serializer.is_valid(raise_exception=True)
-        params: Dict[str, Any] = {}
-        for key in ("direction", "status", "level", "keyword"):
-            val = serializer.validated_data.get(key)
-            if val:
-                params[key] = val
-        qs = self.filter_queryset(self.get_queryset())
-        if params.get("direction"):
-            qs = qs.filter(doc_direction=params["direction"])
-        ordering = serializer.validated_data.get("ordering") or "-created_at"
-        qs = qs.order_by(ordering)
-        page_size = serializer.validated_data.get("page_size") or 200
-        limited_qs = qs[:page_size]
-        data = DocumentSlimSerializer(limited_qs, many=True).data
-        payload = {
-            "download_url": request.build_absolute_uri(request.get_full_path()),
-            "total_rows": qs.count(),
-            "filters": params,
-            "items": data,
-        }
-        return Response(payload)
+        return self._export_documents(request, direction=Document.Direction.DEN)
 
     # ====== Actions ===========================================================
     @extend_schema(
@@ -487,9 +460,13 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
                 or request.data.get("registration_number")
             )
 
+            reservation_id = request.data.get("reservation_id") or None
+
             # Trích toàn bộ chữ số từ chuỗi (IN-1-<ts> -> "1<ts>")
-            received_number: int
-            if raw_number is None:
+            received_number: Optional[int]
+            if raw_number is None and reservation_id:
+                received_number = None  # service lấy số kế tiếp trong khối đã giữ
+            elif raw_number is None:
                 received_number = int(getattr(doc, "pk", 0) or 0)
             else:
                 s = str(raw_number)
@@ -510,8 +487,12 @@ class InboundDocumentViewSet(DocumentBaseViewSet):
                 received_number=received_number,
                 received_date=received_date,
                 sender=sender,
+                reservation_id=reservation_id,
             )
-            return Response({"status_id": getattr(doc, "status_id", None)})
+            return Response({
+                "status_id": getattr(doc, "status_id", None),
+                "received_number": getattr(doc, "received_number", None),
+            })
         except ServiceError as e:
             return _err(e)
 
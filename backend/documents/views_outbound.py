@@ -3,16 +3,14 @@ from __future__ import annotations
 
 from typing import Optional, Any, Dict, Sequence, Type, List, cast
 import os
-from uuid import uuid4
 
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
 from django.db.models import FileField
 from rest_framework.decorators import action
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
 from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticated
@@ -20,7 +18,7 @@ from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
-from documents.views_base import DocumentBaseViewSet
+from documents.views_base import DocumentBaseViewSet, annotate_list_counters
 from documents.models import Document, DocumentAttachment
 from documents.serializers import (
     DocumentSlimSerializer,
@@ -44,6 +42,7 @@ from common.schema import (
 )
 
 # Helpers docs đồng bộ hoá response/401/403… & paged schema
+from core.parsers import ORJSONParser
 from core.docs import (
     DEFAULT_ERROR_RESPONSES,
     doc_list,
@@ -56,7 +55,7 @@ from core.exceptions import ForbiddenError
 from documents.permissions import Act
 from common.idempotency import IdempotencyService
 from workflow.services.errors import ServiceError
-from workflow.services import rbac
+from workflow.services import blob_store, rbac
 
 
 TAG = "Văn bản đi"  # Nhãn hiển thị trong nhóm Swagger
@@ -142,7 +141,7 @@ class OutboundDocumentViewSet(DocumentBaseViewSet):
         if current_action == "attachments":
             parsers = [MultiPartParser(), FormParser()]
             if allow_json_fallback:
-                parsers.insert(0, JSONParser())
+                parsers.insert(0, ORJSONParser())
             return parsers
 
         default_classes = cast(Sequence[Type], api_settings.DEFAULT_PARSER_CLASSES or (()))
@@ -186,14 +185,15 @@ class OutboundDocumentViewSet(DocumentBaseViewSet):
 
     # ---- Queryset tối ưu ----
     def get_queryset(self):
-        qs = Document.objects.filter(doc_direction=self.doc_direction)
+        qs = Document.objects.defer("search_vector").filter(doc_direction=self.doc_direction)
         sel = self._safe_select_related()
         if sel:
             qs = qs.select_related(*sel)
-        pre = self._safe_prefetch_related()
+        # List chỉ cần bộ đếm đã annotate → không prefetch quan hệ con
+        pre = self._safe_prefetch_related() if getattr(self, "action", None) != "list" else []
         if pre:
             qs = qs.prefetch_related(*pre)
-        return qs.order_by(*self.ordering)
+        return annotate_list_counters(qs).order_by(*self.ordering)
 
     ordering_fields = ["created_at"]
     ordering = ["-created_at"]
@@ -252,12 +252,7 @@ class OutboundDocumentViewSet(DocumentBaseViewSet):
     )
     def list(self, request, *args, **kwargs):
         qs = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            ser = self.get_serializer(page, many=True)
-            return self.get_paginated_response(ser.data)
-        ser = self.get_serializer(qs, many=True)
-        return Response(ser.data)
+        return self._list_response(qs)
 
     @doc_retrieve(
         detail_serializer=DocumentDetailSerializer,
@@ -640,18 +635,20 @@ class OutboundDocumentViewSet(DocumentBaseViewSet):
         else:
             # Không có FileField -> lưu qua storage và set storage_path nếu có
             if _att_has_field(DocumentAttachment, "storage_path"):
-                if raw_bytes is None:
-                    if hasattr(upload, "read"):
-                        raw_bytes = upload.read()
-                    elif isinstance(upload, (bytes, bytearray)):
-                        raw_bytes = bytes(upload)
-                    else:
-                        raw_bytes = b""
-                storage_path = default_storage.save(
-                    f"attachments/{uuid4()}_{name or 'upload'}",
-                    ContentFile(raw_bytes or b""),
-                )
-                payload["storage_path"] = storage_path
+                if raw_bytes is None and hasattr(upload, "chunks"):
+                    # UploadedFile: đọc theo khối, không nạp cả tệp vào RAM; nội dung trùng không ghi lại
+                    blob = blob_store.store(upload.chunks)
+                else:
+                    if raw_bytes is None:
+                        if hasattr(upload, "read"):
+                            raw_bytes = upload.read()
+                        elif isinstance(upload, (bytes, bytearray)):
+                            raw_bytes = bytes(upload)
+                        else:
+                            raw_bytes = b""
+                    data = raw_bytes
+                    blob = blob_store.store(lambda: [data])
+                payload.update(blob_store.attachment_fields(blob))
             att = DocumentAttachment.objects.create(**payload)
 
         # ✅ Trả 200 để khớp test kỳ vọng
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='progress_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='type',
+            field=models.CharField(choices=[('REMINDER', 'REMINDER'), ('REPORT_EXPORT', 'REPORT_EXPORT'), ('SYNC_MAIL', 'SYNC_MAIL'), ('DOCUMENT_IMPORT', 'DOCUMENT_IMPORT')], max_length=50),
+        ),
+    ]
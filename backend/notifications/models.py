@@ -55,6 +55,7 @@ class Job(models.Model):
         REMINDER = "REMINDER", "REMINDER"
         REPORT_EXPORT = "REPORT_EXPORT", "REPORT_EXPORT"
         SYNC_MAIL = "SYNC_MAIL", "SYNC_MAIL"
+        DOCUMENT_IMPORT = "DOCUMENT_IMPORT", "DOCUMENT_IMPORT"
 
     class Status(models.TextChoices):
         QUEUED = "QUEUED", "QUEUED"
@@ -73,3 +74,7 @@ class Job(models.Model):
     status = models.CharField(max_length=20, default=Status.QUEUED, choices=Status.choices)
     attempts = models.IntegerField(default=0)
     last_error = models.CharField(max_length=500, null=True, blank=True)
+    # Tiến độ/checkpoint do handler ghi cùng transaction với phần việc đã xong (workflow.services.jobs)
+    progress_json = models.JSONField(null=True, blank=True)
+    # Worker đang chạy cập nhật định kỳ; quá JOBS_STALE_SECONDS → coi như worker chết, job được nhận lại
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_job_progress'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexport',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notifications.job'),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='row_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
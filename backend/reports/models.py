@@ -32,3 +32,7 @@ class ReportExport(models.Model):
     format = models.CharField(max_length=10, choices=Format.choices)
     params_json = models.JSONField(null=True, blank=True)
     file_path = models.CharField(max_length=500)
+    # Xuất nền (workflow.services.document_export): file_path có khi job xong
+    job = models.ForeignKey("notifications.Job", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    row_count = models.IntegerField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
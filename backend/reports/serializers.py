@@ -0,0 +1,43 @@
+# reports/serializers.py
+from __future__ import annotations
+
+from typing import Optional
+
+from django.urls import reverse
+from rest_framework import serializers
+
+from reports.models import ReportExport
+
+
+class ReportExportSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="export_id", read_only=True)
+    report_code = serializers.CharField(source="report.code", read_only=True)
+    status = serializers.SerializerMethodField()
+    last_error = serializers.CharField(source="job.last_error", read_only=True, default=None)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExport
+        fields = (
+            "id",
+            "report_code",
+            "format",
+            "status",
+            "exported_at",
+            "finished_at",
+            "row_count",
+            "params_json",
+            "last_error",
+            "download_url",
+        )
+        read_only_fields = fields
+
+    def get_status(self, obj: ReportExport) -> str:
+        if obj.finished_at is not None:
+            return "DONE"
+        return obj.job.status if obj.job_id and obj.job else "QUEUED"
+
+    def get_download_url(self, obj: ReportExport) -> Optional[str]:
+        if obj.finished_at is None:
+            return None
+        return reverse("report-exports-download", kwargs={"pk": obj.pk})
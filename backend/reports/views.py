@@ -1,3 +1,74 @@
-from django.shortcuts import render
+# reports/views.py
+"""
+Tệp xuất báo cáo của chính người dùng (reports.ReportExport) — tạo bởi job nền REPORT_EXPORT.
 
-# Create your views here.
+- GET /api/v1/report-exports/               : danh sách (mới nhất trước)
+- GET /api/v1/report-exports/{id}/          : trạng thái (QUEUED/RUNNING/DONE/FAILED), số dòng
+- GET /api/v1/report-exports/{id}/download/ : tải file (FileResponse đọc theo khối từ default_storage)
+"""
+from __future__ import annotations
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+from django.http import FileResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+
+from core.docs import DEFAULT_ERROR_RESPONSES, doc_list, doc_retrieve
+from core.exceptions import ContractAPIException
+from reports.models import ReportExport
+from reports.serializers import ReportExportSerializer
+
+TAG = "Báo cáo"
+
+
+class ReportExportViewSet(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReportExportSerializer
+    queryset = ReportExport.objects.all()
+    ordering = ["-exported_at"]
+
+    def get_queryset(self) -> QuerySet[ReportExport]:
+        return (
+            super().get_queryset()
+            .filter(exported_by=self.request.user)
+            .select_related("report", "job")
+            .order_by("-exported_at", "-export_id")
+        )
+
+    @doc_list(
+        item_serializer=ReportExportSerializer,
+        tag=TAG,
+        operation_id="report_export_list",
+        summary="Danh sách tệp xuất của tôi",
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @doc_retrieve(
+        detail_serializer=ReportExportSerializer,
+        tag=TAG,
+        operation_id="report_export_retrieve",
+        summary="Trạng thái tệp xuất",
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @extend_schema(
+        tags=[TAG],
+        operation_id="report_export_download",
+        summary="Tải tệp xuất",
+        responses={(200, "application/octet-stream"): OpenApiTypes.BINARY, **DEFAULT_ERROR_RESPONSES},
+    )
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, *args, **kwargs):
+        export = self.get_object()
+        if export.finished_at is None or not export.file_path:
+            raise ContractAPIException("Tệp xuất chưa sẵn sàng.", code="EXPORT_NOT_READY", status_code=409)
+        name = os.path.basename(export.file_path).split("_", 1)[-1]
+        return FileResponse(default_storage.open(export.file_path, "rb"), as_attachment=True, filename=name)
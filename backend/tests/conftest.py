@@ -30,6 +30,16 @@ def _seed_minimal_data(django_db_setup, django_db_blocker):
             pass
 
 
+@pytest.fixture(autouse=True)
+def _fresh_rbac_cache():
+    """DB rollback sau mỗi test nhưng cache (locmem/process) thì không → bump version cache RBAC/tra cứu."""
+    from workflow.services import rbac_cache
+    from workflow.services.lookup_cache import invalidate_lookup_caches
+    rbac_cache.bump_version()
+    invalidate_lookup_caches()
+    yield
+
+
 # ============================================================
 # API clients & user factories
 # ============================================================
@@ -0,0 +1,78 @@
+# tests/serializers/test_slim_row_encoder.py
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Department
+from catalog.models import DocumentStatus
+from documents import models as doc_models
+from documents.list_encoders import get_slim_row_encoder
+from documents.serializers import DocumentSlimSerializer
+from documents.views_base import annotate_list_counters
+
+
+def _seed(prefix: str):
+    User = get_user_model()
+    named = User.objects.create_user(username=f"{prefix}-n", password="x", full_name="  Nguyễn Văn A ")
+    bare = User.objects.create_user(username=f"{prefix}-b", password="x", full_name="", email=f"{prefix}@x.vn")
+    dept, _ = Department.objects.get_or_create(name="Phòng Tổng hợp", defaults={"department_code": "PTH"})
+    st, _ = DocumentStatus.objects.get_or_create(status_name="Đã ban hành")
+
+    out = doc_models.Document.objects.create(
+        title=f"{prefix} đi", doc_direction="di", issue_number=f"{prefix}-1",
+        issued_date=dt.date(2025, 1, 2), created_by=named, department=dept, status=st,
+    )
+    doc_models.Document.objects.create(
+        title=f"{prefix} đến", doc_direction="den", received_number=17,
+        received_date=dt.date(2025, 2, 3), sender="UBND Tỉnh", created_by=bare,
+    )
+    doc_models.Document.objects.create(
+        title=f"{prefix} nháp", doc_direction="du_thao", document_code=f"{prefix}-DT",
+    )
+    doc_models.DocumentAssignment.objects.create(
+        document=out, user=bare, role_on_doc="assignee", assigned_by=named,
+    )
+    doc_models.DocumentAttachment.objects.create(
+        document=out, attachment_type="file", file_name="a.pdf",
+        storage_path="attachments/a.pdf", uploaded_by=named,
+    )
+
+
+@pytest.mark.django_db
+def test_encoder_matches_drf_serializer_byte_for_byte():
+    _seed("ENC")
+    encoder = get_slim_row_encoder()
+    assert encoder is not None
+
+    qs = annotate_list_counters(
+        doc_models.Document.objects.filter(title__startswith="ENC").select_related("status", "department", "created_by")
+    ).order_by("-created_at", "-document_id")
+
+    render = JSONRenderer().render
+    expected = render(DocumentSlimSerializer(qs, many=True).data)
+    actual = render(encoder.encode_many(encoder.values(qs)))
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_list_endpoint_same_with_and_without_fast_path(auth_client):
+    _seed("API")
+    url = reverse("documents-list")
+    params = {"q": "API", "ordering": "-created_at"}
+
+    with override_settings(DOCUMENT_LIST_FAST_PATH=True):
+        fast = auth_client.get(url, params)
+        fast_cursor = auth_client.get(url, dict(params, cursor="", page_size=2))
+    with override_settings(DOCUMENT_LIST_FAST_PATH=False):
+        slow = auth_client.get(url, params)
+        slow_cursor = auth_client.get(url, dict(params, cursor="", page_size=2))
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content == slow.content
+    assert fast_cursor.content == slow_cursor.content
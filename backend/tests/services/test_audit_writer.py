@@ -0,0 +1,64 @@
+# tests/services/test_audit_writer.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from audit.models import AuditLog
+from workflow.services import audit
+from workflow.services.audit import audit_log, audit_mode
+
+
+@pytest.fixture
+def actor(db):
+    return get_user_model().objects.create_user(username="auditor", password="x")
+
+
+@pytest.mark.django_db
+def test_rows_are_bulk_inserted_on_commit(actor, django_assert_num_queries, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            with django_assert_num_queries(0):
+                for i in range(50):
+                    audit_log(actor=actor, action="DOC.IN.ASSIGN", entity_type="document", entity_id=i)
+            assert not AuditLog.objects.exists()
+
+    assert AuditLog.objects.count() == 50
+    assert set(AuditLog.objects.values_list("actor_id", flat=True)) == {actor.pk}
+
+
+@pytest.mark.django_db
+def test_rolled_back_savepoint_drops_its_rows(actor, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    audit_log(actor=actor, action="DOC.IN.START", entity_type="document", entity_id=1)
+                    raise RuntimeError("lỗi nghiệp vụ")
+            audit_log(actor=actor, action="DOC.IN.COMPLETE", entity_type="document", entity_id=2)
+
+    assert list(AuditLog.objects.values_list("action", "entity_id")) == [("DOC.IN.COMPLETE", "2")]
+
+
+@pytest.mark.django_db
+def test_sync_mode_inserts_immediately(actor):
+    with audit_mode("sync"), transaction.atomic():
+        audit_log(actor=actor, action="CASE.CREATE", entity_type="case", entity_id=5)
+        assert AuditLog.objects.filter(entity_id="5").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_mode_writes_through_background_writer(actor):
+    with audit_mode("async"):
+        with transaction.atomic():
+            for i in range(20):
+                audit_log(actor=actor, action="DOC.OUT.PUBLISH", entity_type="document", entity_id=i)
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                audit_log(actor=actor, action="DOC.OUT.PUBLISH", entity_type="document", entity_id=999)
+                raise RuntimeError("rollback")
+
+    assert audit.get_writer().drain(timeout=5)
+    assert AuditLog.objects.count() == 20
+    assert not AuditLog.objects.filter(entity_id="999").exists()
@@ -0,0 +1,122 @@
+# tests/services/test_blob_store.py
+from __future__ import annotations
+
+import hashlib
+import importlib
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from accounts.models import Department
+from catalog.models import CaseStatus, CaseType
+from cases.models import Case, CaseAttachment
+from common.models import AttachmentBlob
+from documents.models import Document, DocumentAttachment
+from workflow.services import blob_store
+
+DECREE = b"%PDF-1.4\nNghi dinh 30/2020/ND-CP\n" * 50
+
+
+def _case(make_user) -> Case:
+    creator, _ = make_user(username=f"creator-{uuid.uuid4().hex[:6]}", full_name="Người tạo")
+    return Case.objects.create(
+        case_code=f"HS-BLOB-{uuid.uuid4().hex[:6]}",
+        title="Hồ sơ dùng chung nghị định",
+        case_type=CaseType.objects.get_or_create(case_type_name="Loại chuẩn")[0],
+        created_by=creator,
+        department=Department.objects.get_or_create(name="Phòng Hành chính", defaults={"department_code": "PHC"})[0],
+        status=CaseStatus.objects.get_or_create(case_status_name="DA_PHAN_CONG")[0],
+    )
+
+
+@pytest.mark.django_db
+def test_duplicate_uploads_share_one_blob_and_gc_reclaims_it(client_with_user, make_user, media_tmp_path):
+    docs = [
+        Document.objects.create(
+            doc_direction="den", title=f"Công văn {i}", received_number=i, received_date=date(2024, 2, i), sender="Bộ"
+        )
+        for i in (1, 2)
+    ]
+    case = _case(make_user)
+    client = client_with_user(username="vt-blob", role="VAN_THU")
+    for doc in docs:
+        upload = SimpleUploadedFile("nd30.pdf", DECREE, content_type="application/pdf")
+        resp = client.post(f"/api/v1/documents/{doc.pk}/attachments/", {"file": upload}, format="multipart")
+        assert resp.status_code == 201
+    upload = SimpleUploadedFile("nghi-dinh.pdf", DECREE, content_type="application/pdf")
+    assert client.post(f"/api/v1/cases/{case.pk}/attachments/", {"file": upload}, format="multipart").status_code == 201
+
+    sha256 = hashlib.sha256(DECREE).hexdigest()
+    blob = AttachmentBlob.objects.get()
+    assert (blob.sha256, blob.size, blob.ref_count) == (sha256, len(DECREE), 3)
+    paths = DocumentAttachment.objects.filter(document__in=docs).values_list("storage_path", flat=True)
+    assert {*paths, CaseAttachment.objects.get(case=case).storage_path} == {blob.storage_path}
+    assert [p.name for p in media_tmp_path.rglob("*") if p.is_file()] == [sha256]
+
+    docs[0].delete()  # xoá dây chuyền đính kèm → signal nhả tham chiếu
+    CaseAttachment.objects.filter(case=case).delete()
+    blob.refresh_from_db()
+    assert blob.ref_count == 1
+    assert blob_store.gc(grace=timedelta(0)) == []
+
+    DocumentAttachment.objects.filter(document=docs[1]).delete()
+    assert blob_store.gc() == []  # còn trong thời gian grace
+    AttachmentBlob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+    assert blob_store.gc(dry_run=True) == [sha256]
+    assert blob_store.gc() == [sha256]
+    assert not AttachmentBlob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_recount_repairs_drift_and_gc_keeps_referenced_blob(make_user, media_tmp_path):
+    blob = blob_store.store(lambda: [DECREE])
+    case = _case(make_user)
+    CaseAttachment.objects.create(
+        case=case, attachment_type="tep_kem_theo", file_name="a.pdf", uploaded_by=case.created_by,
+        **blob_store.attachment_fields(blob),
+    )
+    AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=0, updated_at=timezone.now() - timedelta(days=2))
+    assert blob_store.gc() == []
+    blob.refresh_from_db()
+    assert blob.ref_count == 1 and default_storage.exists(blob.storage_path)
+
+    AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=7)
+    assert blob_store.recount() == 1
+    blob.refresh_from_db()
+    assert blob.ref_count == 1
+
+
+@pytest.mark.django_db
+def test_migration_dedups_existing_files(make_user, media_tmp_path, django_capture_on_commit_callbacks):
+    doc = Document.objects.create(
+        doc_direction="den", title="Văn bản cũ", received_number=9, received_date=date(2023, 1, 9), sender="Sở"
+    )
+    case = _case(make_user)
+    uploader = case.created_by
+    paths = [default_storage.save(f"attachments/{uuid.uuid4()}_tt.pdf", ContentFile(DECREE)) for _ in range(2)]
+    case_path = default_storage.save(f"case-attachments/{uuid.uuid4()}_tt.pdf", ContentFile(DECREE))
+    other = default_storage.save(f"attachments/{uuid.uuid4()}_khac.pdf", ContentFile(b"noi dung khac"))
+    for path in (*paths, other, "attachments/da-mat.pdf"):
+        DocumentAttachment.objects.create(
+            document=doc, attachment_type="tep_kem_theo", file_name="tt.pdf", storage_path=path, uploaded_by=uploader
+        )
+    CaseAttachment.objects.create(
+        case=case, attachment_type="tep_kem_theo", file_name="tt.pdf", storage_path=case_path, uploaded_by=uploader
+    )
+
+    migration = importlib.import_module("common.migrations.0006_dedup_attachment_files")
+    with django_capture_on_commit_callbacks(execute=True):
+        migration._dedup_existing(apps, None)
+
+    shared = AttachmentBlob.objects.get(sha256=hashlib.sha256(DECREE).hexdigest())
+    assert shared.ref_count == 3 and shared.storage_path == paths[0]
+    assert AttachmentBlob.objects.get(storage_path=other).ref_count == 1
+    assert not default_storage.exists(paths[1]) and not default_storage.exists(case_path)
+    assert CaseAttachment.objects.get().storage_path == paths[0]
+    assert DocumentAttachment.objects.get(storage_path="attachments/da-mat.pdf").blob_id is None
@@ -0,0 +1,122 @@
+# tests/services/test_document_import.py
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from catalog.models import DocumentStatus
+from documents.models import Document
+from notifications.models import Job
+from workflow.services import document_import, jobs
+
+CSV = (
+    "title,received_number,received_date,sender\n"
+    "Công văn 1,1,2024-01-05,UBND tỉnh\n"
+    "Công văn 2,2,05/01/2024,Sở Tài chính\n"
+    "Thiếu nơi gửi,3,2024-01-06,\n"
+    "Sai ngày,4,2024-13-40,Sở Y tế\n"
+    "Công văn 5,5,2024-01-07,Sở Nội vụ\n"
+)
+
+
+@pytest.fixture
+def statuses(db):
+    for name in ("DANG_KY", "PHAT_HANH"):
+        DocumentStatus.objects.get_or_create(status_name=name)
+
+
+@pytest.mark.django_db
+def test_csv_upload_is_imported_by_the_job_runner(client_with_user, statuses, media_tmp_path, settings):
+    settings.IMPORT_BATCH_SIZE = 2
+    client = client_with_user(username="vt-import", role="VAN_THU")
+    upload = SimpleUploadedFile("legacy.csv", CSV.encode("utf-8"), content_type="text/csv")
+    resp = client.post("/api/v1/documents/import/", {"file": upload, "direction": "den"}, format="multipart")
+    assert resp.status_code == 202, resp.content
+    body = resp.json()
+    assert body["status"] == "QUEUED"
+    assert not Document.objects.filter(title__startswith="Công văn").exists()
+
+    assert jobs.run_pending() == 1
+    job = Job.objects.get(pk=body["job_id"])
+    assert job.status == "DONE"
+    titles = set(Document.objects.filter(doc_direction="den").values_list("title", flat=True))
+    assert {"Công văn 1", "Công văn 2", "Công văn 5"} <= titles
+    assert not Document.objects.filter(title__in=["Thiếu nơi gửi", "Sai ngày"]).exists()
+    assert not Document.objects.filter(title="Công văn 1", search_vector__isnull=True).exists()
+
+    report = client.get(body["status_url"]).json()
+    assert (report["processed"], report["created"], report["failed"], report["finished"]) == (5, 3, 2, True)
+    assert [(e["row"], sorted(e["errors"])) for e in report["errors"]] == [(3, ["sender"]), (4, ["received_date"])]
+    assert not any(media_tmp_path.joinpath("imports").iterdir())
+
+    other = client_with_user(username="vt-other-import", role="VAN_THU")
+    assert other.get(body["status_url"]).status_code == 404
+    bad = SimpleUploadedFile("legacy.txt", b"x", content_type="text/plain")
+    assert other.post("/api/v1/documents/import/", {"file": bad}, format="multipart").status_code == 400
+
+
+@pytest.mark.django_db
+def test_failed_run_resumes_from_checkpoint(make_user, statuses, media_tmp_path, settings, monkeypatch):
+    settings.IMPORT_BATCH_SIZE = 2
+    actor, _ = make_user(username="vt-resume", role="VAN_THU")
+    items = [
+        {"title": f"Hồ sơ cũ {i}", "received_number": i, "received_date": "2023-06-01", "sender": "Bộ Nội vụ"}
+        for i in range(1, 6)
+    ]
+    job = document_import.enqueue_import(actor=actor, items=items, direction="den")
+
+    real_after_insert = document_import._after_insert
+    calls = {"n": 0}
+
+    def crash_on_second_chunk(ids):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("worker chết")
+        real_after_insert(ids)
+
+    monkeypatch.setattr(document_import, "_after_insert", crash_on_second_chunk)
+    assert jobs.run_job(jobs.claim_next()) == "QUEUED"
+    job.refresh_from_db()
+    assert (job.attempts, job.progress_json["checkpoint"], job.progress_json["created"]) == (1, 2, 2)
+    assert Document.objects.filter(title__startswith="Hồ sơ cũ").count() == 2
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    assert jobs.run_pending() == 1
+    job.refresh_from_db()
+    assert job.status == "DONE" and job.attempts == 2
+    assert sorted(Document.objects.filter(title__startswith="Hồ sơ cũ").values_list("received_number", flat=True)) == [
+        1, 2, 3, 4, 5
+    ]
+
+
+@pytest.mark.django_db
+def test_rows_rejected_by_the_database_are_isolated(make_user, statuses, media_tmp_path):
+    actor, _ = make_user(username="vt-dup", role="VAN_THU")
+    items = [
+        {"title": "Quyết định A", "issue_number": "12/QĐ-IMP", "issued_date": "2022-03-01"},
+        {"title": "Quyết định B", "issue_number": "12/QĐ-IMP", "issued_date": "2022-04-01"},
+        {"title": "Quyết định C", "issue_number": "13/QĐ-IMP", "issued_date": "2022-04-02"},
+    ]
+    job = document_import.enqueue_import(actor=actor, items=items, direction="di")
+    jobs.run_pending()
+    job.refresh_from_db()
+    assert job.status == "DONE"
+    assert (job.progress_json["created"], [e["row"] for e in job.progress_json["errors"]]) == (2, [2])
+    assert Document.objects.get(title="Quyết định C").issue_year == 2022
+
+
+@pytest.mark.django_db
+def test_stale_running_job_is_reclaimed_and_old_worker_fenced(media_tmp_path):
+    job = jobs.enqueue("DOCUMENT_IMPORT", {"path": "imports/none.ndjson", "format": "ndjson"})
+    first = jobs.claim_next()
+    assert first.pk == job.pk and jobs.claim_next() is None
+
+    Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+    second = jobs.claim_next()
+    assert second.pk == job.pk and second.attempts == 2
+    with pytest.raises(jobs.JobLost):
+        jobs.save_progress(first, {"checkpoint": 1})
+    jobs.save_progress(second, {"checkpoint": 1})
@@ -0,0 +1,201 @@
+# tests/services/test_event_outbox.py
+from __future__ import annotations
+
+import pytest
+from django.db import connection, transaction
+
+from catalog.models import DocumentStatus
+from documents.models import Document
+from workflow.models import EventOutbox
+from workflow.services import event_relay, events, outbound_service
+from workflow.services.event_hub import Principal, audience_allows
+from workflow.services.events import emit
+from workflow.services.status_resolver import StatusResolver as SR
+
+
+class _Pipe:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def publish(self, channel, msg):
+        self.calls.append((channel, msg))
+
+    def execute(self, raise_on_error=True):
+        self.client.executions += 1
+        replies = []
+        for channel, msg in self.calls:
+            if any(bad in msg for bad in self.client.fail_on):
+                replies.append(RuntimeError("OOM"))
+            else:
+                self.client.published.append((channel, msg))
+                replies.append(1)
+        return replies
+
+
+class FakeRedis:
+    """Client ghi nhận lệnh publish gửi qua pipeline."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = tuple(fail_on)
+        self.published = []
+        self.executions = 0
+
+    def pipeline(self, transaction=True):
+        return _Pipe(self)
+
+
+@pytest.fixture(autouse=True)
+def _outbox_on(settings):
+    settings.EVENTS_PUBLISH_ENABLED = True
+    settings.EVENTS_OUTBOX_ENABLED = True
+
+
+@pytest.mark.django_db(transaction=True)
+def test_emit_follows_surrounding_transaction():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            assert emit("doc_in.start", {"document_id": 1}) is True
+            raise RuntimeError("rollback")
+    assert not EventOutbox.objects.exists()
+
+    with transaction.atomic():
+        emit("doc_in.start", {"document_id": 1})
+    row = EventOutbox.objects.get()
+    assert row.ordering_key == "document:1"
+    assert row.envelope["event"] == "doc_in.start"
+
+
+@pytest.mark.django_db
+def test_outbox_error_does_not_break_caller_transaction(monkeypatch):
+    def broken_create(**kwargs):
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1/0")
+
+    monkeypatch.setattr(EventOutbox.objects, "create", broken_create)
+    with transaction.atomic():
+        assert emit("doc_in.start", {"document_id": 1}) is False
+        # savepoint đã rollback phần lỗi → transaction nghiệp vụ vẫn dùng được
+        assert Document.objects.filter(pk=-1).count() == 0
+
+
+@pytest.mark.django_db
+def test_service_state_change_and_event_commit_together(make_user, monkeypatch):
+    actor, _ = make_user(username="outbox-actor")
+    for name in ("DU_THAO", "TRINH_DUYET"):
+        DocumentStatus.objects.get_or_create(status_name=name)
+    du_thao = SR.doc_status_id("DU_THAO")
+    doc = Document.objects.create(
+        title="Tờ trình", doc_direction="du_thao", document_code="DT-OUTBOX", status_id=du_thao
+    )
+    monkeypatch.setattr(outbound_service, "can", lambda *a, **k: True)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crash khi ghi sự kiện")
+
+    monkeypatch.setattr(outbound_service, "emit", crash)
+    with pytest.raises(RuntimeError):
+        outbound_service.OutboundService(actor).submit(doc)
+    doc.refresh_from_db()
+    assert doc.status_id == du_thao
+
+    monkeypatch.setattr(outbound_service, "emit", emit)
+    outbound_service.OutboundService(actor).submit(doc)
+    row = EventOutbox.objects.get(event="doc_out.submitted", ordering_key=f"document:{doc.pk}")
+    # SSE chỉ phát cho người liên quan: người thao tác, Lãnh đạo; người ngoài không nhận
+    assert audience_allows(row.envelope["audience"], Principal(user_id=str(actor.user_id)))
+    assert audience_allows(row.envelope["audience"], Principal(user_id="-1", roles=frozenset({"LD"})))
+    assert not audience_allows(row.envelope["audience"], Principal(user_id="-1", roles=frozenset({"CV"})))
+
+
+@pytest.mark.django_db
+def test_relay_publishes_batch_in_one_pipeline():
+    emit("doc_out.published", {"document_id": 7})
+    emit("case.assigned", {"case_id": 3})
+    client = FakeRedis()
+
+    result = event_relay.relay_once(batch_size=10, client=client)
+
+    assert result.published == 2
+    assert client.executions == 1
+    channels = [ch for ch, _ in client.published]
+    assert channels[:3] == ["events", "events.doc_out", "events.doc_out.published"]
+    assert "events.case.assigned" in channels
+    assert not EventOutbox.objects.filter(published_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_failed_event_blocks_later_events_of_same_document():
+    emit("doc_in.assigned", {"document_id": 1, "note": "bad"})
+    emit("doc_in.start", {"document_id": 2})
+
+    first = event_relay.relay_once(client=FakeRedis(fail_on=['"bad"']))
+    assert (first.published, first.failed) == (1, 1)
+    failed = EventOutbox.objects.get(published_at__isnull=True)
+    assert failed.attempts == 1 and failed.last_error == "OOM"
+    assert failed.available_at > failed.created_at
+
+    # Đang chờ retry: sự kiện mới cùng văn bản phải đợi, văn bản khác vẫn đi
+    emit("doc_in.completed", {"document_id": 1})
+    emit("doc_in.completed", {"document_id": 2})
+    second = event_relay.relay_once(client=FakeRedis())
+    assert (second.published, second.deferred) == (1, 2)
+
+    EventOutbox.objects.filter(pk=failed.pk).update(available_at=failed.created_at)
+    client = FakeRedis()
+    third = event_relay.relay_once(client=client)
+    assert third.published == 2
+    events = [msg for ch, msg in client.published if ch == "events"]
+    assert "doc_in.assigned" in events[0] and "doc_in.completed" in events[1]
+
+
+class _DownPipe(_Pipe):
+    def execute(self, raise_on_error=True):
+        raise ConnectionError("Connection refused")
+
+
+class DownRedis(FakeRedis):
+    def pipeline(self, transaction=True):
+        return _DownPipe(self)
+
+
+@pytest.fixture
+def direct_publish(settings):
+    settings.EVENTS_OUTBOX_ENABLED = False
+    events.reset_redis_client()
+    events.reset_event_stats()
+    yield
+    events.reset_redis_client()
+
+
+def test_direct_emit_sends_all_channels_in_one_round_trip(direct_publish, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(events, "_redis_client", client)
+
+    assert emit("doc_out.published", {"document_id": 5}) is True
+    assert client.executions == 1
+    assert [ch for ch, _ in client.published] == ["events", "events.doc_out", "events.doc_out.published"]
+
+    st = events.event_stats()["doc_out.published"]
+    assert st["count"] == 1 and st["failures"] == 0 and st["max_ms"] >= 0
+
+
+def test_connection_failure_backs_off_and_counts(direct_publish, monkeypatch):
+    monkeypatch.setattr(events, "_redis_client", DownRedis())
+
+    assert emit("case.assigned", {"case_id": 1}) is False
+    # Đang backoff: không thử lại Redis trong request kế tiếp
+    assert events._get_redis() is None
+    assert emit("case.assigned", {"case_id": 1}) is False
+    st = events.event_stats()["case.assigned"]
+    assert (st["count"], st["failures"]) == (1, 1)
+
+
+def test_client_uses_bounded_pool(settings):
+    settings.EVENTS_REDIS_MAX_CONNECTIONS = 7
+    redis = pytest.importorskip("redis")
+    client = events._build_client("redis://127.0.0.1:6399/0")  # không kết nối khi khởi tạo
+    pool = client.connection_pool
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["health_check_interval"] == 30
@@ -0,0 +1,211 @@
+# tests/services/test_event_streams.py
+from __future__ import annotations
+
+import pytest
+
+from workflow.services import events
+from workflow.services.event_streams import StreamConsumer
+
+
+def _seq(message_id: str) -> int:
+    return int(message_id.split("-")[0])
+
+
+class FakeStreams:
+    """
+    Redis Streams tối giản trong bộ nhớ: XADD, XGROUP CREATE, XREADGROUP (PEL), XACK, XAUTOCLAIM,
+    XPENDING. Thời gian (ms) do test tự đẩy qua `now`.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.groups = {}
+        self.xadd_calls = []
+        self.now = 0
+        self._n = 0
+
+    # pipeline không MULTI: thực thi tuần tự khi execute()
+    def pipeline(self, transaction=True):
+        client, queued = self, []
+
+        class _Pipe:
+            def __getattr__(self, name):
+                if name == "publish":
+                    raise AssertionError("backend streams không được PUBLISH")
+                return lambda *a, **kw: queued.append((name, a, kw))
+
+            def execute(self, raise_on_error=True):
+                return [getattr(client, name)(*a, **kw) for name, a, kw in queued]
+
+        return _Pipe()
+
+    def _deliver(self, g, consumer, message_id):
+        for pel in g["pel"].values():
+            if message_id in pel:
+                pel.remove(message_id)
+        g["pel"].setdefault(consumer, []).append(message_id)
+        meta = g["meta"].setdefault(message_id, {"deliveries": 0})
+        meta["deliveries"] += 1
+        meta["at"] = self.now
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.xadd_calls.append((key, maxlen, approximate))
+        self._n += 1
+        message_id = f"{self._n}-0"
+        self.streams.setdefault(key, []).append((message_id, dict(fields)))
+        return message_id
+
+    def xgroup_create(self, key, group, id="$", mkstream=False):
+        if (key, group) in self.groups:
+            raise Exception("BUSYGROUP Consumer Group name already exists")
+        entries = self.streams.setdefault(key, [])
+        last = _seq(entries[-1][0]) if (id == "$" and entries) else (0 if id in ("$", "0") else _seq(id))
+        self.groups[(key, group)] = {"last": last, "pel": {}, "meta": {}}
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        reply = []
+        for key, cursor in streams.items():
+            g = self.groups[(key, group)]
+            pel = g["pel"].setdefault(consumer, [])
+            if cursor == ">":
+                entries = [e for e in self.streams[key] if _seq(e[0]) > g["last"]][:count]
+                if entries:
+                    g["last"] = _seq(entries[-1][0])
+            else:
+                entries = [e for e in self.streams[key] if e[0] in pel and _seq(e[0]) > _seq(cursor)][:count]
+            for mid, _ in entries:
+                self._deliver(g, consumer, mid)
+            reply.append([key, entries])
+        return reply
+
+    def xautoclaim(self, key, group, consumer, min_idle_time, start_id="0-0", count=None):
+        g = self.groups[(key, group)]
+        pending = sorted((mid for pel in g["pel"].values() for mid in pel), key=_seq)
+        idle = [
+            mid for mid in pending
+            if _seq(mid) >= _seq(start_id) and self.now - g["meta"][mid]["at"] >= min_idle_time
+        ][:count]
+        for mid in idle:
+            self._deliver(g, consumer, mid)
+        by_id = dict(self.streams[key])
+        return ["0-0", [(mid, by_id.get(mid)) for mid in idle], []]
+
+    def xpending_range(self, key, group, min, max, count, consumername=None):
+        g = self.groups[(key, group)]
+        rows = [
+            {"message_id": mid, "consumer": name, "times_delivered": g["meta"][mid]["deliveries"]}
+            for name, pel in g["pel"].items() if consumername in (None, name)
+            for mid in pel if _seq(min) <= _seq(mid) <= _seq(max)
+        ]
+        return sorted(rows, key=lambda r: _seq(r["message_id"]))[:count]
+
+    def pending(self, key, group):
+        return sorted(mid for pel in self.groups[(key, group)]["pel"].values() for mid in pel)
+
+    def xack(self, key, group, *ids):
+        acked = 0
+        for pel in self.groups[(key, group)]["pel"].values():
+            for mid in ids:
+                if mid in pel:
+                    pel.remove(mid)
+                    acked += 1
+        return acked
+
+
+@pytest.fixture
+def streams_backend(settings, monkeypatch):
+    settings.EVENTS_PUBLISH_ENABLED = True
+    settings.EVENTS_OUTBOX_ENABLED = False
+    settings.EVENTS_BACKEND = "streams"
+    settings.EVENTS_STREAM_MAXLEN = 500
+    client = FakeStreams()
+    events.reset_redis_client()
+    monkeypatch.setattr(events, "_redis_client", client)
+    yield client
+    events.reset_redis_client()
+
+
+def test_emit_appends_to_capped_domain_stream(streams_backend):
+    assert events.emit("doc_out.published", {"document_id": 9}) is True
+    assert events.emit("case.assigned", {"case_id": 1}) is True
+
+    assert streams_backend.xadd_calls == [
+        ("events:stream:doc_out", 500, True),
+        ("events:stream:case", 500, True),
+    ]
+    _, fields = streams_backend.streams["events:stream:doc_out"][0]
+    assert fields["event"] == "doc_out.published"
+
+
+def test_group_worker_acks_and_rereads_pending_after_restart(streams_backend):
+    events.emit("doc_in.assigned", {"document_id": 1})
+    consumer = StreamConsumer(streams_backend, "notify", "w1", ["doc_in"], count=10)
+    consumer.ensure_groups("0")  # replay phần đã có trong stream
+
+    events.emit("doc_in.start", {"document_id": 1})
+    events.emit("doc_in.completed", {"document_id": 1})
+
+    def flaky(message_id, envelope):
+        if envelope["event"] == "doc_in.start":
+            raise RuntimeError("SMTP down")
+
+    assert consumer.poll(flaky) == 0  # lượt đầu: PEL rỗng
+    assert consumer.poll(flaky) == 2
+    assert consumer.poll(flaky) == 0  # không có message mới
+
+    # Khởi động lại cùng tên consumer: đọc lại message chưa ack rồi mới nhận message mới
+    seen = []
+    restarted = StreamConsumer(streams_backend, "notify", "w1", ["doc_in"], count=10)
+    restarted.ensure_groups("0")
+    assert restarted.poll(lambda mid, env: seen.append(env["event"])) == 1
+    events.emit("doc_in.returned", {"document_id": 1})
+    restarted.poll(lambda mid, env: seen.append(env["event"]))
+    restarted.poll(lambda mid, env: seen.append(env["event"]))
+    assert seen == ["doc_in.start", "doc_in.returned"]
+
+
+def test_idle_pending_of_a_gone_consumer_is_reclaimed(streams_backend):
+    events.emit("doc_in.assigned", {"document_id": 1})
+    events.emit("doc_in.start", {"document_id": 1})
+    gone = StreamConsumer(streams_backend, "notify", "pod-a1b2", ["doc_in"], count=10, claim_idle_ms=30_000)
+    gone.ensure_groups("0")
+
+    def crash(message_id, envelope):
+        raise RuntimeError("pod bị dời")
+
+    gone.poll(crash)
+    assert gone.poll(crash) == 0
+    assert len(streams_backend.pending("events:stream:doc_in", "notify")) == 2
+
+    seen = []
+    worker = StreamConsumer(streams_backend, "notify", "pod-c3d4", ["doc_in"], count=10, claim_idle_ms=30_000)
+    assert worker.poll(lambda mid, env: seen.append(env["event"])) == 0  # chưa treo đủ lâu
+    streams_backend.now += 30_000
+    worker._last_claim = None  # tới kỳ reclaim
+    assert worker.poll(lambda mid, env: seen.append(env["event"])) == 2
+    assert seen == ["doc_in.assigned", "doc_in.start"]
+    assert streams_backend.pending("events:stream:doc_in", "notify") == []
+
+
+def test_failed_handler_is_retried_then_dead_lettered(streams_backend):
+    events.emit("doc_out.published", {"document_id": 1})
+    events.emit("doc_out.published", {"document_id": 2})
+    consumer = StreamConsumer(
+        streams_backend, "notify", "w1", ["doc_out"], count=10, claim_idle_ms=0, max_deliveries=3
+    )
+    consumer.ensure_groups("0")
+    calls = {1: 0, 2: 0}
+
+    def handler(message_id, envelope):
+        doc = envelope["payload"]["document_id"]
+        calls[doc] += 1
+        if doc == 2 or calls[doc] < 2:  # văn bản 1 lỗi một lần; văn bản 2 lỗi mãi
+            raise RuntimeError("SMTP down")
+
+    acked = sum(consumer.poll(handler) for _ in range(6))  # không khởi động lại consumer
+
+    assert acked == 1 and calls == {1: 2, 2: 3}
+    assert streams_backend.pending("events:stream:doc_out", "notify") == []
+    [(_, dead)] = streams_backend.streams["events:stream:doc_out:dead"]
+    assert (dead["group"], dead["deliveries"]) == ("notify", 4)
+    assert dead["source_id"] == streams_backend.streams["events:stream:doc_out"][1][0]
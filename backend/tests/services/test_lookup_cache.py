@@ -0,0 +1,83 @@
+# tests/services/test_lookup_cache.py
+from __future__ import annotations
+
+import pytest
+from django.core.cache import cache
+
+from catalog.models import DocumentStatus
+from systemapps.models import SystemSetting
+from workflow.services import settings_reader, status_resolver
+from workflow.services import lookup_cache
+from workflow.services.lookup_cache import lookup_cache_stats
+from workflow.services.status_resolver import StatusResolver as SR
+
+
+@pytest.mark.django_db
+def test_status_ids_served_from_warm_snapshot(django_assert_num_queries):
+    DocumentStatus.objects.get_or_create(status_name="DU_THAO")
+    expected = DocumentStatus.objects.get(status_name="DU_THAO").status_id
+
+    status_resolver.doc_statuses.warm()
+    before = status_resolver.doc_statuses.stats()
+    with django_assert_num_queries(0):
+        assert SR.doc_status_id("DU_THAO") == expected
+        assert SR.doc_status_id("DU_THAO") == expected
+
+    after = status_resolver.doc_statuses.stats()
+    assert after["hits"] - before["hits"] == 2
+    assert after["loads"] == before["loads"]
+    assert any(s["name"] == "doc_status" for s in lookup_cache_stats())
+
+
+@pytest.mark.django_db
+def test_orm_write_invalidates_and_unknown_name_raises():
+    created = DocumentStatus.objects.create(status_name="TRANG_THAI_MOI")
+    assert SR.doc_status_id("TRANG_THAI_MOI") == created.status_id
+
+    created.delete()
+    with pytest.raises(ValueError):
+        SR.doc_status_id("TRANG_THAI_MOI")
+
+
+@pytest.mark.django_db
+def test_other_worker_bump_is_seen_after_check_interval(settings):
+    settings.LOOKUP_CACHE_CHECK_INTERVAL = 0
+    lookup = status_resolver.doc_statuses
+    lookup.warm()
+    loads = lookup.stats()["loads"]
+
+    lookup.get("__khong_co__")
+    assert lookup.stats()["loads"] == loads
+
+    # Worker khác ghi: chỉ version dùng chung đổi, bản trong process này vẫn còn → nạp lại
+    cache.incr(lookup.version_key)
+    lookup.get("__khong_co__")
+    assert lookup.stats()["loads"] == loads + 1
+
+
+@pytest.mark.django_db
+def test_settings_reader_reflects_system_setting_edits(django_assert_num_queries):
+    key = "doc.visibility.department_level"
+    SystemSetting.objects.filter(setting_key=key).delete()
+    assert settings_reader.get_setting_bool(key, default=False) is False
+
+    row = SystemSetting.objects.create(setting_key=key, setting_value=True)
+    assert settings_reader.get_setting_bool(key) is True
+
+    row.setting_value = "off"
+    row.save()
+    assert settings_reader.get_setting_bool(key, default=True) is False
+
+    # Key không tồn tại: trả None từ snapshot, không tra DB
+    with django_assert_num_queries(0):
+        assert settings_reader.get_setting_raw("khong.ton.tai") is None
+
+
+@pytest.mark.django_db
+def test_warm_up_runs_once_on_first_request(client, django_assert_num_queries):
+    loads = status_resolver.doc_statuses.stats()["loads"]
+    with django_assert_num_queries(0):
+        lookup_cache.warm_on_first_request()  # lúc import wsgi/asgi: chưa chạm DB
+    client.get("/khong-ton-tai/")
+    client.get("/khong-ton-tai/")
+    assert status_resolver.doc_statuses.stats()["loads"] == loads + 1
@@ -0,0 +1,123 @@
+# tests/services/test_numbering.py
+from __future__ import annotations
+
+import threading
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from catalog.models import DocumentStatus
+from documents.models import Document, NumberCounter, NumberingRule, OutgoingNumbering, RegisterBook
+from workflow.services import numbering, outbound_service
+from workflow.services.errors import ValidationError
+from workflow.services.outbound_service import OutboundService
+from workflow.services.status_resolver import StatusResolver as SR
+
+
+@pytest.fixture
+def actor(db):
+    return get_user_model().objects.create_user(username="numbering-vt", password="x")
+
+
+@pytest.mark.django_db
+def test_default_plan_continues_from_issued_numbers(actor):
+    OutgoingNumbering.objects.create(
+        year=2025, seq=7, prefix="UBND", scope="outgoing:UBND", period="2025", issued_by=actor
+    )
+    plan = numbering.default_plan(2025, "UBND")
+    assert numbering.allocate(plan, actor=actor, year=2025)[0] == "8/UBND"
+    assert numbering.allocate(plan, actor=actor, year=2025)[0] == "9/UBND"
+    # Tiền tố khác, năm khác → bộ đếm riêng
+    assert numbering.allocate(numbering.default_plan(2025, "HĐND"), actor=actor, year=2025)[0] == "1/HĐND"
+    assert numbering.allocate(numbering.default_plan(2026, "UBND"), actor=actor, year=2026)[0] == "1/UBND"
+
+
+@pytest.mark.django_db
+def test_rollback_gives_the_number_back(actor):
+    plan = numbering.default_plan(2025)
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            assert numbering.reserve(plan) == (1, 1)
+            raise RuntimeError("phát hành lỗi")
+    assert numbering.reserve(plan) == (1, 1)
+    assert numbering.reserve(plan, 5) == (2, 6)
+
+
+@pytest.mark.django_db
+def test_rule_padding_and_monthly_reset(actor):
+    rule = NumberingRule.objects.create(
+        code="CV-DI", name="Công văn đi", target="outgoing", prefix="UBND-VP", suffix="-CV",
+        padding=4, start_sequence=1, next_sequence=12, reset_policy="monthly",
+    )
+    svc = OutboundService(actor)
+    number, entry = svc._allocate_issue_number(numbering_rule=rule.pk, on=date(2025, 1, 20))
+    assert number == "0012-01/UBND-VP-CV"
+    assert (entry.scope, entry.period, entry.seq) == (f"rule:{rule.pk}", "2025-01", 12)
+    assert svc._allocate_issue_number(numbering_rule=rule, on=date(2025, 2, 3))[0] == "0001-02/UBND-VP-CV"
+
+    # Sửa next_sequence trong cấu hình = reset thủ công kỳ hiện tại; không lùi về số đã cấp
+    feb = numbering.plan_for_rule(rule, date(2025, 2, 9))
+    with pytest.raises(ValidationError) as exc:
+        numbering.set_next_value(feb, 1)
+    assert exc.value.code == "NEXT_SEQUENCE_TOO_LOW" and exc.value.extra["min_next_sequence"] == 2
+    numbering.set_next_value(feb, 50)
+    assert svc._allocate_issue_number(numbering_rule=rule, on=date(2025, 2, 9))[0] == "0050-02/UBND-VP-CV"
+
+
+@pytest.mark.django_db
+def test_publish_with_quarterly_rule_does_not_collide_across_quarters(actor, monkeypatch):
+    for name in ("PHE_DUYET", "PHAT_HANH"):
+        DocumentStatus.objects.get_or_create(status_name=name)
+    rule = NumberingRule.objects.create(
+        code="QD-QUY", name="Quyết định", target="outgoing", prefix="QĐ-UBND", padding=3, reset_policy="quarterly",
+    )
+    monkeypatch.setattr(outbound_service, "can", lambda *a, **k: True)
+    svc = OutboundService(actor)
+    numbers = []
+    for i, issued in enumerate((date(2025, 2, 10), date(2025, 5, 4), date(2025, 5, 5))):
+        doc = Document.objects.create(
+            title=f"Quyết định {i}", doc_direction="du_thao", document_code=f"DT-QUY-{i}",
+            status_id=SR.doc_status_id("PHE_DUYET"),
+        )
+        published, _ = svc.publish(doc, issued_date=issued, numbering_rule=rule)
+        numbers.append(published.issue_number)
+    assert numbers == ["001-Q1/QĐ-UBND", "001-Q2/QĐ-UBND", "002-Q2/QĐ-UBND"]
+
+
+def test_period_keys():
+    on = date(2025, 8, 14)
+    assert numbering.period_key(RegisterBook.ResetPolicy.YEARLY, on) == "2025"
+    assert numbering.period_key(RegisterBook.ResetPolicy.QUARTERLY, on) == "2025-Q3"
+    assert numbering.period_key(RegisterBook.ResetPolicy.MONTHLY, on) == "2025-08"
+    assert numbering.period_key(RegisterBook.ResetPolicy.NEVER, on) == numbering.ALL_TIME
+    assert numbering.period_key(NumberingRule.ResetPolicy.MANUAL, on) == numbering.ALL_TIME
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_publishers_get_unique_contiguous_numbers(actor):
+    plan = numbering.default_plan(2031, "BENCH")
+    workers, per_worker = 8, 10
+    errors = []
+
+    def publisher():
+        try:
+            for _ in range(per_worker):
+                with transaction.atomic():
+                    numbering.allocate(plan, actor=actor, year=2031)
+        except Exception as exc:  # pragma: no cover - báo lỗi về thread chính
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=publisher) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    seqs = sorted(OutgoingNumbering.objects.filter(scope=plan.scope, period=plan.period).values_list("seq", flat=True))
+    assert seqs == list(range(1, workers * per_worker + 1))
+    assert NumberCounter.objects.get(scope=plan.scope, period=plan.period).last_value == workers * per_worker
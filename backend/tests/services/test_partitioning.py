@@ -0,0 +1,147 @@
+# tests/services/test_partitioning.py
+from __future__ import annotations
+
+import gzip
+from datetime import date, datetime, timezone as dt_timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from audit.models import AuditLog
+from core import partitioning
+
+pytestmark = pytest.mark.skipif(connection.vendor != "postgresql", reason="cần PostgreSQL")
+
+
+def _holder(audit_id) -> str:
+    with connection.cursor() as cur:
+        cur.execute("SELECT tableoid::regclass::text FROM audit_logs WHERE audit_id = %s", [audit_id])
+        return cur.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_log_tables_are_partitioned():
+    assert partitioning.is_partitioned("audit_logs")
+    assert partitioning.is_partitioned("document_workflow_logs")
+    this_month = partitioning.month_start(timezone.localdate())
+    names = {p.name for p in partitioning.list_partitions("audit_logs")}
+    assert partitioning.partition_name("audit_logs", partitioning.add_months(this_month, 3)) in names
+
+
+@pytest.mark.django_db
+def test_ensure_partitions_is_idempotent():
+    created = partitioning.ensure_partitions("audit_logs", months_ahead=1, start=date(2020, 1, 15))
+    assert created == ["audit_logs_p202001", "audit_logs_p202002"]
+    assert partitioning.ensure_partitions("audit_logs", months_ahead=1, start=date(2020, 1, 1)) == []
+
+
+@pytest.mark.django_db
+def test_default_rows_move_then_partition_is_archived(tmp_path):
+    actor = get_user_model().objects.create_user(username="partition-actor", password="x")
+    row = AuditLog.objects.create(
+        actor=actor, action="DOC.IN.ASSIGN", entity_type="document", entity_id="1",
+        at=datetime(2019, 6, 10, tzinfo=dt_timezone.utc),
+    )
+    assert _holder(row.pk) == "audit_logs_default"
+
+    partitioning.ensure_partitions("audit_logs", months_ahead=0, start=date(2019, 6, 1))
+    assert _holder(row.pk) == "audit_logs_p201906"
+
+    detached = partitioning.detach_partitions(
+        "audit_logs", retain_months=1, archive_dir=str(tmp_path), drop=True, today=date(2019, 9, 1)
+    )
+    assert [name for name, _ in detached] == ["audit_logs_p201906"]
+    assert not AuditLog.objects.filter(pk=row.pk).exists()
+    with gzip.open(detached[0][1], "rt", encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    assert lines[0].startswith("audit_id,")
+    assert len(lines) == 2 and "DOC.IN.ASSIGN" in lines[1]
+
+
+@pytest.mark.django_db
+def test_rebuild_keeps_unique_constraints_indexes_and_identity(monkeypatch):
+    monkeypatch.setitem(partitioning.PARTITIONED_TABLES, "partition_probe", ("at", "id"))
+    with connection.cursor() as cur:
+        cur.execute(
+            "CREATE TABLE partition_probe (id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+            "ref varchar(20) NOT NULL, at timestamptz NOT NULL, CONSTRAINT partition_probe_ref_uniq UNIQUE (ref))"
+        )
+        cur.execute("CREATE UNIQUE INDEX partition_probe_ref_at_idx ON partition_probe (upper(ref), at)")
+        cur.execute("CREATE INDEX partition_probe_ref_like ON partition_probe (ref varchar_pattern_ops)")
+        cur.execute("INSERT INTO partition_probe (ref, at) VALUES ('A', '2025-01-05'), ('B', '2025-02-05')")
+
+    with connection.schema_editor() as editor:
+        partitioning.convert_to_partitioned(editor, "partition_probe")
+    assert partitioning.is_partitioned("partition_probe")
+
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'partition_probe'::regclass AND conname = 'partition_probe_ref_uniq'"
+        )
+        assert cur.fetchone()[0] == "UNIQUE (ref, at)"
+        cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'partition_probe'")
+        assert {r[0] for r in cur.fetchall()} >= {
+            "partition_probe_pkey", "partition_probe_ref_uniq", "partition_probe_ref_at_idx", "partition_probe_ref_like"
+        }
+        cur.execute("SELECT attidentity FROM pg_attribute WHERE attrelid = 'partition_probe'::regclass AND attname = 'id'")
+        assert cur.fetchone()[0] == "d"
+        cur.execute("INSERT INTO partition_probe (ref, at) VALUES ('C', '2025-02-06') RETURNING id")
+        assert cur.fetchone()[0] == 3
+        with pytest.raises(IntegrityError), transaction.atomic():
+            cur.execute("INSERT INTO partition_probe (ref, at) VALUES ('C', '2025-02-06')")
+
+    with connection.schema_editor() as editor:
+        partitioning.convert_to_plain(editor, "partition_probe")
+    assert not partitioning.is_partitioned("partition_probe")
+    with connection.cursor() as cur:
+        cur.execute("INSERT INTO partition_probe (ref, at) VALUES ('D', '2025-03-01') RETURNING id")
+        assert cur.fetchone()[0] == 4
+
+
+@pytest.mark.django_db
+def test_archive_is_exported_before_detach_and_catches_late_rows(tmp_path, monkeypatch):
+    actor = get_user_model().objects.create_user(username="partition-late", password="x")
+
+    def log(day):
+        return AuditLog.objects.create(
+            actor=actor, action="DOC.IN.ASSIGN", entity_type="document", entity_id=str(day),
+            at=datetime(2018, 3, day, tzinfo=dt_timezone.utc),
+        )
+
+    with connection.cursor() as cur:  # test chạy trong một transaction: FK deferred chặn DROP
+        cur.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    partitioning.ensure_partitions("audit_logs", months_ahead=0, start=date(2018, 3, 1))
+    log(1)
+    export = partitioning._export_csv_gz
+    attached_during_export = []
+
+    def export_then_late_write(cur, name, archive_dir):
+        attached_during_export.append(name in {p.name for p in partitioning.list_partitions("audit_logs")})
+        out = export(cur, name, archive_dir)
+        if len(attached_during_export) == 1:
+            log(2)  # dòng ghi muộn sau khi xuất lần đầu
+        return out
+
+    monkeypatch.setattr(partitioning, "_export_csv_gz", export_then_late_write)
+    detached = partitioning.detach_partitions(
+        "audit_logs", retain_months=1, archive_dir=str(tmp_path), drop=True, today=date(2018, 6, 1)
+    )
+
+    assert [name for name, _ in detached] == ["audit_logs_p201803"]
+    # lần xuất đầu chạy khi partition còn gắn (trước DETACH); lần sau xuất lại vì có dòng mới
+    assert attached_during_export == [True, False]
+    with gzip.open(detached[0][1], "rt", encoding="utf-8") as fh:
+        assert len(fh.read().splitlines()) == 3
+
+
+@pytest.mark.django_db
+def test_drop_without_archive_requires_force():
+    with pytest.raises(ValueError):
+        partitioning.detach_partitions("audit_logs", retain_months=1, drop=True)
+    with pytest.raises(CommandError):
+        call_command("manage_partitions", "audit_logs", "--retain-months", "1", "--drop")
+    assert partitioning.detach_partitions("audit_logs", retain_months=1, drop=True, force=True, today=date(2000, 1, 1)) == []
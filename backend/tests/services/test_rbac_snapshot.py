@@ -0,0 +1,107 @@
+# tests/services/test_rbac_snapshot.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from accounts.models import Role, UserRole
+from workflow.services import rbac, rbac_cache
+from workflow.services.rbac import Act
+
+
+def _user_with_role(username: str, role_name: str):
+    user = get_user_model().objects.create_user(username=username, password="x")
+    role, _ = Role.objects.get_or_create(name=role_name)
+    UserRole.objects.create(user=user, role=role)
+    return user
+
+
+@pytest.mark.django_db
+def test_snapshot_resolves_roles_and_aliases():
+    user = _user_with_role("snap-vt", "VAN_THU")
+
+    snap = rbac.get_permission_snapshot(user)
+    assert snap.role_names == ("VAN_THU", "VT")
+    assert rbac.get_single_role_code(user) == "VT"
+    assert rbac.can(user, Act.IN_RECEIVE) is True
+    assert rbac.can(user, Act.OUT_SIGN) is False
+
+
+@pytest.mark.django_db
+def test_scope_memoises_snapshot_per_user(django_assert_num_queries, settings):
+    settings.RBAC_CACHE_ENABLED = False
+    user = _user_with_role("snap-ld", "LANH_DAO")
+
+    with rbac.permission_cache_scope():
+        # role của user + ma trận role→permission (một truy vấn mỗi thứ)
+        with django_assert_num_queries(2):
+            for act in (Act.VIEW, Act.OUT_APPROVE, Act.OUT_SIGN, Act.CASE_ASSIGN, Act.CASE_APPROVE_CLOSE):
+                assert rbac.can(user, act) is True
+            assert rbac.can(user, Act.IN_RECEIVE) is False
+
+    # Ngoài scope: không memo → mỗi lần gọi nạp lại
+    with django_assert_num_queries(4):
+        rbac.can(user, Act.VIEW)
+        rbac.can(user, Act.VIEW)
+
+
+@pytest.mark.django_db
+def test_shared_cache_serves_roles_until_version_bump(django_assert_num_queries):
+    user = _user_with_role("snap-shared", "CHUYEN_VIEN")
+
+    assert rbac.get_single_role_code(user) == "CV"
+    # Lần sau (request khác/worker khác dùng chung cache) không chạm DB
+    with django_assert_num_queries(0):
+        assert rbac.get_single_role_code(user) == "CV"
+        assert rbac.can(user, Act.OUT_SUBMIT) is True
+
+    # Sửa role qua ORM → signal bump version → request kế tiếp thấy ngay
+    ld, _ = Role.objects.get_or_create(name="LANH_DAO")
+    UserRole.objects.filter(user=user).update(role=ld)  # update() không phát signal
+    assert rbac.get_single_role_code(user) == "CV"
+    UserRole.objects.filter(user=user).delete()
+    UserRole.objects.create(user=user, role=ld)
+    assert rbac.get_single_role_code(user) == "LD"
+
+
+@pytest.mark.django_db
+def test_role_matrix_from_role_permissions(django_assert_num_queries):
+    from accounts.models import RbacPermission, RolePermission
+
+    user = _user_with_role("snap-matrix", "CUSTOM_ROLE")
+    perm, _ = RbacPermission.objects.get_or_create(code="DOC.OUT.SIGN", defaults={"name": "sign"})
+
+    assert rbac.can(user, Act.OUT_SIGN) is False
+    RolePermission.objects.create(role=Role.objects.get(name="CUSTOM_ROLE"), permission=perm)
+    assert rbac.can(user, Act.OUT_SIGN) is True
+
+    # Grant nằm trong ma trận dùng chung; lần sau phục vụ từ cache, không chạm DB
+    with django_assert_num_queries(0):
+        matrix = rbac_cache.get_matrix(rbac_cache.current_version(), rbac._load_role_matrix)
+        assert rbac.can(user, Act.OUT_SIGN) is True
+    assert "DOC.OUT.SIGN" in matrix.configured
+    assert "DOC.OUT.SIGN" in matrix.grants["CUSTOM_ROLE"]
+
+
+@pytest.mark.django_db
+def test_clear_permission_cache_after_role_change():
+    user = _user_with_role("snap-cv", "CHUYEN_VIEN")
+
+    with rbac.permission_cache_scope():
+        assert rbac.can(user, Act.OUT_DRAFT_CREATE) is True
+        assert rbac.can(user, Act.IN_RECEIVE) is False
+
+        # Ghi qua ORM → signal tự xoá memo; update() không phát signal → phải xoá tay
+        UserRole.objects.filter(user=user).update(role=Role.objects.get_or_create(name="VAN_THU")[0])
+        assert rbac.can(user, Act.IN_RECEIVE) is False
+        rbac_cache.bump_version()
+        rbac.clear_permission_cache(user)
+        assert rbac.can(user, Act.IN_RECEIVE) is True
+
+
+@pytest.mark.django_db
+def test_dynamic_assignee_rule_still_checked():
+    user = _user_with_role("snap-cv2", "CHUYEN_VIEN")
+    with rbac.permission_cache_scope():
+        # CV có IN_START trong ma trận nhưng phải là assignee của văn bản
+        assert rbac.can(user, Act.IN_START, None) is False
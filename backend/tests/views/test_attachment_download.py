@@ -0,0 +1,64 @@
+# tests/views/test_attachment_download.py
+from __future__ import annotations
+
+import hashlib
+from datetime import date
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from documents.models import Document
+
+CONTENT = bytes(range(256)) * 8  # 2048 byte
+
+
+@pytest.fixture
+def uploaded(client_with_user, media_tmp_path):
+    doc = Document.objects.create(
+        doc_direction="den", title="Tải về", received_number=3, received_date=date(2024, 4, 1), sender="Sở Y"
+    )
+    client = client_with_user(username="vt-download", role="VAN_THU")
+    upload = SimpleUploadedFile("quyet-dinh.pdf", CONTENT, content_type="application/pdf")
+    att = client.post(f"/api/v1/documents/{doc.pk}/attachments/", {"file": upload}, format="multipart").json()
+    return client, f"/api/v1/documents/{doc.pk}/attachments/{att['attachment_id']}/download/"
+
+
+@pytest.mark.django_db
+def test_download_supports_etag_and_byte_ranges(uploaded):
+    client, url = uploaded
+    etag = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert (full["ETag"], full["Accept-Ranges"], full["Content-Length"]) == (etag, "bytes", "2048")
+    assert full["Content-Type"] == "application/pdf" and "quyet-dinh.pdf" in full["Content-Disposition"]
+    assert b"".join(full.streaming_content) == CONTENT
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(url, HTTP_IF_NONE_MATCH='"khac"').status_code == 200
+
+    part = client.get(url, HTTP_RANGE="bytes=100-199")
+    assert (part.status_code, part["Content-Range"], part["Content-Length"]) == (206, "bytes 100-199/2048", "100")
+    assert b"".join(part.streaming_content) == CONTENT[100:200]
+    tail = client.get(url, HTTP_RANGE="bytes=-48", HTTP_IF_RANGE=etag)
+    assert tail["Content-Range"] == "bytes 2000-2047/2048" and b"".join(tail.streaming_content) == CONTENT[-48:]
+
+    # If-Range lệch (tệp đã đổi) → trả cả tệp; khoảng ngoài tệp → 416
+    assert client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"cu"').status_code == 200
+    bad = client.get(url, HTTP_RANGE="bytes=4096-")
+    assert (bad.status_code, bad["Content-Range"]) == (416, "bytes */2048")
+
+
+@pytest.mark.django_db
+def test_download_can_be_offloaded_to_the_proxy(uploaded, settings):
+    client, url = uploaded
+    settings.ATTACHMENT_DOWNLOAD_OFFLOAD = "x-accel"
+    resp = client.get(url)
+    assert resp.status_code == 200 and resp.content == b""
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert resp["X-Accel-Redirect"] == f"/protected-media/blobs/{sha256[:2]}/{sha256}"
+    assert resp["Content-Type"] == "application/pdf" and resp["ETag"] == f'"{sha256}"'
+
+    settings.ATTACHMENT_DOWNLOAD_OFFLOAD = "x-sendfile"
+    resp = client.get(url)
+    assert resp["X-Sendfile"].endswith(f"/blobs/{sha256[:2]}/{sha256}")
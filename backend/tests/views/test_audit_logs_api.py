@@ -0,0 +1,106 @@
+# tests/views/test_audit_logs_api.py
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+
+from audit.models import AuditLog
+
+URL = "/api/v1/audit-logs/"
+BASE = datetime(2025, 3, 1, 8, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def auditor(client_with_user):
+    return client_with_user(username="auditor-qt", role="QUAN_TRI")
+
+
+@pytest.fixture
+def logs(make_user):
+    actor, _ = make_user(username="audit-actor")
+    rows = [
+        AuditLog(
+            actor=actor if i % 2 == 0 else None,
+            action="DOC.IN.ASSIGN" if i % 3 else "CASE.CREATE",
+            entity_type="document" if i % 3 else "case",
+            entity_id=str(i % 4),
+            at=BASE + timedelta(minutes=i // 2),  # từng cặp trùng `at` → kiểm tra khoá phụ audit_id
+            before_json={"i": i},
+        )
+        for i in range(25)
+    ]
+    AuditLog.objects.bulk_create(rows)
+    return actor
+
+
+def _walk(client, params):
+    ids, query = [], dict(params)
+    while True:
+        resp = client.get(URL, query)
+        assert resp.status_code == 200, resp.content
+        body = resp.json()
+        assert "total_items" not in body
+        ids.extend(item["id"] for item in body["items"])
+        if not body["next_cursor"]:
+            return ids
+        query = dict(params, cursor=body["next_cursor"])
+
+
+@pytest.mark.django_db
+def test_requires_audit_permission(client_with_user):
+    client = client_with_user(username="audit-cv", role="CHUYEN_VIEN")
+    assert client.get(URL).status_code == 403
+    assert client.get(URL + "export/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_list_walks_keyset_pages_newest_first(auditor, logs):
+    ids = _walk(auditor, {"page_size": 4, "at_from": "2025-03-01"})
+    expected = list(
+        AuditLog.objects.filter(at__gte=BASE).order_by("-at", "-audit_id").values_list("audit_id", flat=True)
+    )
+    assert ids == expected and len(ids) == 25
+
+
+@pytest.mark.django_db
+def test_filters(auditor, logs):
+    body = auditor.get(URL, {"entity_type": "case", "entity_id": "0", "action": "CASE.CREATE"}).json()
+    assert {(i["entity_type"], i["entity_id"], i["action"]) for i in body["items"]} == {("case", "0", "CASE.CREATE")}
+
+    body = auditor.get(URL, {"actor": str(logs.pk), "page_size": 50}).json()
+    assert len(body["items"]) == 13
+    assert {i["actor_username"] for i in body["items"]} == {"audit-actor"}
+
+    window = {"at_from": (BASE + timedelta(minutes=2)).isoformat(), "at_to": (BASE + timedelta(minutes=4)).isoformat()}
+    assert len(auditor.get(URL, window).json()["items"]) == 4
+    assert auditor.get(URL, {"at_from": "không-phải-ngày"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_export_ndjson_streams_in_keyset_batches(auditor, logs, settings, django_assert_max_num_queries):
+    settings.AUDIT_EXPORT_BATCH_SIZE = 10
+    resp = auditor.get(URL + "export/", {"action": "DOC.IN.ASSIGN,CASE.CREATE"})
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/x-ndjson"
+    with django_assert_max_num_queries(3):  # 25 dòng / lô 10 → 3 truy vấn
+        lines = b"".join(resp.streaming_content).splitlines()
+    rows = [json.loads(line) for line in lines]
+    expected = list(AuditLog.objects.order_by("at", "audit_id").values_list("audit_id", flat=True))
+    assert [r["id"] for r in rows] == expected
+    assert rows[0]["before_json"] == {"i": 0} and rows[0]["actor_id"] == str(logs.pk)
+
+
+@pytest.mark.django_db
+def test_export_csv(auditor, logs):
+    resp = auditor.get(URL + "export/", {"output": "csv", "entity_type": "case"})
+    assert resp.status_code == 200
+    assert resp["Content-Disposition"].endswith('.csv"')
+    text = b"".join(resp.streaming_content).decode("utf-8").lstrip("\ufeff")
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 9 and {r["entity_type"] for r in rows} == {"case"}
+    assert json.loads(rows[0]["before_json"]) == {"i": 0}
+    assert auditor.get(URL + "export/", {"output": "xml"}).status_code == 400
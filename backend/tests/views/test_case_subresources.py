@@ -96,6 +96,10 @@ def test_upload_case_attachment(client_with_user, make_user, media_tmp_path):
     assert resp.status_code == 201
     assert CaseAttachment.objects.filter(case=case).count() == 1
 
+    download = client.get(f"/api/v1/cases/{case.case_id}/attachments/{resp.json()['attachment_id']}/download/")
+    assert download.status_code == 200 and b"".join(download.streaming_content) == b"Nhiem vu dinh kem"
+    assert client.get(download.request["PATH_INFO"], HTTP_IF_NONE_MATCH=download["ETag"]).status_code == 304
+
 
 @pytest.mark.django_db
 @override_settings(ROOT_URLCONF="config.urls", TESTING=True)
@@ -0,0 +1,149 @@
+# tests/views/test_chunked_upload.py
+from __future__ import annotations
+
+import hashlib
+import io
+import uuid
+from datetime import date
+
+import pytest
+
+from accounts.models import Department
+from catalog.models import CaseStatus, CaseType
+from cases.models import Case, CaseAttachment
+from common.models import UploadSession
+from documents.models import Document, DocumentAttachment
+from workflow.services import blob_store, chunked_upload
+from workflow.services.errors import ServiceError
+
+PAYLOAD = b"%PDF-1.7\n" + bytes(range(256)) * 40  # 10249 byte
+
+
+def _put(client, url, data, offset, **extra):
+    return client.put(f"{url}?offset={offset}", data=data, content_type="application/octet-stream", **extra)
+
+
+@pytest.fixture
+def inbound_doc(db):
+    return Document.objects.create(
+        doc_direction="den", title="Hồ sơ scan", received_number=7, received_date=date(2024, 5, 2), sender="Sở X"
+    )
+
+
+@pytest.mark.django_db
+def test_document_upload_resumes_and_completes(
+    client_with_user, inbound_doc, media_tmp_path, settings, django_capture_on_commit_callbacks
+):
+    settings.UPLOAD_CHUNK_MAX_SIZE = 4096
+    client = client_with_user(username="vt-chunk", role="VAN_THU")
+    base = f"/api/v1/documents/{inbound_doc.pk}/attachments/uploads/"
+    init = client.post(
+        base,
+        {"file_name": "scan.pdf", "total_size": len(PAYLOAD), "sha256": hashlib.sha256(PAYLOAD).hexdigest()},
+        format="json",
+    )
+    assert init.status_code == 201, init.content
+    body = init.json()
+    url = body["upload_url"]
+    assert (body["offset"], body["chunk_size"]) == (0, 4096)
+
+    assert _put(client, url, PAYLOAD[:4096], 0).json()["offset"] == 4096
+    # Client không nhận được phản hồi và gửi lại chunk cũ → 409 kèm offset để nối tiếp
+    stale = _put(client, url, PAYLOAD[:4096], 0)
+    assert stale.status_code == 409 and stale["Upload-Offset"] == "4096"
+    assert _put(client, url, PAYLOAD[:5000], 4096).json()["code"] == "UPLOAD_CHUNK_TOO_LARGE"
+    assert client.post(body["complete_url"]).status_code == 409
+
+    # Rớt mạng giữa chunk: phần nhận được bị bỏ, offset giữ nguyên
+    session = UploadSession.objects.get(pk=body["upload_id"])
+    with pytest.raises(ServiceError) as exc:
+        chunked_upload.write_chunk(session, io.BytesIO(PAYLOAD[4096:6000]), offset=4096, length=4096)
+    assert exc.value.code == "UPLOAD_CHUNK_INCOMPLETE"
+    status = client.get(url)
+    assert (status.json()["offset"], status["Upload-Offset"]) == (4096, "4096")
+
+    assert _put(client, url, PAYLOAD[4096:8192], 4096).status_code == 200
+    assert _put(client, url, PAYLOAD[8192:], 8192).json()["offset"] == len(PAYLOAD)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        done = client.post(body["complete_url"])
+    assert done.status_code == 201, done.content
+    att = DocumentAttachment.objects.get(pk=done.json()["attachment_id"])
+    assert (att.file_name, att.size, att.sha256) == ("scan.pdf", len(PAYLOAD), hashlib.sha256(PAYLOAD).hexdigest())
+    assert att.storage_path == f"blobs/{att.sha256[:2]}/{att.sha256}" and att.blob.ref_count == 1
+    assert media_tmp_path.joinpath(att.storage_path).read_bytes() == PAYLOAD
+    assert not any(media_tmp_path.joinpath("uploads", body["upload_id"]).iterdir())
+    # complete lặp lại (mất phản hồi) trả đúng đính kèm cũ
+    assert client.post(body["complete_url"]).json()["attachment_id"] == str(att.pk)
+    assert DocumentAttachment.objects.filter(document=inbound_doc).count() == 1
+
+    other = client_with_user(username="vt-chunk-other", role="VAN_THU")
+    assert other.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_case_upload_with_content_range_rejects_wrong_checksum(
+    client_with_user, make_user, media_tmp_path, django_capture_on_commit_callbacks
+):
+    dept, _ = Department.objects.get_or_create(name="Phòng Hành chính", defaults={"department_code": "PHC"})
+    creator, _ = make_user(username="creator-chunk", full_name="Người tạo")
+    case = Case.objects.create(
+        case_code=f"HS-UP-{uuid.uuid4().hex[:6]}",
+        title="Hồ sơ tải lớn",
+        case_type=CaseType.objects.get_or_create(case_type_name="Loại chuẩn")[0],
+        created_by=creator,
+        department=dept,
+        status=CaseStatus.objects.get_or_create(case_status_name="DA_PHAN_CONG")[0],
+    )
+    client = client_with_user(username="cv-chunk", role="CHUYEN_VIEN")
+    base = f"/api/v1/cases/{case.pk}/attachments/uploads/"
+    body = client.post(base, {"file_name": "ban-ve.pdf", "total_size": 10, "sha256": "0" * 64}, format="json").json()
+
+    resp = client.put(
+        body["upload_url"], data=b"0123456789", content_type="application/octet-stream",
+        HTTP_CONTENT_RANGE="bytes 0-9/10",
+    )
+    assert resp.json()["offset"] == 10
+    bad = client.post(body["complete_url"])
+    assert (bad.status_code, bad.json()["code"]) == (400, "UPLOAD_CHECKSUM_MISMATCH")
+    assert not CaseAttachment.objects.filter(case=case).exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert client.delete(body["upload_url"]).status_code == 204
+    assert UploadSession.objects.get(pk=body["upload_id"]).status == "ABORTED"
+    assert not any(media_tmp_path.joinpath("uploads", body["upload_id"]).iterdir())
+
+
+@pytest.mark.django_db
+def test_complete_reads_each_part_once_and_reuses_existing_blob(
+    make_user, inbound_doc, media_tmp_path, monkeypatch, django_capture_on_commit_callbacks
+):
+    actor, _ = make_user(username="vt-chunk-once")
+    reads = []
+    file_blocks = blob_store.file_blocks
+
+    def counting(path):
+        reads.append(path)
+        return file_blocks(path)
+
+    monkeypatch.setattr(blob_store, "file_blocks", counting)
+    attachments = []
+    for _ in range(2):
+        session = chunked_upload.start(
+            actor=actor, target_type="document", target_id=inbound_doc.pk, file_name="scan.pdf",
+            total_size=len(PAYLOAD),
+        )
+        for offset in range(0, len(PAYLOAD), 4096):
+            chunk = PAYLOAD[offset : offset + 4096]
+            session = chunked_upload.write_chunk(session, io.BytesIO(chunk), offset=offset, length=len(chunk))
+        reads.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            _, att = chunked_upload.complete(session)
+        assert sorted(reads) == sorted(p["path"] for p in session.parts)
+        assert not any(media_tmp_path.joinpath("uploads", str(session.pk)).iterdir())
+        attachments.append(att)
+
+    blob = attachments[0].blob
+    blob.refresh_from_db()
+    assert attachments[1].blob_id == blob.pk and blob.ref_count == 2
+    assert media_tmp_path.joinpath(blob.storage_path).read_bytes() == PAYLOAD
@@ -0,0 +1,82 @@
+# tests/views/test_count_strategy.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from documents import models as doc_models
+
+
+def _make_drafts(n: int, prefix: str):
+    User = get_user_model()
+    creator, _ = User.objects.get_or_create(username=f"{prefix}-creator")
+    for i in range(n):
+        doc_models.Document.objects.create(
+            title=f"{prefix} {i}",
+            doc_direction="du_thao",
+            document_code=f"{prefix}-{i}",
+            created_by=creator,
+        )
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_exact_count_is_default(auth_client):
+    _make_drafts(3, "EXA")
+    body = auth_client.get(reverse("documents-list"), {"q": "EXA"}).json()
+    assert body["total_items"] == 3
+    assert body["total_is_estimate"] is False
+
+
+@pytest.mark.django_db
+@override_settings(PAGINATION_COUNT_STRATEGY="cached", PAGINATION_COUNT_CACHE_TTL=60)
+def test_cached_count_reused_within_ttl(auth_client):
+    _make_drafts(3, "CAC")
+    url = reverse("documents-list")
+
+    first = auth_client.get(url, {"q": "CAC"}).json()
+    assert (first["total_items"], first["total_is_estimate"]) == (3, False)
+
+    _make_drafts(1, "CAC-late")
+    second = auth_client.get(url, {"q": "CAC", "page": 1}).json()
+    assert (second["total_items"], second["total_is_estimate"]) == (3, True)
+    assert len(second["items"]) == 4
+
+    # Tham số lọc khác → khóa cache khác → đếm lại
+    other = auth_client.get(url, {"q": "CAC-late"}).json()
+    assert (other["total_items"], other["total_is_estimate"]) == (1, False)
+
+
+@pytest.mark.django_db
+@override_settings(PAGINATION_COUNT_STRATEGY="estimated", PAGINATION_ESTIMATE_THRESHOLD=0)
+def test_estimated_count_only_without_filters(auth_client):
+    _make_drafts(5, "EST")
+    with connection.cursor() as cur:
+        cur.execute(f"ANALYZE {doc_models.Document._meta.db_table}")
+    url = reverse("documents-list")
+
+    unfiltered = auth_client.get(url, {"page_size": 2}).json()
+    assert unfiltered["total_is_estimate"] is True
+    assert len(unfiltered["items"]) == 2
+
+    filtered = auth_client.get(url, {"q": "EST"}).json()
+    assert (filtered["total_items"], filtered["total_is_estimate"]) == (5, False)
+
+
+@pytest.mark.django_db
+@override_settings(PAGINATION_COUNT_STRATEGY="estimated")
+def test_estimated_count_falls_back_below_threshold(auth_client):
+    _make_drafts(2, "THR")
+    body = auth_client.get(reverse("documents-list")).json()
+    assert body["total_is_estimate"] is False
+    assert body["total_items"] == doc_models.Document.objects.count()
@@ -0,0 +1,137 @@
+# tests/views/test_cursor_pagination.py
+from __future__ import annotations
+
+import datetime as dt
+import uuid
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Department
+from catalog.models import CaseStatus, CaseType
+from cases.models import Case
+from documents import models as doc_models
+
+
+def _walk(client, url, params):
+    """Duyệt hết các trang theo next_cursor, trả (danh sách id, danh sách trang)."""
+    ids, pages = [], []
+    query = dict(params, cursor="")
+    while True:
+        resp = client.get(url, query)
+        assert resp.status_code == 200, resp.content
+        body = resp.json()
+        pages.append(body)
+        ids.extend(item["id"] for item in body["items"])
+        if not body["next_cursor"]:
+            return ids, pages
+        query = dict(params, cursor=body["next_cursor"])
+
+
+def _make_docs(n: int, *, prefix: str, with_dates: bool = True):
+    User = get_user_model()
+    creator = User.objects.create_user(username=f"{prefix}-creator", password="x")
+    now = timezone.now()
+    docs = []
+    for i in range(n):
+        doc = doc_models.Document.objects.create(
+            title=f"{prefix} {i}",
+            doc_direction="du_thao",
+            document_code=f"{prefix}-{i}",
+            issued_date=(now - dt.timedelta(days=i % 3)).date() if (with_dates and i % 4) else None,
+            created_by=creator,
+        )
+        docs.append(doc)
+    # created_at trùng nhau cho một nửa để buộc phải phân định bằng PK
+    doc_models.Document.objects.filter(document_id__in=[d.document_id for d in docs[::2]]).update(created_at=now)
+    return docs
+
+
+@pytest.mark.django_db
+def test_cursor_walk_matches_offset_order(auth_client):
+    docs = _make_docs(7, prefix="CUR")
+    url = reverse("documents-list")
+
+    ids, pages = _walk(auth_client, url, {"page_size": 3, "q": "CUR"})
+
+    assert sorted(ids) == sorted(d.document_id for d in docs)
+    assert len(ids) == len(set(ids))
+    assert [len(p["items"]) for p in pages] == [3, 3, 1]
+    assert pages[0]["prev_cursor"] is None
+    assert "total_items" not in pages[0]
+
+    expected = list(
+        doc_models.Document.objects.filter(title__startswith="CUR")
+        .order_by("-created_at", "-document_id")
+        .values_list("document_id", flat=True)
+    )
+    assert ids == expected
+
+
+@pytest.mark.django_db
+def test_cursor_prev_returns_previous_page(auth_client):
+    _make_docs(7, prefix="PRV")
+    url = reverse("documents-list")
+    params = {"page_size": 3, "q": "PRV"}
+
+    first = auth_client.get(url, dict(params, cursor="")).json()
+    second = auth_client.get(url, dict(params, cursor=first["next_cursor"])).json()
+    back = auth_client.get(url, dict(params, cursor=second["prev_cursor"])).json()
+
+    assert [i["id"] for i in back["items"]] == [i["id"] for i in first["items"]]
+    assert back["prev_cursor"] is None
+    assert back["next_cursor"]
+
+
+@pytest.mark.django_db
+def test_cursor_with_nullable_ordering_key(auth_client):
+    docs = _make_docs(9, prefix="NUL")
+    url = reverse("documents-list")
+
+    for ordering in ("issued_date", "-issued_date"):
+        ids, _ = _walk(auth_client, url, {"page_size": 2, "q": "NUL", "ordering": ordering})
+        assert sorted(ids) == sorted(d.document_id for d in docs)
+        assert len(ids) == len(set(ids))
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_rejected(auth_client):
+    url = reverse("documents-list")
+    resp = auth_client.get(url, {"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+@override_settings(ROOT_URLCONF="config.urls", TESTING=True)
+def test_case_list_cursor(client_with_user, make_user):
+    dept, _ = Department.objects.get_or_create(name="Phòng Hành chính", defaults={"department_code": "PHC"})
+    case_type, _ = CaseType.objects.get_or_create(case_type_name="Loại chuẩn")
+    case_status, _ = CaseStatus.objects.get_or_create(case_status_name="DA_PHAN_CONG")
+    creator, _ = make_user(username=f"case-cur-{uuid.uuid4().hex[:6]}")
+    created = {
+        Case.objects.create(
+            case_code=f"CUR-{i}-{uuid.uuid4().hex[:4]}",
+            title=f"Hồ sơ {i}",
+            case_type=case_type,
+            created_by=creator,
+            department=dept,
+            status=case_status,
+        ).case_id
+        for i in range(5)
+    }
+    client = client_with_user(username="ld-cursor", role="LANH_DAO")
+
+    seen = []
+    query = {"page_size": 2, "cursor": ""}
+    while True:
+        body = client.get("/api/v1/cases/", query).json()
+        seen.extend(item["id"] for item in body["items"])
+        if not body["next_cursor"]:
+            break
+        query["cursor"] = body["next_cursor"]
+
+    assert created <= set(seen)
+    assert len(seen) == len(set(seen))
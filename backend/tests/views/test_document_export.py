@@ -0,0 +1,81 @@
+# tests/views/test_document_export.py
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from documents.models import Document, RegisterBook
+from reports.models import ReportExport
+from workflow.services import jobs
+
+
+def _rows(content: bytes):
+    text = content.decode("utf-8")
+    assert text.startswith("\ufeff")
+    return list(csv.reader(io.StringIO(text[1:])))
+
+
+@pytest.fixture
+def inbound_docs(db):
+    docs = []
+    for i, (day, sender) in enumerate([(date(2024, 3, 1), "Sở A"), (date(2024, 3, 2), "Sở B"), (date(2023, 12, 30), "Sở C")], 1):
+        docs.append(
+            Document.objects.create(
+                doc_direction="den", title=f"Xuất thử {i}", received_number=i, received_date=day, sender=sender
+            )
+        )
+    return docs
+
+
+@pytest.mark.django_db
+def test_small_export_streams_csv(client_with_user, inbound_docs):
+    client = client_with_user(username="vt-export", role="VAN_THU")
+    resp = client.get("/api/v1/documents/export/", {"direction": "den", "q": "Xuất thử", "ordering": "received_date"})
+    assert resp.status_code == 200
+    assert resp.streaming and resp["Content-Type"].startswith("text/csv")
+    assert 'attachment; filename="van-ban-' in resp["Content-Disposition"]
+    rows = _rows(b"".join(resp.streaming_content))
+    assert rows[0][:3] == ["ID", "Loại", "Số đến"]
+    assert [r[8] for r in rows[1:]] == ["Xuất thử 3", "Xuất thử 1", "Xuất thử 2"]
+
+    bad = client.get("/api/v1/documents/export/", {"output": "pdf"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.django_db
+def test_large_export_runs_as_background_job(client_with_user, inbound_docs, media_tmp_path, settings):
+    settings.EXPORT_SYNC_MAX_ROWS = 1
+    client = client_with_user(username="vt-export-bg", role="VAN_THU")
+    resp = client.get("/api/v1/inbound-docs/export/", {"q": "Xuất thử"})
+    assert resp.status_code == 202, resp.content
+    body = resp.json()
+    assert (body["status"], body["total_rows"]) == ("QUEUED", 3)
+    assert client.get(body["status_url"]).json()["status"] == "QUEUED"
+    assert client.get(body["download_url"]).status_code == 409
+
+    assert jobs.run_pending() == 1
+    status = client.get(body["status_url"]).json()
+    assert (status["status"], status["row_count"], status["download_url"]) == ("DONE", 3, body["download_url"])
+    export = ReportExport.objects.get(pk=body["export_id"])
+    assert export.report.code == "DOCUMENT_EXPORT" and export.file_path.startswith("exports/")
+
+    download = client.get(body["download_url"])
+    assert download.status_code == 200
+    assert len(_rows(b"".join(download.streaming_content))) == 4
+
+    other = client_with_user(username="vt-export-other", role="VAN_THU")
+    assert other.get(body["status_url"]).status_code == 404
+
+
+@pytest.mark.django_db
+def test_register_book_export_lists_the_book_year_in_order(client_with_user, inbound_docs):
+    book = RegisterBook.objects.create(name="Sổ đến 2024", direction="den", year=2024)
+    client = client_with_user(username="vt-export-book", role="VAN_THU")
+    resp = client.get("/api/v1/register-books/export/", {"register_id": book.pk, "mode": "sync"})
+    assert resp.status_code == 200, resp.content
+    rows = _rows(b"".join(resp.streaming_content))
+    assert rows[0][:3] == ["Số đến", "Ngày đến", "Nơi gửi"]
+    assert [r[:3] for r in rows[1:]] == [["1", "2024-03-01", "Sở A"], ["2", "2024-03-02", "Sở B"]]
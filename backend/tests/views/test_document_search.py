@@ -0,0 +1,166 @@
+# tests/views/test_document_search.py
+from __future__ import annotations
+
+import importlib
+import io
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from documents import models as doc_models
+from documents.search import RANK_ANNOTATION, search_documents
+
+
+def _draft(title: str, code: str, **extra):
+    return doc_models.Document.objects.create(
+        title=title,
+        doc_direction="du_thao",
+        document_code=code,
+        **extra,
+    )
+
+
+def _ids(client, **params):
+    resp = client.get(reverse("documents-list"), params)
+    assert resp.status_code == 200, resp.content
+    return [item["id"] for item in resp.json()["items"]]
+
+
+@pytest.mark.django_db
+def test_search_ignores_vietnamese_diacritics(auth_client):
+    hit = _draft("Quyết định khen thưởng năm 2025", "S-1")
+    _draft("Công văn về lịch họp", "S-2")
+
+    assert _ids(auth_client, q="quyet dinh") == [hit.document_id]
+    assert _ids(auth_client, q="QUYẾT ĐỊNH") == [hit.document_id]
+
+
+@pytest.mark.django_db
+def test_search_matches_prefix_sender_and_typo(auth_client):
+    doc = _draft("Thông báo tuyển dụng viên chức", "S-3", sender="Sở Nội vụ")
+    _draft("Báo cáo tài chính quý", "S-4")
+
+    # tiền tố từ
+    assert _ids(auth_client, q="tuyen dun") == [doc.document_id]
+    # nơi gửi nằm trong tsvector
+    assert _ids(auth_client, q="so noi vu") == [doc.document_id]
+    # gõ sai một ký tự → trigram word-similarity
+    assert _ids(auth_client, q="tuyen dunh") == [doc.document_id]
+
+
+@pytest.mark.django_db
+def test_search_by_number(auth_client):
+    doc = _draft("Kế hoạch năm", "S-5", issue_number="123/QĐ-UBND")
+    _draft("Kế hoạch quý", "S-6")
+
+    assert _ids(auth_client, q="123/QĐ") == [doc.document_id]
+
+
+@pytest.mark.django_db
+def test_search_orders_by_relevance_unless_ordering_given(auth_client):
+    strong = _draft("Công văn về công văn đến", "S-8")
+    weak = _draft("Công văn gửi các phòng ban", "S-7", sender="Văn phòng")
+
+    assert _ids(auth_client, q="cong van") == [strong.document_id, weak.document_id]
+    assert _ids(auth_client, q="cong van", ordering="relevance") == [strong.document_id, weak.document_id]
+    # ordering tường minh thắng relevance
+    assert _ids(auth_client, q="cong van", ordering="-created_at") == [weak.document_id, strong.document_id]
+
+
+@pytest.mark.django_db
+def test_search_documents_blank_value_is_noop():
+    _draft("Tờ trình", "S-9")
+    qs = doc_models.Document.objects.all()
+
+    out, matched = search_documents(qs, "  !! ")
+    assert matched is False
+    assert out is qs
+
+    out, matched = search_documents(qs, "to trinh")
+    assert matched is True
+    assert RANK_ANNOTATION in out.query.annotations
+    assert out.count() == 1
+
+
+@pytest.mark.django_db
+def test_search_vector_maintained_on_save():
+    doc = _draft("Tờ trình ngân sách", "S-10", sender="Phòng Tài chính")
+
+    def stored(pk):
+        return doc_models.Document.objects.values_list("search_vector", flat=True).get(pk=pk)
+
+    vec = stored(doc.pk)
+    # title trọng số A, nơi gửi trọng số B, đã bỏ dấu
+    assert "'to':1A" in vec
+    assert re.search(r"'tai':\d+B", vec)
+
+    doc.title = "Quyết định điều chỉnh"
+    doc.save()
+    assert "'quyet'" in stored(doc.pk)
+
+    # save chỉ đổi field không thuộc search_vector → không UPDATE thêm
+    doc_models.Document.objects.filter(pk=doc.pk).update(search_vector=None)
+    doc.save(update_fields=["signer_position"])
+    assert stored(doc.pk) is None
+    doc.save(update_fields=["sender"])
+    assert stored(doc.pk) is not None
+
+
+@pytest.mark.django_db
+def test_backfill_search_vector_command():
+    docs = [_draft(f"Công văn {i}", f"S-B{i}") for i in range(5)]
+    doc_models.Document.objects.update(search_vector=None)
+
+    call_command("backfill_search_vector", "--batch-size", "2", stdout=io.StringIO())
+
+    assert not doc_models.Document.objects.filter(search_vector__isnull=True).exists()
+    hits, _ = search_documents(doc_models.Document.objects.all(), "cong van")
+    assert hits.count() == len(docs)
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_rows(monkeypatch):
+    from django.apps import apps
+
+    migration = importlib.import_module("documents.migrations.0012_backfill_search_vector")
+    monkeypatch.setattr(migration, "BATCH_SIZE", 2)
+    docs = [_draft(f"Tờ trình {i}", f"S-M{i}") for i in range(3)]
+    doc_models.Document.objects.update(search_vector=None)
+
+    migration._backfill(apps, None)
+
+    assert not doc_models.Document.objects.filter(search_vector__isnull=True).exists()
+    hits, _ = search_documents(doc_models.Document.objects.all(), "to trinh")
+    assert set(hits.values_list("pk", flat=True)) >= {d.pk for d in docs}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_search_highlight_in_list(auth_client, settings, fast_path):
+    settings.DOCUMENT_LIST_FAST_PATH = fast_path
+    doc = _draft("Quyết định khen thưởng", "S-11")
+
+    items = auth_client.get(reverse("documents-list"), {"q": "quyet", "highlight": "true"}).json()["items"]
+    assert [it["id"] for it in items] == [doc.document_id]
+    assert items[0]["title_highlight"] == "<mark>Quyết</mark> định khen thưởng"
+
+    plain = auth_client.get(reverse("documents-list"), {"q": "quyet"}).json()["items"]
+    assert "title_highlight" not in plain[0]
+
+
+@pytest.mark.django_db
+def test_number_search_uses_indexes():
+    doc = _draft("Kế hoạch năm", "S-11", issue_number="45/qđ-ubnd")
+    qs, _ = search_documents(doc_models.Document.objects.all(), "45/QĐ")
+    assert list(qs.values_list("document_id", flat=True)) == [doc.document_id]
+
+    with connection.cursor() as cur:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        plan = qs.explain()
+        cur.execute("RESET enable_seqscan")
+    # mọi nhánh OR (FTS, trigram title, số hiệu) đều đi index → không quét bảng documents
+    assert "Seq Scan on documents" not in plan
+    assert "doc_issue_number_trgm" in plan
@@ -0,0 +1,65 @@
+# tests/views/test_events_stream.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from workflow.services.event_hub import EventHub, Principal, audience_allows, hub
+
+
+def test_audience_filter():
+    me = Principal(user_id="7", department_id="2", roles=frozenset({"VT", "VAN_THU"}))
+    assert audience_allows({}, me) is False
+    assert audience_allows(None, me) is False
+    assert audience_allows({"user_ids": []}, me) is False
+    assert audience_allows({"user_ids": [7]}, me) is True
+    assert audience_allows({"user_ids": ["8"], "department_ids": [2]}, me) is True
+    assert audience_allows({"roles": ["LD"]}, me) is False
+    assert audience_allows({"user_ids": ["8"], "roles": ["VT"]}, me) is True
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_requires_jwt_and_asgi(api_client):
+    async def scenario():
+        client = AsyncClient()
+        assert (await client.get("/api/v1/events/stream")).status_code == 401
+        assert (await client.get("/api/v1/events/stream?token=khong-hop-le")).status_code == 401
+
+    asyncio.run(scenario())
+    # Worker WSGI không giữ stream vô hạn
+    resp = api_client.get("/api/v1/events/stream")
+    assert (resp.status_code, resp.json()["code"]) == (503, "SSE_REQUIRES_ASGI")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_delivers_only_matching_events(make_user, monkeypatch):
+    user, _ = make_user(username="sse-user", role="VAN_THU")
+    token = str(RefreshToken.for_user(user).access_token)
+
+    async def _no_redis(self):  # không có Redis trong test: hub chỉ nhận qua dispatch()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(EventHub, "_run", _no_redis)
+
+    async def scenario():
+        resp = await AsyncClient().get(f"/api/v1/events/stream?token={token}&events=doc_in")
+        assert resp.status_code == 200
+        assert resp["Content-Type"].startswith("text/event-stream")
+        chunks = resp.streaming_content
+        assert b": connected" in await anext(chunks)
+        assert hub.subscriber_count == 1
+
+        uid = str(user.user_id)
+        assert hub.dispatch('{"event": "doc_in.assigned", "audience": {"user_ids": ["999"]}, "ts": 1}') == 0
+        assert hub.dispatch('{"event": "case.assigned", "audience": {}, "ts": 2}') == 0
+        assert hub.dispatch('{"event": "doc_in.assigned", "audience": {"user_ids": ["%s"]}, "ts": 3}' % uid) == 1
+
+        frame = await anext(chunks)
+        assert frame.startswith(b"id: 3\nevent: doc_in.assigned\ndata: ")
+        resp.close()  # ASGI handler gọi close() khi client ngắt kết nối
+        assert hub.subscriber_count == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+# tests/views/test_list_query_count.py
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from documents import models as doc_models
+
+
+def _make_outbound(prefix: str, n: int, creator):
+    for i in range(n):
+        doc = doc_models.Document.objects.create(
+            title=f"{prefix} {i}",
+            doc_direction="di",
+            issue_number=f"{prefix}-{i}",
+            issued_date=dt.date.today(),
+            created_by=creator,
+        )
+        if i % 2 == 0:
+            doc_models.DocumentAssignment.objects.create(
+                document=doc, user=creator, role_on_doc="assignee", assigned_by=creator,
+            )
+            doc_models.DocumentAttachment.objects.create(
+                document=doc, attachment_type="file", file_name="a.pdf",
+                storage_path="attachments/a.pdf", uploaded_by=creator,
+            )
+
+
+def _count_list_queries(client, prefix: str) -> tuple[int, list]:
+    url = reverse("outbound-docs-list")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url, {"q": prefix, "page_size": 50})
+    assert resp.status_code == 200
+    return len(ctx.captured_queries), resp.json()["items"]
+
+
+@pytest.mark.django_db
+def test_list_query_count_is_constant(auth_client):
+    User = get_user_model()
+    creator = User.objects.create_user(username="qc-creator", password="x")
+
+    _make_outbound("QCS", 2, creator)
+    _make_outbound("QCL", 12, creator)
+
+    small, small_items = _count_list_queries(auth_client, "QCS")
+    large, large_items = _count_list_queries(auth_client, "QCL")
+
+    assert len(small_items) == 2 and len(large_items) == 12
+    assert small == large
+
+
+@pytest.mark.django_db
+def test_list_counters_come_from_annotations(auth_client):
+    User = get_user_model()
+    creator = User.objects.create_user(username="qc-values", password="x")
+    _make_outbound("QCV", 4, creator)
+
+    _, items = _count_list_queries(auth_client, "QCV")
+    by_title = {it["title"]: it for it in items}
+
+    assert by_title["QCV 0"]["assignee_count"] == 1
+    assert by_title["QCV 0"]["has_attachments"] is True
+    assert by_title["QCV 1"]["assignee_count"] == 0
+    assert by_title["QCV 1"]["has_attachments"] is False
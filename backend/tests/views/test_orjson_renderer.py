@@ -0,0 +1,73 @@
+# tests/views/test_orjson_renderer.py
+from __future__ import annotations
+
+import datetime as dt
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+def test_renderer_matches_drf_json_renderer():
+    payload = {
+        "items": [
+            OrderedDict(
+                id=1,
+                attachment_id=uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                created_at=dt.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=dt.timezone.utc),
+                local=dt.datetime(2025, 1, 2, 10, 4, 5, tzinfo=dt.timezone(dt.timedelta(hours=7))),
+                naive=dt.datetime(2025, 1, 2, 3, 4, 5),
+                issued_date=dt.date(2025, 1, 2),
+                at=dt.time(8, 30),
+                amount=Decimal("12.50"),
+                took=dt.timedelta(seconds=90),
+                label=gettext_lazy("Văn bản đến"),
+                text="Quyết định số 1",
+                nothing=None,
+                flags=(True, False),
+            )
+        ],
+        "total_items": 1,
+        7: "non-str key",
+    }
+    assert ORJSONRenderer().render(payload) == JSONRenderer().render(payload)
+
+
+def test_renderer_honours_indent_and_none():
+    renderer = ORJSONRenderer()
+    assert renderer.render(None) == b""
+    pretty = renderer.render({"a": 1}, "application/json; indent=2")
+    assert pretty == JSONRenderer().render({"a": 1}, "application/json; indent=2")
+
+
+def test_parser_reads_utf8_and_rejects_invalid():
+    parser = ORJSONParser()
+    data = parser.parse(io.BytesIO('{"title": "Công văn", "n": 1}'.encode("utf-8")))
+    assert data == {"title": "Công văn", "n": 1}
+
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"a": NaN}'))
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b"{broken"))
+
+
+@pytest.mark.django_db
+def test_api_uses_orjson_stack(auth_client):
+    resp = auth_client.get(reverse("documents-list"))
+    assert resp.status_code == 200
+    assert isinstance(resp.accepted_renderer, ORJSONRenderer)
+
+    bad = auth_client.generic(
+        "POST", reverse("documents-list"), "{not json", content_type="application/json"
+    )
+    assert bad.status_code == 400
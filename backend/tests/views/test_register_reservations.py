@@ -0,0 +1,112 @@
+# tests/views/test_register_reservations.py
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.models import DocumentStatus
+from documents.models import Document, NumberReservation, RegisterBook
+from workflow.services import numbering
+from workflow.services.errors import ValidationError
+from workflow.services.inbound_service import InboundService
+from workflow.services.status_resolver import StatusResolver as SR
+
+
+def _url(book):
+    return f"/api/v1/register-books/{book.pk}/reserve-numbers/"
+
+
+@pytest.fixture
+def book(db):
+    return RegisterBook.objects.create(
+        name="Sổ VB đến", direction="den", year=2025, padding=4, next_sequence=41, reset_policy="quarterly"
+    )
+
+
+@pytest.mark.django_db
+def test_reserve_block_costs_one_counter_update(client_with_user, book, django_assert_max_num_queries):
+    client = client_with_user(username="vt-reserve", role="VAN_THU")
+    resp = client.post(_url(book), {"count": 300, "date": "2025-02-10"}, format="json")
+    assert resp.status_code == 201, resp.content
+    body = resp.json()
+    assert (body["period"], body["first_value"], body["last_value"], body["remaining"]) == ("2025-Q1", 41, 340, 300)
+
+    # Kích thước lô không ảnh hưởng số truy vấn
+    with django_assert_max_num_queries(12):
+        body = client.post(_url(book), {"count": 1000, "date": "2025-03-31"}, format="json").json()
+    assert (body["first_value"], body["last_value"]) == (341, 1340)
+
+    # Sang quý mới: bộ đếm của sổ bắt đầu lại từ 1
+    body = client.post(_url(book), {"count": 5, "date": "2025-04-01"}, format="json").json()
+    assert (body["period"], body["first_value"], body["last_value"]) == ("2025-Q2", 1, 5)
+
+
+@pytest.mark.django_db
+def test_reserve_requires_register_permission(client_with_user, book):
+    client = client_with_user(username="cv-reserve", role="CHUYEN_VIEN")
+    assert client.post(_url(book), {"count": 3}, format="json").status_code == 403
+    vt = client_with_user(username="vt-reserve-2", role="VAN_THU")
+    assert vt.post(_url(book), {"count": 0}, format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_register_calls_take_numbers_from_the_block(make_user, book):
+    clerk, _ = make_user(username="vt-batch", role="VAN_THU")
+    other, _ = make_user(username="vt-other", role="VAN_THU")
+    feb = date(2025, 2, 11)
+    reservation = numbering.reserve_block(book, 2, actor=clerk, on=date(2025, 2, 10))
+
+    docs = list(Document.objects.filter(doc_direction="den")[:2])
+    if len(docs) < 2:
+        pytest.skip("Không đủ văn bản đến đã seed.")
+    for name in ("TIEP_NHAN", "DANG_KY"):
+        DocumentStatus.objects.get_or_create(status_name=name)
+    svc = InboundService(clerk)
+    for doc in docs:
+        doc.status_id = SR.doc_status_id("TIEP_NHAN")
+        svc.register(doc, received_date=feb, sender="Sở Nội vụ", reservation_id=reservation.pk)
+    assert sorted(d.received_number for d in docs) == [41, 42]
+
+    with pytest.raises(ValidationError) as exc:
+        numbering.take_reserved(reservation.pk, clerk, received_date=feb)
+    assert exc.value.code == "RESERVATION_EXHAUSTED"
+
+    again = numbering.reserve_block(book, 3, actor=clerk, on=feb)
+    with pytest.raises(ValidationError) as exc:
+        numbering.take_reserved(again.pk, other, received_date=feb)
+    assert exc.value.code == "INVALID_RESERVATION"
+
+    # Đăng ký lỗi → số được trả lại cho khối
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            assert numbering.take_reserved(again.pk, clerk, received_date=feb) == 43
+            raise RuntimeError("lỗi đăng ký")
+    assert numbering.take_reserved(again.pk, clerk, received_date=feb) == 43
+    assert NumberReservation.objects.get(pk=again.pk).remaining == 2
+
+
+@pytest.mark.django_db
+def test_reserved_number_only_fits_its_period_and_book(make_user, book):
+    clerk, _ = make_user(username="vt-period", role="VAN_THU")
+    q1 = numbering.reserve_block(book, 5, actor=clerk, on=date(2025, 1, 15))
+
+    for received, code in (
+        (date(2025, 4, 2), "RESERVATION_PERIOD_MISMATCH"),  # quý khác → phải dùng bộ đếm quý 2
+        (date(2024, 3, 1), "REGISTER_BOOK_YEAR_MISMATCH"),
+    ):
+        with pytest.raises(ValidationError) as exc:
+            numbering.take_reserved(q1.pk, clerk, received_date=received)
+        assert exc.value.code == code
+
+    outgoing = Document(doc_direction="di", title="Công văn đi")
+    with pytest.raises(ValidationError) as exc:
+        numbering.take_reserved(q1.pk, clerk, received_date=date(2025, 3, 31), document=outgoing)
+    assert exc.value.code == "RESERVATION_BOOK_MISMATCH"
+
+    assert numbering.take_reserved(q1.pk, clerk, received_date=date(2025, 3, 31)) == 41
+    with pytest.raises(ValidationError) as exc:
+        numbering.reserve_block(book, 1, actor=clerk, on=date(2026, 1, 5))
+    assert exc.value.code == "REGISTER_BOOK_YEAR_MISMATCH"
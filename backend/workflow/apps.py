@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class WorkflowConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "workflow"
+
+    def ready(self):
+        # Vô hiệu cache trạng thái/system_settings khi bảng nguồn thay đổi;
+        # duy trì bảng visibility khi văn bản/hồ sơ/phân công thay đổi; đếm tham chiếu blob đính kèm
+        from workflow.signals import connect_blob_signals, connect_signals, connect_visibility_signals
+
+        connect_signals()
+        connect_visibility_signals()
+        connect_blob_signals()
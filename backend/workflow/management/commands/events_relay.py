@@ -0,0 +1,55 @@
+# workflow/management/commands/events_relay.py
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Đọc event_outbox và publish lên Redis Pub/Sub theo lô (pipeline), có retry/backoff "
+        "và giữ thứ tự theo văn bản/hồ sơ. Chạy song song với web worker; nhiều tiến trình thì chỉ một hoạt động."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=200, help="Số sự kiện mỗi lô (mặc định 200).")
+        parser.add_argument("--interval", type=float, default=1.0, help="Nghỉ khi hàng đợi rỗng (giây).")
+        parser.add_argument("--keep-hours", type=float, default=24.0, help="Giữ dòng đã publish bao lâu (giờ).")
+        parser.add_argument("--once", action="store_true", help="Xử lý đến khi hết hàng đợi rồi thoát.")
+
+    def handle(self, *args, **opts):
+        from workflow.services.event_relay import purge_published, relay_once
+        from workflow.services.events import event_stats
+
+        batch_size = int(opts["batch_size"])
+        if batch_size <= 0:
+            raise CommandError("--batch-size phải > 0")
+        interval = max(0.0, float(opts["interval"]))
+        keep = timedelta(hours=max(0.0, float(opts["keep_hours"])))
+
+        total = 0
+        last_purge = 0.0
+        while True:
+            result = relay_once(batch_size)
+            total += result.published
+            if result.published or result.failed:
+                self.stdout.write(f"… published={result.published} failed={result.failed} deferred={result.deferred}")
+
+            if time.monotonic() - last_purge > 60:
+                purge_published(keep)
+                last_purge = time.monotonic()
+                for event, st in sorted(event_stats().items()):
+                    self.stdout.write(
+                        f"  {event}: n={st['count']:.0f} lỗi={st['failures']:.0f} "
+                        f"avg={st['avg_ms']}ms max={st['max_ms']:.1f}ms"
+                    )
+
+            drained = result.published + result.failed < batch_size
+            if opts["once"] and (drained or result.locked):
+                break
+            if drained:
+                time.sleep(interval)
+
+        self.stdout.write(self.style.SUCCESS(f"Đã publish {total} sự kiện."))
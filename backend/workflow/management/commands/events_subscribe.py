@@ -3,10 +3,22 @@ from django.conf import settings
 import json, sys
 
 class Command(BaseCommand):
-    help = "Subscribe Redis Pub/Sub channels and print envelopes."
+    help = (
+        "Subscribe Redis Pub/Sub channels and print envelopes. "
+        "With --group: consume Redis Streams (EVENTS_BACKEND=streams) as a consumer-group worker."
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument("channels", nargs="*", help="Channels to subscribe (default: events)")
+        parser.add_argument("channels", nargs="*", help="Channels to subscribe (default: events) / domains with --group (default: doc_in doc_out case)")
+        parser.add_argument("--group", help="Consumer group name: read Redis Streams with XREADGROUP + XACK.")
+        parser.add_argument("--consumer", help="Consumer name in the group (default: hostname; must be stable across restarts).")
+        parser.add_argument("--start-id", default="$", help="Offset when creating the group: '$' = new only, '0' = everything retained.")
+        parser.add_argument("--reset", action="store_true", help="Move an existing group to --start-id (replay).")
+        parser.add_argument("--batch", type=int, default=100, help="Messages per XREADGROUP call.")
+        parser.add_argument("--block", type=int, default=5000, help="XREADGROUP block timeout (ms).")
+        parser.add_argument("--claim-idle", type=int, default=None, help="Reclaim (XAUTOCLAIM) pending messages idle longer than this (ms, default 60000); also the reclaim interval.")
+        parser.add_argument("--max-deliveries", type=int, default=None, help="Move a message to the '<stream>:dead' stream after this many deliveries (default 5).")
+        parser.add_argument("--handler", help="Dotted path of callable(message_id, envelope); default prints the envelope.")
 
     def handle(self, *args, **opts):
         try:
@@ -17,6 +29,10 @@ class Command(BaseCommand):
 
         url = getattr(settings, "EVENTS_REDIS_URL", None) or getattr(settings, "REDIS_URL", "redis://localhost:6379/0")
         r = redis.Redis.from_url(url, decode_responses=True)
+
+        if opts["group"]:
+            return self._consume_group(r, opts)
+
         p = r.pubsub()
 
         channels = opts["channels"] or ["events"]
@@ -31,3 +47,40 @@ class Command(BaseCommand):
             except Exception:
                 payload = msg["data"]
             self.stdout.write(f"[{msg['channel']}] {payload}")
+
+    def _consume_group(self, r, opts):
+        from django.utils.module_loading import import_string
+        from workflow.services.event_streams import (
+            DEFAULT_CLAIM_IDLE_MS,
+            DEFAULT_DOMAINS,
+            DEFAULT_MAX_DELIVERIES,
+            StreamConsumer,
+            default_consumer_name,
+        )
+
+        domains = opts["channels"] or list(DEFAULT_DOMAINS)
+        consumer = StreamConsumer(
+            r,
+            opts["group"],
+            opts["consumer"] or default_consumer_name(),
+            domains,
+            count=max(1, opts["batch"]),
+            block_ms=max(0, opts["block"]),
+            claim_idle_ms=max(0, opts["claim_idle"] if opts["claim_idle"] is not None else DEFAULT_CLAIM_IDLE_MS),
+            max_deliveries=max(1, opts["max_deliveries"] or DEFAULT_MAX_DELIVERIES),
+        )
+        consumer.ensure_groups(opts["start_id"])
+        if opts["reset"]:
+            consumer.reset(opts["start_id"])
+
+        if opts["handler"]:
+            handler = import_string(opts["handler"])
+        else:
+            def handler(message_id, envelope):
+                self.stdout.write(f"[{envelope.get('event')} {message_id}] {envelope}")
+
+        self.stdout.write(
+            f"Consuming {', '.join(consumer.keys)} as {consumer.consumer} in group {consumer.group}"
+        )
+        while True:
+            consumer.poll(handler)
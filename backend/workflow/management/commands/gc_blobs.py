@@ -0,0 +1,38 @@
+# workflow/management/commands/gc_blobs.py
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Dọn kho blob đính kèm (common.AttachmentBlob): xoá blob không còn đính kèm nào trỏ tới quá "
+        "BLOB_GC_GRACE_HOURS. --recount dựng lại ref_count từ FK trước khi dọn; --orphans xoá thêm tệp "
+        "dưới blobs/ không có dòng blob."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--grace-hours", type=float, default=None, help="Ghi đè BLOB_GC_GRACE_HOURS.")
+        parser.add_argument("--recount", action="store_true", help="Tính lại ref_count trước khi dọn.")
+        parser.add_argument("--orphans", action="store_true", help="Xoá cả tệp mồ côi dưới blobs/.")
+        parser.add_argument("--dry-run", action="store_true", help="Chỉ liệt kê, không xoá.")
+
+    def handle(self, *args, **opts):
+        from workflow.services import blob_store
+
+        grace = timedelta(hours=opts["grace_hours"]) if opts["grace_hours"] is not None else None
+        dry_run = opts["dry_run"]
+        if opts["recount"]:
+            self.stdout.write(f"… sửa ref_count cho {blob_store.recount()} blob")
+
+        removed = blob_store.gc(grace=grace, dry_run=dry_run)
+        for sha256 in removed:
+            self.stdout.write(f"… blob {sha256}")
+        orphans = blob_store.sweep_orphan_files(grace=grace, dry_run=dry_run) if opts["orphans"] else []
+        for path in orphans:
+            self.stdout.write(f"… tệp mồ côi {path}")
+
+        verb = "Sẽ xoá" if dry_run else "Đã xoá"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} blob, {len(orphans)} tệp mồ côi."))
@@ -0,0 +1,17 @@
+# workflow/management/commands/purge_upload_sessions.py
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Xoá phiên tải đính kèm theo từng phần đã hết hạn (UPLOAD_SESSION_TTL_HOURS) cùng các part "
+        "còn sót trong storage. Chạy định kỳ (cron)."
+    )
+
+    def handle(self, *args, **opts):
+        from workflow.services.chunked_upload import purge_expired
+
+        removed = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá {removed} phiên tải lên hết hạn."))
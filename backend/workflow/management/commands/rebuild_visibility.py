@@ -0,0 +1,31 @@
+# workflow/management/commands/rebuild_visibility.py
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Dựng lại bảng document_visibility/case_visibility theo lô PK (mỗi lô một transaction). "
+        "Chạy trước khi bật VISIBILITY_INDEX_ENABLED hoặc sau sửa dữ liệu hàng loạt không qua ORM."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--documents", action="store_true", help="Chỉ dựng lại phần văn bản.")
+        parser.add_argument("--cases", action="store_true", help="Chỉ dựng lại phần hồ sơ.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Số đối tượng mỗi lô (mặc định 1000).")
+
+    def handle(self, *args, **opts):
+        from workflow.services import visibility_index as vi
+
+        batch_size = int(opts["batch_size"])
+        if batch_size <= 0:
+            raise CommandError("--batch-size phải > 0")
+        both = not opts["documents"] and not opts["cases"]
+
+        if both or opts["documents"]:
+            total = vi.rebuild_documents(batch_size, progress=lambda n: self.stdout.write(f"… {n} văn bản"))
+            self.stdout.write(self.style.SUCCESS(f"Đã dựng lại visibility cho {total} văn bản."))
+        if both or opts["cases"]:
+            total = vi.rebuild_cases(batch_size, progress=lambda n: self.stdout.write(f"… {n} hồ sơ"))
+            self.stdout.write(self.style.SUCCESS(f"Đã dựng lại visibility cho {total} hồ sơ."))
@@ -0,0 +1,41 @@
+# workflow/management/commands/run_jobs.py
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker chạy job nền trong notifications.jobs (nhập văn bản, ...). Nhiều tiến trình chạy song song "
+        "được (SKIP LOCKED); job của worker chết được nhận lại sau JOBS_STALE_SECONDS và chạy tiếp từ checkpoint."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--type", action="append", dest="types", help="Chỉ chạy loại job này (lặp lại được).")
+        parser.add_argument("--interval", type=float, default=2.0, help="Nghỉ khi không có job (giây).")
+        parser.add_argument("--once", action="store_true", help="Chạy đến khi hết job đến hạn rồi thoát.")
+
+    def handle(self, *args, **opts):
+        from workflow.services.jobs import HANDLERS, claim_next, run_job
+
+        types = opts["types"] or None
+        unknown = [t for t in types or () if t not in HANDLERS]
+        if unknown:
+            raise CommandError(f"Không có handler cho: {', '.join(unknown)}")
+        interval = max(0.0, float(opts["interval"]))
+
+        total = 0
+        while True:
+            job = claim_next(types)
+            if job is None:
+                if opts["once"]:
+                    break
+                time.sleep(interval)
+                continue
+            status = run_job(job)
+            total += 1
+            self.stdout.write(f"… job {job.pk} ({job.type}) lần {job.attempts}: {status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Đã chạy {total} job."))
@@ -0,0 +1,16 @@
+# workflow/middleware/rbac_cache.py
+from django.http import HttpRequest, HttpResponse
+from workflow.services.rbac import permission_cache_scope
+
+class RBACCacheMiddleware:
+    """
+    Middleware mở phạm vi memo snapshot quyền (workflow.services.rbac) cho mỗi request:
+    role/permission của user chỉ nạp một lần dù has_permission/has_object_permission/Service
+    gọi rbac.can() nhiều lần.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        with permission_cache_scope():
+            return self.get_response(request)
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0002_case_updated_at'),
+        ('documents', '0006_document_search_vector'),
+        ('workflow', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseVisibility',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cases.case')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'case_visibility',
+                'constraints': [models.UniqueConstraint(fields=('user', 'case'), name='uq_case_visibility')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentVisibility',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documents.document')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'document_visibility',
+                'constraints': [models.UniqueConstraint(fields=('user', 'document'), name='uq_document_visibility')],
+            },
+        ),
+    ]
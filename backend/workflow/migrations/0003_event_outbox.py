@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0002_visibility_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventOutbox',
+            fields=[
+                ('outbox_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event', models.CharField(max_length=100)),
+                ('ordering_key', models.CharField(blank=True, default='', max_length=100)),
+                ('envelope', models.JSONField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.CharField(blank=True, default='', max_length=500)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'event_outbox',
+                'indexes': [models.Index(condition=models.Q(('published_at__isnull', True)), fields=['outbox_id'], name='ix_event_outbox_pending'), models.Index(fields=['published_at'], name='ix_event_outbox_published')],
+            },
+        ),
+    ]
@@ -50,3 +50,63 @@ class WorkflowTransition(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover - admin/debug helper
         return f"{self.module}: {self.from_status} -> {self.to_status}"
+
+
+class DocumentVisibility(models.Model):
+    """
+    Bảng phi chuẩn hoá (user, document) cho visible_documents_q: người tạo + người được phân công.
+    Duy trì bởi workflow.services.visibility_index (signal) / lệnh rebuild_visibility.
+    Quyền theo phòng ban không lưu ở đây (tra trực tiếp documents.department_id).
+    """
+    class Meta:
+        db_table = "document_visibility"
+        constraints = [
+            # (user_id, document_id) vừa chống trùng vừa là index cho join khi lọc theo user
+            models.UniqueConstraint(fields=["user", "document"], name="uq_document_visibility"),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+", db_index=False)
+    document = models.ForeignKey("documents.Document", on_delete=models.CASCADE, related_name="+")
+
+
+class CaseVisibility(models.Model):
+    """Tương tự DocumentVisibility cho hồ sơ: người tạo, owner, participants."""
+    class Meta:
+        db_table = "case_visibility"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "case"], name="uq_case_visibility"),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+", db_index=False)
+    case = models.ForeignKey("cases.Case", on_delete=models.CASCADE, related_name="+")
+
+
+class EventOutbox(models.Model):
+    """
+    Hàng đợi sự kiện ghi cùng transaction với thay đổi nghiệp vụ (workflow.services.events.emit).
+    Lệnh events_relay đọc theo thứ tự outbox_id và publish lên Redis; rollback thì sự kiện cũng mất theo.
+    """
+    class Meta:
+        db_table = "event_outbox"
+        indexes = [
+            # Relay chỉ quét dòng chưa gửi → partial index nhỏ, không phình theo lịch sử
+            models.Index(
+                fields=["outbox_id"],
+                name="ix_event_outbox_pending",
+                condition=models.Q(published_at__isnull=True),
+            ),
+            models.Index(fields=["published_at"], name="ix_event_outbox_published"),
+        ]
+
+    outbox_id = models.BigAutoField(primary_key=True)
+    event = models.CharField(max_length=100)
+    # Khoá thứ tự: các sự kiện cùng key (vd. "document:12") được publish đúng thứ tự ghi
+    ordering_key = models.CharField(max_length=100, blank=True, default="")
+    envelope = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=500, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    published_at = models.DateTimeField(null=True, blank=True)
@@ -1,11 +1,69 @@
 # workflow/services/audit.py
-from typing import Any, Optional, Mapping
+"""
+Ghi audit log.
+
+Chế độ ghi (AUDIT_WRITE_MODE, hoặc tạm thời trong khối `with audit_mode(...)`):
+- "buffered" (mặc định): trong transaction, dòng audit được gom lại và ghi một lần bằng bulk_create
+  khi transaction commit (transaction.on_commit). Rollback (kể cả savepoint lồng bên trong) → dòng
+  tương ứng bị bỏ, giống hệt INSERT trực tiếp trước đây. Ngoài transaction → INSERT ngay.
+- "async": như trên nhưng sau commit đẩy vào hàng đợi của một thread ghi nền (AuditWriter), dùng cho
+  thao tác hàng loạt muốn bỏ hẳn chi phí ghi audit khỏi request.
+- "sync": INSERT ngay từng dòng (hành vi cũ).
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import contextvars
+import logging
+import queue
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, FrozenSet, Iterator, List, Mapping, Optional
+
 from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
 from django.utils import timezone
 from workflow.services.request_context import get_client_ip
 
+logger = logging.getLogger(__name__)
 
-def audit_log(
+_MODES = ("buffered", "async", "sync")
+_mode_override: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("audit_mode", default=None)
+
+
+def _audit_model():
+    return apps.get_model("audit", "AuditLog")
+
+
+@lru_cache(maxsize=None)
+def _field_names() -> FrozenSet[str]:
+    """Tập tên field của AuditLog — schema cố định trong process, chỉ phản chiếu một lần."""
+    names = {getattr(f, "name", None) for f in _audit_model()._meta.get_fields()}
+    names.discard(None)
+    return frozenset(names)
+
+
+def current_mode() -> str:
+    mode = _mode_override.get() or getattr(settings, "AUDIT_WRITE_MODE", "buffered")
+    return mode if mode in _MODES else "buffered"
+
+
+@contextlib.contextmanager
+def audit_mode(mode: str) -> Iterator[None]:
+    """Đổi chế độ ghi audit trong phạm vi khối (vd. `with audit_mode("async"):` cho thao tác hàng loạt)."""
+    if mode not in _MODES:
+        raise ValueError(f"audit mode không hợp lệ: {mode}")
+    token = _mode_override.set(mode)
+    try:
+        yield
+    finally:
+        _mode_override.reset(token)
+
+
+def build_audit_row(
     *,
     actor: Any,
     action: str,
@@ -15,14 +73,8 @@ def audit_log(
     after: Optional[Mapping[str, Any]] = None,
     ip: Optional[str] = None,
 ):
-    """
-    Ghi vào audit.audit_logs theo ERD.
-    Tự động lấy IP từ middleware (contextvars) nếu ip=None.
-    Chỉ set các trường tồn tại trong model để tránh lệch schema.
-    """
-    AuditLog = apps.get_model("audit", "AuditLog")
-    field_names = {getattr(f, "name", None) for f in AuditLog._meta.get_fields()}
-    field_names.discard(None)
+    """Dựng instance AuditLog (chưa lưu); chỉ set các trường tồn tại trong model để tránh lệch schema."""
+    field_names = _field_names()
 
     # Chuẩn hoá giá trị
     resolved_ip = ip or get_client_ip()
@@ -55,4 +107,195 @@ def audit_log(
             aid = getattr(actor, "pk", None)
         data["actor_id"] = aid
 
-    AuditLog.objects.create(**data)
+    return _audit_model()(**data)
+
+
+# ---------- Gom theo transaction ----------
+class _Marker:
+    """
+    Callback on_commit không làm gì ngoài đánh dấu dòng đã commit. Savepoint rollback làm Django bỏ
+    callback khỏi run_on_commit → marker bị thu hồi → weakref chết → dòng không được ghi.
+    """
+    __slots__ = ("row", "buffer", "ran", "__weakref__")
+
+    def __init__(self, row, buffer: "_TxBuffer"):
+        self.row = row
+        self.buffer = buffer
+        self.ran = False
+
+    def __call__(self) -> None:
+        self.ran = True
+        if not self.buffer.done:
+            self.buffer.committed.append(self.row)
+
+
+class _Flush:
+    __slots__ = ("buffer", "__weakref__")
+
+    def __init__(self, buffer: "_TxBuffer"):
+        self.buffer = buffer
+
+    def __call__(self) -> None:
+        self.buffer.flush()
+
+
+class _TxBuffer:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.markers: List[weakref.ref] = []
+        self.committed: List[Any] = []
+        self.flush_ref: Optional[weakref.ref] = None
+        self.done = False
+
+    def add(self, row) -> None:
+        marker = _Marker(row, self)
+        transaction.on_commit(marker)
+        self.markers.append(weakref.ref(marker))
+        # Callback flush có thể đã bị bỏ cùng savepoint chứa nó → đăng ký lại ở mức hiện tại
+        if self.flush_ref is None or self.flush_ref() is None:
+            flush = _Flush(self)
+            transaction.on_commit(flush)
+            self.flush_ref = weakref.ref(flush)
+
+    def flush(self) -> None:
+        if self.done:
+            return
+        self.done = True
+        # Dòng đã commit = marker đã chạy (trước flush) + marker còn sống chờ chạy (sau flush)
+        rows = list(self.committed)
+        rows.extend(m.row for m in (ref() for ref in self.markers) if m is not None and not m.ran)
+        self.markers.clear()
+        self.committed.clear()
+        if _tx_local.__dict__.get("buffer") is self:
+            _tx_local.buffer = None
+        if rows:
+            _write_rows(rows, self.mode)
+
+
+_tx_local = threading.local()
+
+
+def _buffer_for(mode: str) -> _TxBuffer:
+    buf: Optional[_TxBuffer] = getattr(_tx_local, "buffer", None)
+    if buf is not None and not buf.done and buf.mode == mode:
+        # Transaction trước rollback toàn bộ → mọi marker đã chết; dọn để không giữ rác
+        if buf.markers and all(ref() is None for ref in buf.markers):
+            buf.markers.clear()
+        return buf
+    buf = _TxBuffer(mode)
+    _tx_local.buffer = buf
+    return buf
+
+
+def _write_rows(rows: List[Any], mode: str) -> None:
+    if mode == "async":
+        get_writer().submit(rows)
+        return
+    _audit_model().objects.bulk_create(rows, batch_size=int(getattr(settings, "AUDIT_BULK_BATCH_SIZE", 500)))
+
+
+def audit_log(
+    *,
+    actor: Any,
+    action: str,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[Any] = None,
+    before: Optional[Mapping[str, Any]] = None,
+    after: Optional[Mapping[str, Any]] = None,
+    ip: Optional[str] = None,
+):
+    """
+    Ghi vào audit.audit_logs theo ERD.
+    Tự động lấy IP từ middleware (contextvars) nếu ip=None.
+    Chỉ set các trường tồn tại trong model để tránh lệch schema.
+    """
+    row = build_audit_row(
+        actor=actor, action=action, entity_type=entity_type, entity_id=entity_id,
+        before=before, after=after, ip=ip,
+    )
+    mode = current_mode()
+    if mode == "sync":
+        row.save(force_insert=True)
+    elif connection.in_atomic_block:
+        _buffer_for(mode).add(row)
+    elif mode == "async":
+        get_writer().submit([row])
+    else:
+        row.save(force_insert=True)
+    return row
+
+
+# ---------- Thread ghi nền (chế độ async) ----------
+class AuditWriter:
+    """Hàng đợi + thread daemon ghi audit theo lô (tối đa batch_size dòng hoặc mỗi `interval` giây)."""
+
+    def __init__(self, batch_size: int = 500, interval: float = 0.5):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def submit(self, rows: List[Any]) -> None:
+        for row in rows:
+            self._queue.put(row)
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self) -> List[Any]:
+        batch = [self._queue.get()]
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get(timeout=self.interval))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self) -> None:
+        from django.db import close_old_connections
+
+        while True:
+            batch = self._take_batch()
+            try:
+                close_old_connections()
+                _audit_model().objects.bulk_create(batch)
+                self.written += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("audit writer: không ghi được %d dòng audit", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Chờ ghi hết hàng đợi (shutdown/test). Trả False nếu quá timeout."""
+        if timeout is None:
+            self._queue.join()
+            return True
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> AuditWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=int(getattr(settings, "AUDIT_BULK_BATCH_SIZE", 500)),
+                    interval=float(getattr(settings, "AUDIT_ASYNC_FLUSH_INTERVAL", 0.5)),
+                )
+                atexit.register(_writer.drain, 5.0)
+    return _writer
@@ -0,0 +1,242 @@
+# workflow/services/blob_store.py
+"""
+Kho nội dung đính kèm theo SHA-256 (common.AttachmentBlob), dùng chung văn bản và hồ sơ.
+
+- store/acquire: băm nội dung trước (chỉ đọc), đã có blob cùng SHA-256 → không ghi gì thêm, đính kèm
+  mới chỉ là một dòng metadata trỏ tới blob; chưa có → ghi một lần vào blobs/<2 ký tự>/<sha256>.
+  acquire_file: nội dung đã được ghi (và băm) sẵn trong storage → chuyển tệp vào blobs/, không đọc lại.
+- ref_count do signal trên DocumentAttachment/CaseAttachment giữ (tạo +1, xoá −1) trong cùng
+  transaction với dòng đính kèm; acquire chạm updated_at để GC không xoá blob vừa được dùng lại.
+- gc: xoá blob ref_count = 0 quá BLOB_GC_GRACE_HOURS (khoá hàng, kiểm lại tham chiếu thật);
+  recount dựng lại ref_count từ FK khi nghi lệch (ghi ngoài ORM, khôi phục backup...).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .errors import ValidationError
+
+BLOCK_SIZE = 64 * 1024
+BLOB_PREFIX = "blobs"
+# Các model đính kèm trỏ tới blob (app, model)
+REFERRERS: Tuple[Tuple[str, str], ...] = (("documents", "DocumentAttachment"), ("cases", "CaseAttachment"))
+
+
+def _blob_model():
+    return apps.get_model("common", "AttachmentBlob")
+
+
+def _grace() -> timedelta:
+    return timedelta(hours=int(getattr(settings, "BLOB_GC_GRACE_HOURS", 24)))
+
+
+# ---------- Đọc/ghi theo khối ----------
+class StreamReader:
+    """
+    File-like chỉ đọc trên một dòng khối bytes: đếm byte và cập nhật SHA-256 khi dữ liệu đi qua.
+    Bọc bằng django File để default_storage.save đọc dần (File.chunks) thay vì nạp cả tệp.
+    """
+
+    def __init__(self, blocks: Iterable[bytes]):
+        self._blocks = iter(blocks)
+        self._buf = b""
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, n: Optional[int] = -1) -> bytes:
+        while n is None or n < 0 or len(self._buf) < n:
+            block = next(self._blocks, b"")
+            if not block:
+                break
+            self._buf += block
+        if n is None or n < 0:
+            data, self._buf = self._buf, b""
+        else:
+            data, self._buf = self._buf[:n], self._buf[n:]
+        self.size += len(data)
+        self.digest.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def store_stream(path: str, blocks: Iterable[bytes]) -> Tuple[str, str, int]:
+    """Ghi dòng khối vào default_storage; trả (đường dẫn thực tế, sha256 hex, số byte)."""
+    reader = StreamReader(blocks)
+    saved = default_storage.save(path, File(reader))
+    return saved, reader.hexdigest(), reader.size
+
+
+def digest(blocks: Iterable[bytes]) -> Tuple[str, int]:
+    h, size = hashlib.sha256(), 0
+    for block in blocks:
+        h.update(block)
+        size += len(block)
+    return h.hexdigest(), size
+
+
+def file_blocks(path: str) -> Iterator[bytes]:
+    with default_storage.open(path, "rb") as fh:
+        yield from iter(lambda: fh.read(BLOCK_SIZE), b"")
+
+
+def blob_path(sha256: str) -> str:
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}"
+
+
+# ---------- Lấy/ghi blob ----------
+def _acquire(sha256: str, size: int, place: Callable[[str], str]):
+    Blob = _blob_model()
+    with transaction.atomic():
+        blob, created = Blob.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={"size": size, "storage_path": ""}
+        )
+        if created or not blob.storage_path or not default_storage.exists(blob.storage_path):
+            blob.storage_path, blob.size = place(blob_path(sha256)), size
+        blob.updated_at = timezone.now()
+        blob.save()
+    return blob
+
+
+def acquire(sha256: str, size: int, blocks: Callable[[], Iterable[bytes]]):
+    """
+    Blob cho nội dung có SHA-256 `sha256`; chỉ gọi `blocks()` để ghi khi chưa có (hoặc tệp đã mất).
+    Khoá hàng blob: hai upload cùng nội dung mới chạy song song chỉ ghi một lần.
+    """
+
+    def place(target: str) -> str:
+        path, written, written_size = store_stream(target, blocks())
+        if written != sha256 or written_size != size:
+            default_storage.delete(path)
+            raise ValidationError("Nội dung tệp thay đổi trong lúc lưu.", code="BLOB_DIGEST_MISMATCH")
+        return path
+
+    return _acquire(sha256, size, place)
+
+
+def _move(source: str, target: str) -> str:
+    """Đổi tên tệp trong storage cục bộ (không đọc lại nội dung); storage không có đường dẫn → copy."""
+    try:
+        src, dst = default_storage.path(source), default_storage.path(target)
+    except NotImplementedError:
+        path = default_storage.save(target, default_storage.open(source, "rb"))
+        default_storage.delete(source)
+        return path
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(src, dst)
+    return target
+
+
+def acquire_file(sha256: str, size: int, path: str):
+    """
+    Như acquire nhưng nội dung đã nằm sẵn tại `path` trong storage (đã băm khi ghi): blob chưa có →
+    chuyển tệp vào blobs/ thay vì đọc/ghi lại; đã có → để nguyên `path` cho người gọi dọn.
+    """
+    return _acquire(sha256, size, lambda target: _move(path, target))
+
+
+def store(blocks: Callable[[], Iterable[bytes]]):
+    """Băm rồi acquire; `blocks` phải đọc lại được từ đầu (UploadedFile.chunks, part trong storage...)."""
+    sha256, size = digest(blocks())
+    return acquire(sha256, size, blocks)
+
+
+def attachment_fields(blob) -> dict:
+    """Giá trị gán cho DocumentAttachment/CaseAttachment khi trỏ tới `blob`."""
+    return {"blob": blob, "storage_path": blob.storage_path, "sha256": blob.sha256, "size": blob.size}
+
+
+# ---------- Đếm tham chiếu ----------
+def add_ref(sha256: Optional[str]) -> None:
+    if sha256:
+        _blob_model().objects.filter(pk=sha256).update(ref_count=F("ref_count") + 1, updated_at=timezone.now())
+
+
+def release(sha256: Optional[str]) -> None:
+    if sha256:
+        _blob_model().objects.filter(pk=sha256).update(
+            ref_count=Greatest(F("ref_count") - 1, Value(0)), updated_at=timezone.now()
+        )
+
+
+def _reference_count(sha256: str) -> int:
+    return sum(apps.get_model(*ref).objects.filter(blob_id=sha256).count() for ref in REFERRERS)
+
+
+def recount() -> int:
+    """Dựng lại ref_count từ FK của các model đính kèm; trả số blob đã sửa."""
+    Blob = _blob_model()
+    total = Value(0)
+    for ref in REFERRERS:
+        counts = (
+            apps.get_model(*ref).objects.filter(blob_id=OuterRef("pk"))
+            .order_by().values("blob_id").annotate(n=Count("*")).values("n")
+        )
+        total = total + Coalesce(Subquery(counts), Value(0))
+    annotated = Blob.objects.annotate(actual=total).exclude(ref_count=F("actual"))
+    fixed = 0
+    for sha256, actual in list(annotated.values_list("pk", "actual")):
+        Blob.objects.filter(pk=sha256).update(ref_count=actual, updated_at=timezone.now())
+        fixed += 1
+    return fixed
+
+
+def gc(*, grace: Optional[timedelta] = None, dry_run: bool = False) -> List[str]:
+    """Xoá blob không còn tham chiếu quá `grace`; tệp bị xoá sau khi commit. Trả danh sách SHA-256."""
+    Blob = _blob_model()
+    cutoff = timezone.now() - (grace if grace is not None else _grace())
+    due = Blob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+    removed: List[str] = []
+    for sha256 in list(due.values_list("pk", flat=True)):
+        with transaction.atomic():
+            blob = due.select_for_update(skip_locked=True).filter(pk=sha256).first()
+            if blob is None:
+                continue
+            actual = _reference_count(sha256)
+            if actual:
+                # ref_count lệch → sửa, không xoá
+                Blob.objects.filter(pk=sha256).update(ref_count=actual)
+                continue
+            removed.append(sha256)
+            if dry_run:
+                continue
+            path = blob.storage_path
+            blob.delete()
+            transaction.on_commit(lambda p=path: default_storage.delete(p))
+    return removed
+
+
+def sweep_orphan_files(*, grace: Optional[timedelta] = None, dry_run: bool = False) -> List[str]:
+    """Tệp dưới blobs/ không có dòng AttachmentBlob (tiến trình chết giữa ghi tệp và commit)."""
+    Blob = _blob_model()
+    cutoff = timezone.now() - (grace if grace is not None else _grace())
+    removed: List[str] = []
+    try:
+        folders, _ = default_storage.listdir(BLOB_PREFIX)
+    except (FileNotFoundError, NotImplementedError):
+        return removed
+    for folder in folders:
+        _, names = default_storage.listdir(f"{BLOB_PREFIX}/{folder}")
+        paths = [f"{BLOB_PREFIX}/{folder}/{name}" for name in names]
+        known = set(Blob.objects.filter(storage_path__in=paths).values_list("storage_path", flat=True))
+        for path in paths:
+            if path in known or default_storage.get_modified_time(path) >= cutoff:
+                continue
+            removed.append(path)
+            if not dry_run:
+                default_storage.delete(path)
+    return removed
+
@@ -6,10 +6,10 @@ from django.db import transaction
 from django.utils import timezone
 
 from .errors import PermissionDenied, InvalidTransition, ValidationError
-from .rbac import can, Act
+from .rbac import can, Act, Role
 from .status_resolver import StatusResolver as SR
 from .audit import audit_log
-from .events import emit
+from .events import emit, audience
 
 def _case_models():
     Case = apps.get_model('cases', 'Case')
@@ -34,6 +34,20 @@ def _log(case, *, actor, action: str, note=None, meta=None):
         meta_json=meta,
     )
 
+def _case_audience(case, actor, assignee_ids: Iterable[Any] = ()):
+    """Người nhận sự kiện hồ sơ: người được giao, người tạo/chủ trì/lãnh đạo hồ sơ, phòng ban và Lãnh đạo."""
+    return audience(
+        user_ids=(
+            *assignee_ids,
+            getattr(case, "created_by_id", None),
+            getattr(case, "owner_id", None),
+            getattr(case, "leader_id", None),
+            getattr(actor, "user_id", None),
+        ),
+        department_ids=(getattr(case, "department_id", None),),
+        roles=(Role.LD,),
+    )
+
 @dataclass
 class CaseService:
     actor: Any
@@ -93,8 +107,8 @@ class CaseService:
             _log(case, actor=self.actor, action="ASSIGN", note=instruction, meta={"assignees":[str(u.user_id) for u in assignees],"due_date":str(due_date) if due_date else None})
             audit_log(actor=self.actor, action="CASE.ASSIGN", entity_type="case", entity_id=case.case_id,
                       before={"status_id":from_id}, after={"status_id":to_id,"assignees":[str(u.user_id) for u in assignees]})
-
-        emit("case.assigned", {"case_id": case.case_id, "assignees":[str(u.user_id) for u in assignees]})
+            emit("case.assigned", {"case_id": case.case_id, "assignees":[str(u.user_id) for u in assignees]},
+                 audience=_case_audience(case, self.actor, [u.user_id for u in assignees]), actor=self.actor)
 
     def start(self, case: Any):
         if not can(self.actor, Act.CASE_START, obj=case):
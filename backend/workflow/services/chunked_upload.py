@@ -0,0 +1,306 @@
+# workflow/services/chunked_upload.py
+"""
+Tải đính kèm lớn (hồ sơ scan 50–300MB) theo từng phần, nối lại được sau khi rớt mạng.
+
+Giao thức (common.uploads dựng view cho văn bản và hồ sơ):
+  1) start: tạo UploadSession (tên tệp, tổng dung lượng, sha256 mong đợi nếu có).
+  2) write_chunk: PUT thân bytes thô tại `offset` == received_bytes hiện tại. Thân request được đọc
+     theo khối BLOCK_SIZE và ghi thẳng vào default_storage thành một part → bộ nhớ mỗi upload chỉ
+     cỡ một khối, không phụ thuộc kích thước chunk/tệp. Part chỉ được nhận khi đủ Content-Length;
+     rớt mạng giữa chừng → part bị bỏ, client hỏi lại offset và gửi lại từ đó.
+  3) complete: ghép các part theo thứ tự offset thành một tệp tạm, băm trong lúc ghi (ngoài khoá hàng
+     phiên), rồi chuyển tệp vào kho blob (blob_store.acquire_file — nội dung đã có thì bỏ tệp tạm), tạo
+     DocumentAttachment/CaseAttachment và xoá part khi transaction commit.
+
+hashlib không lưu/khôi phục được trạng thái giữa các request (và worker), nên SHA-256 của cả tệp
+được tính ở complete trong một lượt đọc tuần tự các part, bộ nhớ vẫn chỉ một khối.
+Mỗi chunk vẫn được băm khi ghi để đối chiếu X-Chunk-SHA256 (nếu client gửi).
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import blob_store
+from .blob_store import BLOCK_SIZE
+from .errors import ServiceError, ValidationError
+
+PART_PREFIX = "uploads"
+# target_type → (app, model đính kèm, FK tới đối tượng cha)
+TARGETS: Dict[str, Tuple[str, str, str]] = {
+    "document": ("documents", "DocumentAttachment", "document_id"),
+    "case": ("cases", "CaseAttachment", "case_id"),
+}
+DEFAULT_ATTACHMENT_TYPE = "tep_kem_theo"
+
+# Mã lỗi → HTTP status cho tầng view (còn lại 400)
+NOT_FOUND_CODES = ("UPLOAD_NOT_FOUND",)
+CONFLICT_CODES = ("UPLOAD_OFFSET_MISMATCH", "UPLOAD_INCOMPLETE", "UPLOAD_CLOSED")
+GONE_CODES = ("UPLOAD_EXPIRED",)
+
+
+def chunk_max_size() -> int:
+    return int(getattr(settings, "UPLOAD_CHUNK_MAX_SIZE", 8 * 1024 * 1024))
+
+
+def file_max_size() -> int:
+    return int(getattr(settings, "UPLOAD_MAX_FILE_SIZE", 1024 * 1024 * 1024))
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=int(getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24)))
+
+
+def _session_model():
+    return apps.get_model("common", "UploadSession")
+
+
+def _blocks_from(stream: Any, length: int) -> Iterator[bytes]:
+    remaining = length
+    while stream is not None and remaining > 0:
+        block = stream.read(min(BLOCK_SIZE, remaining))
+        if not block:
+            return
+        remaining -= len(block)
+        yield block
+
+
+def _part_blocks(parts: List[Dict[str, Any]]) -> Iterator[bytes]:
+    for part in parts:
+        yield from blob_store.file_blocks(part["path"])
+
+
+# ---------- Phiên ----------
+def start(
+    *,
+    actor: Any,
+    target_type: str,
+    target_id: Any,
+    file_name: str,
+    total_size: int,
+    attachment_type: str = "",
+    note: Optional[str] = None,
+    sha256: str = "",
+):
+    if target_type not in TARGETS:
+        raise ValidationError("Loại đối tượng đính kèm không hợp lệ.", code="UPLOAD_INVALID_TARGET")
+    if total_size <= 0:
+        raise ValidationError("Dung lượng tệp phải lớn hơn 0.", code="UPLOAD_INVALID_SIZE")
+    if total_size > file_max_size():
+        raise ValidationError(
+            f"Tệp vượt giới hạn {file_max_size()} byte.",
+            code="UPLOAD_TOO_LARGE",
+            extra={"max_size": file_max_size()},
+        )
+    now = timezone.now()
+    return _session_model().objects.create(
+        target_type=target_type,
+        target_id=str(target_id),
+        file_name=file_name,
+        attachment_type=attachment_type or "",
+        note=note,
+        total_size=total_size,
+        expected_sha256=(sha256 or "").lower(),
+        created_by=actor,
+        created_at=now,
+        updated_at=now,
+        expires_at=now + _ttl(),
+    )
+
+
+def get_session(upload_id: Any, *, actor: Any, target_type: str, target_id: Any):
+    """Phiên của chính người dùng trên đúng đối tượng; không thấy → UPLOAD_NOT_FOUND."""
+    Session = _session_model()
+    session = Session.objects.filter(
+        pk=upload_id, target_type=target_type, target_id=str(target_id), created_by=actor
+    ).first()
+    if session is None:
+        raise ServiceError("Không tìm thấy phiên tải lên.", code="UPLOAD_NOT_FOUND")
+    return session
+
+
+def _ensure_open(session) -> None:
+    Session = _session_model()
+    if session.status != Session.Status.ACTIVE:
+        raise ServiceError("Phiên tải lên đã kết thúc.", code="UPLOAD_CLOSED", extra={"status": session.status})
+    if session.expires_at <= timezone.now():
+        raise ServiceError("Phiên tải lên đã hết hạn.", code="UPLOAD_EXPIRED")
+
+
+def _offset_mismatch(session) -> ServiceError:
+    return ServiceError(
+        "Offset không khớp dữ liệu đã nhận; tiếp tục từ offset hiện tại.",
+        code="UPLOAD_OFFSET_MISMATCH",
+        extra={"offset": session.received_bytes},
+    )
+
+
+def write_chunk(session, stream: Any, *, offset: int, length: Optional[int], chunk_sha256: str = ""):
+    """
+    Nhận một chunk tại `offset`. Ghi part ngoài transaction (không giữ khoá hàng trong lúc I/O), rồi
+    khoá phiên kiểm tra lại offset: hai PUT cùng offset chạy song song thì chỉ một part được nhận.
+    """
+    _ensure_open(session)
+    if offset != session.received_bytes:
+        raise _offset_mismatch(session)
+    if not length or length <= 0:
+        raise ValidationError("Thiếu Content-Length của chunk.", code="UPLOAD_LENGTH_REQUIRED")
+    if length > chunk_max_size():
+        raise ValidationError(
+            f"Chunk vượt {chunk_max_size()} byte.",
+            code="UPLOAD_CHUNK_TOO_LARGE",
+            extra={"chunk_size": chunk_max_size()},
+        )
+    if offset + length > session.total_size:
+        raise ValidationError("Chunk vượt quá dung lượng đã khai báo.", code="UPLOAD_INVALID_SIZE")
+
+    path, digest, size = blob_store.store_stream(
+        f"{PART_PREFIX}/{session.pk}/{offset:015d}.part", _blocks_from(stream, length)
+    )
+    if size != length:
+        default_storage.delete(path)
+        raise ValidationError(
+            "Chunk nhận thiếu dữ liệu (kết nối bị ngắt?).",
+            code="UPLOAD_CHUNK_INCOMPLETE",
+            extra={"offset": session.received_bytes},
+        )
+    if chunk_sha256 and digest != chunk_sha256.strip().lower():
+        default_storage.delete(path)
+        raise ValidationError("SHA-256 của chunk không khớp.", code="UPLOAD_CHECKSUM_MISMATCH")
+
+    Session = _session_model()
+    with transaction.atomic():
+        current = Session.objects.select_for_update().get(pk=session.pk)
+        if current.status != Session.Status.ACTIVE or current.received_bytes != offset:
+            default_storage.delete(path)
+            _ensure_open(current)
+            raise _offset_mismatch(current)
+        now = timezone.now()
+        current.parts = [*(current.parts or []), {"offset": offset, "size": size, "path": path}]
+        current.received_bytes = offset + size
+        current.updated_at = now
+        current.expires_at = now + _ttl()  # còn đang tải thì gia hạn
+        current.save(update_fields=["parts", "received_bytes", "updated_at", "expires_at"])
+    return current
+
+
+def _delete_parts(session_id: Any, parts: List[Dict[str, Any]]) -> None:
+    for part in parts:
+        try:
+            default_storage.delete(part["path"])
+        except Exception:
+            pass
+    # part mồ côi (PUT ghi xong nhưng không được nhận)
+    folder = f"{PART_PREFIX}/{session_id}"
+    try:
+        _, files = default_storage.listdir(folder)
+    except Exception:
+        return
+    for name in files:
+        try:
+            default_storage.delete(f"{folder}/{name}")
+        except Exception:
+            pass
+
+
+def _create_attachment(session, blob):
+    app_label, model_name, fk = TARGETS[session.target_type]
+    Attachment = apps.get_model(app_label, model_name)
+    fields: Dict[str, Any] = {
+        fk: int(session.target_id),
+        "attachment_type": session.attachment_type or DEFAULT_ATTACHMENT_TYPE,
+        "file_name": session.file_name,
+        "uploaded_by_id": session.created_by_id,
+        **blob_store.attachment_fields(blob),
+    }
+    if session.note is not None and any(f.name == "note" for f in Attachment._meta.get_fields()):
+        fields["note"] = session.note
+    return Attachment.objects.create(**fields)
+
+
+def get_attachment(session):
+    app_label, model_name, _ = TARGETS[session.target_type]
+    return apps.get_model(app_label, model_name).objects.filter(pk=session.attachment_id).first()
+
+
+def _check_complete(session) -> List[Dict[str, Any]]:
+    _ensure_open(session)
+    if session.received_bytes != session.total_size:
+        raise ServiceError(
+            "Chưa nhận đủ dữ liệu.",
+            code="UPLOAD_INCOMPLETE",
+            extra={"offset": session.received_bytes, "total_size": session.total_size},
+        )
+    return sorted(session.parts or [], key=lambda p: p["offset"])
+
+
+def complete(session):
+    """
+    Ghép các part thành một tệp tạm (băm ngay khi ghi) ngoài transaction, rồi mới khoá phiên để chuyển
+    tệp vào kho blob (common.AttachmentBlob) + tạo bản ghi đính kèm: mỗi part chỉ đọc một lần và không
+    giữ khoá hàng trong lúc I/O. Nội dung đã có trong kho thì bỏ tệp tạm. Gọi lại sau khi đã xong trả
+    đúng đính kèm cũ (client mất phản hồi complete vẫn retry an toàn).
+    """
+    Session = _session_model()
+    current = Session.objects.get(pk=session.pk)
+    if current.status == Session.Status.COMPLETED and current.attachment_id:
+        return current, get_attachment(current)
+    parts = _check_complete(current)
+    path, digest, size = blob_store.store_stream(f"{PART_PREFIX}/{current.pk}/assembled", _part_blocks(parts))
+    if size != current.total_size or (current.expected_sha256 and digest != current.expected_sha256):
+        default_storage.delete(path)
+        raise ValidationError(
+            "Tệp ghép không khớp dung lượng/SHA-256 đã khai báo.",
+            code="UPLOAD_CHECKSUM_MISMATCH",
+            extra={"sha256": digest, "size": size},
+        )
+
+    with transaction.atomic():
+        current = Session.objects.select_for_update().get(pk=session.pk)
+        if current.status == Session.Status.COMPLETED and current.attachment_id:
+            default_storage.delete(path)  # complete song song đã xong trước
+            return current, get_attachment(current)
+        if _check_complete(current) != parts:
+            default_storage.delete(path)
+            raise _offset_mismatch(current)
+        blob = blob_store.acquire_file(digest, size, path)
+        attachment = _create_attachment(current, blob)
+        current.status = Session.Status.COMPLETED
+        current.sha256 = digest
+        current.attachment_id = attachment.pk
+        current.updated_at = timezone.now()
+        current.save(update_fields=["status", "sha256", "attachment_id", "updated_at"])
+        # tệp tạm (nếu blob đã có sẵn) nằm cùng thư mục part → được dọn cùng
+        transaction.on_commit(lambda: _delete_parts(current.pk, parts))
+    return current, attachment
+
+
+def abort(session) -> None:
+    Session = _session_model()
+    with transaction.atomic():
+        current = Session.objects.select_for_update().get(pk=session.pk)
+        if current.status == Session.Status.COMPLETED:
+            raise ServiceError("Phiên tải lên đã hoàn tất.", code="UPLOAD_CLOSED", extra={"status": current.status})
+        parts = list(current.parts or [])
+        Session.objects.filter(pk=current.pk).update(
+            status=Session.Status.ABORTED, parts=[], updated_at=timezone.now()
+        )
+        transaction.on_commit(lambda: _delete_parts(current.pk, parts))
+
+
+def purge_expired(now=None) -> int:
+    """Xoá phiên hết hạn (kể cả đã xong/huỷ) cùng part còn sót; trả số phiên đã xoá."""
+    Session = _session_model()
+    now = now or timezone.now()
+    removed = 0
+    for session in Session.objects.filter(expires_at__lte=now).iterator():
+        _delete_parts(session.pk, list(session.parts or []))
+        Session.objects.filter(pk=session.pk).delete()
+        removed += 1
+    return removed
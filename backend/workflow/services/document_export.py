@@ -0,0 +1,285 @@
+# workflow/services/document_export.py
+"""
+Xuất văn bản / sổ đăng ký ra CSV hoặc XLSX với bộ nhớ không đổi theo số dòng.
+
+- Dòng được đọc bằng values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE) (server-side cursor trên
+  PostgreSQL) và ghi ngay: CSV → các khối bytes cho StreamingHttpResponse; XLSX → openpyxl write_only
+  vào file tạm trên đĩa.
+- Tập lớn (> EXPORT_SYNC_MAX_ROWS) chạy nền bằng job REPORT_EXPORT: ghi file vào default_storage và
+  cập nhật dòng reports.ReportExport (file_path, row_count, finished_at) để tải về sau.
+- Bộ lọc được lưu dạng tham số query và dựng lại queryset ở worker (document_queryset/register_queryset),
+  nên đường đồng bộ và đường nền cho cùng một tập dòng.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+import uuid
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from . import jobs
+from .errors import ValidationError
+
+JOB_TYPE = "REPORT_EXPORT"
+FORMATS = ("csv", "xlsx")
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# Mã ReportDefinition cho từng loại xuất (tạo khi cần)
+REPORT_CODES = {"documents": "DOCUMENT_EXPORT", "register": "REGISTER_BOOK_EXPORT"}
+
+# (đường dẫn values_list, tiêu đề cột)
+DOCUMENT_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("document_id", "ID"),
+    ("doc_direction", "Loại"),
+    ("received_number", "Số đến"),
+    ("received_date", "Ngày đến"),
+    ("sender", "Nơi gửi"),
+    ("issue_number", "Số, ký hiệu"),
+    ("issued_date", "Ngày ban hành"),
+    ("document_code", "Mã dự thảo"),
+    ("title", "Trích yếu"),
+    ("document_type__type_name", "Loại văn bản"),
+    ("urgency_level__level_name", "Độ khẩn"),
+    ("security_level__level_name", "Độ mật"),
+    ("status__status_name", "Trạng thái"),
+    ("department__name", "Đơn vị"),
+    ("created_at", "Ngày tạo"),
+)
+REGISTER_COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "den": (
+        ("received_number", "Số đến"),
+        ("received_date", "Ngày đến"),
+        ("sender", "Nơi gửi"),
+        ("issue_number", "Số, ký hiệu"),
+        ("issued_date", "Ngày ban hành"),
+        ("document_type__type_name", "Loại văn bản"),
+        ("title", "Trích yếu"),
+        ("department__name", "Đơn vị nhận"),
+        ("status__status_name", "Trạng thái"),
+    ),
+    "di": (
+        ("issue_number", "Số, ký hiệu"),
+        ("issued_date", "Ngày ban hành"),
+        ("document_type__type_name", "Loại văn bản"),
+        ("title", "Trích yếu"),
+        ("signed_by__username", "Người ký"),
+        ("department__name", "Đơn vị soạn"),
+        ("status__status_name", "Trạng thái"),
+    ),
+}
+# Tham số xuất (DocumentExportQuerySerializer) → tên filter của DocumentFilterSet
+_PARAM_ALIASES = {"direction": "doc_direction", "keyword": "q"}
+_CONTROL_PARAMS = ("output", "mode", "format")
+
+
+def chunk_size() -> int:
+    return max(1, int(getattr(settings, "EXPORT_CHUNK_SIZE", 2000)))
+
+
+def sync_max_rows() -> int:
+    return int(getattr(settings, "EXPORT_SYNC_MAX_ROWS", 5000))
+
+
+def check_format(fmt: str) -> str:
+    from .document_import import xlsx_available
+
+    fmt = (fmt or "csv").lower()
+    if fmt not in FORMATS:
+        raise ValidationError("Định dạng xuất không hỗ trợ (csv|xlsx).", code="INVALID_EXPORT_FORMAT")
+    if fmt == "xlsx" and not xlsx_available():
+        raise ValidationError("Máy chủ chưa cài openpyxl để ghi XLSX.", code="XLSX_UNAVAILABLE")
+    return fmt
+
+
+# ---------- Queryset ----------
+def document_queryset(params: Mapping[str, Any], *, actor: Any = None, direction: Optional[str] = None) -> QuerySet:
+    """Văn bản theo bộ lọc DocumentFilterSet (như API danh sách), mặc định mới nhất trước."""
+    from documents.filters import DocumentFilterSet
+
+    Document = apps.get_model("documents", "Document")
+    data: Dict[str, Any] = {}
+    for key, value in params.items():
+        if key in _CONTROL_PARAMS or value in (None, ""):
+            continue
+        data[_PARAM_ALIASES.get(key, key)] = value
+    qs = Document.objects.all()
+    if direction:
+        qs = qs.filter(doc_direction=direction)
+        data.setdefault("doc_direction", direction)
+    # FilterSet cần request cho `mine` và gợi ý trường ngày theo hướng văn bản
+    request = SimpleNamespace(user=actor, doc_direction_hint=data.get("doc_direction"), query_params=data)
+    filterset = DocumentFilterSet(data=data, queryset=qs, request=request)
+    if not filterset.is_valid():
+        raise ValidationError("Bộ lọc xuất không hợp lệ.", code="INVALID_EXPORT_FILTER", extra=filterset.errors)
+    qs = filterset.qs
+    if not qs.query.order_by:
+        qs = qs.order_by("-created_at", "-document_id")
+    return qs
+
+
+def register_queryset(params: Mapping[str, Any]) -> Tuple[QuerySet, str]:
+    """
+    Văn bản thuộc một sổ đăng ký (register_id) hoặc theo hướng + năm: sổ đến theo ngày đến/số đến,
+    sổ đi theo ngày ban hành/số. Trả (queryset, hướng).
+    """
+    Document = apps.get_model("documents", "Document")
+    RegisterBook = apps.get_model("documents", "RegisterBook")
+    direction, year, department_id = params.get("direction") or "den", params.get("year"), None
+    if params.get("register_id"):
+        book = RegisterBook.objects.filter(pk=params["register_id"]).first()
+        if book is None:
+            raise ValidationError("Không tìm thấy sổ đăng ký.", code="REGISTER_BOOK_NOT_FOUND")
+        direction, year, department_id = book.direction, book.year, book.department_id
+    if direction not in REGISTER_COLUMNS:
+        raise ValidationError("Sổ đăng ký chỉ có hướng den hoặc di.", code="INVALID_EXPORT_FILTER")
+
+    qs = Document.objects.filter(doc_direction=direction)
+    if direction == "den":
+        if year:
+            qs = qs.filter(received_date__year=int(year))
+        qs = qs.order_by("received_date", "received_number", "document_id")
+    else:
+        if year:
+            qs = qs.filter(issue_year=int(year))
+        qs = qs.order_by("issued_date", "issue_number", "document_id")
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    return qs, direction
+
+
+def columns_for(kind: str, direction: Optional[str]) -> Sequence[Tuple[str, str]]:
+    return REGISTER_COLUMNS[direction or "den"] if kind == "register" else DOCUMENT_COLUMNS
+
+
+def resolve(kind: str, params: Mapping[str, Any], *, actor: Any = None, direction: Optional[str] = None):
+    """(queryset, cột) cho một yêu cầu xuất."""
+    if kind == "register":
+        qs, direction = register_queryset(params)
+    else:
+        qs = document_queryset(params, actor=actor, direction=direction)
+    return qs, columns_for(kind, direction)
+
+
+# ---------- Ghi ----------
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S") if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(qs: QuerySet, columns: Sequence[Tuple[str, str]]) -> Iterator[List[Any]]:
+    for row in qs.values_list(*(src for src, _ in columns)).iterator(chunk_size=chunk_size()):
+        yield [_cell(v) for v in row]
+
+
+def csv_chunks(rows: Iterable[List[Any]], columns: Sequence[Tuple[str, str]], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """CSV UTF-8 có BOM (Excel) theo khối ~flush_bytes — ít lần ghi socket hơn từng dòng."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")
+    writer.writerow([title for _, title in columns])
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= flush_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_file(fh, fmt: str, rows: Iterable[List[Any]], columns: Sequence[Tuple[str, str]]) -> int:
+    """Ghi toàn bộ dòng vào file nhị phân `fh`; trả số dòng dữ liệu."""
+    count = 0
+
+    def counted() -> Iterator[List[Any]]:
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    if fmt == "csv":
+        for chunk in csv_chunks(counted(), columns):
+            fh.write(chunk)
+        return count
+
+    import openpyxl  # type: ignore
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([title for _, title in columns])
+    for row in counted():
+        sheet.append(row)
+    workbook.save(fh)
+    return count
+
+
+def filename_for(kind: str, fmt: str) -> str:
+    prefix = "so-dang-ky" if kind == "register" else "van-ban"
+    return f"{prefix}-{timezone.localtime().strftime('%Y%m%d%H%M%S')}.{fmt}"
+
+
+# ---------- Xuất nền ----------
+def _report_definition(kind: str, actor):
+    Definition = apps.get_model("reports", "ReportDefinition")
+    code = REPORT_CODES[kind]
+    definition, _ = Definition.objects.get_or_create(
+        code=code,
+        defaults={"name": f"Xuất {'sổ đăng ký' if kind == 'register' else 'văn bản'}", "config_json": {"kind": kind},
+                  "created_by": actor},
+    )
+    return definition
+
+
+def enqueue_export(*, actor: Any, kind: str, params: Mapping[str, Any], fmt: str, direction: Optional[str] = None):
+    """Tạo ReportExport (chưa có file) + job REPORT_EXPORT; trả ReportExport."""
+    Export = apps.get_model("reports", "ReportExport")
+    clean = {k: v for k, v in params.items() if k not in _CONTROL_PARAMS}
+    with transaction.atomic():
+        export = Export.objects.create(
+            report=_report_definition(kind, actor),
+            exported_by=actor,
+            format=fmt.upper(),
+            params_json={"kind": kind, "direction": direction, "filters": clean},
+            file_path="",
+        )
+        export.job = jobs.enqueue(JOB_TYPE, {"export_id": export.pk})
+        export.save(update_fields=["job"])
+    return export
+
+
+def run_export_job(job) -> None:
+    Export = apps.get_model("reports", "ReportExport")
+    export = Export.objects.select_related("exported_by").get(pk=(job.payload_json or {})["export_id"])
+    if export.finished_at is not None:
+        return
+    params = export.params_json or {}
+    kind, fmt = params.get("kind", "documents"), export.format.lower()
+    qs, columns = resolve(kind, params.get("filters") or {}, actor=export.exported_by, direction=params.get("direction"))
+
+    path = f"exports/{uuid.uuid4()}_{filename_for(kind, fmt)}"
+    with tempfile.TemporaryFile() as tmp:
+        rows = write_file(tmp, fmt, iter_rows(qs, columns), columns)
+        tmp.seek(0)
+        path = default_storage.save(path, File(tmp))
+    with transaction.atomic():
+        Export.objects.filter(pk=export.pk).update(file_path=path, row_count=rows, finished_at=timezone.now())
+        jobs.save_progress(job, {"export_id": export.pk, "rows": rows, "finished": True})
+
@@ -0,0 +1,397 @@
+# workflow/services/document_import.py
+"""
+Nhập văn bản hàng loạt (dữ liệu cũ) từ CSV / XLSX / NDJSON — chạy như job DOCUMENT_IMPORT.
+
+- enqueue_import: lưu file tải lên (hoặc danh sách items → NDJSON) vào default_storage, tạo job.
+- run_import_job: đọc file theo luồng từng dòng (không nạp cả file), kiểm tra từng dòng, gom
+  IMPORT_BATCH_SIZE dòng thành một phần: bulk_create + checkpoint + lỗi từng dòng cùng một transaction.
+  Worker chết giữa chừng → job được nhận lại, bỏ qua các dòng <= checkpoint (không nhập trùng).
+- Phần bị DB từ chối (vd. trùng số phát hành) → chèn lại từng dòng trong savepoint để chỉ dòng lỗi bị loại.
+- bulk_create không gọi Document.save()/signal: search_vector và bảng visibility được cập nhật theo lô.
+Số thứ tự dòng trong báo lỗi = thứ tự dòng dữ liệu (không tính dòng tiêu đề), bắt đầu từ 1.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import orjson
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from . import jobs
+from .audit import audit_log
+from .errors import ValidationError
+
+JOB_TYPE = "DOCUMENT_IMPORT"
+FORMATS = ("csv", "xlsx", "ndjson")
+_EXTENSIONS = {".csv": "csv", ".xlsx": "xlsx", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+# Trạng thái gán cho văn bản nhập khi dòng không có cột status
+DEFAULT_STATUS = {"den": "DANG_KY", "di": "PHAT_HANH", "du_thao": "DU_THAO"}
+
+# cột → (app, model, cột tên) để tra danh mục theo tên (hoặc theo id nếu là số)
+_LOOKUPS = {
+    "field": ("catalog", "Field", "field_name"),
+    "document_type": ("catalog", "DocumentType", "type_name"),
+    "urgency_level": ("catalog", "UrgencyLevel", "level_name"),
+    "security_level": ("catalog", "SecurityLevel", "level_name"),
+    "issue_level": ("catalog", "IssueLevel", "level_name"),
+    "status": ("catalog", "DocumentStatus", "status_name"),
+    "department": ("accounts", "Department", "department_code"),
+}
+_TEXT_LIMITS = {
+    "title": 500,
+    "document_code": 50,
+    "issue_number": 50,
+    "sender": 250,
+    "signer_position": 200,
+    "signing_method": 50,
+}
+_REQUIRED = {
+    "den": ("received_number", "received_date", "sender"),
+    "di": ("issue_number", "issued_date"),
+    "du_thao": ("document_code",),
+}
+_ALIASES = {"direction": "doc_direction"}
+
+Row = Union[Dict[str, Any], str]  # dict dữ liệu hoặc thông báo lỗi đọc dòng
+
+
+def _batch_size() -> int:
+    return max(1, int(getattr(settings, "IMPORT_BATCH_SIZE", 500)))
+
+
+def _max_errors() -> int:
+    return int(getattr(settings, "IMPORT_MAX_ERRORS", 1000))
+
+
+def xlsx_available() -> bool:
+    try:
+        import openpyxl  # noqa: F401  # type: ignore
+    except ImportError:
+        return False
+    return True
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    fmt = (explicit or "").strip().lower()
+    if not fmt:
+        fmt = _EXTENSIONS.get(os.path.splitext(filename or "")[1].lower(), "")
+    if fmt not in FORMATS:
+        raise ValidationError(
+            f"Định dạng nhập không hỗ trợ; chỉ nhận {', '.join(FORMATS)}.", code="UNSUPPORTED_IMPORT_FORMAT"
+        )
+    if fmt == "xlsx" and not xlsx_available():
+        raise ValidationError("Máy chủ chưa cài openpyxl để đọc XLSX.", code="XLSX_UNAVAILABLE")
+    return fmt
+
+
+# ---------- Đọc file theo luồng ----------
+def _normalize(record: Dict[Any, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        name = str(key).strip().lower()
+        name = _ALIASES.get(name, name)
+        if isinstance(value, str):
+            value = value.strip()
+        out[name] = None if value == "" else value
+    return out
+
+
+def _iter_csv(fh) -> Iterator[Tuple[int, Row]]:
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    try:
+        for row_no, record in enumerate(csv.DictReader(text), 1):
+            yield row_no, _normalize(record)
+    finally:
+        text.detach()  # không đóng file gốc của storage
+
+
+def _iter_ndjson(fh) -> Iterator[Tuple[int, Row]]:
+    row_no = 0
+    for line in fh:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield row_no, f"JSON không hợp lệ: {exc}"
+            continue
+        yield row_no, _normalize(record) if isinstance(record, dict) else "Mỗi dòng phải là một object JSON."
+
+
+def _iter_xlsx(fh) -> Iterator[Tuple[int, Row]]:
+    import openpyxl  # type: ignore
+
+    workbook = openpyxl.load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        row_no = 0
+        for values in rows:
+            if not any(v not in (None, "") for v in values):
+                continue
+            row_no += 1
+            yield row_no, _normalize(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fh, fmt: str) -> Iterator[Tuple[int, Row]]:
+    """Duyệt file nhị phân `fh` theo từng dòng dữ liệu: (số thứ tự, dict | thông báo lỗi)."""
+    if fmt == "csv":
+        return _iter_csv(fh)
+    if fmt == "ndjson":
+        return _iter_ndjson(fh)
+    return _iter_xlsx(fh)
+
+
+# ---------- Kiểm tra dòng ----------
+def _parse_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("Ngày không hợp lệ (YYYY-MM-DD hoặc DD/MM/YYYY).")
+
+
+def _parse_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("Phải là số nguyên.")
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError("Phải là số nguyên.") from None
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "x", "co", "có")
+
+
+class RowValidator:
+    """Dựng Document (chưa lưu) từ một dòng; danh mục được nạp một lần cho cả job."""
+
+    def __init__(self, *, direction: Optional[str], actor_id: Any):
+        self.direction = direction or None
+        self.actor_id = actor_id
+        self._lookups: Dict[str, Tuple[set, Dict[str, int]]] = {}
+        for column, (app_label, model_name, name_field) in _LOOKUPS.items():
+            model = apps.get_model(app_label, model_name)
+            pk_name = model._meta.pk.name
+            ids, names = set(), {}
+            fields = [pk_name, name_field] + (["name"] if model_name == "Department" else [])
+            for values in model.objects.values_list(*fields):
+                ids.add(values[0])
+                for name in values[1:]:
+                    if name:
+                        names.setdefault(str(name).strip().lower(), values[0])
+            self._lookups[column] = (ids, names)
+
+    def _resolve(self, column: str, value: Any) -> int:
+        ids, names = self._lookups[column]
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            if int(value) in ids:
+                return int(value)
+        pk = names.get(str(value).strip().lower())
+        if pk is None:
+            raise ValueError(f"Không tìm thấy '{value}' trong danh mục.")
+        return pk
+
+    def build(self, data: Dict[str, Any]):
+        """Trả (Document, None) nếu hợp lệ, ngược lại (None, {cột: lỗi})."""
+        Document = apps.get_model("documents", "Document")
+        errors: Dict[str, str] = {}
+        values: Dict[str, Any] = {}
+
+        direction = self.direction or data.get("doc_direction") or "den"
+        if direction not in _REQUIRED:
+            errors["doc_direction"] = "Chỉ nhận den, di, du_thao."
+        if self.direction and data.get("doc_direction") not in (None, self.direction):
+            errors["doc_direction"] = f"Lệnh nhập chỉ nhận văn bản '{self.direction}'."
+
+        for column, limit in _TEXT_LIMITS.items():
+            value = data.get(column)
+            if value is None:
+                continue
+            value = str(value)
+            if len(value) > limit:
+                errors[column] = f"Tối đa {limit} ký tự."
+            values[column] = value
+        if not values.get("title"):
+            errors["title"] = "Bắt buộc."
+
+        for column, parser in (
+            ("received_number", _parse_int),
+            ("received_date", _parse_date),
+            ("issued_date", _parse_date),
+            ("is_legal_doc", _parse_bool),
+        ):
+            if data.get(column) is None:
+                continue
+            try:
+                values[column] = parser(data[column])
+            except ValueError as exc:
+                errors[column] = str(exc)
+
+        status = data.get("status") or DEFAULT_STATUS.get(direction)
+        for column in _LOOKUPS:
+            value = status if column == "status" else data.get(column)
+            if value is None:
+                continue
+            try:
+                values[f"{column}_id"] = self._resolve(column, value)
+            except ValueError as exc:
+                errors[column] = str(exc)
+
+        for column in _REQUIRED.get(direction, ()):
+            if values.get(column) is None and column not in errors:
+                errors[column] = f"Bắt buộc với văn bản '{direction}'."
+
+        if errors:
+            return None, errors
+        if direction in ("di", "du_thao") and values.get("issued_date"):
+            values["issue_year"] = values["issued_date"].year
+        if direction == "den":
+            values.setdefault("received_by_id", self.actor_id)
+        return Document(doc_direction=direction, created_by_id=self.actor_id, created_at=timezone.now(), **values), None
+
+
+# ---------- Ghi theo phần ----------
+def _insert(docs: List[Tuple[int, Any]], failures: List[Dict[str, Any]]) -> List[int]:
+    """bulk_create cả phần; DB từ chối → chèn từng dòng trong savepoint, dòng lỗi vào failures."""
+    Document = apps.get_model("documents", "Document")
+    if not docs:
+        return []
+    try:
+        with transaction.atomic():
+            created = Document.objects.bulk_create([doc for _, doc in docs])
+        return [doc.pk for doc in created]
+    except DatabaseError:
+        pass
+    ids = []
+    for row_no, doc in docs:
+        doc.pk = None
+        try:
+            with transaction.atomic():
+                Document.objects.bulk_create([doc])
+            ids.append(doc.pk)
+        except DatabaseError as exc:
+            failures.append({"row": row_no, "errors": {"non_field_errors": str(exc).splitlines()[0][:300]}})
+    return ids
+
+
+def _after_insert(ids: List[int]) -> None:
+    from documents.search import document_search_vector
+    from . import visibility_index
+
+    if not ids:
+        return
+    Document = apps.get_model("documents", "Document")
+    Document._base_manager.filter(pk__in=ids).update(search_vector=document_search_vector())
+    if visibility_index.index_enabled():
+        visibility_index.sync_documents(ids)
+
+
+def _commit_chunk(job, progress: Dict[str, Any], docs, failures, last_row: int, *, finished: bool = False) -> None:
+    with transaction.atomic():
+        ids = _insert(docs, failures)
+        _after_insert(ids)
+        progress["created"] += len(ids)
+        progress["failed"] += len(failures)
+        progress["processed"] += last_row - progress["checkpoint"]
+        room = _max_errors() - len(progress["errors"])
+        if room > 0:
+            progress["errors"].extend(sorted(failures, key=lambda f: f["row"])[:room])
+        progress["checkpoint"] = last_row
+        progress["finished"] = finished
+        if finished:
+            actor_id = (job.payload_json or {}).get("actor_id")
+            audit_log(
+                actor=get_user_model().objects.filter(pk=actor_id).first(),
+                action="DOC.IMPORT",
+                entity_type="job",
+                entity_id=job.pk,
+                after={k: progress[k] for k in ("processed", "created", "failed")},
+            )
+        jobs.save_progress(job, progress)
+
+
+def run_import_job(job) -> None:
+    payload = job.payload_json or {}
+    progress: Dict[str, Any] = {"checkpoint": 0, "processed": 0, "created": 0, "failed": 0, "errors": []}
+    progress.update(job.progress_json or {})
+    if progress.get("finished"):
+        return
+
+    path, fmt = payload["path"], payload["format"]
+    validator = RowValidator(direction=payload.get("direction"), actor_id=payload.get("actor_id"))
+    batch = _batch_size()
+    docs: List[Tuple[int, Any]] = []
+    failures: List[Dict[str, Any]] = []
+    last_row = progress["checkpoint"]
+
+    with default_storage.open(path, "rb") as fh:
+        for row_no, data in iter_rows(fh, fmt):
+            if row_no <= progress["checkpoint"]:
+                continue
+            if isinstance(data, str):
+                failures.append({"row": row_no, "errors": {"non_field_errors": data}})
+            else:
+                doc, errors = validator.build(data)
+                if errors:
+                    failures.append({"row": row_no, "errors": errors})
+                else:
+                    docs.append((row_no, doc))
+            last_row = row_no
+            if last_row - progress["checkpoint"] >= batch:
+                _commit_chunk(job, progress, docs, failures, last_row)
+                docs, failures = [], []
+    _commit_chunk(job, progress, docs, failures, last_row, finished=True)
+    default_storage.delete(path)
+
+
+def enqueue_import(*, actor: Any, upload=None, items=None, direction: Optional[str] = None, fmt: Optional[str] = None):
+    """Lưu dữ liệu cần nhập vào storage rồi tạo job DOCUMENT_IMPORT; trả Job."""
+    if upload is not None:
+        filename = getattr(upload, "name", None) or "import"
+        fmt = detect_format(filename, fmt)
+        path = default_storage.save(f"imports/{uuid.uuid4()}_{os.path.basename(filename)}", upload)
+    elif items:
+        filename, fmt = None, "ndjson"
+        content = b"".join(orjson.dumps(item) + b"\n" for item in items)
+        path = default_storage.save(f"imports/{uuid.uuid4()}.ndjson", ContentFile(content))
+    else:
+        raise ValidationError("Cần file hoặc items để nhập.", code="EMPTY_IMPORT")
+    return jobs.enqueue(
+        JOB_TYPE,
+        {
+            "path": path,
+            "format": fmt,
+            "filename": filename,
+            "direction": direction or None,
+            "actor_id": str(actor.pk) if getattr(actor, "pk", None) is not None else None,
+        },
+    )
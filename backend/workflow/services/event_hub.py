@@ -0,0 +1,168 @@
+# workflow/services/event_hub.py
+"""
+Hub sự kiện cho SSE (/api/v1/events/stream), chạy trong event loop của worker ASGI.
+
+- MỘT kết nối Redis Pub/Sub mỗi worker (channel "events" — nhận mọi sự kiện do events.emit phát),
+  mở khi client SSE đầu tiên kết nối, đóng khi client cuối rời đi; mất kết nối thì thử lại có backoff.
+- Mỗi client một asyncio.Queue có giới hạn; envelope được parse một lần rồi phát cho các client có
+  `audience` khớp (user_ids / department_ids / roles); sự kiện không có audience không được phát.
+  Client chậm làm đầy queue → bỏ sự kiện cũ nhất.
+- Cần EVENTS_BACKEND="pubsub" hoặc "both" (backend "streams" không PUBLISH).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from django.conf import settings
+
+from .events import get_effective_redis_url
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_BACKOFF_BASE = 0.5
+RECONNECT_BACKOFF_CAP = 30.0
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Thông tin người nhận dùng để lọc `audience` (tính một lần khi client kết nối)."""
+    user_id: str
+    department_id: Optional[str] = None
+    roles: FrozenSet[str] = frozenset()
+
+
+def _as_strings(values: Any) -> Set[str]:
+    if values is None:
+        return set()
+    if isinstance(values, (str, int)):
+        values = [values]
+    return {str(v) for v in values if v not in (None, "")}
+
+
+def audience_allows(audience: Optional[Dict[str, Any]], principal: Principal) -> bool:
+    """
+    Khớp ít nhất một tiêu chí: user_ids chứa user, department_ids chứa phòng ban của user, hoặc roles
+    giao với role của user. Không có audience → từ chối (payload chứa id văn bản/người được giao).
+    """
+    if not audience:
+        return False
+    user_ids = _as_strings(audience.get("user_ids"))
+    department_ids = _as_strings(audience.get("department_ids"))
+    roles = _as_strings(audience.get("roles"))
+    if principal.user_id in user_ids:
+        return True
+    if principal.department_id and principal.department_id in department_ids:
+        return True
+    return bool(roles & principal.roles)
+
+
+def topic_matches(event: str, topics: Tuple[str, ...]) -> bool:
+    """topics ("doc_in", "case.assigned") khớp theo đoạn: "doc_in" khớp "doc_in.start" nhưng không khớp "doc_inx"."""
+    if not topics:
+        return True
+    return any(event == t or event.startswith(t + ".") for t in topics)
+
+
+@dataclass(eq=False)
+class Subscription:
+    principal: Principal
+    topics: Tuple[str, ...] = ()
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=100))
+    dropped: int = 0
+
+    def offer(self, envelope: Dict[str, Any]) -> bool:
+        if not topic_matches(str(envelope.get("event") or ""), self.topics):
+            return False
+        if not audience_allows(envelope.get("audience"), self.principal):
+            return False
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(envelope)
+        return True
+
+
+class EventHub:
+    def __init__(self, channel: str = "events"):
+        self.channel = channel
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, principal: Principal, topics: Iterable[str] = ()) -> Subscription:
+        maxsize = int(getattr(settings, "EVENTS_SSE_QUEUE_SIZE", 100))
+        sub = Subscription(principal, tuple(t for t in topics if t), asyncio.Queue(maxsize=maxsize))
+        self._subscribers.add(sub)
+        self._ensure_reader()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def dispatch(self, raw: Any) -> int:
+        """Phát một message Pub/Sub tới các client phù hợp; trả số client nhận."""
+        try:
+            envelope = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        except ValueError:
+            return 0
+        if not isinstance(envelope, dict):
+            return 0
+        return sum(sub.offer(envelope) for sub in list(self._subscribers))
+
+    # ---- Redis reader ----
+    def _ensure_reader(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        import redis.asyncio as aioredis  # type: ignore
+
+        failures = 0
+        while True:
+            client = pubsub = None
+            try:
+                client = aioredis.Redis.from_url(
+                    get_effective_redis_url(),
+                    decode_responses=True,
+                    health_check_interval=int(getattr(settings, "EVENTS_REDIS_HEALTH_CHECK_INTERVAL", 30)),
+                )
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                failures = 0
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.dispatch(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                failures += 1
+                delay = min(RECONNECT_BACKOFF_CAP, RECONNECT_BACKOFF_BASE * (2 ** (failures - 1)))
+                logger.warning("event hub: mất kết nối Redis (%s), thử lại sau %.1fs", exc, delay)
+                await asyncio.sleep(delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+                if client is not None:
+                    try:
+                        await client.aclose()
+                    except Exception:
+                        pass
+
+
+hub = EventHub()
@@ -0,0 +1,150 @@
+# workflow/services/event_relay.py
+"""
+Relay event_outbox → Redis Pub/Sub/Streams theo EVENTS_BACKEND (chạy bởi lệnh `events_relay`, ngoài request).
+
+- Mỗi lượt: khoá advisory (chỉ một relay hoạt động, các tiến trình khác đứng chờ), lấy tối đa
+  batch_size dòng chưa gửi theo outbox_id, ghi mọi sự kiện của cả lô trong MỘT pipeline.
+- Thứ tự theo ordering_key: dòng đang chờ retry chặn các dòng sau cùng key trong lô.
+  (Lỗi riêng lẻ một lệnh giữa pipeline — hiếm, vd. OOM — thì các dòng sau đã gửi, không thu hồi được.)
+- Lỗi → attempts+1, lùi available_at theo backoff luỹ thừa; quá EVENTS_OUTBOX_MAX_ATTEMPTS thì
+  bỏ qua (giữ lại để tra cứu, last_error ghi nguyên nhân).
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .events import _dumps, _get_redis, _mark_redis_down, _mark_redis_ok, queue_event, record_publish
+
+logger = logging.getLogger(__name__)
+
+# Khoá advisory cố định cho relay (pg_try_advisory_xact_lock)
+_RELAY_LOCK_ID = 0x0E7E_0B0C
+
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_MAX_SECONDS = 300
+
+
+@dataclass
+class RelayResult:
+    published: int = 0
+    failed: int = 0
+    deferred: int = 0
+    locked: bool = False  # True nếu relay khác đang giữ khoá
+
+
+def _max_attempts() -> int:
+    return int(getattr(settings, "EVENTS_OUTBOX_MAX_ATTEMPTS", 10))
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))))
+
+
+def _try_lock() -> bool:
+    if connection.vendor != "postgresql":
+        return True
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s)", [_RELAY_LOCK_ID])
+        return bool(cur.fetchone()[0])
+
+
+def publish_rows(client, rows: Sequence) -> List[Optional[str]]:
+    """
+    Publish các dòng outbox trong một pipeline (không MULTI). Trả lỗi theo từng dòng (None = thành công).
+    Mất kết nối → mọi dòng cùng lỗi.
+    """
+    pipe = client.pipeline(transaction=False)
+    spans = []
+    for row in rows:
+        spans.append(queue_event(pipe, row.event, _dumps(row.envelope)))
+
+    started = time.perf_counter()
+    try:
+        replies = pipe.execute(raise_on_error=False)
+    except Exception as exc:
+        _mark_redis_down()
+        errors: List[Optional[str]] = [str(exc)[:500] or exc.__class__.__name__] * len(rows)
+    else:
+        _mark_redis_ok()
+        errors = []
+        pos = 0
+        for span in spans:
+            failed = [r for r in replies[pos:pos + span] if isinstance(r, Exception)]
+            errors.append(str(failed[0])[:500] if failed else None)
+            pos += span
+
+    # Độ trễ cả lô chia đều cho từng sự kiện để so với đường publish trực tiếp
+    share_ms = (time.perf_counter() - started) * 1000.0 / max(1, len(rows))
+    for row, error in zip(rows, errors):
+        record_publish(row.event, share_ms, error is None)
+    return errors
+
+
+def relay_once(batch_size: int = 200, client=None) -> RelayResult:
+    """Xử lý một lô outbox. Không có Redis client → để nguyên hàng đợi."""
+    Outbox = apps.get_model("workflow", "EventOutbox")
+    result = RelayResult()
+    client = client if client is not None else _get_redis()
+    if client is None:
+        return result
+
+    with transaction.atomic():
+        if not _try_lock():
+            result.locked = True
+            return result
+
+        now = timezone.now()
+        rows = list(
+            Outbox.objects.filter(published_at__isnull=True, attempts__lt=_max_attempts())
+            .order_by("outbox_id")[:batch_size]
+        )
+        blocked = set()
+        ready = []
+        for row in rows:
+            key = row.ordering_key
+            if key and key in blocked:
+                result.deferred += 1
+                continue
+            if row.available_at > now:
+                if key:
+                    blocked.add(key)
+                result.deferred += 1
+                continue
+            ready.append(row)
+        if not ready:
+            return result
+
+        errors = publish_rows(client, ready)
+        sent_ids = []
+        for row, error in zip(ready, errors):
+            if error is None:
+                sent_ids.append(row.outbox_id)
+                continue
+            row.attempts += 1
+            row.available_at = now + _backoff(row.attempts)
+            row.last_error = error
+            result.failed += 1
+        if sent_ids:
+            result.published = Outbox.objects.filter(outbox_id__in=sent_ids).update(published_at=now)
+        failed_rows = [r for r, e in zip(ready, errors) if e is not None]
+        if failed_rows:
+            Outbox.objects.bulk_update(failed_rows, ["attempts", "available_at", "last_error"])
+            logger.warning("events relay: %d/%d sự kiện publish lỗi: %s", len(failed_rows), len(ready), failed_rows[0].last_error)
+    return result
+
+
+def purge_published(older_than: timedelta) -> int:
+    """Xoá dòng đã publish quá hạn giữ lại."""
+    Outbox = apps.get_model("workflow", "EventOutbox")
+    cutoff = timezone.now() - older_than
+    deleted, _ = Outbox.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,195 @@
+# workflow/services/event_streams.py
+"""
+Đọc sự kiện từ Redis Streams (EVENTS_BACKEND="streams"/"both") theo consumer group.
+
+- Mỗi domain (doc_in, doc_out, case) một stream "events:stream:{domain}", giới hạn bằng MAXLEN ~.
+- Nhiều worker cùng group chia nhau message; message chỉ được XACK sau khi handler chạy xong →
+  worker chết giữa chừng thì message còn trong PEL và được đọc lại khi worker (cùng tên) khởi động.
+- Định kỳ (mỗi claim_idle_ms) poll chạy XAUTOCLAIM: message treo trong PEL quá claim_idle_ms — của
+  consumer đã chết/đổi tên (pod bị dời, scale down) hoặc của chính consumer này khi handler lỗi — được
+  nhận về và xử lý lại, không cần khởi động lại. Message đã giao quá max_deliveries lần (times_delivered
+  của XPENDING) được chuyển sang stream dead-letter "{stream}:dead" rồi XACK.
+- Replay: tạo group từ một offset ("0" = toàn bộ phần còn giữ trong stream) hoặc XGROUP SETID.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .events import stream_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOMAINS = ("doc_in", "doc_out", "case")
+DEFAULT_CLAIM_IDLE_MS = 60_000
+DEFAULT_MAX_DELIVERIES = 5
+DEAD_LETTER_SUFFIX = ":dead"
+
+Handler = Callable[[str, Dict[str, Any]], None]
+
+
+def decode_entry(fields: Mapping[str, Any]) -> Dict[str, Any]:
+    """Field của entry → envelope (dict). Data hỏng thì trả nguyên chuỗi trong "raw"."""
+    data = fields.get("data")
+    try:
+        envelope = json.loads(data)
+    except Exception:
+        envelope = {"raw": data}
+    if isinstance(envelope, dict):
+        envelope.setdefault("event", fields.get("event"))
+        return envelope
+    return {"event": fields.get("event"), "raw": envelope}
+
+
+class StreamConsumer:
+    def __init__(
+        self,
+        client,
+        group: str,
+        consumer: str,
+        domains: Iterable[str] = DEFAULT_DOMAINS,
+        *,
+        count: int = 100,
+        block_ms: int = 5000,
+        claim_idle_ms: int = DEFAULT_CLAIM_IDLE_MS,
+        max_deliveries: int = DEFAULT_MAX_DELIVERIES,
+    ):
+        self.client = client
+        self.group = group
+        self.consumer = consumer
+        self.keys = [stream_key(d) for d in domains]
+        self.count = count
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self._last_claim: Optional[float] = None
+        # Lượt đầu đọc PEL của chính consumer này (từ "0", tiến dần theo id đã đọc để message
+        # handler lỗi không bị đọc lặp vô hạn); hết PEL thì chuyển sang message mới (">")
+        self._cursor = {key: "0" for key in self.keys}
+
+    # ---- group ----
+    def ensure_groups(self, start_id: str = "$") -> None:
+        """Tạo group (và stream nếu chưa có) bắt đầu từ start_id; group đã tồn tại thì giữ nguyên."""
+        for key in self.keys:
+            try:
+                self.client.xgroup_create(key, self.group, id=start_id, mkstream=True)
+            except Exception as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+
+    def reset(self, start_id: str) -> None:
+        """Đặt lại offset của group (replay từ start_id)."""
+        for key in self.keys:
+            self.client.xgroup_setid(key, self.group, id=start_id)
+
+    # ---- đọc / ack ----
+    def _read(self) -> List[Tuple[str, List[Tuple[str, Optional[Dict[str, Any]]]]]]:
+        in_pel = any(cursor != ">" for cursor in self._cursor.values())
+        # Đọc PEL trả ngay; chỉ block khi mọi stream đã chuyển sang message mới
+        block = None if in_pel else self.block_ms
+        reply = self.client.xreadgroup(self.group, self.consumer, dict(self._cursor), count=self.count, block=block)
+        out = []
+        entries_by_key = {key: entries for key, entries in reply or []}
+        for key in self.keys:
+            entries = entries_by_key.get(key) or []
+            if self._cursor[key] != ">":
+                self._cursor[key] = entries[-1][0] if entries else ">"
+            if entries:
+                out.append((key, entries))
+        return out
+
+    def _deliveries(self, key: str, ids: List[str]) -> Dict[str, int]:
+        """times_delivered (XPENDING) của từng message; một round trip cho cả lô."""
+        pipe = self.client.pipeline(transaction=False)
+        for message_id in ids:
+            pipe.xpending_range(key, self.group, min=message_id, max=message_id, count=1)
+        out = {}
+        for rows in pipe.execute():
+            for row in rows or []:
+                out[str(row["message_id"])] = int(row["times_delivered"])
+        return out
+
+    def _dead_letter(self, key: str, message_id: str, fields: Mapping[str, Any], deliveries: int) -> None:
+        self.client.xadd(
+            f"{key}{DEAD_LETTER_SUFFIX}",
+            {**fields, "source_id": message_id, "group": self.group, "deliveries": deliveries},
+        )
+        logger.error("event stream %s: %s lỗi %d lần → dead-letter", key, message_id, deliveries)
+
+    def _claim_due(self) -> bool:
+        now = time.monotonic()
+        if self._last_claim is not None and (now - self._last_claim) * 1000 < self.claim_idle_ms:
+            return False
+        self._last_claim = now
+        return True
+
+    def _claim(self, key: str) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """XAUTOCLAIM mọi message treo quá claim_idle_ms (của bất kỳ consumer nào) về consumer này."""
+        claimed: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        start = "0-0"
+        while True:
+            reply = self.client.xautoclaim(
+                key, self.group, self.consumer, self.claim_idle_ms, start_id=start, count=self.count
+            )
+            start, entries = str(reply[0]), reply[1]
+            claimed.extend(entries or [])
+            if start == "0-0" or not entries:
+                return claimed
+
+    def _handle(self, key: str, entries, handler: Handler) -> int:
+        done: List[str] = []
+        for message_id, fields in entries:
+            if fields is None:  # entry trong PEL đã bị trim khỏi stream
+                done.append(message_id)
+                continue
+            try:
+                handler(message_id, decode_entry(fields))
+            except Exception:
+                # Không ack: message ở lại PEL, được XAUTOCLAIM nhận lại sau claim_idle_ms
+                logger.exception("event stream %s: handler lỗi tại %s", key, message_id)
+                continue
+            done.append(message_id)
+        return int(self.client.xack(key, self.group, *done) or 0) if done else 0
+
+    def reclaim(self, handler: Handler) -> int:
+        """Nhận lại và xử lý message treo; message đã giao quá max_deliveries lần → dead-letter. Trả số ack."""
+        acked = 0
+        for key in self.keys:
+            claimed = self._claim(key)
+            if not claimed:
+                continue
+            deliveries = self._deliveries(key, [mid for mid, fields in claimed if fields is not None])
+            retry, dead = [], []
+            for message_id, fields in claimed:
+                count = deliveries.get(message_id, 0)
+                if fields is not None and count > self.max_deliveries:
+                    self._dead_letter(key, message_id, fields, count)
+                    dead.append(message_id)
+                else:
+                    retry.append((message_id, fields))
+            if dead:
+                self.client.xack(key, self.group, *dead)
+            acked += self._handle(key, retry, handler)
+        return acked
+
+    def poll(self, handler: Handler) -> int:
+        """
+        Đọc một lô, gọi handler(message_id, envelope), XACK các message xử lý xong (kèm lượt reclaim
+        định kỳ). Trả số message đã ack (không tính message chuyển sang dead-letter).
+        """
+        acked = self.reclaim(handler) if self._claim_due() else 0
+        for key, entries in self._read():
+            acked += self._handle(key, entries, handler)
+        return acked
+
+
+def default_consumer_name() -> str:
+    """
+    Tên ổn định qua các lần khởi động lại (để đọc lại ngay PEL của chính mình); message của consumer
+    không quay lại (pod mới đổi hostname) vẫn được worker khác nhận qua XAUTOCLAIM.
+    """
+    import socket
+
+    return socket.gethostname()
@@ -4,9 +4,13 @@ from __future__ import annotations
 import os
 import time
 import json
-from typing import Any, Mapping, Optional, Dict
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 try:
     import orjson  # tối ưu tốc độ nếu có
     def _dumps(obj: Any) -> str:
@@ -15,7 +19,16 @@ except Exception:
     def _dumps(obj: Any) -> str:
         return json.dumps(obj, ensure_ascii=False)
 
-_redis_client = None  # lazy init, cache trong process
+_redis_client = None  # lazy init, cache trong process (dùng chung một ConnectionPool có giới hạn)
+_redis_lock = threading.Lock()
+_down_until = 0.0        # monotonic: trước thời điểm này coi Redis đang lỗi, không thử kết nối
+_consecutive_failures = 0
+
+RECONNECT_BACKOFF_BASE = 0.5
+RECONNECT_BACKOFF_CAP = 30.0
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
 
 
 def _now_ms() -> int:
@@ -44,39 +57,247 @@ def get_effective_redis_url() -> str:
     return f"redis://{host}:{port}/{db}"
 
 
+def _build_client(url: str):
+    import redis  # type: ignore
+    from redis.backoff import ExponentialBackoff  # type: ignore
+    from redis.retry import Retry  # type: ignore
+
+    # BlockingConnectionPool: tối đa max_connections, hết thì chờ `timeout` giây thay vì mở thêm
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        decode_responses=True,
+        max_connections=int(getattr(settings, "EVENTS_REDIS_MAX_CONNECTIONS", 20)),
+        timeout=float(getattr(settings, "EVENTS_REDIS_POOL_TIMEOUT", 1.0)),
+        health_check_interval=int(getattr(settings, "EVENTS_REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        socket_connect_timeout=float(getattr(settings, "EVENTS_REDIS_SOCKET_TIMEOUT", 1.0)),
+        socket_timeout=float(getattr(settings, "EVENTS_REDIS_SOCKET_TIMEOUT", 1.0)),
+        retry_on_timeout=True,
+        retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), retries=2),
+    )
+    return redis.Redis(connection_pool=pool)
+
+
 def _get_redis():
     """
-    Lazy-init Redis client. Trả về None nếu chưa cài redis-py
-    hoặc URL lỗi. Không raise để tránh làm hỏng luồng Service.
+    Lazy-init Redis client (không ping; kết nối mở khi dùng và được health-check định kỳ).
+    Trả về None nếu chưa cài redis-py, URL lỗi hoặc đang trong thời gian backoff sau lỗi kết nối.
+    Không raise để tránh làm hỏng luồng Service.
     """
     global _redis_client
+    if time.monotonic() < _down_until:
+        return None
     if _redis_client is not None:
         return _redis_client
 
-    try:
-        import redis  # type: ignore
-    except Exception:
-        _redis_client = None
-        if getattr(settings, "DEBUG", False):
-            print("[events] redis-py chưa được cài. pip install redis")
-        return None
-
-    url = get_effective_redis_url()
-    try:
-        _redis_client = redis.Redis.from_url(url, decode_responses=True)
-        # ping thử, nếu fail vẫn giữ client để lần sau thử lại
+    with _redis_lock:
+        if _redis_client is not None:
+            return _redis_client
+        url = get_effective_redis_url()
         try:
-            _redis_client.ping()
+            _redis_client = _build_client(url)
+        except ImportError:
             if getattr(settings, "DEBUG", False):
-                print(f"[events] Connected Redis OK: {url}")
+                print("[events] redis-py chưa được cài. pip install redis")
+            _mark_redis_down()
         except Exception as e:
             if getattr(settings, "DEBUG", False):
-                print(f"[events] Redis ping fail ({url}): {e}")
+                print(f"[events] Tạo Redis client thất bại ({url}): {e}")
+            _mark_redis_down()
+    return _redis_client
+
+
+def _mark_redis_down() -> None:
+    """Lỗi kết nối: tạm ngừng thử trong khoảng backoff luỹ thừa (tránh mỗi request chờ timeout)."""
+    global _down_until, _consecutive_failures
+    _consecutive_failures += 1
+    delay = min(RECONNECT_BACKOFF_CAP, RECONNECT_BACKOFF_BASE * (2 ** (_consecutive_failures - 1)))
+    _down_until = time.monotonic() + delay
+
+
+def _mark_redis_ok() -> None:
+    global _down_until, _consecutive_failures
+    _consecutive_failures = 0
+    _down_until = 0.0
+
+
+def reset_redis_client() -> None:
+    """Đóng pool hiện tại và xoá trạng thái backoff (đổi cấu hình/test)."""
+    global _redis_client
+    with _redis_lock:
+        client, _redis_client = _redis_client, None
+    _mark_redis_ok()
+    if client is not None:
+        try:
+            client.connection_pool.disconnect()
+        except Exception:
+            pass
+
+
+# ---------- Bộ đếm chi phí Redis theo event ----------
+def record_publish(event: str, elapsed_ms: float, ok: bool) -> None:
+    with _stats_lock:
+        st = _stats.get(event)
+        if st is None:
+            st = _stats[event] = {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+        st["count"] += 1
+        if not ok:
+            st["failures"] += 1
+        st["total_ms"] += elapsed_ms
+        if elapsed_ms > st["max_ms"]:
+            st["max_ms"] = elapsed_ms
+
+
+def event_stats() -> Dict[str, Dict[str, float]]:
+    """Số lần publish, số lỗi, tổng/trung bình/tối đa độ trễ Redis (ms) theo event trong process hiện tại."""
+    with _stats_lock:
+        out = {}
+        for event, st in _stats.items():
+            row = dict(st)
+            row["avg_ms"] = round(st["total_ms"] / st["count"], 3) if st["count"] else 0.0
+            out[event] = row
+        return out
+
+
+def reset_event_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def event_channels(event: str) -> List[str]:
+    """event = "a.b.c" -> ["events", "events.a", "events.a.b", "events.a.b.c"]"""
+    channels = ["events"]
+    prefix = "events"
+    for part in event.split("."):
+        prefix = f"{prefix}.{part}"
+        channels.append(prefix)
+    return channels
+
+
+def build_envelope(
+    event: str,
+    payload: Optional[Mapping[str, Any]] = None,
+    *,
+    audience: Optional[Mapping[str, Any]] = None,
+    actor: Any = None,
+) -> Dict[str, Any]:
+    envelope: Dict[str, Any] = {
+        "event": event,
+        "payload": dict(payload or {}),
+        "audience": dict(audience or {}),
+        "ts": _now_ms(),
+    }
+    if actor is not None:
+        actor_id = getattr(actor, "user_id", None) or getattr(actor, "pk", None)
+        if actor_id is not None:
+            envelope["actor_id"] = str(actor_id)
+    return envelope
+
+
+def audience(
+    *,
+    user_ids: Iterable[Any] = (),
+    department_ids: Iterable[Any] = (),
+    roles: Iterable[Any] = (),
+) -> Dict[str, List[str]]:
+    """
+    audience cho emit(): chuỗi, bỏ trùng/rỗng. SSE (event_hub.audience_allows) từ chối sự kiện không
+    có audience, nên mọi sự kiện nghiệp vụ phải khai báo người nhận.
+    """
+    def _clean(values: Iterable[Any]) -> List[str]:
+        return list(dict.fromkeys(str(v) for v in values if v not in (None, "")))
+
+    out = {"user_ids": _clean(user_ids), "department_ids": _clean(department_ids), "roles": _clean(roles)}
+    return {k: v for k, v in out.items() if v}
+
+
+def ordering_key_for(payload: Optional[Mapping[str, Any]]) -> str:
+    """Khoá thứ tự trong outbox: cùng văn bản/hồ sơ thì relay publish đúng thứ tự phát sinh."""
+    payload = payload or {}
+    for field, prefix in (("document_id", "document"), ("case_id", "case")):
+        value = payload.get(field)
+        if value not in (None, ""):
+            return f"{prefix}:{value}"
+    return ""
+
+
+# ---------- Backend: Pub/Sub (mặc định) và/hoặc Redis Streams ----------
+def events_backend() -> str:
+    """EVENTS_BACKEND: "pubsub" | "streams" | "both" (ghi cả hai, dùng khi chuyển dần consumer)."""
+    backend = str(getattr(settings, "EVENTS_BACKEND", "pubsub") or "pubsub").lower()
+    return backend if backend in ("pubsub", "streams", "both") else "pubsub"
+
+
+def event_domain(event: str) -> str:
+    """Domain cấp đầu của event: "doc_out.published" -> "doc_out"."""
+    return event.split(".", 1)[0]
+
+
+def stream_key(domain: str) -> str:
+    prefix = getattr(settings, "EVENTS_STREAM_PREFIX", "events:stream")
+    return f"{prefix}:{domain}"
+
+
+def queue_event(pipe, event: str, msg: str) -> int:
+    """Xếp lệnh ghi một sự kiện vào pipeline theo backend; trả số lệnh đã xếp."""
+    backend = events_backend()
+    queued = 0
+    if backend in ("pubsub", "both"):
+        for ch in event_channels(event):
+            pipe.publish(ch, msg)
+            queued += 1
+    if backend in ("streams", "both"):
+        # Stream có giới hạn (MAXLEN ~): trim xấp xỉ theo node, rẻ hơn trim chính xác
+        pipe.xadd(
+            stream_key(event_domain(event)),
+            {"event": event, "data": msg},
+            maxlen=int(getattr(settings, "EVENTS_STREAM_MAXLEN", 100_000)),
+            approximate=True,
+        )
+        queued += 1
+    return queued
+
+
+def publish_envelope(client, event: str, envelope: Mapping[str, Any]) -> bool:
+    """
+    Ghi trực tiếp một envelope (mọi channel phân cấp và/hoặc stream của domain) trong MỘT pipeline
+    (một round trip). Lỗi kết nối → bật backoff, trả False.
+    """
+    msg = _dumps(envelope)
+    started = time.perf_counter()
+    ok = False
+    try:
+        pipe = client.pipeline(transaction=False)
+        queue_event(pipe, event, msg)
+        replies = pipe.execute(raise_on_error=False)
+        ok = any(not isinstance(r, Exception) for r in replies)
+        _mark_redis_ok()
+        if getattr(settings, "DEBUG", False):
+            print(f"[events.emit] {events_backend()} {event} replies={replies}")
     except Exception as e:
-        _redis_client = None
+        _mark_redis_down()
         if getattr(settings, "DEBUG", False):
-            print(f"[events] Tạo Redis client thất bại ({url}): {e}")
-    return _redis_client
+            print(f"[events.emit] publish fail {event}: {e}")
+    finally:
+        record_publish(event, (time.perf_counter() - started) * 1000.0, ok)
+
+    if getattr(settings, "DEBUG", False):
+        print(f"[events.emit] event={event} sent={ok} msg={msg}")
+    return ok
+
+
+def _enqueue(event: str, envelope: Dict[str, Any], ordering_key: str) -> bool:
+    from django.apps import apps
+    from django.db import transaction
+
+    Outbox = apps.get_model("workflow", "EventOutbox")
+    try:
+        # savepoint: lỗi ghi outbox không làm hỏng transaction nghiệp vụ bao ngoài
+        with transaction.atomic():
+            Outbox.objects.create(event=event, envelope=envelope, ordering_key=ordering_key[:100])
+    except Exception:
+        logger.exception("events.emit: không ghi được outbox (event=%s)", event)
+        return False
+    return True
 
 
 def emit(
@@ -87,7 +308,7 @@ def emit(
     actor: Any = None,  # có thể truyền request.user
 ) -> bool:
     """
-    Publish sự kiện realtime qua Redis Pub/Sub.
+    Phát sự kiện realtime.
 
     - event: "doc_out.published" -> publish lên các channel:
         "events", "events.doc_out", "events.doc_out.published"
@@ -95,9 +316,15 @@ def emit(
     - audience: gợi ý lọc người nhận cho consumer (UI/WebSocket) nếu cần
     - actor: user/ID; sẽ nhúng actor_id vào envelope nếu có
 
+    Mặc định (EVENTS_OUTBOX_ENABLED) chỉ ghi một dòng event_outbox trong transaction hiện tại —
+    caller gọi emit() BÊN TRONG transaction.atomic() của nghiệp vụ để sự kiện commit/rollback cùng dữ
+    liệu; lệnh `events_relay` publish lên Redis sau khi commit.
+    EVENTS_OUTBOX_ENABLED=False giữ cách cũ: publish đồng bộ; đang trong transaction thì hoãn tới
+    on_commit (không phát sự kiện cho dữ liệu có thể bị rollback).
+
     Trả về:
-      True  = ít nhất publish được 1 channel
-      False = Redis không cấu hình/không có -> no-op an toàn
+      True  = đã ghi outbox / publish được ít nhất 1 channel
+      False = tắt phát sự kiện hoặc Redis không cấu hình/không có -> no-op an toàn
     """
     # Cho phép tắt publish ở môi trường test/dev
     if getattr(settings, "EVENTS_PUBLISH_ENABLED", True) is False:
@@ -105,45 +332,22 @@ def emit(
             print("[events.emit] disabled by EVENTS_PUBLISH_ENABLED=False")
         return False
 
-    client = _get_redis()
-    envelope: Dict[str, Any] = {
-        "event": event,
-        "payload": dict(payload or {}),
-        "audience": dict(audience or {}),
-        "ts": _now_ms(),
-    }
-    if actor is not None:
-        actor_id = getattr(actor, "user_id", None) or getattr(actor, "pk", None)
-        if actor_id is not None:
-            envelope["actor_id"] = str(actor_id)
+    envelope = build_envelope(event, payload, audience=audience, actor=actor)
+    if getattr(settings, "EVENTS_OUTBOX_ENABLED", True):
+        return _enqueue(event, envelope, ordering_key_for(payload))
 
-    msg = _dumps(envelope)
+    from django.db import transaction
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _publish_direct(event, envelope))
+        return True
+    return _publish_direct(event, envelope)
 
+
+def _publish_direct(event: str, envelope: Dict[str, Any]) -> bool:
+    client = _get_redis()
     if client is None:
         if getattr(settings, "DEBUG", False):
             print("[events.emit] no redis client; skipping")
         return False
-
-    ok = False
-    channels = ["events"]
-    # event = "a.b.c" -> publish dần: events, events.a, events.a.b, events.a.b.c
-    prefix = "events"
-    for part in event.split("."):
-        prefix = f"{prefix}.{part}"
-        channels.append(prefix)
-
-    for ch in channels:
-        try:
-            # publish() trả số subscriber trên channel đó (int)
-            subs = client.publish(ch, msg)
-            ok = ok or (subs is not None)  # coi là sent nếu không exception
-            if getattr(settings, "DEBUG", False):
-                print(f"[events.emit] PUBLISH {ch} subs={subs}")
-        except Exception as e:
-            if getattr(settings, "DEBUG", False):
-                print(f"[events.emit] publish fail {ch}: {e}")
-            continue
-
-    if getattr(settings, "DEBUG", False):
-        print(f"[events.emit] event={event} sent={ok} channels={channels} msg={msg}")
-    return ok
+    return publish_envelope(client, event, envelope)
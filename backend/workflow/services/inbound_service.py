@@ -6,10 +6,11 @@ from django.db import transaction
 from django.utils import timezone
 
 from .errors import PermissionDenied, InvalidTransition, ValidationError
-from .rbac import can, Act
+from .rbac import can, Act, Role
 from .status_resolver import StatusResolver as SR
 from .audit import audit_log
-from .events import emit
+from .events import emit, audience
+from . import numbering
 
 def _doc_models():
     Doc = apps.get_model('documents', 'Document')
@@ -28,14 +29,27 @@ def _insert_wf_log(doc, *, action: str, from_status_id: Optional[int], to_status
     DLog.objects.create(
         document_id=doc.document_id,
         action=action,
-        from_status=from_status_id,
-        to_status=to_status_id,
+        from_status_id=from_status_id,
+        to_status_id=to_status_id,
         acted_by=actor,
         acted_at=timezone.now(),
         comment=comment,
         meta_json=meta,
     )
 
+def _doc_audience(doc, actor, assignee_ids: Iterable[Any] = ()):
+    """Người nhận sự kiện VB đến: người được giao + người giao, người thao tác, phòng ban và Lãnh đạo."""
+    _, _, Assign = _doc_models()
+    assigned = Assign.objects.filter(document_id=doc.document_id).values_list("user_id", "assigned_by_id")
+    user_ids = [*assignee_ids, getattr(actor, "user_id", None)]
+    for user_id, assigned_by_id in assigned:
+        user_ids += [user_id, assigned_by_id]
+    return audience(
+        user_ids=user_ids,
+        department_ids=(getattr(doc, "department_id", None),),
+        roles=(Role.LD,),
+    )
+
 @dataclass
 class InboundService:
     actor: Any  # accounts.User
@@ -53,15 +67,30 @@ class InboundService:
             audit_log(actor=self.actor, action="DOC.IN.RECEIVED", entity_type="document", entity_id=doc.document_id, after={"to":"TIEP_NHAN","note":note})
 
     # ===== Đăng ký (TIEP_NHAN -> DANG_KY) =====
-    def register(self, doc: Any, *, received_number: int, received_date, sender: str):
+    def register(
+        self,
+        doc: Any,
+        *,
+        received_number: Optional[int] = None,
+        received_date,
+        sender: str,
+        reservation_id: Any = None,
+    ):
+        """received_number bỏ trống + reservation_id → lấy số kế tiếp trong khối đã giữ trước của sổ."""
         if not can(self.actor, Act.IN_REGISTER, obj=doc):
             raise PermissionDenied("Không có quyền gán số đến/đăng ký.")
         if doc.doc_direction != 'den':
             raise ValidationError("Chỉ văn bản 'den' mới đăng ký số đến.")
+        if received_number is None and reservation_id is None:
+            raise ValidationError("Thiếu số đến.", code="MISSING_RECEIVED_NUMBER")
         from_id = _status_id(doc)
         dang_ky = SR.doc_status_id("DANG_KY")
 
         with transaction.atomic():
+            if received_number is None:
+                received_number = numbering.take_reserved(
+                    reservation_id, self.actor, received_date=received_date, document=doc
+                )
             doc.received_number = received_number
             doc.received_date = received_date
             doc.sender = sender
@@ -106,7 +135,8 @@ class InboundService:
                       after={"to":"PHAN_CONG","assignees":[str(u.user_id) for u in assignees],"due_at": str(due_at) if due_at else None})
 
             doc.status_id = phan_cong  # sync instance
-        emit("doc_in.assigned", {"document_id": doc.document_id, "assignees":[str(u.user_id) for u in assignees]})
+            emit("doc_in.assigned", {"document_id": doc.document_id, "assignees":[str(u.user_id) for u in assignees]},
+                 audience=_doc_audience(doc, self.actor), actor=self.actor)
 
     # ===== Bắt đầu xử lý (PHAN_CONG -> DANG_XU_LY) =====
     def start_processing(self, doc: Any):
@@ -122,7 +152,8 @@ class InboundService:
             audit_log(actor=self.actor, action="DOC.IN.START", entity_type="document", entity_id=doc.document_id,
                       before={"status_id":from_id}, after={"status_id":dang_xl})
             doc.status_id = dang_xl
-        emit("doc_in.start", {"document_id": doc.document_id, "by": str(self.actor.user_id)})
+            emit("doc_in.start", {"document_id": doc.document_id, "by": str(self.actor.user_id)},
+                 audience=_doc_audience(doc, self.actor), actor=self.actor)
 
     # ===== Hoàn tất (DANG_XU_LY -> HOAN_TAT) =====
     def complete(self, doc: Any, result_note: Optional[str]=None):
@@ -138,7 +169,8 @@ class InboundService:
             audit_log(actor=self.actor, action="DOC.IN.COMPLETE", entity_type="document", entity_id=doc.document_id,
                       before={"status_id":from_id}, after={"status_id":hoan_tat,"note":result_note})
             doc.status_id = hoan_tat
-        emit("doc_in.completed", {"document_id": doc.document_id})
+            emit("doc_in.completed", {"document_id": doc.document_id},
+                 audience=_doc_audience(doc, self.actor), actor=self.actor)
 
     # ===== Lưu trữ (HOAN_TAT -> LUU_TRU) =====
     def archive(self, doc: Any, reason: Optional[str]=None):
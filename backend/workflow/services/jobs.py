@@ -0,0 +1,144 @@
+# workflow/services/jobs.py
+"""
+Chạy job nền trên bảng notifications.jobs (lệnh `run_jobs`, ngoài request): nhập/xuất văn bản.
+
+- claim_next: nhận một job QUEUED đến hạn (hoặc RUNNING mà worker đã chết — heartbeat quá
+  JOBS_STALE_SECONDS) bằng SELECT ... FOR UPDATE SKIP LOCKED → nhiều worker chạy song song không giẫm nhau.
+- Mỗi lần nhận tăng `attempts`; giá trị này là "fencing token": handler ghi checkpoint qua
+  save_progress, hàm này từ chối ghi nếu job đã bị worker khác nhận lại (JobLost).
+- Handler tự chia việc thành từng phần, mỗi phần commit cùng checkpoint → chạy lại (retry/crash)
+  tiếp tục từ checkpoint, không làm lại phần đã commit.
+- Lỗi → QUEUED lại với backoff tới khi hết JOBS_MAX_ATTEMPTS thì FAILED (last_error ghi nguyên nhân).
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Job.type → đường dẫn handler(job); import lười để worker không nạp module không dùng tới
+HANDLERS: Dict[str, str] = {
+    "DOCUMENT_IMPORT": "workflow.services.document_import.run_import_job",
+    "REPORT_EXPORT": "workflow.services.document_export.run_export_job",
+}
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 600
+
+
+class JobLost(Exception):
+    """Job đã bị worker khác nhận lại (worker này bị coi là chết) — dừng, không ghi thêm."""
+
+
+def _job_model():
+    return apps.get_model("notifications", "Job")
+
+
+def _stale_after() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "JOBS_STALE_SECONDS", 300)))
+
+
+def _max_attempts() -> int:
+    return int(getattr(settings, "JOBS_MAX_ATTEMPTS", 3))
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))))
+
+
+def enqueue(job_type: str, payload: Dict[str, Any], *, run_at=None):
+    return _job_model().objects.create(
+        type=job_type,
+        payload_json=payload,
+        run_at=run_at or timezone.now(),
+        status="QUEUED",
+    )
+
+
+def claim_next(types: Optional[Iterable[str]] = None):
+    """Nhận một job đến hạn; trả None nếu không còn job nào."""
+    Job = _job_model()
+    now = timezone.now()
+    due = Q(status="QUEUED", run_at__lte=now) | Q(status="RUNNING", heartbeat_at__lt=now - _stale_after())
+    qs = Job.objects.filter(due)
+    if types:
+        qs = qs.filter(type__in=list(types))
+    with transaction.atomic():
+        job = qs.select_for_update(skip_locked=True).order_by("run_at", "job_id").first()
+        if job is None:
+            return None
+        job.status = "RUNNING"
+        job.attempts += 1
+        job.heartbeat_at = now
+        job.save(update_fields=["status", "attempts", "heartbeat_at"])
+    return job
+
+
+def save_progress(job, progress: Dict[str, Any]) -> None:
+    """
+    Ghi tiến độ/checkpoint + heartbeat. Gọi TRONG transaction của phần việc vừa xong để checkpoint
+    và dữ liệu cùng commit hoặc cùng rollback.
+    """
+    Job = _job_model()
+    current = Job.objects.select_for_update().filter(pk=job.pk).values_list("status", "attempts").first()
+    if current is None or current != ("RUNNING", job.attempts):
+        raise JobLost(f"job {job.pk} đã bị worker khác nhận lại")
+    job.progress_json = progress
+    job.heartbeat_at = timezone.now()
+    Job.objects.filter(pk=job.pk).update(progress_json=progress, heartbeat_at=job.heartbeat_at)
+
+
+def _finish(job, status: str, *, error: Optional[str] = None, run_at=None) -> None:
+    Job = _job_model()
+    fields: Dict[str, Any] = {"status": status, "last_error": (error or "")[:500] or None}
+    if run_at is not None:
+        fields["run_at"] = run_at
+    # Chỉ kết thúc khi job vẫn thuộc lần nhận này
+    Job.objects.filter(pk=job.pk, status="RUNNING", attempts=job.attempts).update(**fields)
+    for key, value in fields.items():
+        setattr(job, key, value)
+
+
+def run_job(job, handler: Optional[Callable[[Any], None]] = None) -> str:
+    """Chạy handler của job, cập nhật trạng thái; trả trạng thái cuối."""
+    try:
+        handler = handler or import_string(HANDLERS[job.type])
+    except (KeyError, ImportError) as exc:
+        _finish(job, "FAILED", error=f"Không có handler cho job {job.type}: {exc}")
+        return job.status
+    try:
+        handler(job)
+    except JobLost:
+        logger.warning("job %s: đã bị worker khác nhận lại, dừng", job.pk)
+        return "LOST"
+    except Exception as exc:
+        logger.exception("job %s (%s) lỗi ở lần chạy %s", job.pk, job.type, job.attempts)
+        error = str(exc) or exc.__class__.__name__
+        if job.attempts < _max_attempts():
+            _finish(job, "QUEUED", error=error, run_at=timezone.now() + _backoff(job.attempts))
+        else:
+            _finish(job, "FAILED", error=error)
+        return job.status
+    _finish(job, "DONE")
+    return job.status
+
+
+def run_pending(limit: Optional[int] = None, types: Optional[Iterable[str]] = None) -> int:
+    """Chạy lần lượt các job đến hạn (tối đa `limit`); trả số job đã chạy."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next(types)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
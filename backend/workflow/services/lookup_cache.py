@@ -0,0 +1,172 @@
+# workflow/services/lookup_cache.py
+"""
+Cache tra cứu nhỏ, đọc nhiều – ghi hiếm (trạng thái catalog, system_settings) dùng chung giữa các worker.
+
+- Mỗi bảng nạp TOÀN BỘ trong một truy vấn vào bộ nhớ process (warm ở request đầu tiên của worker
+  hoặc lần dùng đầu). Không warm lúc import wsgi/asgi: gunicorn --preload sẽ mở kết nối DB trong
+  master rồi các worker fork dùng chung, và import sẽ lỗi khi DB chưa sẵn sàng.
+- Version toàn cục nằm trong Django cache ("lookup:{name}:version", Redis khi có CACHE_REDIS_URL);
+  signal ghi/xoá bump version → worker khác nạp lại sau tối đa LOOKUP_CACHE_CHECK_INTERVAL giây,
+  worker đang ghi nạp lại ngay. LOOKUP_CACHE_TTL là trần an toàn cho ghi không qua ORM (raw SQL).
+- Đếm hits/misses/loads để theo dõi (`lookup_cache_stats()`).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+
+logger = logging.getLogger(__name__)
+
+_registry: List["VersionedLookup"] = []
+
+
+def _fresh_version() -> int:
+    return int(time.time() * 1000)
+
+
+class VersionedLookup:
+    """Bảng tra cứu key → value trong process, vô hiệu theo version dùng chung."""
+
+    def __init__(self, name: str, loader: Callable[[], Mapping[str, Any]]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        _registry.append(self)
+
+    @property
+    def version_key(self) -> str:
+        return f"lookup:{self.name}:version"
+
+    # ---- version dùng chung ----
+    def _shared_version(self) -> int:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, _fresh_version(), timeout=None)
+            version = cache.get(self.version_key)
+        return int(version or 0)
+
+    def invalidate(self) -> None:
+        """Bump version dùng chung và bỏ bản trong process (gọi từ signal)."""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, _fresh_version(), timeout=None)
+        with self._lock:
+            self._data = None
+
+    # ---- nạp / đọc ----
+    def warm(self) -> Dict[str, Any]:
+        version = self._shared_version()  # đọc version TRƯỚC khi nạp: bump xen giữa sẽ buộc nạp lại
+        data = dict(self._loader())
+        now = time.monotonic()
+        with self._lock:
+            self._data = data
+            self._version = version
+            self._loaded_at = self._checked_at = now
+            self.loads += 1
+        logger.debug("lookup cache %s loaded v=%s size=%d", self.name, version, len(data))
+        return data
+
+    def _snapshot(self) -> Dict[str, Any]:
+        ttl = float(getattr(settings, "LOOKUP_CACHE_TTL", 300))
+        interval = float(getattr(settings, "LOOKUP_CACHE_CHECK_INTERVAL", 5))
+        now = time.monotonic()
+        with self._lock:
+            data = self._data
+            stale = data is None or (ttl > 0 and now - self._loaded_at > ttl)
+            check = not stale and now - self._checked_at >= interval
+            if check:
+                self._checked_at = now
+            version = self._version
+        if check and self._shared_version() != version:
+            stale = True
+        if stale or data is None:
+            data = self.warm()
+        return data
+
+    def get(self, key: str, fallback: Optional[Callable[[str], Any]] = None) -> Any:
+        """
+        Giá trị theo key. Không có trong snapshot → miss; nếu có `fallback` thì tra DB trực tiếp
+        (vd. trạng thái vừa thêm bằng raw SQL) và ghi bổ sung vào snapshot.
+        """
+        data = self._snapshot()
+        if key in data:
+            self.hits += 1
+            return data[key]
+        self.misses += 1
+        if fallback is None:
+            return None
+        value = fallback(key)
+        if value is not None:
+            with self._lock:
+                if self._data is data:
+                    self._data = {**data, key: value}
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data) if self._data is not None else 0
+            version = self._version
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "size": size,
+            "version": version,
+        }
+
+
+def lookup_cache_stats() -> List[Dict[str, Any]]:
+    """Bộ đếm hit/miss/load của mọi cache tra cứu trong process hiện tại."""
+    return [lk.stats() for lk in _registry]
+
+
+def warm_lookup_caches() -> None:
+    """Nạp sẵn mọi cache tra cứu (mỗi bảng một truy vấn); lỗi DB không chặn khởi động."""
+    for lk in _registry:
+        try:
+            lk.warm()
+        except Exception:
+            logger.warning("lookup cache %s: warm-up failed", lk.name, exc_info=True)
+
+
+_warm_lock = threading.Lock()
+_warm_pending = False
+
+
+def _warm_on_request(**kwargs) -> None:
+    global _warm_pending
+    with _warm_lock:
+        if not _warm_pending:
+            return
+        _warm_pending = False
+    request_started.disconnect(dispatch_uid="lookup_cache_warm")
+    warm_lookup_caches()
+
+
+def warm_on_first_request() -> None:
+    """Warm một lần ở request đầu tiên của process (sau fork, bằng kết nối DB của chính worker)."""
+    global _warm_pending
+    with _warm_lock:
+        _warm_pending = True
+    request_started.connect(_warm_on_request, dispatch_uid="lookup_cache_warm", weak=False)
+
+
+def invalidate_lookup_caches() -> None:
+    """Bump version mọi cache tra cứu (sau sửa dữ liệu hàng loạt không qua ORM)."""
+    for lk in _registry:
+        lk.invalidate()
@@ -0,0 +1,290 @@
+# workflow/services/numbering.py
+"""
+Cấp số văn bản bằng bộ đếm một dòng (documents.NumberCounter) thay cho MAX(seq) + thử lại.
+
+- Mỗi (scope, period) là một dòng; cấp số = UPDATE ... SET last_value = last_value + n RETURNING.
+  Chỉ khoá dòng đó tới khi transaction kết thúc → phát hành song song xếp hàng trên một row lock,
+  không quét aggregate, không INSERT thất bại.
+- Gọi trong transaction phát hành: rollback trả lại số → dãy số liên tục (không nhảy số).
+- Kỳ reset (period) và định dạng (prefix/suffix/padding) lấy từ NumberingRule/RegisterBook nếu có.
+  Reset theo tháng/quý thì số có nhãn kỳ ("0001-02/UBND", "0001-Q1/UBND"): unique của số đi là
+  (issue_year, issue_number) nên hai kỳ trong cùng năm không được trùng chuỗi số.
+- Sổ đăng ký: giữ trước cả khối N số bằng một lần tăng bộ đếm (reserve_block), các lệnh đăng ký
+  sau đó lấy dần từ khối (take_reserved) — không tranh chấp bộ đếm chung.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .errors import ValidationError
+
+ALL_TIME = "all"
+
+
+def _counter_model():
+    return apps.get_model("documents", "NumberCounter")
+
+
+def _numbering_model():
+    return apps.get_model("documents", "OutgoingNumbering")
+
+
+def period_key(reset_policy: Optional[str], on: date) -> str:
+    """Khoá kỳ đếm theo chính sách reset: yearly → "2025", quarterly → "2025-Q2", monthly → "2025-04"."""
+    policy = (reset_policy or "yearly").lower()
+    if policy == "monthly":
+        return f"{on.year:04d}-{on.month:02d}"
+    if policy == "quarterly":
+        return f"{on.year:04d}-Q{(on.month - 1) // 3 + 1}"
+    if policy in ("never", "manual"):
+        return ALL_TIME
+    return f"{on.year:04d}"
+
+
+def period_label(reset_policy: Optional[str], on: date) -> Optional[str]:
+    """Nhãn kỳ gắn vào số khi reset dưới một năm: monthly → "04", quarterly → "Q2"; còn lại None."""
+    policy = (reset_policy or "yearly").lower()
+    if policy == "monthly":
+        return f"{on.month:02d}"
+    if policy == "quarterly":
+        return f"Q{(on.month - 1) // 3 + 1}"
+    return None
+
+
+@dataclass(frozen=True)
+class NumberingPlan:
+    """Một bộ đếm + cách định dạng số; `initial` = số đầu tiên khi kỳ đếm chưa có dòng."""
+
+    scope: str
+    period: str
+    prefix: Optional[str] = None
+    suffix: Optional[str] = None
+    padding: int = 0
+    initial: int = 1
+    label: Optional[str] = None
+
+    def format(self, seq: int) -> str:
+        number = str(seq).zfill(self.padding) if self.padding else str(seq)
+        if self.label:
+            number = f"{number}-{self.label}"
+        if self.prefix:
+            number = f"{number}/{self.prefix}"
+        if self.suffix:
+            number = f"{number}{self.suffix}"
+        return number
+
+
+def default_plan(year: int, prefix: Optional[str] = None, postfix: Optional[str] = None) -> NumberingPlan:
+    """Cấp số đi không gắn quy tắc: đếm theo năm + tiền tố, định dạng "{seq}/{prefix}{postfix}" như trước."""
+    return NumberingPlan(scope=f"outgoing:{prefix or ''}", period=str(year), prefix=prefix, suffix=postfix)
+
+
+def plan_for_rule(rule: Any, on: date) -> NumberingPlan:
+    scope = f"rule:{rule.pk}"
+    return NumberingPlan(
+        scope=scope,
+        period=period_key(rule.reset_policy, on),
+        prefix=rule.prefix,
+        suffix=rule.suffix,
+        padding=int(rule.padding or 0),
+        label=period_label(rule.reset_policy, on),
+        # next_sequence chỉ áp dụng cho kỳ đầu tiên; kỳ sau bắt đầu lại từ start_sequence
+        initial=int(rule.start_sequence or 1) if _scope_started(scope) else int(rule.next_sequence or 1),
+    )
+
+
+def plan_for_book(book: Any, on: date) -> NumberingPlan:
+    scope = f"book:{book.pk}"
+    return NumberingPlan(
+        scope=scope,
+        period=period_key(book.reset_policy, on),
+        prefix=book.prefix,
+        suffix=book.suffix,
+        padding=int(book.padding or 0),
+        label=period_label(book.reset_policy, on),
+        initial=1 if _scope_started(scope) else int(book.next_sequence or 1),
+    )
+
+
+def _scope_started(scope: str) -> bool:
+    return _counter_model().objects.filter(scope=scope).exists()
+
+
+# ---------- Bộ đếm ----------
+def _increment(plan: NumberingPlan, count: int) -> Optional[int]:
+    """Tăng bộ đếm, trả giá trị mới (None nếu dòng chưa tồn tại). Khoá dòng tới hết transaction."""
+    Counter = _counter_model()
+    now = timezone.now()
+    if connection.vendor in ("postgresql", "sqlite"):
+        table = connection.ops.quote_name(Counter._meta.db_table)
+        with connection.cursor() as cur:
+            cur.execute(
+                f"UPDATE {table} SET last_value = last_value + %s, updated_at = %s "
+                f"WHERE scope = %s AND period = %s RETURNING last_value",
+                [count, now, plan.scope, plan.period],
+            )
+            row = cur.fetchone()
+        return int(row[0]) if row else None
+    # CSDL không hỗ trợ UPDATE ... RETURNING: khoá dòng rồi tăng
+    counter = Counter.objects.select_for_update().filter(scope=plan.scope, period=plan.period).first()
+    if counter is None:
+        return None
+    Counter.objects.filter(pk=counter.pk).update(last_value=F("last_value") + count, updated_at=now)
+    return int(counter.last_value) + count
+
+
+def _issued_max(plan: NumberingPlan) -> int:
+    """Số lớn nhất đã cấp (sổ outgoing_numbering) hoặc đã giữ trước (khối của sổ đăng ký) trong kỳ."""
+    issued = (
+        _numbering_model().objects.filter(scope=plan.scope, period=plan.period).aggregate(m=Max("seq"))["m"] or 0
+    )
+    kind, _, pk = plan.scope.partition(":")
+    if kind == "book":
+        reserved = (
+            apps.get_model("documents", "NumberReservation").objects
+            .filter(register_book_id=pk, period=plan.period).aggregate(m=Max("last_value"))["m"] or 0
+        )
+        issued = max(int(issued), int(reserved))
+    return int(issued)
+
+
+def _seed(plan: NumberingPlan) -> None:
+    """Tạo dòng bộ đếm cho kỳ mới; không lùi dưới số đã cấp trong sổ outgoing_numbering."""
+    start = max(plan.initial - 1, _issued_max(plan))
+    # get_or_create chạy trong savepoint riêng: hai tiến trình cùng tạo → một bên nhận dòng đã có
+    _counter_model().objects.get_or_create(
+        scope=plan.scope, period=plan.period, defaults={"last_value": start, "updated_at": timezone.now()}
+    )
+
+
+def reserve(plan: NumberingPlan, count: int = 1) -> Tuple[int, int]:
+    """
+    Giữ `count` số liên tiếp, trả (số đầu, số cuối). Gọi trong transaction của nghiệp vụ để số
+    được trả lại khi rollback; ngoài transaction thì tự bọc atomic (số cấp ra là vĩnh viễn).
+    """
+    if count < 1:
+        raise ValueError("count phải >= 1")
+    with transaction.atomic():
+        last = _increment(plan, count)
+        if last is None:
+            _seed(plan)
+            last = _increment(plan, count)
+    return last - count + 1, last
+
+
+def allocate(plan: NumberingPlan, *, actor: Any, year: int) -> Tuple[str, Any]:
+    """Cấp một số và ghi sổ outgoing_numbering; trả (chuỗi số, dòng OutgoingNumbering)."""
+    seq, _ = reserve(plan)
+    entry = _numbering_model().objects.create(
+        year=year,
+        seq=seq,
+        scope=plan.scope,
+        period=plan.period,
+        prefix=plan.prefix,
+        postfix=plan.suffix,
+        issued_by=actor,
+        issued_at=timezone.now(),
+    )
+    return plan.format(seq), entry
+
+
+def set_next_value(plan: NumberingPlan, next_value: int) -> None:
+    """
+    Đặt lại bộ đếm của kỳ hiện tại (reset thủ công / sửa next_sequence trong cấu hình).
+    Không cho lùi về số đã cấp/đã giữ trong kỳ: số kế tiếp sẽ trùng và phát hành lỗi mãi.
+    """
+    Counter = _counter_model()
+    issued = _issued_max(plan)
+    if int(next_value) <= issued:
+        raise ValidationError(
+            f"Số kế tiếp phải lớn hơn {issued} (số đã cấp trong kỳ {plan.period}).",
+            code="NEXT_SEQUENCE_TOO_LOW",
+            extra={"min_next_sequence": issued + 1, "period": plan.period},
+        )
+    with transaction.atomic():
+        updated = Counter.objects.filter(scope=plan.scope, period=plan.period).update(
+            last_value=max(0, int(next_value) - 1), updated_at=timezone.now()
+        )
+        if not updated:
+            Counter.objects.get_or_create(
+                scope=plan.scope, period=plan.period,
+                defaults={"last_value": max(0, int(next_value) - 1), "updated_at": timezone.now()},
+            )
+
+
+# ---------- Giữ trước khối số cho sổ đăng ký ----------
+def _check_book_year(book: Any, on: date) -> None:
+    if getattr(book, "year", None) and on.year != int(book.year):
+        raise ValidationError(
+            f"Ngày {on.isoformat()} không thuộc năm của sổ đăng ký ({book.year}).",
+            code="REGISTER_BOOK_YEAR_MISMATCH",
+        )
+
+
+def reserve_block(book: Any, count: int, *, actor: Any, on: Optional[date] = None):
+    """Giữ `count` số liên tiếp của sổ theo kỳ reset của ngày `on` (mặc định hôm nay)."""
+    if not getattr(book, "is_active", True):
+        raise ValidationError("Sổ đăng ký đã ngừng sử dụng.", code="INACTIVE_REGISTER_BOOK")
+    on = on or timezone.localdate()
+    _check_book_year(book, on)
+    plan = plan_for_book(book, on)
+    Reservation = apps.get_model("documents", "NumberReservation")
+    with transaction.atomic():
+        first, last = reserve(plan, count)
+        return Reservation.objects.create(
+            register_book=book,
+            period=plan.period,
+            first_value=first,
+            last_value=last,
+            next_value=first,
+            reserved_by=actor,
+        )
+
+
+def _check_reservation_fits(reservation: Any, received_date: date, document: Any = None) -> None:
+    """Số trong khối chỉ hợp lệ cho văn bản cùng hướng/phòng ban của sổ và ngày đến thuộc đúng kỳ đã giữ."""
+    book = reservation.register_book
+    if document is not None:
+        if getattr(document, "doc_direction", book.direction) != book.direction:
+            raise ValidationError("Văn bản không cùng hướng với sổ đăng ký.", code="RESERVATION_BOOK_MISMATCH")
+        doc_dept = getattr(document, "department_id", None)
+        if book.department_id and doc_dept and doc_dept != book.department_id:
+            raise ValidationError("Văn bản không thuộc phòng ban của sổ đăng ký.", code="RESERVATION_BOOK_MISMATCH")
+    _check_book_year(book, received_date)
+    period = period_key(book.reset_policy, received_date)
+    if period != reservation.period:
+        raise ValidationError(
+            f"Khối số giữ cho kỳ {reservation.period}, ngày đến thuộc kỳ {period}.",
+            code="RESERVATION_PERIOD_MISMATCH",
+            extra={"reservation_period": reservation.period, "period": period},
+        )
+
+
+def take_reserved(reservation_id: Any, actor: Any, *, received_date: date, document: Any = None) -> int:
+    """
+    Lấy số kế tiếp trong khối đã giữ của chính actor cho văn bản `document` đến ngày `received_date`.
+    Gọi trong transaction đăng ký: rollback trả số lại cho khối. Khoá dòng reservation (chỉ người
+    giữ dùng) nên không tranh chấp.
+    """
+    Reservation = apps.get_model("documents", "NumberReservation")
+    with transaction.atomic():
+        reservation = (
+            Reservation.objects.select_for_update(of=("self",)).select_related("register_book")
+            .filter(pk=reservation_id).first()
+        )
+        if reservation is None or reservation.reserved_by_id != getattr(actor, "pk", None):
+            raise ValidationError("Khối số không tồn tại hoặc không thuộc người dùng.", code="INVALID_RESERVATION")
+        _check_reservation_fits(reservation, received_date, document)
+        if reservation.next_value > reservation.last_value:
+            raise ValidationError("Khối số đã giữ đã dùng hết.", code="RESERVATION_EXHAUSTED")
+        value = reservation.next_value
+        reservation.next_value = value + 1
+        reservation.save(update_fields=["next_value"])
+    return int(value)
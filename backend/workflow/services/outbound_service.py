@@ -3,13 +3,13 @@ from dataclasses import dataclass
 from typing import Any, Optional, List
 from django.apps import apps
 from django.db import transaction, IntegrityError
-from django.db.models import Max
 from django.utils import timezone
 from .errors import PermissionDenied, InvalidTransition, ValidationError
-from .rbac import can, Act
+from .rbac import can, Act, Role
 from .status_resolver import StatusResolver as SR
 from .audit import audit_log
-from .events import emit
+from .events import emit, audience
+from . import numbering
 
 def _doc_models():
     Doc = apps.get_model('documents', 'Document')
@@ -46,6 +46,26 @@ def _insert_wf_log(doc, *, action: str, from_status_id: Optional[int], to_status
         meta_json=meta,
     )
 
+def _doc_audience(doc, actor, *, roles=(Role.LD,)):
+    """Người nhận sự kiện VB đi: người soạn, người thao tác, phòng ban soạn thảo và các vai trò duyệt/phát hành."""
+    return audience(
+        user_ids=(getattr(doc, "created_by_id", None), getattr(actor, "user_id", None)),
+        department_ids=(getattr(doc, "department_id", None),),
+        roles=roles,
+    )
+
+def _resolve_config(model_name: str, value: Any):
+    """Instance hoặc pk của NumberingRule/RegisterBook → instance đang hoạt động."""
+    Model = apps.get_model('documents', model_name)
+    if isinstance(value, Model):
+        obj = value
+    else:
+        obj = Model.objects.filter(pk=value).first()
+    if obj is None or not getattr(obj, "is_active", True):
+        raise ValidationError("Cấu hình cấp số không tồn tại hoặc đã ngừng sử dụng.", code="INVALID_NUMBERING_CONFIG")
+    return obj
+
+
 @dataclass
 class OutboundService:
     actor: Any
@@ -75,7 +95,8 @@ class OutboundService:
             _insert_wf_log(doc, action="SUBMITTED", from_status_id=from_id, to_status_id=to_id, actor=self.actor, comment=note)
             audit_log(actor=self.actor, action="DOC.OUT.SUBMIT", entity_type="document", entity_id=doc.document_id,
                       before={"status_id":from_id}, after={"status_id":to_id,"note":note})
-        emit("doc_out.submitted", {"document_id": doc.document_id})
+            emit("doc_out.submitted", {"document_id": doc.document_id},
+                 audience=_doc_audience(doc, self.actor), actor=self.actor)
 
     # ===== Trả lại (TRINH_DUYET -> TRA_LAI) =====
     def return_for_fix(self, doc: Any, reason: str):
@@ -175,6 +196,8 @@ class OutboundService:
         prefix: Optional[str] = None,
         postfix: Optional[str] = None,
         year: Optional[int] = None,
+        numbering_rule: Any = None,
+        register_book: Any = None,
     ):
         if not can(self.actor, Act.OUT_PUBLISH, obj=doc):
             raise PermissionDenied("Không có quyền phát hành.")
@@ -188,15 +211,20 @@ class OutboundService:
             issued_date = timezone.now().date()
         issue_year = year or getattr(issued_date, "year", None) or timezone.now().year
         numbering_entry = None
-        if not issue_number:
-            issue_number, numbering_entry = self._allocate_issue_number(
-                year=issue_year,
-                prefix=prefix,
-                postfix=postfix,
-            )
 
         try:
             with transaction.atomic():
+                # Cấp số trong cùng transaction: rollback (vd. trùng số) trả lại số đã giữ
+                if not issue_number:
+                    issue_number, numbering_entry = self._allocate_issue_number(
+                        year=issue_year,
+                        prefix=prefix,
+                        postfix=postfix,
+                        numbering_rule=numbering_rule,
+                        register_book=register_book,
+                        on=issued_date,
+                    )
+
                 doc.status_id = to_id
                 doc.issue_number = issue_number
                 doc.issue_year = issue_year
@@ -221,44 +249,39 @@ class OutboundService:
                     before={"status_id":from_id},
                     after={"status_id":to_id,"issue_number":issue_number}
                 )
+                emit("doc_out.published", {"document_id": doc.document_id, "channels": channels or []},
+                     audience=_doc_audience(doc, self.actor, roles=(Role.LD, Role.VT)), actor=self.actor)
         except IntegrityError as e:
             # Vi phạm unique filtered issue_number khi doc_direction='di'
             raise ValidationError("Số văn bản đi đã tồn tại.", code="DUPLICATE_ISSUE_NUMBER") from e
-
-        emit("doc_out.published", {"document_id": doc.document_id, "channels": channels or []})
         return doc, numbering_entry
 
-    def _allocate_issue_number(self, *, year: Optional[int] = None, prefix: Optional[str] = None, postfix: Optional[str] = None):
+    def _allocate_issue_number(
+        self,
+        *,
+        year: Optional[int] = None,
+        prefix: Optional[str] = None,
+        postfix: Optional[str] = None,
+        numbering_rule: Any = None,
+        register_book: Any = None,
+        on=None,
+    ):
         """
-        Cấp số đi theo bảng outgoing_numbering (UNIQUE(year, seq)).
-        Dùng aggregate để tránh cảnh báo Pylance và retry nếu đụng race-condition.
+        Cấp số đi qua bộ đếm một dòng (workflow.services.numbering) và ghi sổ outgoing_numbering.
+        Ưu tiên NumberingRule, rồi RegisterBook (padding/prefix/suffix/reset_policy của cấu hình);
+        không có thì đếm theo năm + prefix như trước. Nhận instance hoặc khoá chính.
         """
-        _, _, _, Numbering = _doc_models()
-        now = timezone.now()
-        target_year = year or now.year
-
-        # Vòng lặp nhỏ để an toàn khi nhiều request phát hành song song
-        while True:
-            max_seq = Numbering.objects.filter(year=target_year).aggregate(m=Max("seq"))["m"] or 0
-            next_seq = int(max_seq) + 1
-            try:
-                entry = Numbering.objects.create(
-                    year=target_year,
-                    seq=next_seq,
-                    prefix=prefix,
-                    postfix=postfix,
-                    issued_by=self.actor,   # FK User (GUID)
-                    issued_at=now,
-                )
-                issue_number = str(next_seq)
-                if prefix:
-                    issue_number = f"{issue_number}/{prefix}"
-                if postfix:
-                    issue_number = f"{issue_number}{postfix}"
-                return issue_number, entry
-            except IntegrityError:
-                # Một tiến trình khác vừa chiếm seq này, thử lại
-                continue
+        on = on or timezone.now().date()
+        target_year = year or on.year
+        if numbering_rule is not None:
+            rule = _resolve_config("NumberingRule", numbering_rule)
+            plan = numbering.plan_for_rule(rule, on)
+        elif register_book is not None:
+            book = _resolve_config("RegisterBook", register_book)
+            plan = numbering.plan_for_book(book, on)
+        else:
+            plan = numbering.default_plan(target_year, prefix, postfix)
+        return numbering.allocate(plan, actor=self.actor, year=target_year)
 
     # ===== Lưu trữ (PHAT_HANH -> LUU_TRU) =====
     def archive(self, doc: Any):
@@ -1,7 +1,12 @@
 # workflow/services/rbac.py
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
 from enum import StrEnum
-from typing import Any, Iterable, Optional
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
 from django.apps import apps
+from django.db.models import Q
+from workflow.services import rbac_cache
 
 # ===== Vai trò cốt lõi =====
 class Role(StrEnum):
@@ -57,6 +62,7 @@ class Act(StrEnum):
     CONFIG_NUMBERING_RULE = "CONFIG_NUMBERING_RULE"
     CONFIG_TEMPLATE = "CONFIG_TEMPLATE"
     CONFIG_WORKFLOW = "CONFIG_WORKFLOW"
+    AUDIT_VIEW = "AUDIT_VIEW"              # tra cứu/xuất nhật ký audit
 
 # ===== Map hành động -> permission code (nếu kiểm DB) =====
 PERM_CODE = {
@@ -102,6 +108,7 @@ PERM_CODE = {
     Act.CONFIG_NUMBERING_RULE: "CONFIG.NUMBERING_RULE",
     Act.CONFIG_TEMPLATE: "CONFIG.TEMPLATE",
     Act.CONFIG_WORKFLOW: "CONFIG.WORKFLOW",
+    Act.AUDIT_VIEW: "AUDIT.VIEW",
 
     # Chung
     Act.VIEW: "COMMON.VIEW",
@@ -153,6 +160,7 @@ ROLE_ACTIONS[Role.QT].update({
     Act.CONFIG_NUMBERING_RULE,
     Act.CONFIG_TEMPLATE,
     Act.CONFIG_WORKFLOW,
+    Act.AUDIT_VIEW,
 })
 
 # ===== Helpers lấy Role/Permission từ DB — dùng values_list để tránh cảnh báo Pylance =====
@@ -162,34 +170,56 @@ def _get_model(app_label: str, model_name: str):
     except LookupError:
         return None
 
-def _get_user_role_names(user) -> Iterable[str]:
+# ===== Snapshot quyền theo user (memo theo request, dữ liệu nguồn qua rbac_cache) =====
+@dataclass(frozen=True)
+class PermissionSnapshot:
     """
-    Trả về danh sách tên role (UPPER) từ users.role_id (nếu có) và bảng user_roles (nếu có).
+    Quyền đã giải của một user:
+      - role_names: tên role (UPPER + alias QT/VT/CV/LD)
+      - configured: các permission code (trong PERM_CODE) có trong bảng permissions;
+        None nếu schema không có bảng RBAC
+      - granted: các code được cấp qua role_permissions cho các role trên
     """
-    RoleModel = _get_model('accounts', 'Role')
-    if RoleModel is None:
-        return []
+    role_names: Tuple[str, ...] = ()
+    configured: Optional[FrozenSet[str]] = None
+    granted: FrozenSet[str] = frozenset()
 
-    names = []
 
-    # 1) users.role_id (vai trò chính) — nếu schema có cột này
-    rid = getattr(user, "role_id", None)
-    if rid:
-        name = RoleModel.objects.filter(role_id=rid).values_list("name", flat=True).first()
-        if name:
-            names.append(name)
-
-    # 2) user_roles (đa vai) — nếu có model
-    UserRole = _get_model('accounts', 'UserRole')
-    if UserRole is not None:
-        role_ids = list(
-            UserRole.objects.filter(user_id=getattr(user, "user_id", None)).values_list("role_id", flat=True)
-        )
-        if role_ids:
-            extra = list(RoleModel.objects.filter(role_id__in=role_ids).values_list("name", flat=True))
-            names.extend(extra)
-
-    # Chuẩn hoá UPPER & alias
+# None = ngoài scope (mỗi lần gọi tự nạp lại); dict = cache trong phạm vi một request
+_snapshot_cache: contextvars.ContextVar[Optional[Dict[Any, PermissionSnapshot]]] = contextvars.ContextVar(
+    "rbac_snapshot_cache", default=None
+)
+
+
+@contextmanager
+def permission_cache_scope():
+    """Bật memo snapshot quyền trong khối lệnh (middleware bọc mỗi request)."""
+    token = _snapshot_cache.set({})
+    try:
+        yield
+    finally:
+        _snapshot_cache.reset(token)
+
+
+def clear_permission_cache(user=None) -> None:
+    """Xoá snapshot đã memo (của một user hoặc toàn bộ) trong scope hiện tại — dùng sau khi đổi role."""
+    cache = _snapshot_cache.get()
+    if cache is None:
+        return
+    if user is None:
+        cache.clear()
+    else:
+        cache.pop(_snapshot_key(user), None)
+
+
+def _snapshot_key(user) -> Optional[Tuple[str, Any]]:
+    pk = getattr(user, "pk", None)
+    if pk is None:
+        return None
+    return (type(user).__name__, pk)
+
+
+def _normalize_role_names(names: Iterable[str]) -> Tuple[str, ...]:
     normalized = []
     for raw in dict.fromkeys(names):
         if not raw:
@@ -199,51 +229,120 @@ def _get_user_role_names(user) -> Iterable[str]:
         alias = ROLE_NAME_ALIASES.get(upper)
         if alias:
             normalized.append(alias.upper())
+    return tuple(dict.fromkeys(normalized))
 
-    return list(dict.fromkeys(normalized))
 
-def _has_permission_db(user, act: Act) -> Optional[bool]:
-    """
-    Kiểm tra quyền dựa vào bảng permissions/role_permissions nếu có.
-    Trả None nếu không thể xác định (chưa cấu hình code hoặc bảng không tồn tại) để fallback sang ROLE_ACTIONS.
-    """
-    Permission = _get_model('accounts', 'Permission')
-    RolePermission = _get_model('accounts', 'RolePermission')
+def _load_role_names(user) -> Tuple[str, ...]:
+    """Tên role từ users.role_id (nếu schema có) và user_roles — một truy vấn."""
     RoleModel = _get_model('accounts', 'Role')
-    if Permission is None or RolePermission is None or RoleModel is None:
-        return None
+    if RoleModel is None:
+        return ()
 
-    code = PERM_CODE.get(act)
-    if not code:
+    cond = Q()
+    rid = getattr(user, "role_id", None)
+    if rid:
+        cond |= Q(role_id=rid)
+    uid = getattr(user, "user_id", None)
+    if uid is not None and _get_model('accounts', 'UserRole') is not None:
+        cond |= Q(user_roles__user_id=uid)
+    if cond == Q():
+        return ()
+
+    names = RoleModel.objects.filter(cond).values_list("name", flat=True).distinct()
+    return _normalize_role_names(sorted(names))
+
+
+def _load_role_matrix() -> rbac_cache.RoleMatrix:
+    """Toàn bộ role→permission code (chỉ các code thuộc PERM_CODE)."""
+    Permission = _get_model('accounts', 'RbacPermission')
+    RolePermission = _get_model('accounts', 'RolePermission')
+    if Permission is None or RolePermission is None or _get_model('accounts', 'Role') is None:
+        return rbac_cache.RoleMatrix()
+
+    # Một truy vấn: permission (LEFT JOIN role_permissions → roles); role NULL = code có cấu hình nhưng chưa cấp
+    rows = Permission.objects.filter(code__in=set(PERM_CODE.values())).values_list(
+        "code", "rolepermission__role__name"
+    )
+    configured: set = set()
+    grants: Dict[str, set] = {}
+    for code, role_name in rows:
+        configured.add(code)
+        if role_name:
+            grants.setdefault(role_name, set()).add(code)
+    return rbac_cache.RoleMatrix(
+        configured=frozenset(configured),
+        grants={name: frozenset(codes) for name, codes in grants.items()},
+    )
+
+
+def _user_cache_key(user) -> Optional[str]:
+    pk = getattr(user, "pk", None)
+    if pk is None:
         return None
+    # users.role_id (nếu schema có) nằm trong key: đổi vai trò chính không cần signal
+    return f"{pk}:{getattr(user, 'role_id', None) or ''}"
 
-    perm_id = Permission.objects.filter(code=code).values_list("permission_id", flat=True).first()
-    if perm_id is None:
-        return None  # chưa cấu hình permission code trong DB
 
-    role_names = _get_user_role_names(user)
-    if not role_names:
-        return False
+def _load_snapshot(user) -> PermissionSnapshot:
+    version = rbac_cache.current_version() if rbac_cache.enabled() else None
+    role_names = rbac_cache.get_user_roles(version, _user_cache_key(user), lambda: _load_role_names(user))
+    matrix = rbac_cache.get_matrix(version, _load_role_matrix)
+    if matrix.configured is None:
+        return PermissionSnapshot(role_names=role_names)
 
-    role_ids = list(RoleModel.objects.filter(name__in=role_names).values_list("role_id", flat=True))
-    if not role_ids:
-        return False
+    # Khớp đúng tên role trong DB như truy vấn role__name__in=role_names trước đây
+    granted = frozenset(code for name in role_names for code in matrix.grants.get(name, ()))
+    return PermissionSnapshot(role_names=role_names, configured=matrix.configured, granted=granted)
 
-    return RolePermission.objects.filter(role_id__in=role_ids, permission_id=perm_id).exists()
 
-def get_single_role_code(user) -> Optional[str]:
+def get_permission_snapshot(user) -> PermissionSnapshot:
+    """Snapshot quyền của user; trong permission_cache_scope() chỉ nạp một lần mỗi request."""
+    cache = _snapshot_cache.get()
+    key = _snapshot_key(user)
+    if cache is not None and key is not None:
+        snap = cache.get(key)
+        if snap is None:
+            snap = cache[key] = _load_snapshot(user)
+        return snap
+    return _load_snapshot(user)
+
+
+def _get_user_role_names(user) -> Iterable[str]:
     """
-    Suy ra mã QT/VT/CV/LD từ tên role (ưu tiên users.role_id).
-    Fallback: is_superuser => QT.
+    Trả về danh sách tên role (UPPER) từ users.role_id (nếu có) và bảng user_roles (nếu có).
     """
-    names = _get_user_role_names(user)
+    return list(get_permission_snapshot(user).role_names)
+
+def _snapshot_permission(snap: PermissionSnapshot, act: Act) -> Optional[bool]:
+    code = PERM_CODE.get(act)
+    if not code:
+        return None
+    if snap.configured is None or code not in snap.configured:
+        return None  # chưa cấu hình permission code trong DB
+    return code in snap.granted
+
+def _snapshot_role_code(snap: PermissionSnapshot, user) -> Optional[str]:
     for r in (Role.QT, Role.VT, Role.CV, Role.LD):
-        if r.value in names:
+        if r.value in snap.role_names:
             return r.value
     if getattr(user, "is_superuser", False):
         return Role.QT.value
     return None
 
+def _has_permission_db(user, act: Act) -> Optional[bool]:
+    """
+    Kiểm tra quyền dựa vào bảng permissions/role_permissions nếu có.
+    Trả None nếu không thể xác định (chưa cấu hình code hoặc bảng không tồn tại) để fallback sang ROLE_ACTIONS.
+    """
+    return _snapshot_permission(get_permission_snapshot(user), act)
+
+def get_single_role_code(user) -> Optional[str]:
+    """
+    Suy ra mã QT/VT/CV/LD từ tên role (ưu tiên users.role_id).
+    Fallback: is_superuser => QT.
+    """
+    return _snapshot_role_code(get_permission_snapshot(user), user)
+
 # ===== Quy tắc động mức đối tượng (assignee) =====
 def _is_doc_assignee(user, doc) -> bool:
     Assign = _get_model('documents', 'DocumentAssignment')
@@ -263,22 +362,26 @@ def _is_case_assignee(user, case) -> bool:
 
 # ===== Entry chính: kiểm quyền =====
 def can(user, act: Act, obj=None) -> bool:
+    # Role/permission của user: một snapshot (memo theo request trong permission_cache_scope)
+    snap = get_permission_snapshot(user)
+
     # 0) Quy tắc then chốt: chỉ LD được CASE_ASSIGN/REASSIGN/APPROVE_CLOSE
     if act in (Act.CASE_ASSIGN, Act.CASE_REASSIGN, Act.CASE_APPROVE_CLOSE):
-        return get_single_role_code(user) == Role.LD.value
+        return _snapshot_role_code(snap, user) == Role.LD.value
 
-    # 1) Ưu tiên kiểm DB nếu có
-    db_has = _has_permission_db(user, act)
-    if db_has is not None:
-        return bool(db_has)
+    # 1) Ưu tiên kiểm DB nếu có (thay cho ma trận tĩnh, KHÔNG bỏ qua quy tắc động ở bước 3)
+    db_has = _snapshot_permission(snap, act)
+    if db_has is False:
+        return False
 
     # 2) Fallback ma trận tĩnh
-    role_code = get_single_role_code(user)
-    if not role_code:
-        return False
-    allowed = ROLE_ACTIONS.get(Role(role_code), set())
-    if act not in allowed:
-        return False
+    role_code = _snapshot_role_code(snap, user)
+    if db_has is None:
+        if not role_code:
+            return False
+        allowed = ROLE_ACTIONS.get(Role(role_code), set())
+        if act not in allowed:
+            return False
 
     # 3) Quy tắc động theo đối tượng
     if act == Act.IN_START:
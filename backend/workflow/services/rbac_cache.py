@@ -0,0 +1,102 @@
+# workflow/services/rbac_cache.py
+"""
+Cache dùng chung (Django cache framework: Redis/locmem) cho dữ liệu RBAC, đánh version toàn cục.
+
+- Key dữ liệu chứa version ("rbac:v{n}:matrix", "rbac:v{n}:user:{key}") → bump version là vô hiệu
+  mọi bản cũ cùng lúc (bản cũ tự hết hạn theo RBAC_CACHE_TTL), không phải xoá từng key.
+- Version được bump bởi signal ghi/xoá Role, RolePermission, RbacPermission, UserRole
+  (accounts.signals) — ngay khi ghi và thêm một lần sau commit.
+- Ma trận role→permission còn được giữ trong process theo version: request chỉ tốn một
+  cache.get(version) để biết bản trong process còn dùng được không.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "rbac:version"
+
+
+@dataclass(frozen=True)
+class RoleMatrix:
+    """
+    configured: permission code (thuộc PERM_CODE) có trong bảng permissions; None nếu schema thiếu bảng RBAC.
+    grants: tên role (đúng như DB) → các code được cấp.
+    """
+    configured: Optional[FrozenSet[str]] = None
+    grants: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+
+
+_local_lock = threading.Lock()
+_local: Dict[str, Any] = {"version": None, "matrix": None}
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "RBAC_CACHE_ENABLED", True))
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "RBAC_CACHE_TTL", 300))
+
+
+def _fresh_version() -> int:
+    # Khởi tạo theo thời gian: key version bị evict cũng không quay lại số cũ còn dữ liệu trong cache
+    return int(time.time() * 1000)
+
+
+def current_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return int(version or 0)
+
+
+def bump_version() -> None:
+    """Vô hiệu toàn bộ cache RBAC (mọi worker thấy ở request kế tiếp)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _fresh_version(), timeout=None)
+    with _local_lock:
+        _local["version"] = None
+        _local["matrix"] = None
+
+
+def get_matrix(version: Optional[int], loader: Callable[[], RoleMatrix]) -> RoleMatrix:
+    """Ma trận role→permission: process (theo version) → cache dùng chung → DB."""
+    if version is None:
+        return loader()
+    with _local_lock:
+        if _local["version"] == version and _local["matrix"] is not None:
+            return _local["matrix"]
+
+    key = f"rbac:v{version}:matrix"
+    matrix = cache.get(key)
+    if not isinstance(matrix, RoleMatrix):
+        matrix = loader()
+        cache.set(key, matrix, _ttl())
+
+    with _local_lock:
+        _local["version"] = version
+        _local["matrix"] = matrix
+    return matrix
+
+
+def get_user_roles(
+    version: Optional[int], user_key: Optional[str], loader: Callable[[], Tuple[str, ...]]
+) -> Tuple[str, ...]:
+    """Tên role (đã chuẩn hoá) của một user, cache theo version."""
+    if version is None or not user_key:
+        return loader()
+    key = f"rbac:v{version}:user:{user_key}"
+    names = cache.get(key)
+    if not isinstance(names, tuple):
+        names = loader()
+        cache.set(key, names, _ttl())
+    return names
@@ -1,8 +1,9 @@
 # workflow/services/settings_reader.py
-from functools import lru_cache
-from typing import Optional
+from typing import Any, Dict, Optional
 from django.apps import apps
 
+from workflow.services.lookup_cache import VersionedLookup
+
 
 def _get_model():
     """
@@ -17,17 +18,20 @@ def _get_model():
     return None
 
 
-@lru_cache(maxsize=256)
-def get_setting_raw(key: str) -> Optional[str]:
+def _load_settings() -> Dict[str, Any]:
     Model = _get_model()
     if Model is None:
-        return None
-    return (
-        Model.objects
-        .filter(setting_key=key)
-        .values_list("setting_value", flat=True)
-        .first()
-    )
+        return {}
+    return dict(Model.objects.values_list("setting_key", "setting_value"))
+
+
+# Toàn bộ system_settings nạp một lần/process; vô hiệu qua version (workflow.signals)
+system_settings = VersionedLookup("system_settings", _load_settings)
+
+
+def get_setting_raw(key: str) -> Optional[str]:
+    # Snapshot chứa mọi dòng → key vắng mặt nghĩa là chưa cấu hình, không cần tra DB
+    return system_settings.get(key)
 
 
 def get_setting_bool(key: str, default: bool = False) -> bool:
@@ -1,7 +1,34 @@
 # workflow/services/status_resolver.py
-from functools import lru_cache
 from django.apps import apps
 
+from workflow.services.lookup_cache import VersionedLookup
+
+
+def _load_doc_statuses():
+    Status = apps.get_model('catalog', 'DocumentStatus')
+    return dict(Status.objects.values_list('status_name', 'status_id'))
+
+
+def _load_case_statuses():
+    Status = apps.get_model('catalog', 'CaseStatus')
+    return dict(Status.objects.values_list('case_status_name', 'case_status_id'))
+
+
+def _fetch_doc_status(name: str):
+    Status = apps.get_model('catalog', 'DocumentStatus')
+    return Status.objects.filter(status_name=name).values_list('status_id', flat=True).first()
+
+
+def _fetch_case_status(name: str):
+    Status = apps.get_model('catalog', 'CaseStatus')
+    return Status.objects.filter(case_status_name=name).values_list('case_status_id', flat=True).first()
+
+
+# Toàn bộ bảng trạng thái nạp một lần/process; vô hiệu qua version (workflow.signals)
+doc_statuses = VersionedLookup("doc_status", _load_doc_statuses)
+case_statuses = VersionedLookup("case_status", _load_case_statuses)
+
+
 class StatusResolver:
     """
     Map tên trạng thái -> ID cho Document & Case (FK).
@@ -9,38 +36,31 @@ class StatusResolver:
       VB đến: TIEP_NHAN, DANG_KY, PHAN_CONG, DANG_XU_LY, HOAN_TAT, LUU_TRU, THU_HOI
       VB đi : DU_THAO, TRINH_DUYET, TRA_LAI, PHE_DUYET, KY_SO, PHAT_HANH, HUY_PHAT_HANH, LUU_TRU
       Case   : MOI_TAO, CHO_PHAN_CONG, DA_PHAN_CONG, DANG_THUC_HIEN, TAM_DUNG, CHO_DUYET_DONG, DONG, LUU_TRU
+    Tra qua cache dùng chung (workflow.services.lookup_cache) thay cho lru_cache không bao giờ hết hạn.
     """
 
     @staticmethod
-    @lru_cache(maxsize=256)
     def doc_status_id(name: str) -> int:
         """
         Trả về catalog.document_statuses.status_id theo status_name.
         """
-        Status = apps.get_model('catalog', 'DocumentStatus')
-        pk = (
-            Status.objects
-            .filter(status_name=name)
-            .values_list('status_id', flat=True)
-            .first()
-        )
+        pk = doc_statuses.get(name, fallback=_fetch_doc_status)
         if pk is None:
             raise ValueError(f"Không tìm thấy document_statuses.status_name = '{name}'")
         return int(pk)
 
     @staticmethod
-    @lru_cache(maxsize=256)
     def case_status_id(name: str) -> int:
         """
         Trả về catalog.case_statuses.case_status_id theo case_status_name.
         """
-        Status = apps.get_model('catalog', 'CaseStatus')
-        pk = (
-            Status.objects
-            .filter(case_status_name=name)
-            .values_list('case_status_id', flat=True)
-            .first()
-        )
+        pk = case_statuses.get(name, fallback=_fetch_case_status)
         if pk is None:
             raise ValueError(f"Không tìm thấy case_statuses.case_status_name = '{name}'")
         return int(pk)
+
+    @staticmethod
+    def cache_clear() -> None:
+        """Bỏ cache trạng thái ở mọi worker (sau khi sửa catalog không qua ORM)."""
+        doc_statuses.invalidate()
+        case_statuses.invalidate()
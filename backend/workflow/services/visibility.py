@@ -3,6 +3,38 @@ from typing import Optional
 from django.db.models import Q
 from django.apps import apps
 from .settings_reader import get_setting_bool
+from .visibility_index import index_enabled
+
+
+def _dept_visibility(dept_visibility: Optional[bool]) -> bool:
+    if dept_visibility is None:
+        dept_visibility = get_setting_bool('doc.visibility.department_level', default=False)
+    return bool(dept_visibility)
+
+
+def visible_document_ids(user, dept_visibility: Optional[bool] = None):
+    """
+    Subquery document_id user được thấy, đọc từ bảng document_visibility (khi bật VISIBILITY_INDEX_ENABLED):
+    quyền cá nhân tra theo index (user_id, document_id); nhánh phòng ban UNION trực tiếp trên documents.
+    """
+    Document = apps.get_model('documents', 'Document')
+    Vis = apps.get_model('workflow', 'DocumentVisibility')
+
+    ids = Vis.objects.filter(user_id=user.user_id).values('document_id')
+    if _dept_visibility(dept_visibility) and getattr(user, "department_id", None):
+        ids = ids.union(Document.objects.filter(department_id=user.department_id).values('document_id'))
+    return ids
+
+
+def visible_case_ids(user, dept_visibility: Optional[bool] = None):
+    Case = apps.get_model('cases', 'Case')
+    Vis = apps.get_model('workflow', 'CaseVisibility')
+
+    ids = Vis.objects.filter(user_id=user.user_id).values('case_id')
+    if _dept_visibility(dept_visibility) and getattr(user, "department_id", None):
+        ids = ids.union(Case.objects.filter(department_id=user.department_id).values('case_id'))
+    return ids
+
 
 def visible_documents_q(user, dept_visibility: Optional[bool] = None):
     """
@@ -12,28 +44,37 @@ def visible_documents_q(user, dept_visibility: Optional[bool] = None):
       - (nếu bật) cùng department_id
     """
     Document = apps.get_model('documents', 'Document')
+    if index_enabled():
+        return Document.objects.filter(document_id__in=visible_document_ids(user, dept_visibility))
+
     Assign = apps.get_model('documents', 'DocumentAssignment')
 
     my_doc_ids = Assign.objects.filter(user_id=user.user_id).values_list('document_id', flat=True)
     cond = Q(created_by=user.user_id) | Q(document_id__in=my_doc_ids)
 
-    if dept_visibility is None:
-        dept_visibility = get_setting_bool('doc.visibility.department_level', default=False)
-
-    if dept_visibility and getattr(user, "department_id", None):
+    if _dept_visibility(dept_visibility) and getattr(user, "department_id", None):
         cond |= Q(department_id=user.department_id)
     return Document.objects.filter(cond)
 
 def visible_cases_q(user, dept_visibility: Optional[bool] = None):
     Case = apps.get_model('cases', 'Case')
+    if index_enabled():
+        return Case.objects.filter(case_id__in=visible_case_ids(user, dept_visibility))
+
     Part = apps.get_model('cases', 'CaseParticipant')
 
     my_case_ids = Part.objects.filter(user_id=user.user_id).values_list('case_id', flat=True)
     cond = Q(created_by=user.user_id) | Q(owner_id=user.user_id) | Q(case_id__in=my_case_ids)
 
-    if dept_visibility is None:
-        dept_visibility = get_setting_bool('doc.visibility.department_level', default=False)
-
-    if dept_visibility and getattr(user, "department_id", None):
+    if _dept_visibility(dept_visibility) and getattr(user, "department_id", None):
         cond |= Q(department_id=user.department_id)
     return Case.objects.filter(cond)
+
+
+def restrict_documents(qs, user, dept_visibility: Optional[bool] = None):
+    """Giới hạn queryset văn bản (đã lọc/sắp xếp sẵn) về phạm vi user được thấy."""
+    return qs.filter(document_id__in=visible_documents_q(user, dept_visibility).values('document_id'))
+
+
+def restrict_cases(qs, user, dept_visibility: Optional[bool] = None):
+    return qs.filter(case_id__in=visible_cases_q(user, dept_visibility).values('case_id'))
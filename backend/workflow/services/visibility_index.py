@@ -0,0 +1,124 @@
+# workflow/services/visibility_index.py
+"""
+Duy trì bảng phi chuẩn hoá document_visibility / case_visibility cho visibility.py.
+
+- sync_document / sync_case: tính lại tập user được thấy một đối tượng (người tạo, được phân công,
+  owner, participants) rồi ghi phần chênh lệch — gọi từ signal (workflow.signals) khi bật
+  VISIBILITY_INDEX_ENABLED.
+- rebuild_documents / rebuild_cases: dựng lại toàn bộ theo lô PK (lệnh rebuild_visibility) — chạy
+  khi mới bật cờ hoặc sau thao tác hàng loạt không phát signal (QuerySet.update/bulk_create).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+
+def index_enabled() -> bool:
+    return bool(getattr(settings, "VISIBILITY_INDEX_ENABLED", False))
+
+
+# ---------- Tập user được thấy (nguồn sự thật) ----------
+def _document_grants(document_ids: Iterable[int]) -> Dict[int, Set[Any]]:
+    Document = apps.get_model('documents', 'Document')
+    Assign = apps.get_model('documents', 'DocumentAssignment')
+    ids = list(document_ids)
+    grants: Dict[int, Set[Any]] = {pk: set() for pk in ids}
+    for pk, creator in Document.objects.filter(document_id__in=ids).values_list('document_id', 'created_by_id'):
+        if creator:
+            grants[pk].add(creator)
+    for pk, user_id in Assign.objects.filter(document_id__in=ids).values_list('document_id', 'user_id'):
+        grants.setdefault(pk, set()).add(user_id)
+    return grants
+
+
+def _case_grants(case_ids: Iterable[int]) -> Dict[int, Set[Any]]:
+    Case = apps.get_model('cases', 'Case')
+    Part = apps.get_model('cases', 'CaseParticipant')
+    ids = list(case_ids)
+    grants: Dict[int, Set[Any]] = {pk: set() for pk in ids}
+    for pk, creator, owner in Case.objects.filter(case_id__in=ids).values_list('case_id', 'created_by_id', 'owner_id'):
+        grants[pk].update(u for u in (creator, owner) if u)
+    for pk, user_id in Part.objects.filter(case_id__in=ids).values_list('case_id', 'user_id'):
+        grants.setdefault(pk, set()).add(user_id)
+    return grants
+
+
+# ---------- Ghi chênh lệch ----------
+def _sync(model_label: str, fk: str, grants: Dict[int, Set[Any]]) -> None:
+    Vis = apps.get_model('workflow', model_label)
+    if not grants:
+        return
+    existing: Dict[int, Set[Any]] = {pk: set() for pk in grants}
+    for pk, user_id in Vis.objects.filter(**{f"{fk}_id__in": list(grants)}).values_list(f"{fk}_id", 'user_id'):
+        existing[pk].add(user_id)
+
+    to_add = []
+    for pk, wanted in grants.items():
+        stale = existing[pk] - wanted
+        if stale:
+            Vis.objects.filter(**{f"{fk}_id": pk, "user_id__in": list(stale)}).delete()
+        to_add.extend(Vis(**{f"{fk}_id": pk, "user_id": user_id}) for user_id in wanted - existing[pk])
+    if to_add:
+        Vis.objects.bulk_create(to_add, ignore_conflicts=True)
+
+
+def sync_document(document_id: Optional[int]) -> None:
+    if document_id is None:
+        return
+    _sync('DocumentVisibility', 'document', _document_grants([document_id]))
+
+
+def sync_documents(document_ids: Iterable[int]) -> None:
+    """Như sync_document cho cả lô (vd. sau bulk_create khi nhập dữ liệu)."""
+    _sync('DocumentVisibility', 'document', _document_grants(document_ids))
+
+
+def sync_case(case_id: Optional[int]) -> None:
+    if case_id is None:
+        return
+    _sync('CaseVisibility', 'case', _case_grants([case_id]))
+
+
+# ---------- Dựng lại toàn bộ ----------
+def _rebuild(model_label: str, source_label: str, pk_name: str, fk: str,
+             grants_fn: Callable[[Iterable[int]], Dict[int, Set[Any]]],
+             batch_size: int, progress: Optional[Callable[[int], None]]) -> int:
+    Vis = apps.get_model('workflow', model_label)
+    Source = apps.get_model(*source_label.split('.'))
+
+    # Dòng trỏ tới đối tượng đã xoá tự mất theo CASCADE; chỉ cần tính lại theo lô
+    last_pk, total = None, 0
+    while True:
+        qs = Source.objects.order_by(pk_name)
+        if last_pk is not None:
+            qs = qs.filter(**{f"{pk_name}__gt": last_pk})
+        ids = list(qs.values_list(pk_name, flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            Vis.objects.filter(**{f"{fk}_id__in": ids}).delete()
+            rows = [
+                Vis(**{f"{fk}_id": pk, "user_id": user_id})
+                for pk, users in grants_fn(ids).items()
+                for user_id in users
+            ]
+            Vis.objects.bulk_create(rows, ignore_conflicts=True)
+        total += len(ids)
+        last_pk = ids[-1]
+        if progress:
+            progress(total)
+    return total
+
+
+def rebuild_documents(batch_size: int = 1000, progress: Optional[Callable[[int], None]] = None) -> int:
+    return _rebuild('DocumentVisibility', 'documents.Document', 'document_id', 'document',
+                    _document_grants, batch_size, progress)
+
+
+def rebuild_cases(batch_size: int = 1000, progress: Optional[Callable[[int], None]] = None) -> int:
+    return _rebuild('CaseVisibility', 'cases.Case', 'case_id', 'case',
+                    _case_grants, batch_size, progress)
@@ -0,0 +1,99 @@
+# workflow/signals.py
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def _lookup_targets():
+    from workflow.services import settings_reader, status_resolver
+
+    targets = [
+        (("catalog", "DocumentStatus"), status_resolver.doc_statuses),
+        (("catalog", "CaseStatus"), status_resolver.case_statuses),
+    ]
+    setting_model = settings_reader._get_model()
+    if setting_model is not None:
+        targets.append(((setting_model._meta.app_label, setting_model.__name__), settings_reader.system_settings))
+    return targets
+
+
+def connect_signals() -> None:
+    """Ghi/xoá trạng thái catalog hoặc system_settings → bump version cache tra cứu tương ứng."""
+    for (app_label, model_name), lookup in _lookup_targets():
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            continue
+
+        def _invalidate(sender, _lookup=lookup, **kwargs):
+            _lookup.invalidate()
+            transaction.on_commit(_lookup.invalidate)
+
+        uid = f"lookup_cache_{lookup.name}"
+        post_save.connect(_invalidate, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_invalidate, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
+
+
+def _touches(kwargs, fields) -> bool:
+    update_fields = kwargs.get("update_fields")
+    return kwargs.get("created") or update_fields is None or bool(set(update_fields) & set(fields))
+
+
+def connect_visibility_signals() -> None:
+    """
+    Giữ document_visibility/case_visibility khớp nguồn (khi bật VISIBILITY_INDEX_ENABLED).
+    Luôn kết nối, kiểm cờ lúc chạy; ghi trong cùng transaction với thay đổi gốc.
+    """
+    from workflow.services import visibility_index as vi
+
+    def _document_saved(sender, instance, **kwargs):
+        if vi.index_enabled() and _touches(kwargs, ("created_by", "created_by_id")):
+            vi.sync_document(instance.pk)
+
+    def _assignment_changed(sender, instance, **kwargs):
+        if vi.index_enabled():
+            vi.sync_document(instance.document_id)
+
+    def _case_saved(sender, instance, **kwargs):
+        if vi.index_enabled() and _touches(kwargs, ("created_by", "created_by_id", "owner", "owner_id")):
+            vi.sync_case(instance.pk)
+
+    def _participant_changed(sender, instance, **kwargs):
+        if vi.index_enabled():
+            vi.sync_case(instance.case_id)
+
+    wiring = [
+        (("documents", "Document"), (post_save,), _document_saved),
+        (("documents", "DocumentAssignment"), (post_save, post_delete), _assignment_changed),
+        (("cases", "Case"), (post_save,), _case_saved),
+        (("cases", "CaseParticipant"), (post_save, post_delete), _participant_changed),
+    ]
+    for (app_label, model_name), signals, handler in wiring:
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            continue
+        for signal in signals:
+            suffix = "save" if signal is post_save else "delete"
+            signal.connect(handler, sender=model, weak=False, dispatch_uid=f"visibility_{model_name.lower()}_{suffix}")
+
+
+def connect_blob_signals() -> None:
+    """ref_count của common.AttachmentBlob: +1 khi tạo đính kèm, −1 khi xoá (kể cả xoá dây chuyền)."""
+    from workflow.services import blob_store
+
+    def _attachment_created(sender, instance, created, **kwargs):
+        if created:
+            blob_store.add_ref(instance.blob_id)
+
+    def _attachment_deleted(sender, instance, **kwargs):
+        blob_store.release(instance.blob_id)
+
+    for app_label, model_name in blob_store.REFERRERS:
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            continue
+        uid = f"blob_ref_{model_name.lower()}"
+        post_save.connect(_attachment_created, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_attachment_deleted, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
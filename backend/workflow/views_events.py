@@ -0,0 +1,111 @@
+# workflow/views_events.py
+"""
+GET /api/v1/events/stream — Server-Sent Events cho SPA (thay cho polling dashboard/nhắc việc).
+
+- Chạy async dưới ASGI (config/asgi.py); mọi client của một worker dùng chung một subscription Redis
+  (workflow.services.event_hub). Worker WSGI (gunicorn sync) sẽ bị một stream vô hạn chiếm trọn →
+  request không qua ASGI nhận 503 SSE_REQUIRES_ASGI; muốn bật SSE cần chạy config.asgi:application
+  (vd. `gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker`).
+- Xác thực JWT qua header Authorization: Bearer … hoặc ?token=… (EventSource không gửi được header).
+- ?events=doc_in,case.assigned để chỉ nhận một số loại sự kiện.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+
+from workflow.services.event_hub import Principal, hub
+from workflow.services.events import _dumps
+
+
+def _raw_token(request) -> Optional[str]:
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip() or None
+    return request.GET.get("token") or None
+
+
+def _principal_for(raw_token: str) -> Optional[Principal]:
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    from workflow.services import rbac
+
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if not user or not getattr(user, "is_active", False):
+        return None
+    user_id = getattr(user, "user_id", None) or user.pk
+    department_id = getattr(user, "department_id", None)
+    return Principal(
+        user_id=str(user_id),
+        department_id=str(department_id) if department_id is not None else None,
+        roles=frozenset(rbac.get_permission_snapshot(user).role_names),
+    )
+
+
+def _frame(envelope: dict) -> str:
+    lines = []
+    if envelope.get("ts") is not None:
+        lines.append(f"id: {envelope['ts']}")
+    if envelope.get("event"):
+        lines.append(f"event: {envelope['event']}")
+    lines.append(f"data: {_dumps(envelope)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class _EventStream:
+    """
+    Nội dung streaming của một client. Django gọi close() khi kết thúc response (kể cả client ngắt
+    kết nối) → rời hub ngay, không đợi generator bị thu gom.
+    """
+
+    def __init__(self, sub):
+        self.sub = sub
+
+    async def __aiter__(self):
+        heartbeat = float(getattr(settings, "EVENTS_SSE_HEARTBEAT", 15))
+        try:
+            # retry: thời gian EventSource chờ trước khi tự kết nối lại
+            yield f"retry: {int(getattr(settings, 'EVENTS_SSE_RETRY_MS', 5000))}\n: connected\n\n"
+            while True:
+                try:
+                    envelope = await asyncio.wait_for(self.sub.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # giữ kết nối qua proxy, phát hiện client đã rời
+                    continue
+                yield _frame(envelope)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        hub.unsubscribe(self.sub)
+
+
+async def event_stream(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Luồng sự kiện chỉ phục vụ qua ASGI.", "code": "SSE_REQUIRES_ASGI"}, status=503
+        )
+
+    raw = _raw_token(request)
+    principal = await sync_to_async(_principal_for)(raw) if raw else None
+    if principal is None:
+        return JsonResponse({"detail": "Bạn cần đăng nhập để tiếp tục.", "code": "UNAUTHORIZED"}, status=401)
+
+    topics = [t.strip() for t in request.GET.get("events", "").split(",") if t.strip()]
+    sub = hub.subscribe(principal, topics)
+    response = StreamingHttpResponse(_EventStream(sub), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: không buffer SSE
+    return response